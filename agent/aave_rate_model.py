@@ -0,0 +1,204 @@
+"""
+Local Aave V3 interest-rate model.
+
+Supplying to a reserve lowers its utilization and therefore the supply rate
+everyone earns, including us. This module loads each reserve's interest-rate
+strategy parameters once (they only change through governance), keeps the
+reserve's supply/debt totals from the latest snapshot, and evaluates the
+post-deposit supply APY for any number of candidate deposit sizes with numpy,
+without further RPC calls.
+
+Rates are returned in percent with the same convention as get_current_apy
+(liquidity rate in RAY * 100 / RAY).
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+from web3 import Web3
+
+from rpc_batch import BatchRpcClient, RpcBatchError
+
+logger = logging.getLogger(__name__)
+
+RAY = 10 ** 27
+
+
+def _selector(signature: str) -> str:
+    return Web3.to_hex(Web3.keccak(text=signature)[:4])
+
+
+class AaveRateModel:
+    """
+    Cached interest-rate strategy parameters and reserve totals per asset.
+    """
+
+    # DefaultReserveInterestRateStrategyV2 (Aave 3.1+): one contract for all reserves
+    GET_INTEREST_RATE_DATA = _selector("getInterestRateData(address)")
+    # DefaultReserveInterestRateStrategy (3.0): one contract per reserve, RAY getters
+    V1_GETTERS = [
+        _selector("OPTIMAL_USAGE_RATIO()"),
+        _selector("getBaseVariableBorrowRate()"),
+        _selector("getVariableRateSlope1()"),
+        _selector("getVariableRateSlope2()"),
+    ]
+    TOTAL_SUPPLY = _selector("totalSupply()")
+
+    def __init__(self, rpc: BatchRpcClient):
+        """
+        Args:
+            rpc: Batched JSON-RPC client
+        """
+        self.rpc = rpc
+        self._lock = threading.Lock()
+        # strategy address -> reserve address -> params (RAY ints); loaded once
+        self._strategies: Dict[str, Dict[str, Dict[str, int]]] = {}
+        # asset -> reserve state from the latest snapshot
+        self._reserves: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _words(result: str) -> list:
+        raw = bytes.fromhex(result[2:])
+        return [int.from_bytes(raw[i:i + 32], "big") for i in range(0, len(raw), 32)]
+
+    def _load_strategy(self, strategy: str, reserve: str) -> Optional[Dict[str, int]]:
+        """Fetch strategy parameters (V2 getInterestRateData, else V1 getters) in one batch."""
+        padded = reserve.lower()[2:].rjust(64, "0")
+        calls = [("eth_call", [{"to": strategy, "data": self.GET_INTEREST_RATE_DATA + padded}, "latest"])]
+        calls += [("eth_call", [{"to": strategy, "data": sel}, "latest"]) for sel in self.V1_GETTERS]
+        replies = self.rpc.batch(calls)
+
+        v2 = replies[0]
+        if "error" not in v2 and len(v2.get("result") or "0x") >= 2 + 64 * 4:
+            words = self._words(v2["result"])[:4]
+        elif all("error" not in r and r.get("result", "0x") != "0x" for r in replies[1:]):
+            words = [self._words(r["result"])[0] for r in replies[1:]]
+        else:
+            logger.warning("Could not read interest-rate strategy %s for reserve %s", strategy, reserve)
+            return None
+        optimal, base, slope1, slope2 = words
+        return {
+            "optimal_usage_ratio": optimal,
+            "base_variable_borrow_rate": base,
+            "variable_rate_slope1": slope1,
+            "variable_rate_slope2": slope2,
+        }
+
+    def update_reserve(self, asset: str, reserve_address: str, reserve_data: Sequence[Any], decimals: int):
+        """
+        Record a reserve's getReserveData() result from the market snapshot.
+
+        Strategy parameters are loaded the first time a strategy/reserve pair is seen.
+
+        Args:
+            asset: Asset symbol
+            reserve_address: Underlying token address
+            reserve_data: Tuple returned by Pool.getReserveData
+            decimals: Underlying token decimals
+        """
+        configuration = int(reserve_data[0])
+        strategy = Web3.to_checksum_address(reserve_data[11])
+        reserve = Web3.to_checksum_address(reserve_address)
+        with self._lock:
+            known = reserve in self._strategies.get(strategy, {})
+        if not known:
+            try:
+                params = self._load_strategy(strategy, reserve)
+            except RpcBatchError as e:
+                logger.warning("Interest-rate strategy load failed for %s: %s", asset, e)
+                params = None
+            if params:
+                with self._lock:
+                    self._strategies.setdefault(strategy, {})[reserve] = params
+                logger.info("Loaded %s rate strategy: %s", asset, params)
+
+        with self._lock:
+            previous = self._reserves.get(asset, {})
+            self._reserves[asset] = {
+                "reserve": reserve,
+                "strategy": strategy,
+                "decimals": decimals,
+                "liquidity_rate": int(reserve_data[2]),
+                # ReserveConfiguration bits 64-79: reserve factor in bps
+                "reserve_factor": ((configuration >> 64) & 0xFFFF) / 10_000,
+                "a_token": Web3.to_checksum_address(reserve_data[8]),
+                "variable_debt_token": Web3.to_checksum_address(reserve_data[10]),
+                "total_supply": previous.get("total_supply"),
+                "total_debt": previous.get("total_debt"),
+            }
+
+    def refresh_totals(self):
+        """Fetch aToken and variable-debt totalSupply for every known reserve in one batch."""
+        with self._lock:
+            assets = list(self._reserves.items())
+        if not assets:
+            return
+        calls = []
+        for _, state in assets:
+            calls.append(("eth_call", [{"to": state["a_token"], "data": self.TOTAL_SUPPLY}, "latest"]))
+            calls.append(("eth_call", [{"to": state["variable_debt_token"], "data": self.TOTAL_SUPPLY}, "latest"]))
+        try:
+            replies = self.rpc.batch(calls)
+        except RpcBatchError as e:
+            logger.warning("Reserve totals refresh failed: %s", e)
+            return
+        with self._lock:
+            for i, (asset, _) in enumerate(assets):
+                supply, debt = replies[2 * i], replies[2 * i + 1]
+                if "error" in supply or "error" in debt:
+                    continue
+                self._reserves[asset]["total_supply"] = int(supply["result"], 16)
+                self._reserves[asset]["total_debt"] = int(debt["result"], 16)
+
+    @staticmethod
+    def _liquidity_rate(utilization: np.ndarray, params: Dict[str, int], reserve_factor: float) -> np.ndarray:
+        """Supply rate (RAY-scaled floats) for an array of utilizations."""
+        optimal = max(params["optimal_usage_ratio"] / RAY, 1e-9)
+        base = params["base_variable_borrow_rate"] / RAY
+        slope1 = params["variable_rate_slope1"] / RAY
+        slope2 = params["variable_rate_slope2"] / RAY
+        below = base + slope1 * utilization / optimal
+        above = base + slope1 + slope2 * (utilization - optimal) / max(1 - optimal, 1e-9)
+        borrow_rate = np.where(utilization <= optimal, below, above)
+        return borrow_rate * utilization * (1 - reserve_factor)
+
+    def supply_apy(self, asset: str, deposit_amounts: Sequence[float]) -> Optional[np.ndarray]:
+        """
+        Supply APY (%) after depositing each of the given amounts.
+
+        The model is calibrated so a zero deposit reproduces the on-chain
+        currentLiquidityRate (absorbing unbacked/treasury effects the simple
+        model ignores).
+
+        Args:
+            asset: Asset symbol
+            deposit_amounts: Candidate deposit sizes in token units
+
+        Returns:
+            Array of APYs in percent, or None if the reserve or its strategy is unknown
+        """
+        with self._lock:
+            state = dict(self._reserves.get(asset) or {})
+            params = self._strategies.get(state.get("strategy"), {}).get(state.get("reserve"))
+        if not state or not params or not state.get("total_supply"):
+            return None
+
+        scale = 10 ** state["decimals"]
+        supply = state["total_supply"] / scale
+        debt = state["total_debt"] / scale
+        amounts = np.asarray(deposit_amounts, dtype=float)
+        utilization = np.clip(debt / (supply + np.concatenate(([0.0], amounts))), 0.0, 1.0)
+        rates = self._liquidity_rate(utilization, params, state["reserve_factor"])
+
+        onchain = state["liquidity_rate"] / RAY
+        calibration = onchain / rates[0] if rates[0] > 0 else 1.0
+        return rates[1:] * calibration * 100
+
+    def impact_table(self, asset: str, deposit_amounts: Sequence[float]) -> Optional[Dict[str, float]]:
+        """Post-deposit APY keyed by deposit size, for the market snapshot."""
+        apys = self.supply_apy(asset, deposit_amounts)
+        if apys is None:
+            return None
+        return {f"{amount:.2f}": float(apy) for amount, apy in zip(deposit_amounts, apys)}
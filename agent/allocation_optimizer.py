@@ -0,0 +1,276 @@
+"""
+Deterministic allocation optimizer.
+
+Maximizes expected net yield over a horizon across the supported assets,
+subject to the risk profile: a concentration cap per asset and a volatility
+penalty on APY. Swap costs (LI.FI quotes) and deposit/swap gas are charged
+against the allocation, and each reserve's post-deposit APY comes from the
+local Aave rate model, so pushing more into one reserve has diminishing
+returns.
+
+The treasury is split into equal chunks. Every chunk's marginal net value is
+computed per asset with numpy; since marginal values are non-increasing in the
+amount already allocated, taking the best chunks across assets (water-filling)
+is optimal for the variable part of the objective. Fixed per-asset costs (the
+deposit and swap transactions) are then handled by dropping assets whose
+yield doesn't pay for them and re-solving. A solve takes a few milliseconds.
+
+Stablecoins are valued 1:1 in USD, as elsewhere in the agent.
+"""
+
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# (asset, amounts in token units) -> post-deposit supply APY (%) per amount, or None
+SupplyApyFn = Callable[[str, Sequence[float]], Optional[np.ndarray]]
+# (from, to, amount_usd) -> swap cost in bps (fees + price impact), or None if unknown
+SwapCostFn = Callable[[str, str, float], Optional[float]]
+# (action, asset) -> USD gas cost; asset is "FROM->TO" for swaps
+GasCostFn = Callable[[str, Optional[str]], float]
+
+
+class AllocationOptimizer:
+    """
+    Water-filling optimizer for a multi-asset Aave allocation.
+    """
+
+    # max_share: concentration cap per asset; volatility_penalty: APY points
+    # deducted per point of APY standard deviation
+    RISK_PROFILES = {
+        "conservative": {"max_share": 0.5, "volatility_penalty": 1.0},
+        "moderate": {"max_share": 0.75, "volatility_penalty": 0.5},
+        "aggressive": {"max_share": 1.0, "volatility_penalty": 0.1},
+    }
+
+    def __init__(
+        self,
+        risk_tolerance: str = "moderate",
+        horizon_days: float = 30.0,
+        chunks: int = 200,
+        default_swap_bps: float = 10.0,
+        supply_apy: Optional[SupplyApyFn] = None,
+        swap_cost_bps: Optional[SwapCostFn] = None,
+        gas_cost_usd: Optional[GasCostFn] = None,
+    ):
+        """
+        Args:
+            risk_tolerance: "conservative", "moderate", or "aggressive"
+            horizon_days: Period over which yield must repay one-time costs
+            chunks: Number of equal slices the treasury is split into
+            default_swap_bps: Swap cost assumed when no quote is available
+            supply_apy: Post-deposit APY model; flat current APY if None or unknown
+            swap_cost_bps: Swap cost lookup; default_swap_bps if None or unknown
+            gas_cost_usd: Gas cost lookup for an action; gas ignored if None
+        """
+        profile = self.RISK_PROFILES.get(risk_tolerance, self.RISK_PROFILES["moderate"])
+        self.risk_tolerance = risk_tolerance
+        self.max_share = profile["max_share"]
+        self.volatility_penalty = profile["volatility_penalty"]
+        self.horizon_days = horizon_days
+        self.chunks = chunks
+        self.default_swap_bps = default_swap_bps
+        self.supply_apy = supply_apy
+        self.swap_cost_bps = swap_cost_bps
+        self.gas_cost_usd = gas_cost_usd
+
+    def _gas(self, action: str, asset: Optional[str]) -> float:
+        return self.gas_cost_usd(action, asset) if self.gas_cost_usd else 0.0
+
+    def _apy_curve(self, asset: str, apy: float, amounts: np.ndarray) -> np.ndarray:
+        """Supply APY (%) at each cumulative deposit amount."""
+        if self.supply_apy is not None:
+            try:
+                curve = self.supply_apy(asset, amounts)
+            except Exception as e:
+                logger.debug("Post-deposit APY model failed for %s: %s", asset, e)
+                curve = None
+            if curve is not None:
+                return np.asarray(curve, dtype=float)
+        return np.full(len(amounts), apy, dtype=float)
+
+    def _inbound_swap(self, asset: str, balances: Dict[str, float], amount_usd: float):
+        """Cheapest source asset to swap into `asset` and its cost in bps."""
+        best = (None, self.default_swap_bps)
+        sources = [a for a, v in balances.items() if a != asset and v > 0]
+        costs = []
+        for source in sources:
+            bps = self.swap_cost_bps(source, asset, amount_usd) if self.swap_cost_bps else None
+            costs.append((source, self.default_swap_bps if bps is None else max(bps, 0.0)))
+        if costs:
+            best = min(costs, key=lambda c: c[1])
+        return best
+
+    def _fixed_cost(self, asset: str, amount: float, balances: Dict[str, float], swap_source: Optional[str]) -> float:
+        """Gas for depositing `asset`, plus one swap leg if it needs more than the treasury holds."""
+        cost = self._gas("depositERC20", asset)
+        if amount > balances.get(asset, 0.0) + 1e-9 and swap_source:
+            cost += self._gas("lifi_swap", f"{swap_source}->{asset}")
+        return cost
+
+    def evaluate(
+        self,
+        allocation: Dict[str, float],
+        balances: Dict[str, float],
+        apys: Dict[str, float],
+        volatility: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Expected results of an allocation over the horizon.
+
+        Args:
+            allocation: Asset -> percentage of total treasury value
+            balances: Asset -> current treasury balance (USD)
+            apys: Asset -> current supply APY (%)
+            volatility: Asset -> APY standard deviation (percentage points)
+
+        Returns:
+            Dict with gross yield, risk-adjusted yield, swap and gas costs and
+            net (risk-adjusted yield minus costs), all in USD over the horizon
+        """
+        volatility = volatility or {}
+        total = sum(v for v in balances.values() if v > 0)
+        years = self.horizon_days / 365
+        gross = adjusted = swap_cost = gas_cost = 0.0
+        for asset, pct in allocation.items():
+            if asset not in apys or not isinstance(pct, (int, float)) or pct <= 0:
+                continue
+            amount = total * pct / 100
+            apy = float(self._apy_curve(asset, apys[asset], np.array([amount]))[0])
+            gross += amount * apy / 100 * years
+            adjusted += amount * (apy - self.volatility_penalty * volatility.get(asset, 0.0)) / 100 * years
+            inbound = max(amount - balances.get(asset, 0.0), 0.0)
+            source, bps = self._inbound_swap(asset, balances, inbound)
+            swap_cost += inbound * bps / 10_000
+            gas_cost += self._fixed_cost(asset, amount, balances, source)
+        return {
+            "gross_yield_usd": float(gross),
+            "risk_adjusted_yield_usd": float(adjusted),
+            "swap_cost_usd": float(swap_cost),
+            "gas_cost_usd": float(gas_cost),
+            "net_usd": float(adjusted - swap_cost - gas_cost),
+        }
+
+    def optimize(
+        self,
+        balances: Dict[str, float],
+        apys: Dict[str, float],
+        volatility: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Best allocation for the current treasury.
+
+        Args:
+            balances: Asset -> current treasury balance (USD)
+            apys: Asset -> current supply APY (%)
+            volatility: Asset -> APY standard deviation (percentage points)
+
+        Returns:
+            Dict with allocation (asset -> percent, summing to <= 100), the
+            evaluate() breakdown, assets excluded for not covering their fixed
+            costs, and solve time in ms
+        """
+        started = time.perf_counter()
+        volatility = volatility or {}
+        total = sum(v for v in balances.values() if v > 0)
+        assets = [a for a in apys if apys[a] is not None]
+        if total <= 0 or not assets:
+            return {"allocation": {}, "expected": self.evaluate({}, balances, apys, volatility),
+                    "excluded": {}, "solve_ms": (time.perf_counter() - started) * 1000}
+
+        chunk = total / self.chunks
+        levels = chunk * np.arange(1, self.chunks + 1)
+        cap_chunks = int(np.floor(self.max_share * self.chunks + 1e-9))
+        years = self.horizon_days / 365
+
+        # Marginal net value of each asset's k-th chunk
+        marginals = {}
+        for asset in assets:
+            apy = self._apy_curve(asset, apys[asset], levels)
+            risk_apy = apy - self.volatility_penalty * volatility.get(asset, 0.0)
+            cumulative = levels * risk_apy / 100 * years
+            marginal = np.diff(cumulative, prepend=0.0)
+            # Chunks beyond what the treasury already holds must be swapped in
+            _, bps = self._inbound_swap(asset, balances, max(total - balances.get(asset, 0.0), 0.0))
+            needs_swap = levels > balances.get(asset, 0.0) + 1e-9
+            marginal = marginal - needs_swap * chunk * bps / 10_000
+            # Guard against small non-concavities in the rate curve
+            marginals[asset] = np.minimum.accumulate(marginal[:cap_chunks])
+
+        excluded: Dict[str, str] = {}
+        allocation: Dict[str, float] = {}
+        while True:
+            active = [a for a in assets if a not in excluded]
+            if not active:
+                allocation = {}
+                break
+            values = np.concatenate([marginals[a] for a in active])
+            owners = np.repeat(np.arange(len(active)), [len(marginals[a]) for a in active])
+            # Top chunks with positive value; concavity makes each asset's pick a prefix
+            order = np.argsort(-values, kind="stable")[:self.chunks]
+            picked = order[values[order] > 0]
+            counts = np.bincount(owners[picked], minlength=len(active))
+            allocation = {a: float(counts[i] * 100 / self.chunks) for i, a in enumerate(active) if counts[i] > 0}
+
+            # Drop the worst asset whose variable yield doesn't repay its fixed costs
+            shortfalls = {}
+            for i, asset in enumerate(active):
+                if not counts[i]:
+                    continue
+                amount = counts[i] * chunk
+                source, _ = self._inbound_swap(asset, balances, amount)
+                fixed = self._fixed_cost(asset, amount, balances, source)
+                variable = float(marginals[asset][:counts[i]].sum())
+                if variable <= fixed:
+                    shortfalls[asset] = (fixed - variable, variable, fixed)
+            if not shortfalls:
+                break
+            worst = max(shortfalls, key=lambda a: shortfalls[a][0])
+            _, variable, fixed = shortfalls[worst]
+            excluded[worst] = f"yield ${variable:.4f} does not cover fixed costs ${fixed:.4f}"
+
+        result = {
+            "allocation": allocation,
+            "expected": self.evaluate(allocation, balances, apys, volatility),
+            "excluded": excluded,
+            "solve_ms": (time.perf_counter() - started) * 1000,
+        }
+        logger.info("Optimizer allocation %s (net $%.4f over %gd, %.1f ms)",
+                    allocation, result['expected']['net_usd'], self.horizon_days, result['solve_ms'])
+        return result
+
+    def clip(self, allocation: Dict[str, Any], apys: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Bring an externally proposed allocation (e.g. the LLM's) within constraints.
+
+        Unknown assets and non-numeric or negative entries are dropped, each
+        asset is capped at the risk profile's concentration limit, and the
+        total is scaled down to 100% if it exceeds it.
+
+        Returns:
+            Dict with the clipped allocation and a list of adjustments made
+        """
+        adjustments = []
+        clipped: Dict[str, float] = {}
+        cap = self.max_share * 100
+        for asset, pct in (allocation or {}).items():
+            if asset not in apys:
+                adjustments.append(f"dropped unsupported asset {asset}")
+                continue
+            if isinstance(pct, bool) or not isinstance(pct, (int, float)) or pct < 0:
+                adjustments.append(f"dropped invalid {asset} allocation {pct!r}")
+                continue
+            if pct > cap:
+                adjustments.append(f"capped {asset} at {cap:g}% (was {pct:g}%)")
+                pct = cap
+            if pct > 0:
+                clipped[asset] = float(pct)
+        total = sum(clipped.values())
+        if total > 100:
+            adjustments.append(f"scaled allocation from {total:g}% to 100%")
+            clipped = {a: pct * 100 / total for a, pct in clipped.items()}
+        return {"allocation": clipped, "adjustments": adjustments}
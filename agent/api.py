@@ -6,6 +6,8 @@ When a request is made, it performs a full analysis and returns the complete out
 """
 
 import os
+import secrets
+import threading
 import time
 import logging
 from datetime import datetime
@@ -15,19 +17,45 @@ import requests
 import json
 from dotenv import load_dotenv
 from openai import OpenAI
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 
+from aave_rate_model import AaveRateModel
+from allocation_optimizer import AllocationOptimizer
+from cassette import Cassette
+from fee_oracle import FeeOracle
+from gas_model import GasUsageModel
+from log_config import configure_logging
+from metrics import (
+    DECISIONS,
+    DEPENDENCY_SECONDS,
+    install_session_hooks as install_metrics_hooks,
+    on_transaction_finalized,
+    on_transaction_submitted,
+    record_llm_usage,
+    render as render_metrics,
+    timed,
+)
+from monte_carlo import ReturnSimulator, daily_apy_volatility
+from price_feed import EthPriceFeed
+from profiler import MEMORY_PROFILER, PROFILER
+from quote_service import LifiQuoteService
+from rebalance_planner import RebalancePlanner
+from receipt_balances import apply_transfers
+from reserve_watcher import ReserveWatcher
+from rpc_batch import BatchRpcClient, RpcBatchError
+from supply_scheduler import SupplyScheduler
+from tracing import TRACER, current_span, current_trace_id, start_span
+from tracing import install_session_hooks as install_trace_hooks
+from tx_tracker import PendingTransactionTracker
+from yield_tracker import YieldTracker
+
 # Load environment variables from .env file
 load_dotenv()
 
-# Configure logging (no .log file; only console and JSON output)
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler()]
-)
+# Configure logging (no .log file; console via a background writer, see log_config.py)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
@@ -84,6 +112,41 @@ class LLMAaveYieldAgent:
         {"inputs": [{"internalType": "uint256", "name": "amount", "type": "uint256"}], "name": "supplyToAave", "outputs": [], "stateMutability": "nonpayable", "type": "function"},
     ]
     
+    # YieldOrchestrator ABI (simplified for depositERC20)
+    ORCHESTRATOR_ABI = [
+        {
+            "inputs": [
+                {"name": "from", "type": "address"},
+                {"name": "inputAsset", "type": "address"},
+                {"name": "amountIn", "type": "uint256"},
+                {"name": "targetAsset", "type": "address"},
+                {"name": "minAmountOut", "type": "uint256"},
+                {"name": "receiver", "type": "address"}
+            ],
+            "name": "depositERC20",
+            "outputs": [{"name": "sharesOut", "type": "uint256"}],
+            "stateMutability": "nonpayable",
+            "type": "function"
+        },
+        {
+            "inputs": [
+                {"name": "vault", "type": "address"},
+                {"name": "amount", "type": "uint256"}
+            ],
+            "name": "supplyVaultToAave",
+            "outputs": [],
+            "stateMutability": "nonpayable",
+            "type": "function"
+        },
+        {
+            "inputs": [{"name": "data", "type": "bytes[]"}],
+            "name": "multicall",
+            "outputs": [{"name": "results", "type": "bytes[]"}],
+            "stateMutability": "nonpayable",
+            "type": "function"
+        }
+    ]
+    
     # Aave V3 Pool ABI (simplified)
     POOL_ABI = [
         {
@@ -129,6 +192,8 @@ class LLMAaveYieldAgent:
         }
     ]
     
+    DECISION_BACKENDS = ("llm", "optimizer", "llm_validated")
+
     def __init__(
         self,
         rpc_url: str,
@@ -138,6 +203,7 @@ class LLMAaveYieldAgent:
         risk_tolerance: str = "moderate",
         supply_to_aave_percent: int = 5,
         operator_private_key: Optional[str] = None,
+        supply_after_deposit: bool = False,
     ):
         """
         Initialize the LLM-powered Aave yield agent.
@@ -150,19 +216,27 @@ class LLMAaveYieldAgent:
             risk_tolerance: "conservative", "moderate", or "aggressive"
             supply_to_aave_percent: When decision is DEPOSIT, percent of vault idle to supply to Aave (0-100).
             operator_private_key: Optional. If set, agent will call vault.supplyToAave(amount) when decision is DEPOSIT. Must have OPERATOR_ROLE on vault.
+            supply_after_deposit: Supply vault idle to Aave (standalone or in the batched deposit) after
+                DEPOSIT decisions, subject to the supply scheduler. Off by default.
         """
-        # Web3 setup
-        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+        # Web3 setup (one pooled HTTP session shared by web3 and the batched RPC client)
+        self.http = requests.Session()
+        # CASSETTE_MODE=record|replay captures or serves every HTTP exchange (RPC, APIs, LLM) from a file
+        self.cassette = Cassette.from_env()
+        self.cassette.install(self.http)
+        self.w3 = Web3(Web3.HTTPProvider(rpc_url, session=self.http))
+        self.rpc = BatchRpcClient(rpc_url, session=self.http)
         self.treasury_address = Web3.to_checksum_address(treasury_address)
         self.risk_tolerance = risk_tolerance
         self.supply_to_aave_percent = max(0, min(100, supply_to_aave_percent))
+        self.supply_after_deposit = supply_after_deposit
         self.operator_private_key = operator_private_key.strip() if operator_private_key else None
         # Load vault address from .env (dotenv already loaded at module level)
         vault_addr = os.getenv("YIELD_VAULT_ADDRESS", "").strip()
         self.vault_address = Web3.to_checksum_address(vault_addr) if vault_addr else None
         
         # OpenAI setup
-        self.client = OpenAI(api_key=openai_api_key)
+        self.client = OpenAI(api_key=openai_api_key, http_client=self.cassette.httpx_client())
         self.model = model
         
         # Initialize contracts
@@ -179,6 +253,124 @@ class LLMAaveYieldAgent:
         self.decision_history = []
         self.apy_history_file = "apy_history.json"
         self.apy_history = self._load_apy_history()
+
+        # Interest-rate strategy params (loaded once) for post-deposit APY estimates
+        self.rate_model = AaveRateModel(self.rpc)
+        # liquidityIndex samples per snapshot -> realized yield over any window
+        self.yield_tracker = YieldTracker(os.getenv("YIELD_SAMPLES_FILE", "yield_samples.jsonl"))
+        self._liquidity_indexes: Dict[str, int] = {}
+
+        # EIP-1559 fees from cached eth_feeHistory, gas limits from eth_estimateGas + margin
+        self.fee_oracle = FeeOracle(self.rpc)
+        self.tx_urgency = os.getenv("TX_URGENCY", "standard").lower()
+        # Bundle a rebalance's deposits into one orchestrator multicall (needs the multicall-enabled orchestrator)
+        self.batch_deposits = os.getenv("BATCH_DEPOSITS", "false").lower() == "true"
+        self._chain_id: Optional[int] = None
+
+        # gasUsed percentiles learned from receipts, per action type and asset
+        self.gas_model = GasUsageModel(os.getenv("GAS_USAGE_FILE", "gas_usage_history.json"))
+        self._gas_unit_cost_usd = 0.0  # USD per gas unit, refreshed by estimate_gas_cost()
+        self.supply_scheduler = SupplyScheduler(
+            os.getenv("SUPPLY_SCHEDULER_FILE", "supply_scheduler_state.json"),
+            max_breakeven_days=float(os.getenv("SUPPLY_MAX_BREAKEVEN_DAYS", "3")),
+            min_supply_usd=float(os.getenv("SUPPLY_MIN_USD", "1.0")),
+        )
+        self.rebalance_planner = RebalancePlanner(
+            min_leg_usd=float(os.getenv("REBALANCE_MIN_LEG_USD", "1.0")),
+            min_leg_gas_multiple=float(os.getenv("REBALANCE_MIN_LEG_GAS_MULTIPLE", "20")),
+            gas_cost_usd=self.action_gas_cost_usd,
+        )
+
+        # Decision backend: "llm" (GPT decides), "optimizer" (deterministic water-filling),
+        # or "llm_validated" (GPT decides, allocation clipped and checked by the optimizer)
+        self.decision_backend = os.getenv("DECISION_BACKEND", "llm").lower()
+        if self.decision_backend not in self.DECISION_BACKENDS:
+            logger.warning("Unknown DECISION_BACKEND '%s', using 'llm'", self.decision_backend)
+            self.decision_backend = "llm"
+        self.optimizer = AllocationOptimizer(
+            risk_tolerance,
+            horizon_days=float(os.getenv("OPTIMIZER_HORIZON_DAYS", "30")),
+            default_swap_bps=float(os.getenv("OPTIMIZER_DEFAULT_SWAP_BPS", "10")),
+            supply_apy=self.rate_model.supply_apy,
+            swap_cost_bps=self._swap_cost_bps,
+            gas_cost_usd=self.action_gas_cost_usd,
+        )
+        # Monte Carlo bands for projected returns, attached to every decision
+        self.return_simulator = ReturnSimulator(
+            n_paths=int(os.getenv("MC_PATHS", "2000")),
+            mean_reversion=float(os.getenv("MC_MEAN_REVERSION", "0.05")),
+            correlation=float(os.getenv("MC_CORRELATION", "0.6")),
+        )
+        self.mc_default_daily_volatility = float(os.getenv("MC_DEFAULT_DAILY_VOLATILITY", "0.1"))
+        # llm_validated: replace the LLM allocation when it falls this far short of the optimizer's net yield
+        self.optimizer_override_shortfall = float(os.getenv("OPTIMIZER_OVERRIDE_SHORTFALL_PCT", "25")) / 100
+
+        # External API base URLs (overridable for local stand-ins; the OpenAI SDK reads OPENAI_BASE_URL itself)
+        self.defillama_url = os.getenv("DEFILLAMA_API_URL", "https://yields.llama.fi").rstrip("/")
+        coingecko_url = os.getenv("COINGECKO_API_URL", "").strip().rstrip("/")
+
+        # ETH/USD cached and refreshed in the background (Chainlink on Base, CoinGecko fallback)
+        self.price_feed = EthPriceFeed(
+            self.rpc,
+            session=self.http,
+            sources=[s.strip() for s in os.getenv("ETH_PRICE_SOURCES", "chainlink,coingecko").split(",") if s.strip()],
+            chainlink_feed=os.getenv("CHAINLINK_ETH_USD_FEED", "").strip() or None,
+            coingecko_url=f"{coingecko_url}/simple/price" if coingecko_url else None,
+            ttl=float(os.getenv("ETH_PRICE_TTL", "1800")),
+            refresh_interval=float(os.getenv("ETH_PRICE_REFRESH_INTERVAL", "60")),
+        )
+        self.eth_price_fallback_usd = float(os.getenv("ETH_PRICE_FALLBACK_USD", "3000"))
+
+        # LI.FI quotes for every pair at standard sizes, refreshed in the background
+        from eth_account import Account
+        swap_sender = Account.from_key(self.operator_private_key).address if self.operator_private_key else self.treasury_address
+        self.quote_service = LifiQuoteService(
+            self.SUPPORTED_ASSETS,
+            from_address=swap_sender,
+            to_address=self.treasury_address,
+            session=self.http,
+            base_url=os.getenv("LIFI_API_URL", "").strip() or None,
+            api_key=os.getenv("LIFI_API_KEY", "").strip() or None,
+            notional_sizes_usd=[float(x) for x in os.getenv("LIFI_QUOTE_SIZES_USD", "100,1000,10000").split(",") if x.strip()],
+            ttl=float(os.getenv("LIFI_QUOTE_TTL", "120")),
+            refresh_interval=float(os.getenv("LIFI_QUOTE_REFRESH_INTERVAL", "300")),
+        )
+
+        # Submitted transactions are tracked in the background instead of blocking on receipts
+        self.tx_tracker = PendingTransactionTracker(
+            self.rpc,
+            storage_file=os.getenv("PENDING_TX_FILE", "pending_transactions.json"),
+            poll_interval=float(os.getenv("TX_POLL_INTERVAL", "2")),
+            drop_after=float(os.getenv("TX_DROP_AFTER", "900")),
+        )
+        self.tx_tracker.add_listener(self.gas_model.on_transaction_finalized)
+        self.tx_tracker.add_listener(on_transaction_finalized)
+
+        # Re-analysis on reserve rate moves and vault deposits (started in get_agent when enabled)
+        self.decision_lock = threading.Lock()
+        self.reserve_watcher = ReserveWatcher(
+            self.rpc,
+            self.AAVE_V3_POOL,
+            {asset: config["address"] for asset, config in self.SUPPORTED_ASSETS.items()},
+            on_trigger=self.run_triggered_analysis,
+            current_rates=self.get_all_asset_apys,
+            vault_address=self.vault_address,
+            rate_threshold=float(os.getenv("REANALYZE_RATE_THRESHOLD", "0.25")),
+            min_deposit=float(os.getenv("REANALYZE_MIN_DEPOSIT", "100")),
+            cooldown=float(os.getenv("REANALYZE_COOLDOWN", "60")),
+            poll_interval=float(os.getenv("RESERVE_WATCH_INTERVAL", "2")),
+            confirmations=int(os.getenv("RESERVE_WATCH_CONFIRMATIONS", "1")),
+        )
+
+        # Per-dependency latency, JSON-RPC call counts and trace spans (OpenAI is instrumented at the call)
+        dependencies = {
+            rpc_url: "rpc",
+            self.defillama_url: "defillama",
+            self.price_feed.coingecko_url: "coingecko",
+            self.quote_service.base_url: "lifi",
+        }
+        install_metrics_hooks(self.http, dependencies)
+        install_trace_hooks(self.http, dependencies)
     
     def _load_apy_history(self) -> List[Dict]:
         """Load APY history from JSON file."""
@@ -187,7 +379,7 @@ class LLMAaveYieldAgent:
                 with open(self.apy_history_file, 'r') as f:
                     return json.load(f)
         except Exception as e:
-            logger.warning(f"Could not load APY history: {e}")
+            logger.warning("Could not load APY history: %s", e)
         return []
 
     def _save_apy_history(self):
@@ -196,7 +388,7 @@ class LLMAaveYieldAgent:
             with open(self.apy_history_file, 'w') as f:
                 json.dump(self.apy_history, f, indent=2)
         except Exception as e:
-            logger.error(f"Could not save APY history: {e}")
+            logger.error("Could not save APY history: %s", e)
 
     def _record_apy(self, apy: float):
         """Record current APY with timestamp."""
@@ -224,7 +416,7 @@ class LLMAaveYieldAgent:
         """
         try:
             if asset not in self.SUPPORTED_ASSETS:
-                logger.error(f"Unsupported asset: {asset}")
+                logger.error("Unsupported asset: %s", asset)
                 return 0.0
             
             asset_address = Web3.to_checksum_address(self.SUPPORTED_ASSETS[asset]["address"])
@@ -232,6 +424,14 @@ class LLMAaveYieldAgent:
                 asset_address
             ).call()
             
+            self._liquidity_indexes[asset] = int(reserve_data[1])
+            try:
+                self.rate_model.update_reserve(
+                    asset, asset_address, reserve_data, self.SUPPORTED_ASSETS[asset]["decimals"]
+                )
+            except Exception as e:
+                logger.warning("Rate model update failed for %s: %s", asset, e)
+            
             liquidity_rate = reserve_data[2]
             RAY = 10 ** 27
             
@@ -243,7 +443,7 @@ class LLMAaveYieldAgent:
             try:
                 liquidity_rate = int(liquidity_rate)
             except (ValueError, TypeError) as e:
-                logger.error(f"Could not convert liquidity_rate to int: {e}")
+                logger.error("Could not convert liquidity_rate to int: %s", e)
                 return 0.0
             
             # Direct conversion matching TypeScript implementation
@@ -251,24 +451,28 @@ class LLMAaveYieldAgent:
             
             # Sanity check
             if apy > 10000:
-                logger.error(f"APY calculation seems incorrect for {asset}. Capping at 1000% for safety.")
+                logger.error("APY calculation seems incorrect for %s. Capping at 1000%% for safety.", asset)
                 apy = 1000.0
             
-            logger.info(f"Current Aave {asset} APY: {apy:.4f}%")
+            logger.info("Current Aave %s APY: %.4f%%", asset, apy)
             return apy
         except Exception as e:
-            logger.error(f"Error fetching Aave APY for {asset}: {e}", exc_info=True)
+            logger.error("Error fetching Aave APY for %s: %s", asset, e, exc_info=True)
             return 0.0
     
+    @timed("asset_apys")
     def get_all_asset_apys(self) -> Dict[str, float]:
         """Get APY for all supported assets."""
         apys = {}
         for asset in self.SUPPORTED_ASSETS.keys():
-            apys[asset] = self.get_current_apy(asset)
+            with start_span("get_current_apy", asset=asset) as span:
+                apys[asset] = self.get_current_apy(asset)
+                span.set_attribute("apy", apys[asset])
         return apys
     
-    def get_treasury_balances(self) -> Dict[str, float]:
-        """Get treasury balances for all supported assets."""
+    @timed("treasury_balances")
+    def get_treasury_balances_raw(self) -> Dict[str, int]:
+        """Get treasury balances for all supported assets in base units."""
         balances = {}
         for asset, config in self.SUPPORTED_ASSETS.items():
             try:
@@ -276,17 +480,119 @@ class LLMAaveYieldAgent:
                     address=Web3.to_checksum_address(config["address"]),
                     abi=self.ERC20_ABI
                 )
-                balance_raw = token_contract.functions.balanceOf(
+                balances[asset] = token_contract.functions.balanceOf(
                     self.treasury_address
                 ).call()
-                balance = balance_raw / (10 ** config["decimals"])
-                balances[asset] = balance
-                logger.info(f"Treasury {asset} Balance: {balance:,.2f}")
             except Exception as e:
-                logger.error(f"Error fetching {asset} balance: {e}")
-                balances[asset] = 0.0
+                logger.error("Error fetching %s balance: %s", asset, e)
+                balances[asset] = 0
         return balances
-    
+
+    def _to_units(self, balances_raw: Dict[str, int]) -> Dict[str, float]:
+        """Convert raw balances to token units using each asset's decimals."""
+        return {
+            asset: raw / (10 ** self.SUPPORTED_ASSETS[asset]["decimals"])
+            for asset, raw in balances_raw.items()
+        }
+
+    def get_treasury_balances(self) -> Dict[str, float]:
+        """Get treasury balances for all supported assets."""
+        balances = self._to_units(self.get_treasury_balances_raw())
+        for asset, balance in balances.items():
+            logger.info("Treasury %s Balance: %.2f", asset, balance)
+        return balances
+
+    @timed("swap_reconciliation")
+    def reconcile_swap_balances(
+        self,
+        balances_raw: Dict[str, int],
+        swap_results: List[Dict[str, Any]],
+        timeout: float = 120.0,
+    ) -> Dict[str, int]:
+        """
+        Derive post-swap treasury balances from the swaps' ERC20 Transfer logs.
+
+        Receipts for all swaps are fetched in one batch; swaps not yet mined are
+        waited on through tx_tracker. If any receipt is missing or reverted the
+        balances are re-read on-chain instead, so deposits are never sized on a guess.
+
+        Args:
+            balances_raw: Treasury balances in base units before the swaps
+            swap_results: Results returned by execute_lifi_swap (successful ones)
+            timeout: Seconds to wait for each unmined swap
+
+        Returns:
+            Asset -> balance in base units after the swaps
+        """
+        tx_hashes = [r["txHash"] for r in swap_results if r.get("txHash")]
+        if not tx_hashes:
+            return dict(balances_raw)
+
+        try:
+            receipts = self.rpc.get_receipts(tx_hashes)
+            for tx_hash in [h for h, receipt in receipts.items() if receipt is None]:
+                if self.tx_tracker.wait_for(tx_hash, timeout):
+                    receipts.update(self.rpc.get_receipts([tx_hash]))
+        except RpcBatchError as e:
+            logger.warning("Could not fetch swap receipts, re-reading balances: %s", e)
+            return self.get_treasury_balances_raw()
+
+        if any(r is None or int(r.get("status", "0x0"), 16) != 1 for r in receipts.values()):
+            logger.warning("Swap receipt missing or reverted, re-reading balances")
+            return self.get_treasury_balances_raw()
+
+        token_symbols = {config["address"].lower(): asset for asset, config in self.SUPPORTED_ASSETS.items()}
+        updated = dict(balances_raw)
+        for tx_hash in tx_hashes:
+            updated = apply_transfers(updated, receipts[tx_hash], self.treasury_address, token_symbols)
+        logger.info("Post-swap balances from Transfer logs: %s", self._to_units(updated))
+        return updated
+
+    def _send_contract_transaction(
+        self,
+        contract,
+        fn_name: str,
+        args: List[Any],
+        metadata: Optional[Dict[str, Any]] = None,
+        urgency: Optional[str] = None,
+    ) -> str:
+        """
+        Build, sign and broadcast a contract call from the operator account.
+
+        Gas limit comes from eth_estimateGas with the fee oracle's margin for fn_name,
+        and fees from the oracle's urgency tier. The tx is registered with tx_tracker.
+
+        Returns:
+            0x-prefixed transaction hash
+        """
+        from eth_account import Account
+
+        account = Account.from_key(self.operator_private_key)
+        if self._chain_id is None:
+            self._chain_id = self.w3.eth.chain_id
+        tx = {
+            "from": account.address,
+            "to": contract.address,
+            "data": contract.encode_abi(fn_name, args=args),
+            "value": 0,
+            "chainId": self._chain_id,
+            # "pending" nonce: earlier txs from this analysis may not be mined yet
+            "nonce": self.w3.eth.get_transaction_count(account.address, "pending"),
+        }
+        tx.update(self.fee_oracle.transaction_fields(fn_name, tx, urgency or self.tx_urgency))
+        if "maxFeePerGas" not in tx:
+            tx["gasPrice"] = self.w3.eth.gas_price
+
+        signed = account.sign_transaction(tx)
+        tx_hash_hex = Web3.to_hex(self.w3.eth.send_raw_transaction(signed.raw_transaction))
+        current_span().set_attributes({"tx.hash": tx_hash_hex, "tx.action": fn_name, "tx.nonce": tx["nonce"],
+                                       "tx.gas_limit": tx.get("gas")})
+        # Receipt is reconciled by the tracker; query /transactions for the final status
+        self.tx_tracker.register(tx_hash_hex, fn_name, metadata)
+        on_transaction_submitted(fn_name)
+        return tx_hash_hex
+
+    @timed("swap")
     def execute_lifi_swap(
         self, 
         from_token: str, 
@@ -306,37 +612,60 @@ class LLMAaveYieldAgent:
         Returns:
             Dict with success status and transaction hash
         """
+        current_span().set_attributes({"swap.from": from_token, "swap.to": to_token, "swap.amount": str(amount)})
         if not self.operator_private_key:
             return {
                 "success": False,
                 "error": "OPERATOR_PRIVATE_KEY not set"
             }
+        if self.cassette.mode == "replay":
+            # lifi_swap.js talks to the network itself; never run a real swap from a replayed analysis
+            return {
+                "success": False,
+                "error": "LI.FI swaps are not executed in cassette replay mode"
+            }
         
         try:
             import subprocess
             import json as json_module
             
+            import tempfile
+            
             # Get script path
             script_path = os.path.join(os.path.dirname(__file__), "lifi_swap.js")
+            args = [
+                "node",
+                script_path,
+                from_token,
+                to_token,
+                str(amount),
+                self.operator_private_key,
+                recipient
+            ]
+            
+            # Hand the script a fresh (usually pre-fetched) quote so it skips route discovery
+            quote = self.quote_service.quote_for_execution(from_token, to_token, amount, recipient)
+            quote_file = None
+            if quote is not None:
+                with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+                    json_module.dump(quote["quote"], f)
+                    quote_file = f.name
+                args.append(quote_file)
             
             # Execute Node.js script
-            result = subprocess.run(
-                [
-                    "node",
-                    script_path,
-                    from_token,
-                    to_token,
-                    str(amount),
-                    self.operator_private_key,
-                    recipient
-                ],
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minute timeout
-            )
+            try:
+                result = subprocess.run(
+                    args,
+                    capture_output=True,
+                    text=True,
+                    timeout=300  # 5 minute timeout
+                )
+            finally:
+                if quote_file:
+                    os.unlink(quote_file)
             
             if result.returncode != 0:
-                logger.error(f"LI.FI swap failed: {result.stderr}")
+                logger.error("LI.FI swap failed: %s", result.stderr)
                 return {
                     "success": False,
                     "error": result.stderr
@@ -348,19 +677,174 @@ class LLMAaveYieldAgent:
             swap_result = json_module.loads(json_output)
             
             if swap_result.get("success"):
-                logger.info(f"LI.FI swap successful: {swap_result.get('txHash')}")
+                logger.info("LI.FI swap successful: %s", swap_result.get('txHash'))
+                if swap_result.get("txHash"):
+                    self.tx_tracker.register(
+                        swap_result["txHash"],
+                        "lifi_swap",
+                        {"from": from_token, "to": to_token, "amount": str(amount)},
+                    )
+                    on_transaction_submitted("lifi_swap")
+                    current_span().set_attribute("tx.hash", swap_result["txHash"])
             else:
-                logger.error(f"LI.FI swap failed: {swap_result.get('error')}")
+                logger.error("LI.FI swap failed: %s", swap_result.get('error'))
             
             return swap_result
             
         except Exception as e:
-            logger.error(f"Error executing LI.FI swap: {e}", exc_info=True)
+            logger.error("Error executing LI.FI swap: %s", e, exc_info=True)
             return {
                 "success": False,
                 "error": str(e)
             }
     
+    def build_deposit_call(self, asset: str, amount: int, receiver: str) -> Dict[str, Any]:
+        """
+        Planned YieldOrchestrator.depositERC20 call (same-asset, no internal swap).
+
+        Returns:
+            Dict with contract, fn_name, args and metadata, shared by simulation and execution
+        """
+        orchestrator = self.w3.eth.contract(
+            address=Web3.to_checksum_address(os.getenv("YIELD_ORCHESTRATOR_ADDRESS", "").strip()),
+            abi=self.ORCHESTRATOR_ABI
+        )
+        asset_addr = Web3.to_checksum_address(self.SUPPORTED_ASSETS[asset]["address"])
+        # For same-asset deposit, inputAsset == targetAsset, minAmountOut == amount
+        return {
+            "contract": orchestrator,
+            "fn_name": "depositERC20",
+            "args": [
+                self.treasury_address,  # from
+                asset_addr,  # inputAsset (same as targetAsset)
+                amount,  # amountIn
+                asset_addr,  # targetAsset (same as inputAsset - no swap)
+                amount,  # minAmountOut (same as amountIn since no swap)
+                Web3.to_checksum_address(receiver)  # receiver
+            ],
+            "metadata": {"asset": asset, "amount": str(amount)},
+        }
+
+    def build_batch_deposit_call(self, deposits: List[Dict[str, Any]], receiver: str,
+                                 supply_amount: int = 0) -> Dict[str, Any]:
+        """
+        One YieldOrchestrator.multicall bundling every depositERC20 of a rebalance,
+        followed by supplyVaultToAave when a supply amount is given.
+
+        Args:
+            deposits: Dicts with asset and amount (base units)
+            receiver: Receiver of the strategy shares
+            supply_amount: Vault idle to supply to Aave in the same transaction
+                (base units, from plan_supply_to_aave); 0 for no supply leg
+
+        Returns:
+            Planned call dict, same shape as build_deposit_call
+        """
+        inner = [self.build_deposit_call(d["asset"], d["amount"], receiver) for d in deposits]
+        orchestrator = inner[0]["contract"]
+        data = [orchestrator.encode_abi(call["fn_name"], args=call["args"]) for call in inner]
+        if supply_amount > 0:
+            data.append(orchestrator.encode_abi("supplyVaultToAave", args=[self.vault_address, supply_amount]))
+        return {
+            "contract": orchestrator,
+            "fn_name": "multicall",
+            "args": [data],
+            "metadata": {
+                "asset": "+".join(d["asset"] for d in deposits),
+                "amounts": {d["asset"]: str(d["amount"]) for d in deposits},
+                "supply_to_aave": str(supply_amount) if supply_amount > 0 else None,
+            },
+        }
+
+    @timed("batch_deposit")
+    def execute_batched_deposit(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Broadcast a planned multicall from build_batch_deposit_call as a single transaction.
+
+        Returns:
+            Dict with success status and transaction hash (receipt reconciled by tx_tracker)
+        """
+        current_span().set_attributes({"asset": call["metadata"]["asset"], "amounts": str(call["metadata"]["amounts"])})
+        try:
+            tx_hash_hex = self._send_contract_transaction(
+                call["contract"],
+                call["fn_name"],
+                call["args"],
+                metadata=call["metadata"],
+            )
+            logger.info("Batched deposit tx sent: %s (%s)", tx_hash_hex, call['metadata']['asset'])
+            return {
+                "success": True,
+                "status": PendingTransactionTracker.STATUS_PENDING,
+                "tx_hash": tx_hash_hex,
+                "amounts": call["metadata"]["amounts"],
+                "supply_to_aave": call["metadata"]["supply_to_aave"],
+            }
+        except Exception as e:
+            logger.error("Error executing batched deposit: %s", e, exc_info=True)
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    @staticmethod
+    def _decode_revert_reason(error: Dict[str, Any]) -> str:
+        """Human-readable revert reason from an eth_call JSON-RPC error."""
+        data = error.get("data")
+        if isinstance(data, dict):  # some nodes nest it as {"data": "0x..."}
+            data = data.get("data")
+        if isinstance(data, str) and data.startswith("0x08c379a0") and len(data) >= 138:
+            # Error(string): selector, offset, length, utf-8 bytes
+            raw = bytes.fromhex(data[10:])
+            length = int.from_bytes(raw[32:64], "big")
+            return raw[64:64 + length].decode("utf-8", errors="replace")
+        if isinstance(data, str) and data.startswith("0x4e487b71") and len(data) >= 74:
+            return f"Panic(0x{int(data[10:74], 16):02x})"
+        if isinstance(data, str) and len(data) >= 10:
+            return f"custom error {data[:10]}"
+        return error.get("message", "execution reverted")
+
+    @timed("simulation")
+    def simulate_calls(self, calls: List[Dict[str, Any]], block_identifier: Any = "latest") -> List[Dict[str, Any]]:
+        """
+        Dry-run planned contract calls from the operator account with one batched eth_call.
+
+        Each call is simulated independently against the same pinned block, so effects
+        of earlier calls in the plan (e.g. spent allowance) are not visible to later ones.
+
+        Args:
+            calls: Planned calls (dicts with contract, fn_name, args, metadata)
+            block_identifier: Block number to pin the simulation to, or a tag
+
+        Returns:
+            One dict per call with action, metadata, success and revert_reason
+        """
+        from eth_account import Account
+
+        if not calls:
+            return []
+        operator = Account.from_key(self.operator_private_key).address
+        block = hex(block_identifier) if isinstance(block_identifier, int) else block_identifier
+        replies = self.rpc.batch([
+            ("eth_call", [{
+                "from": operator,
+                "to": call["contract"].address,
+                "data": call["contract"].encode_abi(call["fn_name"], args=call["args"]),
+            }, block])
+            for call in calls
+        ])
+        results = []
+        for call, reply in zip(calls, replies):
+            reverted = "error" in reply
+            results.append({
+                "action": call["fn_name"],
+                "metadata": call["metadata"],
+                "success": not reverted,
+                "revert_reason": self._decode_revert_reason(reply["error"]) if reverted else None,
+            })
+        return results
+
+    @timed("deposit")
     def execute_orchestrator_deposit(
         self,
         asset: str,
@@ -384,8 +868,10 @@ class LLMAaveYieldAgent:
             receiver: Receiver address
             
         Returns:
-            Dict with success status and transaction hash
+            Dict with success status and transaction hash. success means the tx was
+            broadcast; its receipt is reconciled asynchronously by tx_tracker.
         """
+        current_span().set_attributes({"asset": asset, "amount": str(amount)})
         if not self.operator_private_key:
             return {
                 "success": False,
@@ -400,82 +886,32 @@ class LLMAaveYieldAgent:
             }
         
         try:
-            from eth_account import Account
-            
-            # YieldOrchestrator ABI (simplified for depositERC20)
-            ORCHESTRATOR_ABI = [
-                {
-                    "inputs": [
-                        {"name": "from", "type": "address"},
-                        {"name": "inputAsset", "type": "address"},
-                        {"name": "amountIn", "type": "uint256"},
-                        {"name": "targetAsset", "type": "address"},
-                        {"name": "minAmountOut", "type": "uint256"},
-                        {"name": "receiver", "type": "address"}
-                    ],
-                    "name": "depositERC20",
-                    "outputs": [{"name": "sharesOut", "type": "uint256"}],
-                    "stateMutability": "nonpayable",
-                    "type": "function"
-                }
-            ]
-            
-            orchestrator = self.w3.eth.contract(
-                address=Web3.to_checksum_address(orchestrator_addr),
-                abi=ORCHESTRATOR_ABI
-            )
-            
-            asset_addr = Web3.to_checksum_address(
-                self.SUPPORTED_ASSETS[asset]["address"]
+            call = self.build_deposit_call(asset, amount, receiver)
+            tx_hash_hex = self._send_contract_transaction(
+                call["contract"],
+                call["fn_name"],
+                call["args"],
+                metadata=call["metadata"],
             )
             
-            # For same-asset deposit, inputAsset == targetAsset, minAmountOut == amount
-            account = Account.from_key(self.operator_private_key)
-            chain_id = self.w3.eth.chain_id
-            nonce = self.w3.eth.get_transaction_count(account.address)
-            
-            tx = orchestrator.functions.depositERC20(
-                self.treasury_address,  # from
-                asset_addr,  # inputAsset (same as targetAsset)
-                amount,  # amountIn
-                asset_addr,  # targetAsset (same as inputAsset - no swap)
-                amount,  # minAmountOut (same as amountIn since no swap)
-                Web3.to_checksum_address(receiver)  # receiver
-            ).build_transaction({
-                "from": account.address,
-                "chainId": chain_id,
-                "nonce": nonce,
-                "gas": 300_000,  # Standard gas for deposit (no swap)
-            })
-            
-            signed = account.sign_transaction(tx)
-            tx_hash = self.w3.eth.send_raw_transaction(signed.raw_transaction)
-            tx_hash_hex = tx_hash.hex()
-            
-            logger.info(f"Orchestrator deposit tx sent: {tx_hash_hex} (asset: {asset}, amount: {amount})")
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            logger.info("Orchestrator deposit tx sent: %s (asset: %s, amount: %s)", tx_hash_hex, asset, amount)
             
-            if receipt.get("status") == 1:
-                return {
-                    "success": True,
-                    "tx_hash": tx_hash_hex,
-                    "asset": asset,
-                    "amount": amount
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": "Transaction reverted",
-                    "tx_hash": tx_hash_hex
-                }
+            return {
+                "success": True,
+                "status": PendingTransactionTracker.STATUS_PENDING,
+                "tx_hash": tx_hash_hex,
+                "asset": asset,
+                "amount": amount
+            }
                 
         except Exception as e:
-            logger.error(f"Error executing orchestrator deposit: {e}", exc_info=True)
+            logger.error("Error executing orchestrator deposit: %s", e, exc_info=True)
             return {
                 "success": False,
                 "error": str(e)
             }
 
+    @timed("historical_yield_metrics")
     def get_historical_yield_metrics(self) -> Dict:
         """
         Calculate historical yield metrics from tracked APY data and external APIs.
@@ -555,7 +991,7 @@ class LLMAaveYieldAgent:
             if defillama_data:
                 metrics["defillama_historical"] = defillama_data
         except Exception as e:
-            logger.debug(f"Could not fetch DefiLlama historical data: {e}")
+            logger.debug("Could not fetch DefiLlama historical data: %s", e)
 
         return metrics
 
@@ -568,8 +1004,8 @@ class LLMAaveYieldAgent:
             pool_id = os.getenv("DEFILLAMA_POOL_ID", "").strip()
             if not pool_id:
                 # Try to find Aave v3 Base USDC pool
-                response = requests.get(
-                    "https://yields.llama.fi/pools",
+                response = self.http.get(
+                    f"{self.defillama_url}/pools",
                     params={"chain": "Base", "protocol": "aave-v3"},
                     timeout=10
                 )
@@ -581,8 +1017,8 @@ class LLMAaveYieldAgent:
             
             if pool_id:
                 # Fetch historical data for the pool
-                hist_response = requests.get(
-                    f"https://yields.llama.fi/chart/{pool_id}",
+                hist_response = self.http.get(
+                    f"{self.defillama_url}/chart/{pool_id}",
                     timeout=10
                 )
                 if hist_response.status_code == 200:
@@ -594,7 +1030,7 @@ class LLMAaveYieldAgent:
                         "latest_apy": hist_data.get("data", [{}])[-1].get("apy") if hist_data.get("data") else None,
                     }
         except Exception as e:
-            logger.debug(f"DefiLlama historical fetch error: {e}")
+            logger.debug("DefiLlama historical fetch error: %s", e)
         return None
     
     def get_treasury_balance(self) -> float:
@@ -604,12 +1040,13 @@ class LLMAaveYieldAgent:
                 self.treasury_address
             ).call()
             balance_usdc = balance_wei / 10 ** 6
-            logger.info(f"Treasury USDC Balance: {balance_usdc:,.2f} USDC")
+            logger.info("Treasury USDC Balance: %.2f USDC", balance_usdc)
             return balance_usdc
         except Exception as e:
-            logger.error(f"Error fetching treasury balance: {e}")
+            logger.error("Error fetching treasury balance: %s", e)
             return 0.0
 
+    @timed("vault_balances")
     def get_vault_balances(self) -> Optional[Dict[str, float]]:
         """
         Get YieldVault balances: outside Aave (idle) and inside Aave (supplied).
@@ -620,7 +1057,7 @@ class LLMAaveYieldAgent:
         try:
             code = self.w3.eth.get_code(self.vault_address)
             if not code or code == b"":
-                logger.warning(f"No contract at YIELD_VAULT_ADDRESS {self.vault_address}")
+                logger.warning("No contract at YIELD_VAULT_ADDRESS %s", self.vault_address)
                 return None
             vault = self.w3.eth.contract(address=self.vault_address, abi=self.VAULT_ABI)
             idle = vault.functions.idleUnderlying().call()
@@ -633,75 +1070,128 @@ class LLMAaveYieldAgent:
                 "total_usdc": total / (10**decimals),
             }
         except Exception as e:
-            logger.error(f"Error fetching vault balances: {e}")
+            logger.error("Error fetching vault balances: %s", e)
             return None
 
-    def execute_supply_to_aave(self, market_data: Dict) -> Dict:
+    def plan_supply_to_aave(self, market_data: Dict, incoming_raw: int = 0) -> Dict:
         """
-        Supply a percentage of vault idle to Aave via YieldVault.supplyToAave(amount).
-        Caller must have OPERATOR_ROLE on the vault. Uses supply_to_aave_percent of idle.
-        Returns dict with success status and transaction details.
+        Size a supply of vault idle to Aave and ask the supply scheduler whether it is due.
+
+        Uses supply_to_aave_percent of the vault's idle underlying.
+
+        Args:
+            market_data: Market snapshot (APYs for the scheduler)
+            incoming_raw: USDC (base units) deposited into the vault earlier in the same
+                transaction as the supply (a batched multicall's deposit legs), so not
+                yet in idleUnderlying() but idle by the time the supply leg runs
+
+        Returns:
+            Result dict (same shape as execute_supply_to_aave's) plus amount_raw:
+            the amount to supply, or 0 when nothing should be sent (error, no idle,
+            deferred by the scheduler)
         """
         result = {
             "success": False,
+            "status": None,
             "tx_hash": None,
             "amount_usdc": 0.0,
+            "amount_raw": 0,
             "error": None
         }
-        
+
         if not self.vault_address:
             result["error"] = "YIELD_VAULT_ADDRESS not set in .env"
             return result
         if not self.operator_private_key:
             result["error"] = "OPERATOR_PRIVATE_KEY not set in .env"
             return result
+        if self.supply_to_aave_percent <= 0:
+            result["error"] = "Supply to Aave disabled (SUPPLY_TO_AAVE_PERCENT=0)"
+            result["success"] = True  # Not an error, just nothing to do
+            return result
+        vault = self.w3.eth.contract(address=self.vault_address, abi=self.VAULT_ABI)
+        # Deposits sent earlier in this decision are tracked, not awaited: read and simulate
+        # against the pending state rather than the pre-deposit market snapshot
+        idle_raw = vault.functions.idleUnderlying().call(block_identifier="pending") + incoming_raw
+        if idle_raw == 0:
+            result["error"] = "No idle in vault"
+            result["success"] = True  # Not an error, just nothing to do
+            return result
+        amount_raw = (idle_raw * self.supply_to_aave_percent) // 100
+        current_span().set_attributes({"idle_raw": str(idle_raw), "amount": str(amount_raw)})
+        if amount_raw == 0:
+            result["error"] = "Supply amount would be 0 (idle too small)"
+            result["success"] = True  # Not an error, just nothing to do
+            return result
+        # Let idle accumulate until the supply's yield repays its gas within the horizon
+        evaluation = self.supply_scheduler.evaluate(
+            amount_raw / 1e6,
+            market_data.get('asset_apys', {}).get('USDC', market_data.get('aave_apy', 0)),
+            self.action_gas_cost_usd("supplyToAave", "USDC"),
+        )
+        result["scheduler"] = evaluation
+        if not evaluation["should_supply"]:
+            result["error"] = f"Deferred: {evaluation['reason']}"
+            result["status"] = "deferred"
+            result["success"] = True  # Not an error, waiting for more idle
+            return result
+        result["success"] = True
+        result["amount_raw"] = amount_raw
+        result["amount_usdc"] = amount_raw / 1e6
+        return result
+
+    @timed("supply_to_aave")
+    def execute_supply_to_aave(self, market_data: Dict) -> Dict:
+        """
+        Supply a percentage of vault idle to Aave via YieldVault.supplyToAave(amount).
+        Caller must have OPERATOR_ROLE on the vault. Sized and gated by plan_supply_to_aave.
+        Returns dict with success status and transaction details; the tx is tracked
+        by tx_tracker rather than waited on.
+        """
+        result = {"success": False, "status": None, "tx_hash": None, "amount_usdc": 0.0, "error": None}
         try:
-            from eth_account import Account
-            vault = self.w3.eth.contract(address=self.vault_address, abi=self.VAULT_ABI)
-            idle_raw = vault.functions.idleUnderlying().call()
-            if idle_raw == 0:
-                result["error"] = "No idle in vault"
-                result["success"] = True  # Not an error, just nothing to do
+            result = self.plan_supply_to_aave(market_data)
+            amount_raw = result.pop("amount_raw")
+            if not amount_raw:
                 return result
-            amount_raw = (idle_raw * self.supply_to_aave_percent) // 100
-            if amount_raw == 0:
-                result["error"] = "Supply amount would be 0 (idle too small)"
-                result["success"] = True  # Not an error, just nothing to do
+            result["success"] = False
+            vault = self.w3.eth.contract(address=self.vault_address, abi=self.VAULT_ABI)
+            call = {
+                "contract": vault,
+                "fn_name": "supplyToAave",
+                "args": [amount_raw],
+                "metadata": {"asset": "USDC", "amount": str(amount_raw)},
+            }
+            simulation = self.simulate_calls([call], "pending")[0]
+            if not simulation["success"]:
+                result["error"] = f"Simulation reverted: {simulation['revert_reason']}"
+                logger.error("supplyToAave rejected before signing: %s", simulation['revert_reason'])
                 return result
-            account = Account.from_key(self.operator_private_key)
-            account_address = account.address
-            chain_id = self.w3.eth.chain_id
-            # Get nonce for the account (required for transaction signing)
-            nonce = self.w3.eth.get_transaction_count(account_address)
-            tx = vault.functions.supplyToAave(amount_raw).build_transaction({
-                "from": account_address,
-                "chainId": chain_id,
-                "nonce": nonce,
-                "gas": 200_000,
-            })
-            signed = account.sign_transaction(tx)
-            tx_hash = self.w3.eth.send_raw_transaction(signed.raw_transaction)
-            tx_hash_hex = tx_hash.hex()
-            logger.info(f"supplyToAave tx sent: {tx_hash_hex} (amount={amount_raw} raw, {amount_raw/1e6:.6f} USDC)")
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
-            if receipt.get("status") == 1:
-                result["success"] = True
-                result["tx_hash"] = tx_hash_hex
-                result["amount_usdc"] = amount_raw / 1e6
-                logger.info("supplyToAave succeeded")
-            else:
-                result["error"] = "Transaction reverted"
-                logger.error("supplyToAave tx reverted")
+            # Not time-critical: idle keeps earning nothing either way, so use the low fee tier
+            tx_hash_hex = self._send_contract_transaction(
+                call["contract"],
+                call["fn_name"],
+                call["args"],
+                metadata=call["metadata"],
+                urgency="low",
+            )
+            logger.info("supplyToAave tx sent: %s (amount=%s raw, %.6f USDC)", tx_hash_hex, amount_raw, amount_raw/1e6)
+            result["success"] = True
+            result["status"] = PendingTransactionTracker.STATUS_PENDING
+            result["tx_hash"] = tx_hash_hex
+            self.supply_scheduler.record_supply(amount_raw / 1e6, tx_hash_hex)
         except Exception as e:
+            result["success"] = False
             result["error"] = str(e)
             logger.error("execute_supply_to_aave failed: %s", e, exc_info=True)
         return result
 
+    @timed("alternative_yields")
     def get_alternative_yields(self) -> Dict[str, float]:
         """Get yields from alternative DeFi protocols."""
         alternatives = {}
         try:
-            response = requests.get("https://yields.llama.fi/pools", timeout=10)
+            response = self.http.get(f"{self.defillama_url}/pools", timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 for pool in data.get('data', []):
@@ -712,65 +1202,211 @@ class LLMAaveYieldAgent:
                         apy = pool.get('apy', 0)
                         if protocol not in alternatives or alternatives[protocol] < apy:
                             alternatives[protocol] = apy
-                logger.info(f"Alternative yields found: {alternatives}")
+                logger.info("Alternative yields found: %s", alternatives)
         except Exception as e:
-            logger.warning(f"Could not fetch alternative yields: {e}")
+            logger.warning("Could not fetch alternative yields: %s", e)
         
         if not alternatives:
             alternatives['Conservative Benchmark'] = 1.0
         return alternatives
     
+    def post_deposit_blended_apy(self, allocation: Optional[Dict], market_data: Dict) -> Optional[float]:
+        """
+        Allocation-weighted supply APY after our deposits, from the local rate model.
+
+        Falls back to an asset's current APY when its rate strategy is unknown.
+
+        Returns:
+            Blended APY in percent, or None without a usable allocation
+        """
+        total_value = market_data.get('total_treasury_value', 0)
+        weights = {
+            asset: pct for asset, pct in (allocation or {}).items()
+            if asset in self.SUPPORTED_ASSETS and isinstance(pct, (int, float)) and pct > 0
+        }
+        if not weights or total_value <= 0:
+            return None
+        blended = 0.0
+        for asset, pct in weights.items():
+            post = self.rate_model.supply_apy(asset, [total_value * pct / 100])
+            apy = float(post[0]) if post is not None else market_data.get('asset_apys', {}).get(asset, 0.0)
+            blended += apy * pct / sum(weights.values())
+        return blended
+
+    def estimate_action_gas_units(self, action: str, asset: Optional[str] = None) -> int:
+        """
+        Gas units for one action: learned receipt percentile, else last eth_estimateGas,
+        else the fee oracle's fallback limit.
+        """
+        return (
+            self.gas_model.estimate(action, asset)
+            or self.fee_oracle.cached_gas_estimate(action)
+            or FeeOracle.FALLBACK_GAS_LIMITS.get(action, FeeOracle.FALLBACK_GAS_LIMITS["default"])
+        )
+
+    def action_gas_cost_usd(self, action: str, asset: Optional[str] = None) -> float:
+        """USD cost of one action at the gas/ETH price from the last estimate_gas_cost() call."""
+        return self.estimate_action_gas_units(action, asset) * self._gas_unit_cost_usd
+
+    def estimate_plan_gas_cost(self, decision: Dict, treasury_balances: Optional[Dict[str, float]] = None) -> float:
+        """
+        USD gas cost of the swaps and deposits a decision would execute.
+
+        Args:
+            decision: Decision dict with swaps_needed and allocation
+            treasury_balances: Current balances; when given, costs the netted
+                rebalance plan instead of the LLM's swaps_needed verbatim
+        """
+        allocation = {
+            asset: pct for asset, pct in (decision.get("allocation") or {}).items()
+            if isinstance(pct, (int, float)) and pct > 0
+        }
+        if treasury_balances is not None:
+            plan = self.rebalance_planner.plan(treasury_balances, allocation)
+            swaps = [(leg["from"], leg["to"]) for leg in plan["swaps"]]
+            deposit_assets = [leg["asset"] for leg in plan["deposits"]]
+        else:
+            swaps = [(swap.get("from"), swap.get("to")) for swap in decision.get("swaps_needed") or []]
+            deposit_assets = list(allocation)
+        total = 0.0
+        for from_token, to_token in swaps:
+            total += self.action_gas_cost_usd("lifi_swap", f"{from_token}->{to_token}")
+        if self.batch_deposits and deposit_assets:
+            # All deposits (+ Aave supply) go out as one orchestrator multicall
+            total += self.action_gas_cost_usd("multicall", "+".join(deposit_assets))
+        else:
+            for asset in deposit_assets:
+                total += self.action_gas_cost_usd("depositERC20", asset)
+        return total
+
+    def estimate_gas_costs_by_action(self) -> Dict[str, Any]:
+        """Per-action USD gas costs for the market snapshot (call after estimate_gas_cost)."""
+        return {
+            "depositERC20": {asset: self.action_gas_cost_usd("depositERC20", asset) for asset in self.SUPPORTED_ASSETS},
+            "supplyToAave": self.action_gas_cost_usd("supplyToAave", "USDC"),
+            "lifi_swap": self.action_gas_cost_usd("lifi_swap"),
+        }
+
+    def get_eth_price(self) -> Dict[str, Any]:
+        """
+        ETH/USD from the cached price feed, with source and age.
+
+        Falls back to ETH_PRICE_FALLBACK_USD only when no source has ever answered,
+        and says so in the returned source field.
+        """
+        reading = self.price_feed.get_price()
+        if reading is None:
+            logger.error("No ETH price available from %s; using fallback $%.2f",
+                         self.price_feed.sources, self.eth_price_fallback_usd)
+            return {"price": self.eth_price_fallback_usd, "source": "fallback", "age_seconds": None, "stale": True}
+        if reading["stale"]:
+            logger.warning("ETH price from %s is %.0fs old", reading['source'], reading['age_seconds'])
+        return reading
+
+    @timed("gas_estimate")
     def estimate_gas_cost(self) -> float:
-        """Estimate gas cost for Aave deposit transaction."""
+        """
+        Estimate gas cost for an Aave deposit transaction.
+
+        Uses the fee oracle's expected effective gas price (next base fee + tip for the
+        configured urgency) and the learned gasUsed for a USDC depositERC20. Also caches
+        the USD price of one gas unit for action_gas_cost_usd().
+        """
         try:
-            gas_price = self.w3.eth.gas_price
-            estimated_gas_units = 250000
+            fees = self.fee_oracle.get_fees(self.tx_urgency)
+            gas_price = fees["expectedGasPrice"] if fees else self.w3.eth.gas_price
+            estimated_gas_units = self.estimate_action_gas_units("depositERC20", "USDC")
             cost_wei = gas_price * estimated_gas_units
             cost_eth = cost_wei / 10 ** 18
             
-            try:
-                price_response = requests.get(
-                    "https://api.coingecko.com/api/v3/simple/price",
-                    params={"ids": "ethereum", "vs_currencies": "usd"},
-                    timeout=5
-                )
-                eth_price = price_response.json().get('ethereum', {}).get('usd', 3000)
-            except:
-                eth_price = 3000
+            eth_price = self.get_eth_price()["price"]
             
             cost_usd = cost_eth * eth_price
-            logger.info(f"Estimated gas cost: ${cost_usd:.4f}")
+            self._gas_unit_cost_usd = gas_price * eth_price / 10 ** 18
+            logger.info("Estimated gas cost: $%.4f", cost_usd)
             return cost_usd
         except Exception as e:
-            logger.error(f"Error estimating gas cost: {e}")
+            logger.error("Error estimating gas cost: %s", e)
             return 100.0
     
+    @timed("market_context")
     def get_market_context(self) -> Dict:
         """Gather all market data for LLM analysis (multi-asset)."""
+        # Pin the block this snapshot describes; planned transactions are simulated against it
+        block_number = self.w3.eth.block_number
+        current_span().set_attribute("block_number", block_number)
+
         # Get APY for all supported assets
         asset_apys = self.get_all_asset_apys()
         
-        # Get treasury balances for all assets
-        treasury_balances = self.get_treasury_balances()
+        # Get treasury balances for all assets (raw kept for exact deposit sizing)
+        treasury_balances_raw = self.get_treasury_balances_raw()
+        treasury_balances = self._to_units(treasury_balances_raw)
+        for asset, balance in treasury_balances.items():
+            logger.info("Treasury %s Balance: %.2f", asset, balance)
         
         # Calculate total treasury value (in USD, assuming 1:1 for stablecoins)
         total_treasury_value = sum(treasury_balances.values())
         
         ctx = {
             'timestamp': datetime.now().isoformat(),
+            'block_number': block_number,
             'aave_apy': asset_apys.get('USDC', 0.0),  # Legacy field for backward compatibility
             'asset_apys': asset_apys,  # APY for all assets
             'treasury_balance': treasury_balances.get('USDC', 0.0),  # Legacy field
             'treasury_balances': treasury_balances,  # Balances for all assets
+            'treasury_balances_raw': treasury_balances_raw,  # Base units, for deposit sizing
             'total_treasury_value': total_treasury_value,
             'alternative_yields': self.get_alternative_yields(),
             'gas_cost_usd': self.estimate_gas_cost(),
             'network': 'Base Mainnet',
             'supported_assets': list(self.SUPPORTED_ASSETS.keys()),
         }
+        ctx['gas_costs_by_action'] = self.estimate_gas_costs_by_action()
+
+        # Supply APY after depositing 25/50/100% of the treasury into each reserve
+        self.rate_model.refresh_totals()
+        if total_treasury_value > 0:
+            sizes = [total_treasury_value * f for f in (0.25, 0.5, 1.0)]
+            post_deposit_apys = {}
+            for asset in self.SUPPORTED_ASSETS:
+                table = self.rate_model.impact_table(asset, sizes)
+                if table is not None:
+                    post_deposit_apys[asset] = table
+            ctx['post_deposit_apys'] = post_deposit_apys
+        eth_price = self.get_eth_price()
+        ctx['eth_price'] = {
+            'usd': eth_price['price'],
+            'source': eth_price['source'],
+            'age_seconds': eth_price['age_seconds'],
+            'stale': eth_price['stale'],
+        }
         vault_balances = self.get_vault_balances()
         ctx['vault_balances'] = vault_balances  # None or {outside_aave_usdc, inside_aave_usdc, total_usdc}
+        if vault_balances:
+            # Every check feeds the idle-inflow estimate, not just DEPOSIT decisions
+            self.supply_scheduler.observe(vault_balances['outside_aave_usdc'])
+
+        # EIP-1559 fee suggestions per urgency tier (gwei), from the cached fee history
+        fee_tiers = {}
+        for tier in FeeOracle.URGENCY_TIERS:
+            fees = self.fee_oracle.get_fees(tier)
+            if fees:
+                fee_tiers[tier] = {k: v / 1e9 for k, v in fees.items()}
+        ctx['gas_fees_gwei'] = fee_tiers
+
+        # Real swap costs from cached LI.FI quotes ("FROM->TO" -> notional size -> costs)
+        if self.cassette.enabled:
+            # No background refresher under a cassette; quote in-line so the run is reproducible
+            self.quote_service.refresh()
+        ctx['swap_quotes'] = self.quote_service.summary()
         
+        # Realized yield from liquidityIndex deltas (vault aToken balance known for USDC only)
+        for asset, liquidity_index in self._liquidity_indexes.items():
+            balance = vault_balances['inside_aave_usdc'] if vault_balances and asset == 'USDC' else None
+            self.yield_tracker.record(asset, liquidity_index, balance)
+        ctx['realized_yield'] = self.yield_tracker.summary()
+
         # Add historical yield metrics
         ctx['historical_yield_metrics'] = self.get_historical_yield_metrics()
         
@@ -852,6 +1488,7 @@ IMPORTANT GUIDELINES:
 
 Remember: You're managing real treasury funds on Base Mainnet. Your recommendations should be professional, well-reasoned, and defensible. Consider both yield optimization and risk management."""
 
+    @timed("llm_decision")
     def ask_llm_for_decision(self, market_data: Dict) -> Dict:
         """Use GPT-4 to analyze market data and make a decision."""
         
@@ -896,17 +1533,46 @@ ALTERNATIVE YIELDS (Base Mainnet for comparison):
         for protocol, apy in market_data['alternative_yields'].items():
             market_summary += f"- {protocol}: {apy:.2f}% APY\n"
         
+        gas_by_action = market_data.get('gas_costs_by_action') or {}
+        if gas_by_action:
+            market_summary += "\nGAS COST BY ACTION (learned from past receipts):\n"
+            for asset, cost in gas_by_action.get('depositERC20', {}).items():
+                market_summary += f"- Deposit {asset}: ${cost:.4f}\n"
+            market_summary += f"- Supply vault idle to Aave: ${gas_by_action.get('supplyToAave', 0):.4f}\n"
+            market_summary += f"- LI.FI swap: ${gas_by_action.get('lifi_swap', 0):.4f}\n"
+
+        post_deposit = market_data.get('post_deposit_apys') or {}
+        if post_deposit:
+            market_summary += "\nAPY AFTER DEPOSIT (our supply lowers utilization; local Aave rate model):\n"
+            for asset, table in post_deposit.items():
+                cells = ", ".join(f"${float(size):,.0f} -> {apy:.4f}%" for size, apy in table.items())
+                market_summary += f"- {asset} (now {asset_apys.get(asset, 0):.4f}%): {cells}\n"
+
+        swap_quotes = market_data.get('swap_quotes') or {}
+        if swap_quotes:
+            market_summary += "\nSWAP COSTS (live LI.FI quotes; cost = output shortfall incl. fees, plus gas):\n"
+            for pair, sizes in sorted(swap_quotes.items()):
+                costs = ", ".join(
+                    f"${float(size):,.0f}: {q['cost_bps']:.1f} bps + ${q['gas_usd']:.2f} gas"
+                    for size, q in sorted(sizes.items(), key=lambda x: float(x[0]))
+                    if q.get('cost_bps') is not None and not q.get('stale')
+                )
+                if costs:
+                    market_summary += f"- {pair}: {costs}\n"
+
         # Calculate metrics for best asset
         best_asset = max(asset_apys.items(), key=lambda x: x[1])[0] if asset_apys else "USDC"
         best_apy = asset_apys.get(best_asset, 0)
+        # Break-even uses the cost of actually depositing into the best asset
+        best_deposit_gas = gas_by_action.get('depositERC20', {}).get(best_asset, market_data['gas_cost_usd'])
         
         market_summary += f"""
 CALCULATED METRICS:
 - Total Treasury Value: ${total_value:,.2f}
 - Best APY Asset: {best_asset} ({best_apy:.4f}% APY)
 - Daily interest at best APY: ${(total_value * best_apy / 100 / 365):,.2f}
-- Gas cost as % of balance: {(market_data['gas_cost_usd'] / total_value * 100) if total_value > 0 else 0:.4f}%
-- Days to recover gas cost: {(market_data['gas_cost_usd'] / (total_value * best_apy / 100 / 365)) if best_apy > 0 and total_value > 0 else float('inf'):.2f} days
+- Gas cost as % of balance: {(best_deposit_gas / total_value * 100) if total_value > 0 else 0:.4f}%
+- Days to recover gas cost: {(best_deposit_gas / (total_value * best_apy / 100 / 365)) if best_apy > 0 and total_value > 0 else float('inf'):.2f} days
 
 HISTORICAL YIELD ANALYSIS:
 """
@@ -930,6 +1596,17 @@ HISTORICAL YIELD ANALYSIS:
         else:
             market_summary += f"- Insufficient historical data ({hist_metrics.get('data_points', 0)} points). Tracking started.\n"
 
+        realized = market_data.get('realized_yield') or {}
+        if realized:
+            market_summary += "\nREALIZED YIELD (from Aave liquidityIndex growth; compare with projections):\n"
+            for asset, windows in realized.items():
+                cells = ", ".join(
+                    f"{name}: {r['realized_apy']:.4f}% APY"
+                    + (f" / {r['earnings']:,.4f} {asset} earned" if r.get('balance') is not None else "")
+                    for name, r in windows.items()
+                )
+                market_summary += f"- {asset}: {cells}\n"
+
         market_summary += f"""
 DECISION HISTORY:
 - Total decisions made: {len(self.decision_history)}
@@ -947,15 +1624,21 @@ Provide your recommendation in the required JSON format with allocation percenta
         logger.info("Requesting decision from GPT-4...")
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self.create_system_prompt()},
-                    {"role": "user", "content": market_summary}
-                ],
-                temperature=0.7,  # Some creativity but not too random
-                response_format={"type": "json_object"}  # Force JSON response
-            )
+            with DEPENDENCY_SECONDS.time(dependency="openai"), \
+                    start_span("openai chat.completions", model=self.model, prompt_chars=len(market_summary)) as span:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": self.create_system_prompt()},
+                        {"role": "user", "content": market_summary}
+                    ],
+                    temperature=0.7,  # Some creativity but not too random
+                    response_format={"type": "json_object"}  # Force JSON response
+                )
+                if response.usage is not None:
+                    span.set_attributes({"llm.prompt_tokens": response.usage.prompt_tokens,
+                                         "llm.completion_tokens": response.usage.completion_tokens})
+            record_llm_usage(self.model, response.usage)
             
             # Parse the LLM response
             llm_response = response.choices[0].message.content
@@ -965,7 +1648,12 @@ Provide your recommendation in the required JSON format with allocation percenta
             vb = market_data.get('vault_balances')
             balance_for_calc = vb['total_usdc'] if vb and vb.get('total_usdc', 0) > 0 else market_data.get('treasury_balance', 0)
             aave_apy = market_data.get('aave_apy', 0)
-            gas_cost = market_data.get('gas_cost_usd', 0)
+            # Project at the rate we'd actually earn after our own deposits move utilization
+            blended_apy = self.post_deposit_blended_apy(decision_data.get('allocation'), market_data)
+            if blended_apy is not None:
+                aave_apy = blended_apy
+            # Gas for the swaps and deposits this decision would actually execute
+            gas_cost = self.estimate_plan_gas_cost(decision_data, market_data.get('treasury_balances')) if self._gas_unit_cost_usd else market_data.get('gas_cost_usd', 0)
             
             # Only calculate if decision is DEPOSIT and we have valid data
             if decision_data.get('decision') == 'DEPOSIT' and balance_for_calc > 0 and aave_apy > 0:
@@ -973,27 +1661,28 @@ Provide your recommendation in the required JSON format with allocation percenta
                     # Calculate: balance * (APY / 100) * (30 / 365) - gas_cost (one-time)
                     projected_30d = (balance_for_calc * aave_apy / 100 * 30 / 365) - gas_cost
                     decision_data['projected_30day_return'] = max(0, projected_30d)  # Don't go negative
-                    logger.info(f"Calculated projected_30day_return: ${projected_30d:.2f}")
+                    logger.info("Calculated projected_30day_return: $%.2f", projected_30d)
                 
                 if not decision_data.get('projected_90day_return') or decision_data.get('projected_90day_return', 0) == 0:
                     # Calculate: balance * (APY / 100) * (90 / 365) - gas_cost (one-time)
                     projected_90d = (balance_for_calc * aave_apy / 100 * 90 / 365) - gas_cost
                     decision_data['projected_90day_return'] = max(0, projected_90d)  # Don't go negative
-                    logger.info(f"Calculated projected_90day_return: ${projected_90d:.2f}")
+                    logger.info("Calculated projected_90day_return: $%.2f", projected_90d)
             elif decision_data.get('decision') == 'HOLD':
                 # For HOLD decisions, ensure returns are 0
                 decision_data['projected_30day_return'] = 0
                 decision_data['projected_90day_return'] = 0
             
             # Log token usage
-            logger.info(f"Tokens used - Prompt: {response.usage.prompt_tokens}, "
-                       f"Completion: {response.usage.completion_tokens}, "
-                       f"Total: {response.usage.total_tokens}")
+            logger.info("Tokens used - Prompt: %s, Completion: %s, Total: %s",
+                        response.usage.prompt_tokens, response.usage.completion_tokens, response.usage.total_tokens,
+                        extra={"model": self.model, "prompt_tokens": response.usage.prompt_tokens,
+                               "completion_tokens": response.usage.completion_tokens})
             
             return decision_data
             
         except Exception as e:
-            logger.error(f"Error getting LLM decision: {e}")
+            logger.error("Error getting LLM decision: %s", e)
             # Fallback to conservative decision
             return {
                 "decision": "HOLD",
@@ -1007,6 +1696,164 @@ Provide your recommendation in the required JSON format with allocation percenta
                 "alternative_recommendation": "Wait for system to recover"
             }
     
+    def _swap_cost_bps(self, from_token: str, to_token: str, amount_usd: float) -> Optional[float]:
+        """Swap cost in bps from the cached LI.FI quote grid, or None without a quote."""
+        estimate = self.quote_service.estimate_cost(from_token, to_token, amount_usd)
+        return estimate["cost_bps"] if estimate else None
+
+    def _apy_volatility(self, market_data: Dict) -> Dict[str, float]:
+        """
+        APY standard deviation per asset for the optimizer's volatility penalty.
+
+        APY history is tracked for USDC only, so its 7d (else 30d) volatility is
+        used as the proxy for every asset.
+        """
+        metrics = market_data.get('historical_yield_metrics') or {}
+        vol = metrics.get('apy_volatility_7d') or metrics.get('apy_volatility_30d') or 0.0
+        return {asset: vol for asset in self.SUPPORTED_ASSETS}
+
+    @timed("optimizer_decision")
+    def optimizer_decision(self, market_data: Dict) -> Dict:
+        """
+        Deterministic decision from the allocation optimizer, in the LLM's response format.
+        """
+        balances = market_data.get('treasury_balances', {})
+        apys = market_data.get('asset_apys', {})
+        result = self.optimizer.optimize(balances, apys, self._apy_volatility(market_data))
+        allocation = result['allocation']
+        expected = result['expected']
+        deposit = bool(allocation) and expected['net_usd'] > 0
+
+        # Scale horizon yield to 30/90 days; costs are one-time
+        horizon = self.optimizer.horizon_days
+        costs = expected['swap_cost_usd'] + expected['gas_cost_usd']
+        projected = {
+            days: max(0.0, expected['gross_yield_usd'] * days / horizon - costs) if deposit else 0
+            for days in (30, 90)
+        }
+        modeled = set(market_data.get('post_deposit_apys') or {})
+        quoted = bool(market_data.get('swap_quotes'))
+        confidence = 90 if set(allocation) <= modeled and quoted else 70
+
+        cells = ", ".join(f"{asset} {pct:.1f}%" for asset, pct in allocation.items()) or "nothing"
+        reasoning = (
+            f"Optimizer ({self.risk_tolerance} profile, {horizon:g}-day horizon) allocates {cells}: "
+            f"expected gross ${expected['gross_yield_usd']:.2f}, risk-adjusted ${expected['risk_adjusted_yield_usd']:.2f}, "
+            f"swap cost ${expected['swap_cost_usd']:.2f}, gas ${expected['gas_cost_usd']:.2f}, "
+            f"net ${expected['net_usd']:.2f}."
+        )
+        return {
+            "decision": "DEPOSIT" if deposit else "HOLD",
+            "confidence": confidence,
+            "reasoning": reasoning,
+            "allocation": allocation,
+            "swaps_needed": [],  # derived from the allocation by the rebalance planner
+            "key_factors": [
+                f"Concentration cap {self.optimizer.max_share * 100:g}% per asset",
+                f"Volatility penalty {self.optimizer.volatility_penalty:g}x APY std-dev",
+                "Post-deposit APY from the Aave rate model" if modeled else "Current APY (rate model unavailable)",
+                "Swap costs from LI.FI quotes" if quoted else "Default swap cost (no LI.FI quotes)",
+            ],
+            "projected_30day_return": projected[30],
+            "projected_90day_return": projected[90],
+            "risks": [f"{asset} excluded: {reason}" for asset, reason in result['excluded'].items()],
+            "opportunities": [],
+            "alternative_recommendation": "" if deposit else "Hold until yield covers swap and gas costs",
+            "optimizer": result,
+        }
+
+    def validate_llm_decision(self, decision: Dict, market_data: Dict) -> Dict:
+        """
+        Clip the LLM's allocation to the risk constraints and check it against the optimizer.
+
+        The clipped allocation replaces the LLM's. If its expected net yield falls
+        short of the optimizer's by more than OPTIMIZER_OVERRIDE_SHORTFALL_PCT,
+        the optimizer's allocation is used instead.
+        """
+        if decision.get("decision") != "DEPOSIT":
+            return decision
+        balances = market_data.get('treasury_balances', {})
+        apys = market_data.get('asset_apys', {})
+        volatility = self._apy_volatility(market_data)
+        clipped = self.optimizer.clip(decision.get("allocation") or {}, apys)
+        llm_expected = self.optimizer.evaluate(clipped['allocation'], balances, apys, volatility)
+        best = self.optimizer.optimize(balances, apys, volatility)
+
+        validation = {
+            "original_allocation": decision.get("allocation"),
+            "adjustments": clipped['adjustments'],
+            "llm_expected": llm_expected,
+            "optimizer_allocation": best['allocation'],
+            "optimizer_expected": best['expected'],
+            "overridden": False,
+        }
+        decision = dict(decision, allocation=clipped['allocation'])
+        best_net = best['expected']['net_usd']
+        if best_net > 0 and llm_expected['net_usd'] < best_net * (1 - self.optimizer_override_shortfall):
+            logger.warning("LLM allocation nets $%.2f vs optimizer $%.2f; using optimizer allocation %s",
+                           llm_expected['net_usd'], best_net, best['allocation'])
+            decision['allocation'] = best['allocation']
+            validation['overridden'] = True
+        if clipped['adjustments']:
+            logger.info("LLM allocation adjusted: %s", '; '.join(clipped['adjustments']))
+        decision['optimizer_validation'] = validation
+        return decision
+
+    def project_return_distribution(self, decision: Dict, market_data: Dict) -> Dict[str, Any]:
+        """
+        Monte Carlo percentile bands for the 30/90-day return of a decision's allocation.
+
+        Paths start at each reserve's post-deposit APY and revert to the 30-day
+        average where history exists; volatility comes from the recorded APY
+        history (USDC, used for every asset). Swap and gas costs of the netted
+        rebalance plan are subtracted from every path.
+        """
+        total = market_data.get('total_treasury_value', 0)
+        apys = market_data.get('asset_apys', {})
+        amounts = {
+            asset: total * pct / 100 for asset, pct in (decision.get('allocation') or {}).items()
+            if asset in apys and isinstance(pct, (int, float)) and pct > 0
+        }
+        start_apys = {}
+        for asset, amount in amounts.items():
+            post = self.rate_model.supply_apy(asset, [amount])
+            start_apys[asset] = float(post[0]) if post is not None else apys[asset]
+
+        metrics = market_data.get('historical_yield_metrics') or {}
+        long_run = metrics.get('apy_avg_30d') or metrics.get('apy_avg_7d')
+        long_run_apys = {'USDC': long_run} if long_run else None
+        daily_vol = daily_apy_volatility(self.apy_history) or self.mc_default_daily_volatility
+
+        cost = 0.0
+        if amounts:
+            balances = market_data.get('treasury_balances', {})
+            plan = self.rebalance_planner.plan(balances, {a: decision['allocation'][a] for a in amounts})
+            for leg in plan['swaps']:
+                bps = self._swap_cost_bps(leg['from'], leg['to'], leg['amount_usd'])
+                cost += leg['amount_usd'] * (bps if bps is not None else self.optimizer.default_swap_bps) / 10_000
+            cost += self.estimate_plan_gas_cost(decision, balances) if self._gas_unit_cost_usd else market_data.get('gas_cost_usd', 0)
+
+        distribution = self.return_simulator.simulate(
+            amounts, start_apys, {asset: daily_vol for asset in amounts},
+            long_run_apys=long_run_apys, one_time_cost_usd=cost,
+        )
+        distribution['daily_apy_volatility'] = daily_vol
+        distribution['one_time_cost_usd'] = cost
+        logger.info("Monte Carlo (%s paths, %.1f ms): 30d p5/p50/p95 $%.2f/$%.2f/$%.2f",
+                    distribution['paths'], distribution['elapsed_ms'],
+                    distribution['30d']['p5'], distribution['30d']['p50'], distribution['30d']['p95'])
+        return distribution
+
+    def get_decision(self, market_data: Dict) -> Dict:
+        """Decision from the configured backend (DECISION_BACKEND)."""
+        if self.decision_backend == "optimizer":
+            return self.optimizer_decision(market_data)
+        decision = self.ask_llm_for_decision(market_data)
+        if self.decision_backend == "llm_validated":
+            decision = self.validate_llm_decision(decision, market_data)
+        return decision
+
+    @timed("make_decision")
     def make_decision(self) -> Dict:
         """Main decision-making process powered by LLM. Returns complete decision data."""
         logger.info("=" * 80)
@@ -1015,54 +1862,80 @@ Provide your recommendation in the required JSON format with allocation percenta
         
         # Gather market data
         market_data = self.get_market_context()
+        # Whatever started this analysis, the watcher's next rate-move check is against these rates
+        self.reserve_watcher.mark_analyzed(market_data.get('asset_apys') or {})
         
-        # Get LLM decision
-        llm_decision = self.ask_llm_for_decision(market_data)
+        # Get decision (LLM, optimizer, or LLM checked by the optimizer)
+        llm_decision = self.get_decision(market_data)
         
         # Combine with market data
         full_decision = {
             'timestamp': market_data['timestamp'],
             'market_data': market_data,
             'llm_analysis': llm_decision,
-            'model_used': self.model,
-            'risk_tolerance': self.risk_tolerance
+            'model_used': "allocation-optimizer" if self.decision_backend == "optimizer" else self.model,
+            'decision_backend': self.decision_backend,
+            'risk_tolerance': self.risk_tolerance,
+            'trace_id': current_trace_id(),
         }
+        current_span().set_attributes({
+            "decision": llm_decision.get("decision"),
+            "confidence": llm_decision.get("confidence"),
+            "decision_backend": self.decision_backend,
+        })
         
+        # Only a DEPOSIT executes the allocation (and pays its swaps and gas); nothing to project otherwise
+        if llm_decision.get("decision") == "DEPOSIT":
+            try:
+                full_decision['return_distribution'] = self.project_return_distribution(llm_decision, market_data)
+            except Exception as e:
+                logger.warning("Monte Carlo projection failed: %s", e)
+
         # Store decision
         self.decision_history.append(full_decision)
+        DECISIONS.inc(decision=llm_decision.get("decision", "UNKNOWN"), backend=self.decision_backend)
 
         # Execute multi-asset allocation if decision is DEPOSIT
         transaction_results = []
         if llm_decision.get("decision") == "DEPOSIT":
             allocation = llm_decision.get("allocation", {})
             swaps_needed = llm_decision.get("swaps_needed", [])
-            total_value = market_data.get('total_treasury_value', 0)
             treasury_balances = market_data.get('treasury_balances', {})
             
-            logger.info(f"Decision is DEPOSIT. Executing multi-asset allocation...")
-            logger.info(f"Allocation: {allocation}")
-            logger.info(f"Swaps needed: {swaps_needed}")
+            logger.info("Decision is DEPOSIT. Executing multi-asset allocation...")
+            logger.info("Allocation: %s", allocation)
+            logger.info("Swaps suggested by LLM: %s", swaps_needed)
             
-            # Execute swaps first
-            for swap in swaps_needed:
-                from_token = swap.get("from")
-                to_token = swap.get("to")
-                amount_percent = swap.get("amount_percent", 0)
-                
-                if from_token not in treasury_balances or to_token not in self.SUPPORTED_ASSETS:
-                    logger.warning(f"Invalid swap: {from_token} -> {to_token}")
+            # Net the allocation against current balances instead of executing
+            # swaps_needed verbatim: cancelling swaps disappear and legs too small
+            # to pay for their gas are dropped
+            valid_allocation = {}
+            for asset, allocation_pct in allocation.items():
+                if asset not in self.SUPPORTED_ASSETS:
+                    logger.warning("Invalid asset in allocation: %s", asset)
                     continue
-                
-                # Calculate swap amount
-                from_balance = treasury_balances[from_token]
-                swap_amount_usd = total_value * (amount_percent / 100)
-                swap_amount_raw = int(swap_amount_usd * (10 ** self.SUPPORTED_ASSETS[from_token]["decimals"]))
-                
+                valid_allocation[asset] = allocation_pct
+            plan = self.rebalance_planner.plan(treasury_balances, valid_allocation)
+            full_decision['rebalance_plan'] = plan
+            treasury_balances_raw = market_data.get('treasury_balances_raw') or self.get_treasury_balances_raw()
+            
+            # Swap amounts in base units (never more than the treasury holds)
+            swap_legs = []
+            for swap in plan["swaps"]:
+                swap_amount_raw = int(swap["amount_usd"] * (10 ** self.SUPPORTED_ASSETS[swap["from"]]["decimals"]))
+                swap_legs.append((swap["from"], swap["to"], min(swap_amount_raw, treasury_balances_raw.get(swap["from"], 0))))
+            if swap_legs:
+                # Quote every leg in parallel up front; execution then reuses the fresh quotes
+                self.quote_service.prefetch([leg for leg in swap_legs if leg[2] > 0], self.treasury_address)
+            
+            # Execute swaps first
+            for swap, (from_token, to_token, swap_amount_raw) in zip(plan["swaps"], swap_legs):
                 if swap_amount_raw == 0:
-                    logger.warning(f"Swap amount too small: {from_token} -> {to_token}")
+                    logger.warning("Swap amount too small: %s -> %s", from_token, to_token)
                     continue
                 
-                logger.info(f"Executing swap: {from_token} -> {to_token}, Amount: {swap_amount_raw} ({amount_percent}%)")
+                logger.info("Executing swap: %s -> %s, Amount: %s ($%.2f)",
+                            from_token, to_token, swap_amount_raw, swap['amount_usd'])
                 swap_result = self.execute_lifi_swap(
                     from_token,
                     to_token,
@@ -1077,57 +1950,125 @@ Provide your recommendation in the required JSON format with allocation percenta
                 })
                 
                 if swap_result.get("success"):
-                    logger.info(f"Swap successful: {swap_result.get('txHash')}")
+                    logger.info("Swap successful: %s", swap_result.get('txHash'))
                 else:
-                    logger.error(f"Swap failed: {swap_result.get('error')}")
+                    logger.error("Swap failed: %s", swap_result.get('error'))
             
-            # After swaps, refresh balances to get updated amounts
-            # Note: In production, you might want to wait for swap confirmations
-            # For now, we'll use the expected balances after swaps
-            updated_balances = treasury_balances.copy()
-            for swap in swaps_needed:
-                if swap.get("result", {}).get("success"):
-                    from_token = swap.get("from")
-                    to_token = swap.get("to")
-                    amount_percent = swap.get("amount_percent", 0)
-                    swap_amount_usd = total_value * (amount_percent / 100)
-                    # Update balances (simplified - in production, wait for actual balance updates)
-                    updated_balances[from_token] = updated_balances.get(from_token, 0) - swap_amount_usd
-                    updated_balances[to_token] = updated_balances.get(to_token, 0) + swap_amount_usd
+            # Post-swap balances from the swaps' Transfer logs (exact, no balanceOf re-reads)
+            successful_swaps = [t["result"] for t in transaction_results if t["type"] == "swap" and t["result"].get("success")]
+            updated_balances_raw = self.reconcile_swap_balances(treasury_balances_raw, successful_swaps)
+            dust_usd = float(os.getenv("DEPOSIT_DUST_USD", "1.0"))
             
-            # Execute deposits for each asset based on allocation
+            # Size the planned deposits against the actual post-swap balances
             # IMPORTANT: We use LI.FI for swaps, then deposit the swapped tokens
             # We do NOT use the orchestrator's internal swap feature
-            for asset, allocation_pct in allocation.items():
-                if allocation_pct <= 0:
-                    continue
-                
-                if asset not in self.SUPPORTED_ASSETS:
-                    logger.warning(f"Invalid asset in allocation: {asset}")
-                    continue
-                
-                # Calculate deposit amount
-                deposit_amount_usd = total_value * (allocation_pct / 100)
-                deposit_amount_raw = int(deposit_amount_usd * (10 ** self.SUPPORTED_ASSETS[asset]["decimals"]))
-                
-                if deposit_amount_raw == 0:
-                    logger.warning(f"Deposit amount too small for {asset}")
-                    continue
+            planned_deposits = []
+            for deposit in plan["deposits"]:
+                asset = deposit["asset"]
+                allocation_pct = deposit["allocation_pct"]
+                deposit_amount_raw = int(deposit["amount_usd"] * (10 ** self.SUPPORTED_ASSETS[asset]["decimals"]))
                 
                 # Check if we have enough balance (after swaps)
-                current_balance = updated_balances.get(asset, 0)
-                if current_balance < deposit_amount_usd:
-                    logger.warning(f"Insufficient {asset} balance: {current_balance} < {deposit_amount_usd}")
+                current_balance_raw = updated_balances_raw.get(asset, 0)
+                if current_balance_raw < deposit_amount_raw:
+                    logger.warning("Insufficient %s balance: %s < %s (raw)",
+                                   asset, current_balance_raw, deposit_amount_raw)
                     # Use available balance instead
-                    deposit_amount_raw = int(current_balance * (10 ** self.SUPPORTED_ASSETS[asset]["decimals"]))
+                    deposit_amount_raw = current_balance_raw
+                elif current_balance_raw - deposit_amount_raw < int(dust_usd * (10 ** self.SUPPORTED_ASSETS[asset]["decimals"])):
+                    # Sweep the remainder instead of leaving dust behind
+                    deposit_amount_raw = current_balance_raw
                 
                 if deposit_amount_raw == 0:
                     continue
-                
+                planned_deposits.append((asset, allocation_pct, deposit_amount_raw))
+
+            # Dry-run every planned deposit in one batched eth_call before signing anything.
+            # The snapshot block is stale once swaps have landed, so re-pin after swaps.
+            simulations = {}
+            if planned_deposits and self.operator_private_key and os.getenv("YIELD_ORCHESTRATOR_ADDRESS", "").strip():
+                swapped = any(t["type"] == "swap" and t["result"].get("success") for t in transaction_results)
+                sim_block = self.w3.eth.block_number if swapped else market_data.get("block_number", "latest")
+
+                # Single-transaction path: all deposits (+ Aave supply) in one orchestrator multicall.
+                # Falls back to per-asset deposits if the batch would revert (e.g. an orchestrator
+                # deployed before multicall was added).
+                if self.batch_deposits:
+                    # The supply leg is sized and gated like a standalone supplyToAave, which reads
+                    # idle after the deposits are broadcast: count this batch's USDC deposit legs,
+                    # which land in the vault before supplyVaultToAave runs
+                    supply_plan = None
+                    if self.supply_after_deposit and self.supply_to_aave_percent > 0 and self.vault_address:
+                        batch_usdc_raw = sum(amount_raw for asset, _, amount_raw in planned_deposits if asset == "USDC")
+                        try:
+                            supply_plan = self.plan_supply_to_aave(market_data, incoming_raw=batch_usdc_raw)
+                        except Exception as e:
+                            logger.warning("Could not plan batched Aave supply: %s", e)
+                    batch_call = self.build_batch_deposit_call(
+                        [{"asset": asset, "amount": amount_raw} for asset, _, amount_raw in planned_deposits],
+                        self.treasury_address,
+                        supply_amount=supply_plan["amount_raw"] if supply_plan else 0,
+                    )
+                    try:
+                        batch_sim = self.simulate_calls([batch_call], sim_block)[0]
+                    except Exception as e:
+                        batch_sim = {"success": False, "revert_reason": str(e)}
+                    full_decision['batch_simulation'] = {"block_number": sim_block, **batch_sim}
+                    if batch_sim["success"]:
+                        logger.info("Executing batched deposit: %s", batch_call['metadata']['amounts'])
+                        batch_result = self.execute_batched_deposit(batch_call)
+                        transaction_results.append({
+                            "type": "batch_deposit",
+                            "assets": [asset for asset, _, _ in planned_deposits],
+                            "allocation_pct": {asset: pct for asset, pct, _ in planned_deposits},
+                            "result": batch_result
+                        })
+                        planned_deposits = []
+                        if supply_plan is not None and batch_result.get("success"):
+                            # The scheduler's verdict stands for this decision: either the supply
+                            # went out in the batch or it is deferred
+                            supply_result = {k: v for k, v in supply_plan.items() if k != "amount_raw"}
+                            if supply_plan["amount_raw"]:
+                                supply_result.update(status=batch_result["status"], tx_hash=batch_result["tx_hash"])
+                                self.supply_scheduler.record_supply(supply_result["amount_usdc"], batch_result["tx_hash"])
+                            full_decision['transaction_result'] = supply_result
+                    else:
+                        logger.warning("Batched deposit would revert (%s); falling back to per-asset deposits",
+                                       batch_sim['revert_reason'])
+
+            if planned_deposits and self.operator_private_key and os.getenv("YIELD_ORCHESTRATOR_ADDRESS", "").strip():
+                try:
+                    sim_results = self.simulate_calls(
+                        [self.build_deposit_call(asset, amount_raw, self.treasury_address) for asset, _, amount_raw in planned_deposits],
+                        sim_block,
+                    )
+                    simulations = {r["metadata"]["asset"]: r for r in sim_results}
+                    full_decision['simulation'] = {"block_number": sim_block, "results": sim_results}
+                except Exception as e:
+                    logger.warning("Deposit simulation unavailable, executing without dry-run: %s", e)
+
+            for asset, allocation_pct, deposit_amount_raw in planned_deposits:
+                simulation = simulations.get(asset)
+                if simulation and not simulation["success"]:
+                    logger.error("Deposit %s rejected before signing: %s", asset, simulation['revert_reason'])
+                    transaction_results.append({
+                        "type": "deposit",
+                        "asset": asset,
+                        "allocation_pct": allocation_pct,
+                        "result": {
+                            "success": False,
+                            "simulated": True,
+                            "error": f"Simulation reverted: {simulation['revert_reason']}",
+                            "asset": asset,
+                            "amount": deposit_amount_raw,
+                        }
+                    })
+                    continue
+
                 # Deposit the asset (already swapped via LI.FI if needed)
                 # We use orchestrator's depositERC20 with inputAsset == targetAsset (no internal swap)
-                logger.info(f"Executing deposit: {asset}, Amount: {deposit_amount_raw} ({allocation_pct}%)")
-                logger.info(f"  Note: Asset already in correct token (swapped via LI.FI if needed)")
+                logger.info("Executing deposit: %s, Amount: %s (%s%%)", asset, deposit_amount_raw, allocation_pct)
+                logger.info("  Note: Asset already in correct token (swapped via LI.FI if needed)")
                 deposit_result = self.execute_orchestrator_deposit(
                     asset,  # asset (inputAsset == targetAsset, no swap)
                     deposit_amount_raw,
@@ -1141,22 +2082,61 @@ Provide your recommendation in the required JSON format with allocation percenta
                 })
                 
                 if deposit_result.get("success"):
-                    logger.info(f"Deposit successful: {deposit_result.get('tx_hash')}")
+                    logger.info("Deposit successful: %s", deposit_result.get('tx_hash'))
                 else:
-                    logger.error(f"Deposit failed: {deposit_result.get('error')}")
+                    logger.error("Deposit failed: %s", deposit_result.get('error'))
+
+        # Push vault idle to Aave when the scheduler says the supply pays for itself
+        # (skipped if a batched deposit already settled the supply)
+        if (llm_decision.get("decision") == "DEPOSIT" and self.supply_after_deposit
+                and self.supply_to_aave_percent > 0 and self.vault_address
+                and 'transaction_result' not in full_decision):
+            full_decision['transaction_result'] = self.execute_supply_to_aave(market_data)
 
         # Add transaction results to decision
         full_decision['transaction_results'] = transaction_results
 
         # Log the decision
         logger.info("=" * 80)
-        logger.info(f"LLM DECISION: {llm_decision['decision']}")
-        logger.info(f"CONFIDENCE: {llm_decision['confidence']}%")
-        logger.info(f"REASONING: {llm_decision['reasoning']}")
+        logger.info("LLM DECISION: %s", llm_decision['decision'], extra={
+            "decision": llm_decision['decision'],
+            "confidence": llm_decision.get('confidence'),
+            "allocation": llm_decision.get('allocation'),
+            "decision_backend": self.decision_backend,
+            "transactions": len(transaction_results),
+        })
+        logger.info("CONFIDENCE: %s%%", llm_decision['confidence'])
+        logger.info("REASONING: %s", llm_decision['reasoning'])
         logger.info("=" * 80)
+
+        # Record mode: flush the exchanges of this analysis to the cassette
+        self.cassette.save()
         
         return full_decision
     
+    def save_decision_history(self):
+        """Write decision_history to llm_decision_history.json."""
+        try:
+            with open('llm_decision_history.json', 'w') as f:
+                json.dump(self.decision_history, f, indent=2)
+        except Exception as e:
+            logger.warning("Could not save decision history: %s", e)
+
+    def run_triggered_analysis(self, trigger: Dict[str, Any]) -> Dict:
+        """
+        reserve_watcher callback: run an analysis because of on-chain events.
+
+        Args:
+            trigger: {"block", "reasons"} from the watcher; stored on the decision
+        """
+        with self.decision_lock, PROFILER.profile_analysis(), \
+                start_span("reserve_watcher trigger", block_number=trigger["block"],
+                           reasons=[r["type"] for r in trigger["reasons"]]):
+            decision = self.make_decision()
+        decision['trigger'] = trigger
+        self.save_decision_history()
+        return decision
+
     def generate_report(self) -> str:
         """Generate a comprehensive report of the latest LLM decision."""
         if not self.decision_history:
@@ -1242,6 +2222,13 @@ RISK TOLERANCE: {latest['risk_tolerance'].upper()}
         report += "| PROJECTED RETURNS:\n"
         report += f"|   30-day: ${llm.get('projected_30day_return', 0):>10.2f}\n"
         report += f"|   90-day: ${llm.get('projected_90day_return', 0):>10.2f}\n"
+        dist = latest.get('return_distribution')
+        if dist and dist.get('paths'):
+            report += f"|   Monte Carlo ({dist['paths']} paths), p5 / p50 / p95:\n"
+            for horizon in ('30d', '90d'):
+                band = dist[horizon]
+                report += (f"|   {horizon:>6}: ${band['p5']:>10.2f} / ${band['p50']:>10.2f} / ${band['p95']:>10.2f}"
+                           f"  (P(loss) {band['prob_loss'] * 100:.1f}%)\n")
 
         if llm.get('risks'):
             report += "|\n"
@@ -1275,7 +2262,10 @@ RISK TOLERANCE: {latest['risk_tolerance'].upper()}
         if tx_result:
             report += "|\n"
             report += "| TRANSACTION RESULT:\n"
-            if tx_result.get('success'):
+            if tx_result.get('status') == 'deferred':
+                report += f"|   Status: DEFERRED\n"
+                report += f"|   Reason: {tx_result.get('scheduler', {}).get('reason', 'N/A')}\n"
+            elif tx_result.get('success'):
                 report += f"|   Status: SUCCESS\n"
                 report += f"|   TX Hash: {tx_result.get('tx_hash', 'N/A')}\n"
                 report += f"|   Amount: {tx_result.get('amount_usdc', 0):.6f} USDC\n"
@@ -1313,6 +2303,7 @@ def get_agent() -> LLMAaveYieldAgent:
         MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o')
         RISK_TOLERANCE = os.getenv('RISK_TOLERANCE', 'moderate').lower()
         SUPPLY_TO_AAVE_PERCENT = int(os.getenv('SUPPLY_TO_AAVE_PERCENT', '5'))
+        SUPPLY_TO_AAVE_ON_DEPOSIT = os.getenv('SUPPLY_TO_AAVE_ON_DEPOSIT', 'false').lower() in ('1', 'true', 'yes')
         
         if not TREASURY_ADDRESS:
             raise ValueError("TREASURY_ADDRESS not found in .env file")
@@ -1330,11 +2321,31 @@ def get_agent() -> LLMAaveYieldAgent:
             risk_tolerance=RISK_TOLERANCE,
             supply_to_aave_percent=SUPPLY_TO_AAVE_PERCENT,
             operator_private_key=OPERATOR_PRIVATE_KEY or None,
+            supply_after_deposit=SUPPLY_TO_AAVE_ON_DEPOSIT,
         )
+        # Background pollers would interleave unpredictably with a cassette; their data is fetched on demand instead
+        if not _agent_instance.cassette.enabled:
+            _agent_instance.tx_tracker.start()
+            _agent_instance.price_feed.start()
+            _agent_instance.quote_service.start()
+            if os.getenv('RESERVE_WATCHER_ENABLED', 'false').lower() in ('1', 'true', 'yes'):
+                _agent_instance.reserve_watcher.start()
         logger.info("Agent instance created")
     return _agent_instance
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop background workers."""
+    if _agent_instance is not None:
+        _agent_instance.tx_tracker.stop()
+        _agent_instance.price_feed.stop()
+        _agent_instance.quote_service.stop()
+        _agent_instance.reserve_watcher.stop()
+        _agent_instance.cassette.save()
+    TRACER.flush()
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API information."""
@@ -1345,6 +2356,12 @@ async def root():
         "endpoints": {
             "/": "This endpoint (API info)",
             "/analyze": "POST - Run full agent analysis and get complete output",
+            "/transactions": "GET - Submitted transactions and their receipt status (?status=pending|confirmed|reverted|dropped)",
+            "/transactions/{tx_hash}": "GET - Status of a single submitted transaction",
+            "/yield/realized": "GET - Realized yield per asset from liquidityIndex deltas (?asset=USDC&window_hours=24)",
+            "/metrics": "GET - Prometheus metrics (stage and dependency latency, RPC calls, LLM tokens, transactions)",
+            "/admin/profile": "POST - Profile the next N analyses (?analyses=1&mode=sampling|deterministic); GET - status and last profile; DELETE - cancel",
+            "/admin/memory": "GET - tracemalloc top allocations and growth since start; POST /admin/memory/start|stop",
             "/health": "GET - Health check"
         }
     }
@@ -1360,6 +2377,8 @@ async def health():
             "agent_initialized": True,
             "vault_address_set": agent.vault_address is not None,
             "operator_key_set": agent.operator_private_key is not None,
+            "transactions": agent.tx_tracker.counts(),
+            "reserve_watcher": agent.reserve_watcher.status(),
         }
     except Exception as e:
         return {
@@ -1368,10 +2387,20 @@ async def health():
         }
 
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrics in text exposition format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.post("/analyze")
-async def analyze():
+def analyze():
     """
     Run the full agent analysis.
+
+    A plain def on purpose: FastAPI runs it in its threadpool, so waiting on
+    decision_lock (held by a watcher-triggered analysis) and the blocking
+    RPC/LLM calls don't stall the event loop.
     Performs all agent operations and returns the complete output including:
     - Market data
     - LLM decision and analysis
@@ -1381,23 +2410,22 @@ async def analyze():
     try:
         agent = get_agent()
         
-        # Run the agent's decision-making process
-        decision = agent.make_decision()
-        
-        # Generate the formatted report
-        report = agent.generate_report()
+        # One trace per analysis; its id is returned so the run can be found in the trace backend
+        with agent.decision_lock, PROFILER.profile_analysis(), start_span("POST /analyze"):
+            # Run the agent's decision-making process
+            decision = agent.make_decision()
+
+            # Generate the formatted report
+            report = agent.generate_report()
         
         # Save decision history to JSON file
-        try:
-            with open('llm_decision_history.json', 'w') as f:
-                json.dump(agent.decision_history, f, indent=2)
-        except Exception as e:
-            logger.warning(f"Could not save decision history: {e}")
+        agent.save_decision_history()
         
         # Return complete output
         return {
             "success": True,
             "timestamp": decision['timestamp'],
+            "trace_id": decision.get('trace_id'),
             "decision": decision['llm_analysis']['decision'],
             "confidence": decision['llm_analysis']['confidence'],
             "full_decision_data": decision,  # Complete decision with all market data
@@ -1410,13 +2438,148 @@ async def analyze():
                 "vault_total": decision['market_data'].get('vault_balances', {}).get('total_usdc'),
                 "transaction_executed": decision.get('transaction_result') is not None,
                 "transaction_success": decision.get('transaction_result', {}).get('success', False) if decision.get('transaction_result') else False,
+                # Broadcast but not yet confirmed; follow up via GET /transactions/{tx_hash}
+                "pending_transactions": [
+                    tx['result']['tx_hash'] for tx in decision.get('transaction_results', [])
+                    if tx.get('result', {}).get('status') == PendingTransactionTracker.STATUS_PENDING
+                ],
             }
         }
     except Exception as e:
-        logger.error(f"Error in /analyze endpoint: {e}", exc_info=True)
+        logger.error("Error in /analyze endpoint: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Agent analysis failed: {str(e)}")
 
 
+@app.get("/transactions")
+async def transactions(status: Optional[str] = None, limit: int = 100):
+    """
+    List transactions submitted by the agent with their reconciled status.
+    Analyses return as soon as transactions are broadcast; poll here for receipts.
+    """
+    valid = (
+        PendingTransactionTracker.STATUS_PENDING,
+        PendingTransactionTracker.STATUS_CONFIRMED,
+        PendingTransactionTracker.STATUS_REVERTED,
+        PendingTransactionTracker.STATUS_DROPPED,
+    )
+    if status is not None and status not in valid:
+        raise HTTPException(status_code=400, detail=f"Invalid status '{status}', expected one of {list(valid)}")
+    agent = get_agent()
+    return {
+        "counts": agent.tx_tracker.counts(),
+        "transactions": agent.tx_tracker.list(status=status, limit=max(1, min(limit, 1000))),
+    }
+
+
+@app.get("/transactions/{tx_hash}")
+async def transaction_status(tx_hash: str):
+    """Get the status of a single submitted transaction."""
+    agent = get_agent()
+    entry = agent.tx_tracker.get(tx_hash)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Transaction {tx_hash} is not tracked")
+    return entry
+
+
+@app.get("/yield/realized")
+async def realized_yield(asset: Optional[str] = None, window_hours: Optional[float] = None):
+    """
+    Realized yield per asset, from liquidityIndex samples taken at each analysis.
+    Without window_hours, returns the 24h / 7d / 30d windows.
+    """
+    agent = get_agent()
+    if asset is not None and asset not in agent.SUPPORTED_ASSETS:
+        raise HTTPException(status_code=400, detail=f"Unsupported asset '{asset}'")
+    if window_hours is None:
+        summary = agent.yield_tracker.summary()
+        return summary if asset is None else {asset: summary.get(asset, {})}
+    assets = [asset] if asset else list(agent.SUPPORTED_ASSETS)
+    return {a: agent.yield_tracker.realized(a, window_seconds=window_hours * 3600) for a in assets}
+
+
+def _require_admin(token: Optional[str]):
+    """Admin endpoints are disabled unless ADMIN_TOKEN is set, and then require it in X-Admin-Token."""
+    expected = os.getenv("ADMIN_TOKEN", "").strip()
+    if not expected:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled (set ADMIN_TOKEN)")
+    # Constant-time comparison, so response timing doesn't leak the token prefix
+    if not token or not secrets.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.post("/admin/profile")
+async def arm_profiler(
+    analyses: int = 1,
+    mode: str = "sampling",
+    interval_ms: float = 5.0,
+    sort: str = "cumulative",
+    limit: int = 40,
+    x_admin_token: Optional[str] = Header(default=None),
+):
+    """
+    Profile the next N analyses (/analyze calls).
+
+    mode=sampling reads the analysis thread's stack every interval_ms (low overhead);
+    mode=deterministic runs them under cProfile. Fetch the result with GET /admin/profile.
+    """
+    _require_admin(x_admin_token)
+    try:
+        return PROFILER.arm(analyses, mode, interval_ms, sort, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/admin/profile")
+async def profiler_status(x_admin_token: Optional[str] = Header(default=None)):
+    """Profiler status and the last finished profile (text report, plus folded stacks when sampled)."""
+    _require_admin(x_admin_token)
+    return {**PROFILER.status(), "last_result": PROFILER.last_result}
+
+
+@app.delete("/admin/profile")
+async def cancel_profiler(x_admin_token: Optional[str] = Header(default=None)):
+    """Cancel an armed profile."""
+    _require_admin(x_admin_token)
+    PROFILER.cancel()
+    return PROFILER.status()
+
+
+@app.post("/admin/memory/start")
+def start_memory_profiler(frames: int = 10, x_admin_token: Optional[str] = Header(default=None)):
+    """Start tracemalloc and take the baseline snapshot growth is measured against."""
+    _require_admin(x_admin_token)
+    return MEMORY_PROFILER.start(frames)
+
+
+@app.post("/admin/memory/stop")
+def stop_memory_profiler(x_admin_token: Optional[str] = Header(default=None)):
+    """Stop tracemalloc (it slows allocation while running)."""
+    _require_admin(x_admin_token)
+    return MEMORY_PROFILER.stop()
+
+
+@app.get("/admin/memory")
+def memory_snapshot(limit: int = 25, key_type: str = "lineno", x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Top allocation sites and their growth since /admin/memory/start.
+
+    Plain def (run in the threadpool): taking and diffing a snapshot can take seconds
+    on a large heap and would otherwise stall the event loop. Also reports the size of the agent's in-memory histories, the usual suspects for growth.
+    """
+    _require_admin(x_admin_token)
+    if key_type not in ("lineno", "filename", "traceback"):
+        raise HTTPException(status_code=400, detail="key_type must be lineno, filename or traceback")
+    if not MEMORY_PROFILER.tracing:
+        raise HTTPException(status_code=409, detail="tracemalloc is not running; POST /admin/memory/start first")
+    result = MEMORY_PROFILER.snapshot(limit, key_type)
+    if _agent_instance is not None:
+        result["agent"] = {
+            "decision_history": len(_agent_instance.decision_history),
+            "apy_history": len(_agent_instance.apy_history),
+        }
+    return result
+
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -0,0 +1,425 @@
+"""
+Backtesting engine for allocation policies.
+
+Replays APY series through pluggable decision policies with simulated swap
+and gas costs, so risk-tolerance settings and rebalance rules can be compared
+without running them live.
+
+Sources:
+- apy_history.json (USDC APY recorded by the agent)
+- the decision journal (llm_decision_history.json; asset_apys per decision)
+- DefiLlama /chart/{pool} daily history for one pool per asset
+
+A policy maps the (time x asset) APY matrix to a (time x asset) weight
+matrix; scores are computed vectorized over time, and only the hold/threshold
+rule scans the rows in order. The engine evaluates a whole batch of weight
+matrices (one per parameter set) at once with cumulative products, and
+sweeps over large parameter grids are split across a process pool.
+
+Usage:
+    python backtest.py --source defillama --policy best_apy \\
+        --grid threshold_bps=0,25,50 --grid lookback=1,7 --grid max_share=0.5,1
+"""
+
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import product
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import requests
+
+from allocation_optimizer import AllocationOptimizer
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+# Recorded APYs above this are treated as bad samples (early unit bugs in apy_history.json)
+MAX_PLAUSIBLE_APY = 100.0
+
+# Series: {"timestamps": (T,) unix seconds, "apys": (T, A) percent, "assets": [A names]}
+Series = Dict[str, Any]
+# Policy: (apys (T, A), params) -> weights (T, A), rows summing to <= 1
+Policy = Callable[[np.ndarray, Dict[str, Any]], np.ndarray]
+
+
+# ---------------------------------------------------------------------------
+# Loaders
+# ---------------------------------------------------------------------------
+
+def _series(timestamps: Sequence[float], apys: np.ndarray, assets: List[str]) -> Series:
+    ts = np.asarray(timestamps, dtype=float)
+    apys = np.asarray(apys, dtype=float).reshape(len(ts), len(assets))
+    order = np.argsort(ts, kind="stable")
+    ts, apys = ts[order], apys[order]
+    # Drop implausible samples and duplicate timestamps
+    keep = np.all((apys >= 0) & (apys <= MAX_PLAUSIBLE_APY), axis=1)
+    keep &= np.concatenate(([True], np.diff(ts) > 0))
+    if (~keep).any():
+        logger.info("Dropped %s implausible or duplicate samples", int((~keep).sum()))
+    return {"timestamps": ts[keep], "apys": apys[keep], "assets": list(assets)}
+
+
+def load_apy_history(path: str = "apy_history.json", asset: str = "USDC") -> Series:
+    """Load the agent's recorded APY history (single asset)."""
+    with open(path, "r") as f:
+        entries = json.load(f)
+    return _series(
+        [e["unix_timestamp"] for e in entries],
+        np.array([[float(e["apy"])] for e in entries]).reshape(-1, 1),
+        [asset],
+    )
+
+
+def load_decision_journal(path: str = "llm_decision_history.json") -> Series:
+    """
+    Load per-asset APYs from the decision journal.
+
+    Decisions without asset_apys (older single-asset entries) contribute their
+    aave_apy as USDC; assets missing from a decision are forward-filled.
+    """
+    with open(path, "r") as f:
+        decisions = json.load(f)
+    rows = []
+    for decision in decisions:
+        market = decision.get("market_data") or {}
+        apys = market.get("asset_apys") or {"USDC": market.get("aave_apy")}
+        ts = datetime.fromisoformat(decision.get("timestamp") or market["timestamp"]).timestamp()
+        rows.append((ts, {a: v for a, v in apys.items() if isinstance(v, (int, float))}))
+    assets = sorted({a for _, apys in rows for a in apys})
+    matrix = np.full((len(rows), len(assets)), np.nan)
+    for i, (_, apys) in enumerate(rows):
+        for j, asset in enumerate(assets):
+            matrix[i, j] = apys.get(asset, np.nan)
+    return _series([ts for ts, _ in rows], _ffill(matrix), assets)
+
+
+def load_defillama(pools: Dict[str, str], session: Optional[requests.Session] = None,
+                   base_url: str = "https://yields.llama.fi") -> Series:
+    """
+    Load daily APY history from DefiLlama for one pool per asset, aligned on common days.
+
+    Args:
+        pools: Asset -> DefiLlama pool id
+        session: Optional requests session
+        base_url: DefiLlama yields API base URL
+    """
+    session = session or requests.Session()
+    per_asset = {}
+    for asset, pool_id in pools.items():
+        response = session.get(f"{base_url.rstrip('/')}/chart/{pool_id}", timeout=30)
+        response.raise_for_status()
+        points = response.json().get("data", [])
+        per_asset[asset] = {
+            # Daily points; key by UTC day so pools with different sample times align
+            int(datetime.fromisoformat(p["timestamp"].replace("Z", "+00:00")).timestamp() // 86400): float(p["apy"])
+            for p in points if p.get("apy") is not None
+        }
+    days = sorted(set.intersection(*(set(v) for v in per_asset.values()))) if per_asset else []
+    assets = list(per_asset)
+    apys = np.array([[per_asset[a][d] for a in assets] for d in days]).reshape(len(days), len(assets))
+    return _series([d * 86400 for d in days], apys, assets)
+
+
+def find_defillama_pools(assets: Sequence[str], session: Optional[requests.Session] = None,
+                         base_url: str = "https://yields.llama.fi") -> Dict[str, str]:
+    """Aave v3 Base pool id per asset symbol, from DefiLlama's pool list."""
+    session = session or requests.Session()
+    response = session.get(f"{base_url.rstrip('/')}/pools", timeout=30)
+    response.raise_for_status()
+    pools = {}
+    for p in response.json().get("data", []):
+        if p.get("chain") == "Base" and p.get("project") == "aave-v3" and p.get("symbol") in assets:
+            pools.setdefault(p["symbol"], p["pool"])
+    return pools
+
+
+def _ffill(matrix: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs down each column (leading NaNs become 0)."""
+    idx = np.where(np.isnan(matrix), 0, np.arange(len(matrix))[:, None])
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    filled = matrix[idx, np.arange(matrix.shape[1])]
+    return np.nan_to_num(filled, nan=0.0)
+
+
+def resample(series: Series, step_seconds: float) -> Series:
+    """Forward-fill a series onto a regular time grid."""
+    ts = series["timestamps"]
+    if len(ts) < 2:
+        return series
+    grid = np.arange(ts[0], ts[-1] + 1e-9, step_seconds)
+    idx = np.searchsorted(ts, grid, side="right") - 1
+    return {"timestamps": grid, "apys": series["apys"][idx], "assets": series["assets"]}
+
+
+# ---------------------------------------------------------------------------
+# Policies
+# ---------------------------------------------------------------------------
+
+def _rolling_mean(apys: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over `window` rows (shorter at the start)."""
+    window = max(int(window), 1)
+    csum = np.cumsum(np.vstack([np.zeros((1, apys.shape[1])), apys]), axis=0)
+    rows = np.arange(1, len(apys) + 1)
+    start = np.maximum(rows - window, 0)
+    return (csum[rows] - csum[start]) / (rows - start)[:, None]
+
+
+def _rolling_std(apys: np.ndarray, window: int) -> np.ndarray:
+    mean = _rolling_mean(apys, window)
+    return np.sqrt(np.maximum(_rolling_mean(apys ** 2, window) - mean ** 2, 0.0))
+
+
+def _capped_ranking_weights(scores: np.ndarray, max_share: float) -> np.ndarray:
+    """Fill the best-scoring assets up to max_share each until 100% is allocated."""
+    order = np.argsort(-scores, axis=1, kind="stable")
+    n_assets = scores.shape[1]
+    # Rank k gets min(max_share, what's left after k full caps)
+    shares = np.clip(1.0 - max_share * np.arange(n_assets), 0.0, max_share)
+    weights = np.zeros_like(scores)
+    np.put_along_axis(weights, order, np.broadcast_to(shares, scores.shape), axis=1)
+    return weights
+
+
+def _hold_unless_better(weights: np.ndarray, scores: np.ndarray, threshold_pct: float,
+                        rebalance_every: int) -> np.ndarray:
+    """
+    Keep the held allocation unless the new target beats it by threshold_pct
+    (APY points, on `scores`), and only change on every rebalance_every-th step.
+
+    The comparison is against what is actually held, so this is a sequential
+    scan over rows; each step is a dot product, cheap next to the engine.
+    """
+    held = np.empty_like(weights)
+    every = max(int(rebalance_every), 1)
+    # Targets are only ever adopted whole, so track the held row by index
+    current = 0
+    value_new = np.sum(weights * scores, axis=1)
+    for t in range(len(weights)):
+        if t % every == 0 and np.any(np.abs(weights[t] - weights[current]) > 1e-12):
+            if value_new[t] - weights[current] @ scores[t] >= threshold_pct:
+                current = t
+        held[t] = weights[current]
+    return held
+
+
+def hold_policy(apys: np.ndarray, params: Dict[str, Any]) -> np.ndarray:
+    """Static allocation: params["weights"] (one per asset), default all in the first asset."""
+    weights = np.asarray(params.get("weights") or [1.0] + [0.0] * (apys.shape[1] - 1), dtype=float)
+    return np.broadcast_to(weights, apys.shape).copy()
+
+
+def best_apy_policy(apys: np.ndarray, params: Dict[str, Any]) -> np.ndarray:
+    """
+    Chase the highest trailing-mean APY, capped at max_share per asset.
+
+    Params: lookback (rows, default 1), max_share (default 1.0),
+    threshold_bps (min APY gain to move, default 0), rebalance_every (rows, default 1).
+    """
+    scores = _rolling_mean(apys, params.get("lookback", 1))
+    weights = _capped_ranking_weights(scores, params.get("max_share", 1.0))
+    return _hold_unless_better(weights, scores, params.get("threshold_bps", 0) / 100,
+                               params.get("rebalance_every", 1))
+
+
+def risk_profile_policy(apys: np.ndarray, params: Dict[str, Any]) -> np.ndarray:
+    """
+    The optimizer's risk profile: concentration cap and volatility-penalized APY.
+
+    Params: risk_tolerance (default "moderate"), lookback (rows, default 7),
+    threshold_bps (default 0), rebalance_every (rows, default 1).
+    """
+    profile = AllocationOptimizer.RISK_PROFILES[params.get("risk_tolerance", "moderate")]
+    lookback = params.get("lookback", 7)
+    scores = _rolling_mean(apys, lookback) - profile["volatility_penalty"] * _rolling_std(apys, lookback)
+    weights = _capped_ranking_weights(scores, profile["max_share"])
+    return _hold_unless_better(weights, scores, params.get("threshold_bps", 0) / 100,
+                               params.get("rebalance_every", 1))
+
+
+POLICIES: Dict[str, Policy] = {
+    "hold": hold_policy,
+    "best_apy": best_apy_policy,
+    "risk_profile": risk_profile_policy,
+}
+
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+
+def simulate(series: Series, weights: np.ndarray, initial_usd: float = 10_000.0,
+             swap_cost_bps: float = 10.0, gas_per_tx_usd: float = 0.05) -> Dict[str, np.ndarray]:
+    """
+    Evaluate a batch of weight matrices over a series.
+
+    Weights set at row t earn row t's APY until row t+1. Moving weight between
+    assets costs swap_cost_bps on the traded value plus gas per swap leg and
+    per deposit; both are charged when the weights change.
+
+    Args:
+        series: APY series
+        weights: (N, T, A) or (T, A) weight matrices
+        initial_usd: Starting value
+        swap_cost_bps: Swap cost (fees + price impact)
+        gas_per_tx_usd: Gas per transaction
+
+    Returns:
+        Dict of (N,) arrays: final_usd, net_apy, gross_apy, swap_cost_usd,
+        gas_cost_usd, tx_count, turnover
+    """
+    weights = np.asarray(weights, dtype=float)
+    if weights.ndim == 2:
+        weights = weights[None]
+    ts, apys = series["timestamps"], series["apys"]
+    n = weights.shape[0]
+    if len(ts) < 2:
+        zeros = np.zeros(n)
+        return {"final_usd": zeros + initial_usd, "net_apy": zeros, "gross_apy": zeros,
+                "swap_cost_usd": zeros, "gas_cost_usd": zeros, "tx_count": zeros, "turnover": zeros}
+
+    dt_years = np.diff(ts) / SECONDS_PER_YEAR                                    # (T-1,)
+    period_return = np.einsum("nta,ta->nt", weights[:, :-1], apys[:-1]) / 100 * dt_years
+    growth = 1.0 + period_return                                                 # (N, T-1)
+
+    # Changes vs the previous row (first row: deposits from cash into each asset)
+    previous = np.concatenate([np.zeros_like(weights[:, :1]), weights[:, :-1]], axis=1)
+    delta = weights - previous
+    swapped = np.clip(np.minimum(delta.clip(min=0).sum(axis=2), -delta.clip(max=0).sum(axis=2)), 0, None)
+    swapped[:, 0] = 0.0                                                          # initial deposit isn't a swap
+    swap_legs = np.minimum((delta < -1e-9).sum(axis=2), (delta > 1e-9).sum(axis=2))
+    swap_legs = np.where(swapped > 0, np.maximum(swap_legs, 1), 0)
+    deposits = (delta > 1e-9).sum(axis=2)
+    tx = swap_legs + deposits                                                    # (N, T)
+
+    # Value path: proportional swap cost folds into growth; gas is subtracted in USD.
+    # After row t's trades, V_t = P_t * (V_0 - sum_{s<=t} gas_s / P_s), where P is the
+    # cumulative product of swap-cost and growth factors up to row t.
+    keep = 1.0 - swapped * swap_cost_bps / 10_000
+    factors = np.concatenate([keep[:, :1], growth * keep[:, 1:]], axis=1)       # (N, T)
+    cumulative = np.cumprod(factors, axis=1)
+    gas = tx * gas_per_tx_usd
+    final = cumulative[:, -1] * (initial_usd - np.sum(gas / cumulative, axis=1))
+
+    gross = initial_usd * np.prod(growth, axis=1)
+    years = (ts[-1] - ts[0]) / SECONDS_PER_YEAR
+    # Swap cost in USD approximated at the value before each trade
+    value_before = initial_usd * np.concatenate([np.ones((n, 1)), np.cumprod(growth, axis=1)], axis=1)
+    swap_cost = np.sum(value_before * swapped * swap_cost_bps / 10_000, axis=1)
+    return {
+        "final_usd": final,
+        "net_apy": ((np.maximum(final, 0) / initial_usd) ** (1 / years) - 1) * 100,
+        "gross_apy": ((gross / initial_usd) ** (1 / years) - 1) * 100,
+        "swap_cost_usd": swap_cost,
+        "gas_cost_usd": gas.sum(axis=1),
+        "tx_count": tx.sum(axis=1),
+        "turnover": swapped.sum(axis=1),
+    }
+
+
+def run_grid(series: Series, policy: str, param_sets: List[Dict[str, Any]], **costs) -> List[Dict[str, Any]]:
+    """Evaluate one policy for many parameter sets in a single vectorized batch."""
+    weights = np.stack([POLICIES[policy](series["apys"], params) for params in param_sets])
+    metrics = simulate(series, weights, **costs)
+    return [
+        {"policy": policy, "params": params, **{k: float(v[i]) for k, v in metrics.items()}}
+        for i, params in enumerate(param_sets)
+    ]
+
+
+def sweep(series: Series, policy: str, grid: Dict[str, Sequence[Any]], processes: Optional[int] = None,
+          chunk_size: int = 256, **costs) -> List[Dict[str, Any]]:
+    """
+    Backtest every combination of a parameter grid, best net APY first.
+
+    Grids larger than one chunk are split across a process pool.
+
+    Args:
+        series: APY series
+        policy: Name in POLICIES
+        grid: Param name -> values to try
+        processes: Worker processes (None = CPU count; 1 = in-process)
+        chunk_size: Parameter sets per vectorized batch
+        **costs: initial_usd, swap_cost_bps, gas_per_tx_usd for simulate()
+    """
+    keys = list(grid)
+    param_sets = [dict(zip(keys, values)) for values in product(*(grid[k] for k in keys))] or [{}]
+    chunks = [param_sets[i:i + chunk_size] for i in range(0, len(param_sets), chunk_size)]
+    if len(chunks) > 1 and processes != 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            parts = list(pool.map(_run_chunk, [(series, policy, chunk, costs) for chunk in chunks]))
+    else:
+        parts = [run_grid(series, policy, chunk, **costs) for chunk in chunks]
+    results = [r for part in parts for r in part]
+    results.sort(key=lambda r: r["net_apy"], reverse=True)
+    return results
+
+
+def _run_chunk(job):
+    series, policy, chunk, costs = job
+    return run_grid(series, policy, chunk, **costs)
+
+
+def _parse_grid(items: Sequence[str]) -> Dict[str, List[Any]]:
+    grid = {}
+    for item in items:
+        key, _, values = item.partition("=")
+        parsed = []
+        for value in values.split(","):
+            try:
+                parsed.append(json.loads(value))
+            except json.JSONDecodeError:
+                parsed.append(value)
+        grid[key.strip()] = parsed
+    return grid
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Backtest allocation policies over historical APYs")
+    parser.add_argument("--source", choices=["apy_history", "journal", "defillama"], default="apy_history")
+    parser.add_argument("--path", help="File for apy_history/journal sources")
+    parser.add_argument("--assets", default="USDC,USDT,DAI", help="Assets for the defillama source")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="best_apy")
+    parser.add_argument("--grid", action="append", default=[], help="param=v1,v2 (repeatable)")
+    parser.add_argument("--resample-hours", type=float, default=0, help="Forward-fill onto a regular grid")
+    parser.add_argument("--initial-usd", type=float, default=10_000.0)
+    parser.add_argument("--swap-cost-bps", type=float, default=float(os.getenv("OPTIMIZER_DEFAULT_SWAP_BPS", "10")))
+    parser.add_argument("--gas-per-tx-usd", type=float, default=0.05)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--output", help="Write all results as JSON")
+    args = parser.parse_args()
+
+    if args.source == "apy_history":
+        series = load_apy_history(args.path or "apy_history.json")
+    elif args.source == "journal":
+        series = load_decision_journal(args.path or "llm_decision_history.json")
+    else:
+        assets = [a.strip() for a in args.assets.split(",") if a.strip()]
+        pool_id = os.getenv("DEFILLAMA_POOL_ID", "").strip()
+        pools = {"USDC": pool_id} if pool_id and assets == ["USDC"] else find_defillama_pools(assets)
+        series = load_defillama(pools)
+    if args.resample_hours:
+        series = resample(series, args.resample_hours * 3600)
+    logger.info("Loaded %s samples for %s", len(series['timestamps']), series['assets'])
+
+    results = sweep(
+        series, args.policy, _parse_grid(args.grid), processes=args.processes,
+        initial_usd=args.initial_usd, swap_cost_bps=args.swap_cost_bps, gas_per_tx_usd=args.gas_per_tx_usd,
+    )
+    print(f"{'net APY':>9} {'gross APY':>10} {'txs':>5} {'turnover':>9} {'costs $':>9}  params")
+    for r in results[:args.top]:
+        print(f"{r['net_apy']:>8.4f}% {r['gross_apy']:>9.4f}% {r['tx_count']:>5.0f} {r['turnover']:>9.2f} "
+              f"{r['swap_cost_usd'] + r['gas_cost_usd']:>9.2f}  {json.dumps(r['params'])}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"source": args.source, "assets": series["assets"], "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""
+End-to-end latency benchmark for the agent.
+
+Starts the local stand-ins (stand_ins.py) for the RPC node, DefiLlama,
+CoinGecko, LI.FI and OpenAI, points a fresh agent at them and times each
+stage of a decision:
+
+- get_market_context
+- ask_llm_for_decision (on a fixed market context)
+- make_decision
+- POST /analyze through the real FastAPI app served by uvicorn
+
+For every stage it reports latency percentiles and the requests each
+iteration sent to the stand-ins (RPC round trips, RPC calls per method,
+HTTP requests per service). Runs are appended to a JSON results file and
+compared with the previous run (or a named baseline) so regressions show up.
+
+Usage:
+    python benchmark.py                          # 10 iterations, compare with last run
+    python benchmark.py -n 30 --llm-latency-ms 800 --rpc-latency-ms 40
+    python benchmark.py --baseline 2 --fail-on-regression
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from stand_ins import StandInServer, StandInState
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("get_market_context", "ask_llm_for_decision", "make_decision", "analyze")
+
+# Stand-in treasury and vault
+TREASURY_ADDRESS = "0x1111111111111111111111111111111111111111"
+VAULT_ADDRESS = "0x2222222222222222222222222222222222222222"
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(latencies_ms: List[float], counts: List[Dict[str, int]]) -> Dict[str, Any]:
+    """Latency percentiles and mean per-iteration request counts for one stage."""
+    keys = sorted({k for c in counts for k in c})
+    return {
+        "iterations": len(latencies_ms),
+        "latency_ms": {
+            "min": min(latencies_ms),
+            "p50": _percentile(latencies_ms, 50),
+            "p95": _percentile(latencies_ms, 95),
+            "max": max(latencies_ms),
+            "mean": statistics.fmean(latencies_ms),
+        },
+        "requests": {k: sum(c.get(k, 0) for c in counts) / len(counts) for k in keys},
+    }
+
+
+def _stand_in_env(server: StandInServer) -> Dict[str, str]:
+    env = server.env()
+    env.update({
+        "OPENAI_API_KEY": "sk-benchmark",
+        "TREASURY_ADDRESS": TREASURY_ADDRESS,
+        "YIELD_VAULT_ADDRESS": VAULT_ADDRESS,
+        "OPERATOR_PRIVATE_KEY": "",
+        "CASSETTE_MODE": "off",
+    })
+    return env
+
+
+@contextmanager
+def stand_in_agent(
+    latency_ms: Optional[Dict[str, float]] = None,
+    llm_decision: str = "HOLD",
+    defillama_pools: int = 18_000,
+) -> Iterator[Tuple[Any, Any, StandInServer]]:
+    """
+    A fresh agent wired to running stand-ins, installed as the API's agent.
+
+    The environment and working directory are restored on exit (state files
+    such as the decision history go to a scratch directory). No background
+    pollers are started, so their requests don't land in measured counts.
+
+    Args:
+        latency_ms: Stand-in latency per service
+        llm_decision: Decision returned by the fake LLM
+        defillama_pools: Pools in the fake DefiLlama /pools payload
+
+    Yields:
+        (api module, agent, stand-in server)
+    """
+    import api  # imported late: reads its configuration from the environment set up here
+
+    state = StandInState(api.LLMAaveYieldAgent.SUPPORTED_ASSETS, TREASURY_ADDRESS, VAULT_ADDRESS,
+                         llm_decision=llm_decision)
+    server = StandInServer(state, latency_ms=latency_ms, defillama_pools=defillama_pools).start()
+    env = _stand_in_env(server)
+    previous_env = {k: os.environ.get(k) for k in env}
+    previous_cwd = os.getcwd()
+    workdir = tempfile.TemporaryDirectory(prefix="agent-bench-")
+    try:
+        os.environ.update(env)
+        os.chdir(workdir.name)
+        agent = api.LLMAaveYieldAgent(
+            rpc_url=os.environ["BASE_SEPOLIA_RPC_URL"],
+            treasury_address=TREASURY_ADDRESS,
+            openai_api_key=os.environ["OPENAI_API_KEY"],
+            model="gpt-4o",
+            risk_tolerance="moderate",
+        )
+        api._agent_instance = agent
+        yield api, agent, server
+    finally:
+        api._agent_instance = None
+        os.chdir(previous_cwd)
+        workdir.cleanup()
+        for key, value in previous_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        server.stop()
+
+
+def serve_app(app, thread_name: str = "benchmark-api"):
+    """
+    Serve a FastAPI app with uvicorn on a free local port in a background thread.
+
+    Returns:
+        (uvicorn.Server, base URL); set should_exit on the server to stop it
+    """
+    import socket
+
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off")
+    uvicorn_server = uvicorn.Server(config)
+    threading.Thread(target=uvicorn_server.run, name=thread_name, daemon=True).start()
+    deadline = time.time() + 10
+    while not uvicorn_server.started:
+        if time.time() > deadline:
+            raise RuntimeError("API server did not start")
+        time.sleep(0.05)
+    return uvicorn_server, f"http://127.0.0.1:{port}"
+
+
+class AgentBenchmark:
+    """
+    Runs the agent against local stand-ins and measures each stage.
+    """
+
+    def __init__(
+        self,
+        iterations: int = 10,
+        warmup: int = 2,
+        llm_latency_ms: float = 0.0,
+        rpc_latency_ms: float = 0.0,
+        http_latency_ms: float = 0.0,
+        llm_decision: str = "HOLD",
+        defillama_pools: int = 18_000,
+    ):
+        """
+        Args:
+            iterations: Measured iterations per stage
+            warmup: Unmeasured iterations per stage (connection setup, caches)
+            llm_latency_ms: Latency of the fake OpenAI endpoint
+            rpc_latency_ms: Latency per JSON-RPC round trip
+            http_latency_ms: Latency of DefiLlama, CoinGecko and LI.FI
+            llm_decision: Decision returned by the fake LLM ("HOLD" or "DEPOSIT")
+            defillama_pools: Pools in the fake DefiLlama /pools payload
+        """
+        self.iterations = iterations
+        self.warmup = warmup
+        self.llm_decision = llm_decision
+        self.latency_ms = {
+            "openai": llm_latency_ms,
+            "rpc": rpc_latency_ms,
+            "defillama": http_latency_ms,
+            "coingecko": http_latency_ms,
+            "lifi": http_latency_ms,
+        }
+        self.defillama_pools = defillama_pools
+
+    def _measure(self, server: StandInServer, fn: Callable[[], Any]) -> Dict[str, Any]:
+        """Warm up, then time `fn` and collect stand-in request counts per iteration."""
+        for _ in range(self.warmup):
+            fn()
+        latencies, counts = [], []
+        for _ in range(self.iterations):
+            server.reset_counts()
+            started = time.perf_counter()
+            fn()
+            latencies.append((time.perf_counter() - started) * 1000)
+            counts.append(server.reset_counts())
+        return summarize(latencies, counts)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run every stage.
+
+        Returns:
+            Dict with configuration, per-stage summaries and a timestamp
+        """
+        stages: Dict[str, Any] = {}
+        with stand_in_agent(self.latency_ms, self.llm_decision, self.defillama_pools) as (api, agent, server):
+            stages["get_market_context"] = self._measure(server, agent.get_market_context)
+            market_data = agent.get_market_context()
+            stages["ask_llm_for_decision"] = self._measure(server, lambda: agent.ask_llm_for_decision(market_data))
+            stages["make_decision"] = self._measure(server, agent.make_decision)
+
+            uvicorn_server, url = serve_app(api.app)
+            try:
+                with requests.Session() as client:
+                    def analyze():
+                        response = client.post(f"{url}/analyze", timeout=120)
+                        response.raise_for_status()
+                    stages["analyze"] = self._measure(server, analyze)
+            finally:
+                uvicorn_server.should_exit = True
+
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "config": {
+                "iterations": self.iterations,
+                "warmup": self.warmup,
+                "latency_ms": self.latency_ms,
+                "llm_decision": self.llm_decision,
+                "defillama_pools": self.defillama_pools,
+            },
+            "stages": stages,
+        }
+
+
+def load_results(path: str) -> List[Dict[str, Any]]:
+    """Previously stored runs (oldest first)."""
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning("Could not load benchmark results from %s: %s", path, e)
+        return []
+
+
+def save_results(path: str, runs: List[Dict[str, Any]]):
+    with open(path, "w") as f:
+        json.dump(runs, f, indent=2)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Regressions of `current` against `baseline`.
+
+    A stage regresses when its p50 latency grows by more than `tolerance`
+    (fraction), or when it sends more RPC round trips or calls per iteration.
+
+    Returns:
+        Human-readable regression descriptions (empty if none)
+    """
+    regressions = []
+    for stage, result in current["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before:
+            continue
+        p50, p50_before = result["latency_ms"]["p50"], before["latency_ms"]["p50"]
+        if p50_before > 0 and p50 > p50_before * (1 + tolerance):
+            regressions.append(f"{stage}: p50 {p50:.1f} ms vs {p50_before:.1f} ms (+{(p50 / p50_before - 1) * 100:.0f}%)")
+        for key in ("rpc.round_trips", "rpc.calls"):
+            now, then = result["requests"].get(key, 0), before["requests"].get(key, 0)
+            if now > then:
+                regressions.append(f"{stage}: {key} {now:g} vs {then:g} per iteration")
+    return regressions
+
+
+def print_report(run: Dict[str, Any], baseline: Optional[Dict[str, Any]]):
+    print(f"\n{'stage':<22}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'rpc trips':>11}{'rpc calls':>11}{'http':>7}")
+    for stage in STAGES:
+        result = run["stages"].get(stage)
+        if not result:
+            continue
+        lat, req = result["latency_ms"], result["requests"]
+        http = sum(v for k, v in req.items() if k.startswith("http.") and k != "http.rpc")
+        line = (f"{stage:<22}{lat['p50']:>10.1f}{lat['p95']:>10.1f}{lat['max']:>10.1f}"
+                f"{req.get('rpc.round_trips', 0):>11g}{req.get('rpc.calls', 0):>11g}{http:>7g}")
+        before = (baseline or {}).get("stages", {}).get(stage)
+        if before and before["latency_ms"]["p50"] > 0:
+            line += f"   ({(lat['p50'] / before['latency_ms']['p50'] - 1) * 100:+.0f}% p50 vs baseline)"
+        print(line)
+    for stage in STAGES:
+        result = run["stages"].get(stage)
+        if result:
+            methods = {k[4:]: v for k, v in result["requests"].items()
+                       if k.startswith("rpc.") and k not in ("rpc.round_trips", "rpc.calls") and not k.startswith("rpc.eth_call.")}
+            print(f"  {stage} rpc calls: {json.dumps(methods, sort_keys=True)}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the agent against local stand-ins")
+    parser.add_argument("-n", "--iterations", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--llm-latency-ms", type=float, default=float(os.getenv("BENCHMARK_LLM_LATENCY_MS", "0")))
+    parser.add_argument("--rpc-latency-ms", type=float, default=float(os.getenv("BENCHMARK_RPC_LATENCY_MS", "0")))
+    parser.add_argument("--http-latency-ms", type=float, default=float(os.getenv("BENCHMARK_HTTP_LATENCY_MS", "0")))
+    parser.add_argument("--llm-decision", choices=["HOLD", "DEPOSIT"], default="HOLD")
+    parser.add_argument("--defillama-pools", type=int, default=18_000)
+    parser.add_argument("--output", default=os.getenv("BENCHMARK_RESULTS_FILE", "benchmark_results.json"),
+                        help="JSON file runs are appended to")
+    parser.add_argument("--baseline", type=int, default=None,
+                        help="Index of the stored run to compare with (default: the previous run)")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p50 slowdown as a fraction")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    runs = load_results(output)
+    run = AgentBenchmark(
+        iterations=args.iterations,
+        warmup=args.warmup,
+        llm_latency_ms=args.llm_latency_ms,
+        rpc_latency_ms=args.rpc_latency_ms,
+        http_latency_ms=args.http_latency_ms,
+        llm_decision=args.llm_decision,
+        defillama_pools=args.defillama_pools,
+    ).run()
+
+    baseline = None
+    if runs:
+        baseline = runs[args.baseline] if args.baseline is not None else runs[-1]
+        if baseline.get("config") != run["config"]:
+            print("Note: baseline was run with a different configuration")
+    print_report(run, baseline)
+
+    regressions = compare(run, baseline, args.tolerance) if baseline else []
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+
+    if not args.no_save:
+        runs.append(run)
+        save_results(output, runs)
+        print(f"\nSaved run #{len(runs) - 1} to {output}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""
+Record/replay cassettes for deterministic offline runs.
+
+In record mode every HTTP exchange the agent makes — JSON-RPC (web3 and the
+batch client share one requests session), DefiLlama, CoinGecko, LI.FI and the
+OpenAI API — is captured with its latency into one gzip-compressed JSON file.
+In replay mode the same session and the OpenAI client are served entirely
+from the cassette, so an analysis can be re-run without network, in CI, or
+with the recorded latencies to study where time goes.
+
+Matching: requests are keyed on method, URL and body, with JSON-RPC ids
+stripped (they are per-process counters). Repeated identical requests are
+answered in recorded order. A non-JSON-RPC request whose body differs (e.g.
+an LLM prompt containing a new timestamp) falls back to the next unused
+recording for the same method and URL. Replayed JSON-RPC responses get their ids rewritten to
+the new request's ids.
+
+A request with no recording raises CassetteMiss, a ConnectionError, so the
+agent's normal network-error handling applies.
+"""
+
+import base64
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Response headers worth keeping (the rest is transport noise)
+KEPT_HEADERS = ("content-type", "x-request-id")
+
+
+class CassetteMiss(requests.ConnectionError):
+    """Raised in replay mode when a request has no recording."""
+
+
+def _normalize_body(body: Optional[bytes]) -> Tuple[str, Optional[List[Any]]]:
+    """
+    Canonical request body for matching, plus the JSON-RPC ids it carried (in order).
+    """
+    if not body:
+        return "", None
+    try:
+        payload = json.loads(body)
+    except (ValueError, UnicodeDecodeError):
+        return base64.b64encode(body).decode(), None
+    items = payload if isinstance(payload, list) else [payload]
+    if items and all(isinstance(i, dict) and "jsonrpc" in i for i in items):
+        ids = [i.get("id") for i in items]
+        stripped = [{k: v for k, v in i.items() if k != "id"} for i in items]
+        payload = stripped if isinstance(payload, list) else stripped[0]
+        return json.dumps(payload, sort_keys=True, separators=(",", ":")), ids
+    return json.dumps(payload, sort_keys=True, separators=(",", ":")), None
+
+
+def _ids_to_positions(content: bytes, request_ids: List[Any]) -> bytes:
+    """Replace JSON-RPC response ids with the position of their request."""
+    try:
+        payload = json.loads(content)
+    except ValueError:
+        return content
+    positions = {rid: i for i, rid in enumerate(request_ids)}
+    items = payload if isinstance(payload, list) else [payload]
+    for item in items:
+        if isinstance(item, dict) and item.get("id") in positions:
+            item["id"] = positions[item["id"]]
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def _positions_to_ids(content: bytes, request_ids: List[Any]) -> bytes:
+    """Inverse of _ids_to_positions for a new request's ids."""
+    try:
+        payload = json.loads(content)
+    except ValueError:
+        return content
+    items = payload if isinstance(payload, list) else [payload]
+    for item in items:
+        if isinstance(item, dict) and isinstance(item.get("id"), int) and item["id"] < len(request_ids):
+            item["id"] = request_ids[item["id"]]
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def _httpx_module():
+    """httpx2 (what the OpenAI SDK depends on since its 3.x releases), else httpx."""
+    try:
+        import httpx2
+        return httpx2
+    except ImportError:
+        import httpx
+        return httpx
+
+
+class Cassette:
+    """
+    Recorded HTTP interactions with record and replay modes.
+    """
+
+    MODES = ("off", "record", "replay")
+
+    def __init__(self, path: str = "cassette.json.gz", mode: str = "off", replay_latency: bool = False):
+        """
+        Args:
+            path: Cassette file (gzip-compressed if it ends in .gz)
+            mode: "off", "record" or "replay"
+            replay_latency: In replay mode, sleep for each interaction's recorded latency
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}' (expected one of {self.MODES})")
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self._lock = threading.Lock()
+        self._interactions: List[Dict[str, Any]] = []
+        # Replay indexes into _interactions: exact key -> indexes; (method, url) -> indexes
+        self._by_key: Dict[Tuple[str, str, str], Deque[int]] = defaultdict(deque)
+        self._by_url: Dict[Tuple[str, str], Deque[int]] = defaultdict(deque)
+        self._used = set()
+        if mode == "replay":
+            self._load()
+
+    @classmethod
+    def from_env(cls) -> "Cassette":
+        """Cassette configured by CASSETTE_MODE, CASSETTE_PATH and CASSETTE_REPLAY_LATENCY."""
+        return cls(
+            path=os.getenv("CASSETTE_PATH", "cassette.json.gz"),
+            mode=os.getenv("CASSETTE_MODE", "off").lower(),
+            replay_latency=os.getenv("CASSETTE_REPLAY_LATENCY", "false").lower() == "true",
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def _open(self, mode: str):
+        return gzip.open(self.path, mode + "t") if self.path.endswith(".gz") else open(self.path, mode)
+
+    def _load(self):
+        """Load and index a cassette for replay."""
+        with self._open("r") as f:
+            data = json.load(f)
+        self._interactions = data.get("interactions", [])
+        for i, interaction in enumerate(self._interactions):
+            request = interaction["request"]
+            self._by_key[(request["method"], request["url"], request["body"])].append(i)
+            self._by_url[(request["method"], request["url"])].append(i)
+        logger.info("Loaded cassette %s (%s interactions)", self.path, len(self._interactions))
+
+    def save(self):
+        """Write recorded interactions (record mode only)."""
+        if self.mode != "record":
+            return
+        with self._lock:
+            data = {"version": 1, "recorded_at": time.time(), "interactions": list(self._interactions)}
+        with self._open("w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        logger.info("Saved cassette %s (%s interactions)", self.path, len(data['interactions']))
+
+    def record(self, method: str, url: str, body: Optional[bytes], status: int,
+               headers: Dict[str, str], content: bytes, elapsed: float):
+        """Capture one exchange."""
+        normalized, rpc_ids = _normalize_body(body)
+        if rpc_ids is not None:
+            content = _ids_to_positions(content, rpc_ids)
+        interaction = {
+            "request": {"method": method.upper(), "url": url, "body": normalized},
+            "response": {
+                "status": status,
+                "headers": {k: v for k, v in headers.items() if k.lower() in KEPT_HEADERS},
+                "body": base64.b64encode(content).decode(),
+            },
+            "elapsed_ms": elapsed * 1000,
+        }
+        with self._lock:
+            self._interactions.append(interaction)
+
+    def _take(self, pool: Optional[Deque[int]]) -> Optional[int]:
+        """Next unused recording in a pool; once all are used, the last one keeps answering."""
+        if not pool:
+            return None
+        while len(pool) > 1 and pool[0] in self._used:
+            pool.popleft()
+        index = pool[0]
+        if index in self._used:
+            return index
+        self._used.add(index)
+        if len(pool) > 1:
+            pool.popleft()
+        return index
+
+    def play(self, method: str, url: str, body: Optional[bytes]) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Recorded response for a request.
+
+        Returns:
+            (status, headers, content)
+
+        Raises:
+            CassetteMiss: No unused recording matches the request
+        """
+        method = method.upper()
+        normalized, rpc_ids = _normalize_body(body)
+        with self._lock:
+            index = self._take(self._by_key.get((method, url, normalized)))
+            if index is None and rpc_ids is None:
+                # Body changed (e.g. a prompt with a new timestamp): next recording for the URL.
+                # JSON-RPC never falls back; a different call must not get another call's result.
+                index = self._take(self._by_url.get((method, url)))
+            if index is None:
+                raise CassetteMiss(f"No cassette recording for {method} {url}")
+            interaction = self._interactions[index]
+        if self.replay_latency:
+            time.sleep(interaction["elapsed_ms"] / 1000)
+        response = interaction["response"]
+        content = base64.b64decode(response["body"])
+        if rpc_ids is not None:
+            content = _positions_to_ids(content, rpc_ids)
+        return response["status"], dict(response["headers"]), content
+
+    def install(self, session: requests.Session):
+        """Route a requests session through the cassette (no-op when off)."""
+        if not self.enabled:
+            return
+        adapter = CassetteAdapter(self)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+    def httpx_client(self):
+        """
+        httpx client for the OpenAI SDK that records or replays through the cassette.
+
+        Built on the HTTP library the installed SDK uses: httpx2 for current
+        releases, httpx for older ones (the SDK accepts a client of either).
+
+        Returns None when the cassette is off (the SDK then builds its own client).
+        """
+        if not self.enabled:
+            return None
+        httpx = _httpx_module()
+
+        cassette = self
+
+        class CassetteTransport(httpx.BaseTransport):
+            def __init__(self):
+                self._live = httpx.HTTPTransport() if cassette.mode == "record" else None
+
+            def handle_request(self, request: httpx.Request) -> httpx.Response:
+                body = request.read()
+                if cassette.mode == "replay":
+                    try:
+                        status, headers, content = cassette.play(request.method, str(request.url), body)
+                    except CassetteMiss as e:
+                        raise httpx.ConnectError(str(e), request=request) from e
+                    return httpx.Response(status, headers=headers, content=content, request=request)
+                started = time.perf_counter()
+                response = self._live.handle_request(request)
+                content = response.read()
+                cassette.record(request.method, str(request.url), body, response.status_code,
+                                dict(response.headers), content, time.perf_counter() - started)
+                headers = {k: v for k, v in response.headers.items()
+                           if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")}
+                return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+            def close(self):
+                if self._live:
+                    self._live.close()
+
+        return httpx.Client(transport=CassetteTransport())
+
+
+class CassetteAdapter(HTTPAdapter):
+    """requests transport adapter that records to or replays from a Cassette."""
+
+    def __init__(self, cassette: Cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        body = request.body.encode() if isinstance(request.body, str) else request.body
+        if self.cassette.mode == "replay":
+            status, headers, content = self.cassette.play(request.method, request.url, body)
+            return self._build(request, status, headers, content)
+        started = time.perf_counter()
+        response = super().send(request, **kwargs)
+        content = response.content  # decoded (gzip etc. already undone by urllib3)
+        self.cassette.record(request.method, request.url, body, response.status_code,
+                             dict(response.headers), content, time.perf_counter() - started)
+        return response
+
+    def _build(self, request, status: int, headers: Dict[str, str], content: bytes) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response.headers = requests.structures.CaseInsensitiveDict(headers)
+        response._content = content
+        response.url = request.url
+        response.request = request
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.connection = self
+        return response
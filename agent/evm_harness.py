@@ -0,0 +1,543 @@
+"""
+In-process EVM harness for the vault/orchestrator execution path.
+
+Deploys the Foundry-built contracts (YieldVault, YieldStrategy,
+YieldOrchestrator, YieldReallocator, YieldDistributor) together with the
+mocks in contracts/test/mocks (MockERC20 per supported asset, MockAavePool)
+into an eth-tester / py-evm chain, wired the way
+script/DeployCompleteSystem.s.sol wires them, with one vault and strategy per
+asset. The chain is served over a local JSON-RPC endpoint, so the agent runs
+unmodified: web3 and the batch RPC client both talk to it over HTTP.
+
+It then drives the real execution path — make_decision's multi-asset deposit
+loop, execute_orchestrator_deposit and execute_supply_to_aave — with a fixed
+market snapshot and decision, and measures transactions per rebalance, gas
+used, RPC calls and throughput. The off-chain services the agent still
+touches (CoinGecko for the ETH price, LI.FI, DefiLlama, OpenAI) are pointed
+at the local stand-ins from stand_ins.py, so a run never leaves the machine.
+
+Requires the contract artifacts (`forge build` in contracts/, or a Foundry
+out/ directory named by EVM_HARNESS_ARTIFACTS) and eth-tester with the py-evm
+backend (`pip install "eth-tester[py-evm]"`).
+
+Usage:
+    python evm_harness.py                        # 10 rebalances per scenario
+    python evm_harness.py -n 50 --output evm_results.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from eth_account import Account
+from web3 import Web3
+
+from benchmark import _percentile, load_results, save_results
+from stand_ins import StandInServer, StandInState
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARTIFACTS_DIR = os.getenv("EVM_HARNESS_ARTIFACTS") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "contracts", "out")
+# Every contract deploy_system deploys
+REQUIRED_ARTIFACTS = ("MockAavePool", "MockERC20", "YieldDistributor", "YieldOrchestrator",
+                      "YieldReallocator", "YieldVault", "YieldStrategy")
+
+# Treasury holdings minted before every rebalance (token units)
+DEFAULT_TREASURY_BALANCES = {"USDC": 6_000.0, "USDT": 3_000.0, "DAI": 1_000.0}
+DEFAULT_APYS = {"USDC": 4.8, "USDT": 5.6, "DAI": 4.1, "USDC.e": 3.2}
+
+MAX_UINT256 = 2 ** 256 - 1
+
+
+def missing_artifacts(artifacts_dir: str = DEFAULT_ARTIFACTS_DIR) -> List[str]:
+    """Names from REQUIRED_ARTIFACTS with no artifact in artifacts_dir."""
+    return [name for name in REQUIRED_ARTIFACTS
+            if not os.path.isfile(os.path.join(artifacts_dir, f"{name}.sol", f"{name}.json"))]
+
+
+def load_artifact(name: str, artifacts_dir: str = DEFAULT_ARTIFACTS_DIR) -> Dict[str, Any]:
+    """
+    ABI and bytecode of a contract from Foundry's out/ directory.
+
+    Args:
+        name: Contract name (artifact at out/<name>.sol/<name>.json)
+        artifacts_dir: Foundry out/ directory
+
+    Returns:
+        Dict with abi and bytecode (0x-prefixed creation code)
+    """
+    path = os.path.join(artifacts_dir, f"{name}.sol", f"{name}.json")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Artifact {path} not found; run `forge build` in contracts/")
+    with open(path, "r") as f:
+        artifact = json.load(f)
+    bytecode = artifact["bytecode"]["object"] if isinstance(artifact["bytecode"], dict) else artifact["bytecode"]
+    return {"abi": artifact["abi"], "bytecode": bytecode}
+
+
+def _jsonable(value: Any) -> Any:
+    """Provider results to JSON-RPC form (ints and bytes as 0x hex, AttributeDicts as dicts)."""
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    if isinstance(value, int) and not isinstance(value, bool):
+        return hex(value)
+    if isinstance(value, dict) or hasattr(value, "items"):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return value
+
+
+class EvmRpcServer:
+    """
+    JSON-RPC over HTTP for an in-process eth-tester chain.
+
+    py-evm is not thread-safe, so requests are serialized. Every call is
+    counted per method; batches also count as one round trip.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            host: Bind address
+            port: Bind port (0 = any free port)
+        """
+        try:
+            from eth_tester import EthereumTester, PyEVMBackend
+            from web3 import EthereumTesterProvider
+        except ImportError as e:
+            raise ImportError('The EVM harness needs eth-tester with py-evm: pip install "eth-tester[py-evm]"') from e
+
+        self.tester = EthereumTester(PyEVMBackend())
+        # Requests arrive as raw JSON-RPC (hex quantities); the provider's own middleware
+        # translates them for eth-tester, so go through its request_func, not make_request
+        w3 = Web3(EthereumTesterProvider(self.tester), middleware=[])
+        self._request = w3.provider.request_func(w3, w3.middleware_onion)
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.dumps(server.handle(json.loads(self.rfile.read(length)))).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "EvmRpcServer":
+        threading.Thread(target=self._httpd.serve_forever, name="evm-rpc", daemon=True).start()
+        logger.info("In-process EVM listening on %s", self.url)
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset_counts(self) -> Dict[str, int]:
+        """Return and clear the request counters."""
+        with self._lock:
+            counts = dict(self.counts)
+            self.counts.clear()
+        return counts
+
+    def handle(self, payload: Any) -> Any:
+        items = payload if isinstance(payload, list) else [payload]
+        replies = []
+        with self._lock:
+            self.counts["rpc.round_trips"] += 1
+            for item in items:
+                method = item.get("method")
+                self.counts["rpc.calls"] += 1
+                self.counts[f"rpc.{method}"] += 1
+                try:
+                    response = self._request(method, item.get("params") or [])
+                except Exception as e:
+                    # Reverts surface as exceptions from eth-tester
+                    response = {"error": {"code": -32000, "message": str(e)}}
+                reply = {"jsonrpc": "2.0", "id": item.get("id")}
+                if "error" in response:
+                    error = response["error"]
+                    reply["error"] = _jsonable(error) if isinstance(error, dict) else {"code": -32000, "message": str(error)}
+                else:
+                    reply["result"] = _jsonable(response.get("result"))
+                replies.append(reply)
+        return replies if isinstance(payload, list) else replies[0]
+
+
+class EvmHarness:
+    """
+    Deploys the system into an in-process EVM and runs the agent's execution path against it.
+    """
+
+    def __init__(
+        self,
+        artifacts_dir: str = DEFAULT_ARTIFACTS_DIR,
+        treasury_balances: Optional[Dict[str, float]] = None,
+        apys: Optional[Dict[str, float]] = None,
+        supply_to_aave_percent: int = 50,
+    ):
+        """
+        Args:
+            artifacts_dir: Foundry out/ directory with the core and mock artifacts
+            treasury_balances: Token units minted to the treasury before each rebalance
+            apys: Supply APY (%) reported in the market snapshot
+            supply_to_aave_percent: Share of vault idle supplied to Aave per decision
+        """
+        self.artifacts_dir = artifacts_dir
+        self.treasury_balances = treasury_balances or dict(DEFAULT_TREASURY_BALANCES)
+        self.apys = apys or dict(DEFAULT_APYS)
+        self.supply_to_aave_percent = supply_to_aave_percent
+        self.server: Optional[EvmRpcServer] = None
+        self.off_chain: Optional[StandInServer] = None
+        self.w3: Optional[Web3] = None
+        self.contracts: Dict[str, Any] = {}
+        self.assets: Dict[str, Dict[str, Any]] = {}
+
+    # ------------------------------------------------------------------
+    # Chain setup
+    # ------------------------------------------------------------------
+
+    def start(self) -> "EvmHarness":
+        self.server = EvmRpcServer().start()
+        self.w3 = Web3(Web3.HTTPProvider(self.server.url))
+        accounts = self.w3.eth.accounts
+        self.deployer, self.treasury = accounts[0], accounts[1]
+        operator = Account.create()
+        self.operator_key = operator.key.hex()
+        self.operator = self.server.tester.add_account(self.operator_key)
+        self._transact(None, None, to=self.operator, value=10 ** 20)
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.stop()
+        if self.off_chain:
+            self.off_chain.stop()
+
+    def _transact(self, contract, fn_name: Optional[str], *args, sender: Optional[str] = None, **tx) -> Dict[str, Any]:
+        """Send a transaction from an unlocked account and return its receipt."""
+        params = {"from": sender or self.deployer, **tx}
+        if contract is None:
+            tx_hash = self.w3.eth.send_transaction(params)
+        else:
+            tx_hash = getattr(contract.functions, fn_name)(*args).transact(params)
+        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        if receipt["status"] != 1:
+            raise RuntimeError(f"{fn_name or 'transfer'} reverted")
+        return receipt
+
+    def deploy(self, name: str, *args) -> Any:
+        """Deploy a contract from its artifact; returns the web3 contract."""
+        artifact = load_artifact(name, self.artifacts_dir)
+        factory = self.w3.eth.contract(abi=artifact["abi"], bytecode=artifact["bytecode"])
+        receipt = self.w3.eth.wait_for_transaction_receipt(
+            factory.constructor(*args).transact({"from": self.deployer})
+        )
+        return self.w3.eth.contract(address=receipt["contractAddress"], abi=artifact["abi"])
+
+    def deploy_system(self, asset_decimals: Optional[Dict[str, int]] = None) -> Dict[str, str]:
+        """
+        Deploy tokens, the mock Aave pool and the core contracts, and grant roles.
+
+        Mirrors DeployCompleteSystem.s.sol, extended to one vault + strategy per
+        asset. The operator gets OPERATOR_ROLE on the orchestrator and vaults;
+        the treasury approves the orchestrator for every token.
+
+        Args:
+            asset_decimals: Asset -> decimals (defaults to the treasury assets, DAI with 18)
+
+        Returns:
+            Name -> address of every deployed contract
+        """
+        from api import LLMAaveYieldAgent
+
+        missing = missing_artifacts(self.artifacts_dir)
+        if missing:
+            # Fail before deploying anything rather than halfway through the system
+            raise FileNotFoundError(f"Missing artifacts in {self.artifacts_dir}: {', '.join(missing)}; "
+                                    "run `forge build` in contracts/")
+        asset_decimals = asset_decimals or {
+            asset: LLMAaveYieldAgent.SUPPORTED_ASSETS[asset]["decimals"] for asset in self.treasury_balances
+        }
+        pool = self.deploy("MockAavePool")
+        # Only used for in-contract swaps, which the agent never requests (it swaps via LI.FI)
+        router = self.deploy("MockERC20", "Unused Router", "ROUTER", 18)
+        distributor = self.deploy("YieldDistributor", self.deployer, [self.treasury])
+        orchestrator = self.deploy("YieldOrchestrator", self.deployer, self.operator, router.address, 3000)
+        reallocator = self.deploy("YieldReallocator", self.deployer, self.operator)
+        self.contracts.update(pool=pool, distributor=distributor, orchestrator=orchestrator, reallocator=reallocator)
+
+        for asset, decimals in asset_decimals.items():
+            token = self.deploy("MockERC20", f"Mock {asset}", asset, decimals)
+            self._transact(pool, "initReserve", token.address)
+            a_token = pool.functions.aTokenOf(token.address).call()
+            vault = self.deploy("YieldVault", token.address, a_token, self.deployer, 1000, pool.address, self.deployer)
+            strategy = self.deploy("YieldStrategy", token.address, f"Yield {asset} Strategy", f"y{asset}",
+                                   vault.address, self.deployer)
+            self._transact(vault, "addStrategy", strategy.address)
+            self._transact(orchestrator, "setStrategy", token.address, strategy.address)
+            self._transact(strategy, "addOperator", orchestrator.address)
+            self._transact(strategy, "addOperator", reallocator.address)
+            self._transact(vault, "addOperator", orchestrator.address)
+            self._transact(vault, "addOperator", self.operator)
+            self._transact(token, "approve", orchestrator.address, MAX_UINT256, sender=self.treasury)
+            self.assets[asset] = {"address": token.address, "decimals": decimals, "aToken": a_token,
+                                  "token": token, "vault": vault, "strategy": strategy}
+
+        addresses = {name: c.address for name, c in self.contracts.items()}
+        for asset, entry in self.assets.items():
+            addresses.update({asset: entry["address"], f"{asset}_vault": entry["vault"].address,
+                              f"{asset}_strategy": entry["strategy"].address})
+        logger.info("Deployed system: %s", addresses)
+        return addresses
+
+    def fund_treasury(self):
+        """Mint the treasury back up to its configured balances."""
+        for asset, amount in self.treasury_balances.items():
+            token = self.assets[asset]["token"]
+            target = int(amount * 10 ** self.assets[asset]["decimals"])
+            held = token.functions.balanceOf(self.treasury).call()
+            if held < target:
+                self._transact(token, "mint", self.treasury, target - held)
+
+    # ------------------------------------------------------------------
+    # Agent
+    # ------------------------------------------------------------------
+
+    def make_agent(self, batch_deposits: bool = False):
+        """
+        An agent wired to the deployed contracts.
+
+        A subclass swaps the supported-asset table for the mock tokens and
+        replaces the market snapshot and decision with fixed inputs, so
+        make_decision runs only the on-chain execution path.
+        """
+        import api
+
+        harness = self
+        total = sum(self.treasury_balances.values())
+        allocation = {asset: round(amount * 100 / total, 6) for asset, amount in self.treasury_balances.items()}
+
+        class HarnessAgent(api.LLMAaveYieldAgent):
+            SUPPORTED_ASSETS = {
+                asset: {"address": entry["address"], "decimals": entry["decimals"], "aToken": entry["aToken"]}
+                for asset, entry in harness.assets.items()
+            }
+
+            def get_market_context(self) -> Dict:
+                balances_raw = self.get_treasury_balances_raw()
+                balances = self._to_units(balances_raw)
+                return {
+                    "timestamp": datetime.now().isoformat(),
+                    "block_number": self.w3.eth.block_number,
+                    "treasury_balances": balances,
+                    "treasury_balances_raw": balances_raw,
+                    "treasury_balance": balances.get("USDC", 0.0),
+                    "vault_balances": self.get_vault_balances(),
+                    "asset_apys": {a: harness.apys.get(a, 0.0) for a in self.SUPPORTED_ASSETS},
+                    "aave_apy": harness.apys.get("USDC", 0.0),
+                    "gas_cost_usd": 0.0,
+                    "network": "eth-tester",
+                }
+
+            def get_decision(self, market_data: Dict) -> Dict:
+                # Allocation matches the holdings: deposits only, no LI.FI swaps
+                return {"decision": "DEPOSIT", "confidence": 100, "reasoning": "EVM harness",
+                        "allocation": dict(allocation), "swaps_needed": []}
+
+        if self.off_chain is None:
+            state = StandInState(HarnessAgent.SUPPORTED_ASSETS, self.treasury, apys=self.apys,
+                                 llm_decision="DEPOSIT")
+            self.off_chain = StandInServer(state, defillama_pools=len(self.assets)).start()
+        off_chain_env = self.off_chain.env()
+        # Chain reads stay on the EVM; there is no Chainlink aggregator on it, so price from (stand-in) CoinGecko
+        for key in ("BASE_SEPOLIA_RPC_URL", "CHAINLINK_ETH_USD_FEED"):
+            off_chain_env.pop(key)
+        os.environ.update(off_chain_env)
+        os.environ["ETH_PRICE_SOURCES"] = "coingecko"
+        os.environ["YIELD_ORCHESTRATOR_ADDRESS"] = self.contracts["orchestrator"].address
+        os.environ["YIELD_VAULT_ADDRESS"] = self.assets["USDC"]["vault"].address
+        os.environ["BATCH_DEPOSITS"] = "true" if batch_deposits else "false"
+        os.environ["CASSETTE_MODE"] = "off"
+        return HarnessAgent(
+            rpc_url=self.server.url,
+            treasury_address=self.treasury,
+            openai_api_key="sk-evm-harness",
+            model="none",
+            risk_tolerance="aggressive",
+            supply_to_aave_percent=self.supply_to_aave_percent,
+            operator_private_key=self.operator_key,
+            supply_after_deposit=True,
+        )
+
+    # ------------------------------------------------------------------
+    # Measurements
+    # ------------------------------------------------------------------
+
+    def _receipts(self, tx_hashes: List[str]) -> List[Dict[str, Any]]:
+        return [self.w3.eth.get_transaction_receipt(h) for h in tx_hashes]
+
+    @staticmethod
+    def _tx_hashes(decision: Dict[str, Any]) -> List[str]:
+        results = [t["result"] for t in decision.get("transaction_results", [])]
+        if decision.get("transaction_result"):
+            results.append(decision["transaction_result"])
+        return [r["tx_hash"] for r in results if r.get("success") and r.get("tx_hash")]
+
+    def run_scenario(self, name: str, rounds: int, fn, prepare=None) -> Dict[str, Any]:
+        """
+        Run `fn()` (returning tx hashes) `rounds` times, refunding the treasury in between.
+
+        `prepare()`, if given, runs before each round outside the measurement.
+
+        Returns:
+            Per-round latency percentiles, transactions, gas, RPC calls and throughput
+        """
+        latencies, txs, gas, rpc_calls, rpc_trips, reverted = [], [], [], [], [], 0
+        for _ in range(rounds):
+            self.fund_treasury()
+            if prepare:
+                prepare()
+            self.server.reset_counts()
+            started = time.perf_counter()
+            tx_hashes = fn()
+            latencies.append((time.perf_counter() - started) * 1000)
+            counts = self.server.reset_counts()
+            receipts = self._receipts(tx_hashes)
+            reverted += sum(1 for r in receipts if r["status"] != 1)
+            txs.append(len(receipts))
+            gas.append(sum(r["gasUsed"] for r in receipts))
+            rpc_calls.append(counts.get("rpc.calls", 0))
+            rpc_trips.append(counts.get("rpc.round_trips", 0))
+        elapsed_s = sum(latencies) / 1000
+        result = {
+            "rounds": rounds,
+            "latency_ms": {"p50": _percentile(latencies, 50), "p95": _percentile(latencies, 95),
+                           "mean": statistics.fmean(latencies)},
+            "txs_per_round": statistics.fmean(txs),
+            "gas_per_round": statistics.fmean(gas),
+            "gas_per_tx": sum(gas) / sum(txs) if sum(txs) else 0,
+            "rpc_calls_per_round": statistics.fmean(rpc_calls),
+            "rpc_round_trips_per_round": statistics.fmean(rpc_trips),
+            "reverted_txs": reverted,
+            "rounds_per_second": rounds / elapsed_s if elapsed_s else 0,
+            "txs_per_second": sum(txs) / elapsed_s if elapsed_s else 0,
+        }
+        logger.info("%s: %s", name, result)
+        return result
+
+    def run(self, rounds: int = 10) -> Dict[str, Any]:
+        """
+        Deploy once, then measure each execution-path scenario.
+
+        Scenarios: make_decision with per-asset deposits, make_decision with the
+        batched multicall, a single execute_orchestrator_deposit, and
+        execute_supply_to_aave on the USDC vault.
+        """
+        addresses = self.deploy_system()
+        scenarios = {}
+        previous_cwd = os.getcwd()
+        workdir = tempfile.TemporaryDirectory(prefix="agent-evm-")
+        try:
+            # Pending-transaction and scheduler state files go to a scratch directory
+            os.chdir(workdir.name)
+            agent = self.make_agent(batch_deposits=False)
+            scenarios["make_decision_per_asset"] = self.run_scenario(
+                "make_decision_per_asset", rounds, lambda: self._tx_hashes(agent.make_decision()))
+
+            batched = self.make_agent(batch_deposits=True)
+            scenarios["make_decision_batched"] = self.run_scenario(
+                "make_decision_batched", rounds, lambda: self._tx_hashes(batched.make_decision()))
+
+            usdc_raw = int(self.treasury_balances["USDC"] * 10 ** self.assets["USDC"]["decimals"])
+
+            def deposit():
+                result = agent.execute_orchestrator_deposit("USDC", usdc_raw, self.treasury)
+                return [result["tx_hash"]] if result.get("success") else []
+            scenarios["execute_orchestrator_deposit"] = self.run_scenario("execute_orchestrator_deposit", rounds, deposit)
+
+            def supply():
+                result = agent.execute_supply_to_aave(agent.get_market_context())
+                return [result["tx_hash"]] if result.get("tx_hash") else []
+            # Each round deposits first so the vault has idle to supply
+            scenarios["execute_supply_to_aave"] = self.run_scenario(
+                "execute_supply_to_aave", rounds, supply, prepare=deposit)
+        finally:
+            os.chdir(previous_cwd)
+            workdir.cleanup()
+
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "config": {"rounds": rounds, "treasury_balances": self.treasury_balances,
+                       "supply_to_aave_percent": self.supply_to_aave_percent},
+            "contracts": addresses,
+            "scenarios": scenarios,
+        }
+
+
+def print_report(run: Dict[str, Any]):
+    print(f"\n{'scenario':<32}{'p50 ms':>9}{'txs':>6}{'gas/round':>12}{'gas/tx':>10}{'rpc calls':>11}{'tx/s':>8}")
+    for name, s in run["scenarios"].items():
+        print(f"{name:<32}{s['latency_ms']['p50']:>9.1f}{s['txs_per_round']:>6g}{s['gas_per_round']:>12,.0f}"
+              f"{s['gas_per_tx']:>10,.0f}{s['rpc_calls_per_round']:>11g}{s['txs_per_second']:>8.1f}")
+        if s["reverted_txs"]:
+            print(f"  WARNING: {s['reverted_txs']} reverted transactions")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the agent's execution path on an in-process EVM")
+    parser.add_argument("-n", "--rounds", type=int, default=10)
+    parser.add_argument("--artifacts", default=DEFAULT_ARTIFACTS_DIR, help="Foundry out/ directory")
+    parser.add_argument("--supply-percent", type=int, default=50)
+    parser.add_argument("--output", default=os.getenv("EVM_HARNESS_RESULTS_FILE", "evm_harness_results.json"),
+                        help="JSON file runs are appended to")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    harness = EvmHarness(artifacts_dir=os.path.abspath(args.artifacts), supply_to_aave_percent=args.supply_percent)
+    harness.start()
+    try:
+        run = harness.run(rounds=args.rounds)
+    finally:
+        harness.stop()
+    print_report(run)
+    if not args.no_save:
+        runs = load_results(output)
+        runs.append(run)
+        save_results(output, runs)
+        print(f"\nSaved run #{len(runs) - 1} to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+EIP-1559 fee oracle for agent transactions on Base.
+
+Replaces hardcoded gas limits and node-chosen fees with:
+- eth_feeHistory reward percentiles, cached for a short TTL (about one Base
+  block), mapped to urgency tiers
+- explicit maxFeePerGas / maxPriorityFeePerGas per tier
+- eth_estimateGas with a safety margin per call type, with the last estimate
+  cached so cost projections don't need an RPC call
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from rpc_batch import BatchRpcClient, RpcBatchError
+
+logger = logging.getLogger(__name__)
+
+
+class FeeOracle:
+    """
+    Suggests EIP-1559 fee fields and gas limits for agent transactions.
+    """
+
+    # Urgency tier -> (reward percentile, multiplier on next-block base fee)
+    URGENCY_TIERS = {
+        "low": (10, 1.25),
+        "standard": (50, 2.0),
+        "high": (90, 3.0),
+    }
+    REWARD_PERCENTILES = [10, 50, 90]
+
+    # Safety margin applied on top of eth_estimateGas, per call type
+    DEFAULT_GAS_MARGINS = {
+        "supplyToAave": 1.20,
+        "depositERC20": 1.25,
+        "multicall": 1.25,
+        "default": 1.30,
+    }
+
+    # Used only when eth_estimateGas fails and nothing is cached yet
+    FALLBACK_GAS_LIMITS = {
+        "supplyToAave": 200_000,
+        "depositERC20": 300_000,
+        "multicall": 1_000_000,
+        "default": 250_000,
+    }
+
+    def __init__(
+        self,
+        rpc: BatchRpcClient,
+        history_blocks: int = 20,
+        cache_ttl: float = 2.0,
+        min_priority_fee_wei: int = 1_000_000,
+        gas_margins: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Args:
+            rpc: Batched JSON-RPC client
+            history_blocks: Number of blocks requested from eth_feeHistory
+            cache_ttl: Seconds a fee-history snapshot is reused (default: one 2s Base block)
+            min_priority_fee_wei: Floor for maxPriorityFeePerGas
+            gas_margins: Overrides for DEFAULT_GAS_MARGINS
+        """
+        self.rpc = rpc
+        self.history_blocks = history_blocks
+        self.cache_ttl = cache_ttl
+        self.min_priority_fee_wei = min_priority_fee_wei
+        self.gas_margins = dict(self.DEFAULT_GAS_MARGINS, **(gas_margins or {}))
+
+        self._lock = threading.Lock()
+        self._fee_history: Optional[Dict[str, Any]] = None
+        self._fee_history_fetched_at = 0.0
+        self._gas_estimates: Dict[str, Dict[str, Any]] = {}
+
+    def get_fee_history(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the fee-history snapshot for the latest block.
+
+        The snapshot is reused while it is younger than cache_ttl (a time-based TTL,
+        not keyed on the block number), so several transactions built within about
+        one block share a single eth_feeHistory call. A failed refresh returns the
+        last snapshot, however old.
+
+        Returns:
+            Dict with newest_block, next_base_fee and median reward per percentile,
+            or None if the node could not be reached
+        """
+        with self._lock:
+            if self._fee_history and time.time() - self._fee_history_fetched_at < self.cache_ttl:
+                return self._fee_history
+
+        try:
+            raw = self.rpc.call(
+                "eth_feeHistory",
+                [hex(self.history_blocks), "latest", self.REWARD_PERCENTILES],
+            )
+        except RpcBatchError as e:
+            logger.warning("eth_feeHistory failed: %s", e)
+            with self._lock:
+                return self._fee_history
+
+        base_fees = [int(x, 16) for x in raw.get("baseFeePerGas", [])]
+        rewards = raw.get("reward") or []
+        oldest = int(raw.get("oldestBlock", "0x0"), 16)
+
+        # Median over the window of each percentile column; skip empty blocks (all-zero rewards)
+        rewards_by_percentile = {}
+        for idx, pct in enumerate(self.REWARD_PERCENTILES):
+            column = sorted(int(block[idx], 16) for block in rewards if len(block) > idx and int(block[idx], 16) > 0)
+            rewards_by_percentile[pct] = column[len(column) // 2] if column else 0
+
+        snapshot = {
+            "newest_block": oldest + max(len(base_fees) - 2, 0),
+            # baseFeePerGas has one extra entry: the base fee of the next block
+            "next_base_fee": base_fees[-1] if base_fees else 0,
+            "reward_percentiles": rewards_by_percentile,
+        }
+        with self._lock:
+            self._fee_history = snapshot
+            self._fee_history_fetched_at = time.time()
+        return snapshot
+
+    def get_fees(self, urgency: str = "standard") -> Optional[Dict[str, int]]:
+        """
+        Suggested EIP-1559 fee fields for an urgency tier.
+
+        Args:
+            urgency: "low", "standard" or "high"
+
+        Returns:
+            Dict with maxFeePerGas, maxPriorityFeePerGas and the expected effective
+            gas price (next base fee + tip), or None if fee history is unavailable
+        """
+        history = self.get_fee_history()
+        if not history:
+            return None
+        percentile, base_multiplier = self.URGENCY_TIERS.get(urgency, self.URGENCY_TIERS["standard"])
+        priority = max(history["reward_percentiles"].get(percentile, 0), self.min_priority_fee_wei)
+        base_fee = history["next_base_fee"]
+        return {
+            "maxFeePerGas": int(base_fee * base_multiplier) + priority,
+            "maxPriorityFeePerGas": priority,
+            "expectedGasPrice": base_fee + priority,
+        }
+
+    def estimate_gas(self, call_type: str, tx: Dict[str, Any]) -> int:
+        """
+        Gas limit for a call: eth_estimateGas times the call type's margin.
+
+        Falls back to the last cached estimate for the call type, then to
+        FALLBACK_GAS_LIMITS, when the node cannot estimate.
+
+        Args:
+            call_type: Action name (e.g. "supplyToAave", "depositERC20")
+            tx: Call object with from / to / data (and optional value)
+        """
+        margin = self.gas_margins.get(call_type, self.gas_margins["default"])
+        call = {k: v for k, v in tx.items() if k in ("from", "to", "data", "value")}
+        if isinstance(call.get("value"), int):
+            call["value"] = hex(call["value"])
+        try:
+            estimate = int(self.rpc.call("eth_estimateGas", [call]), 16)
+            gas_limit = int(estimate * margin)
+            with self._lock:
+                self._gas_estimates[call_type] = {"estimate": estimate, "gas_limit": gas_limit, "at": time.time()}
+            return gas_limit
+        except (RpcBatchError, ValueError, TypeError) as e:
+            logger.warning("eth_estimateGas failed for %s: %s", call_type, e)
+            cached = self.cached_gas_estimate(call_type)
+            if cached:
+                return int(cached * margin)
+            return self.FALLBACK_GAS_LIMITS.get(call_type, self.FALLBACK_GAS_LIMITS["default"])
+
+    def cached_gas_estimate(self, call_type: str) -> Optional[int]:
+        """Last raw eth_estimateGas result for a call type (no RPC)."""
+        with self._lock:
+            entry = self._gas_estimates.get(call_type)
+        return entry["estimate"] if entry else None
+
+    def transaction_fields(self, call_type: str, tx: Dict[str, Any], urgency: str = "standard") -> Dict[str, Any]:
+        """
+        Gas and fee fields to merge into an unsigned transaction.
+
+        Returns:
+            Dict with gas, maxFeePerGas, maxPriorityFeePerGas and type (omits the fee
+            fields if fee history is unavailable so the node's defaults are used)
+        """
+        fields: Dict[str, Any] = {"gas": self.estimate_gas(call_type, tx)}
+        fees = self.get_fees(urgency)
+        if fees:
+            fields["maxFeePerGas"] = fees["maxFeePerGas"]
+            fields["maxPriorityFeePerGas"] = fees["maxPriorityFeePerGas"]
+            fields["type"] = 2
+        return fields
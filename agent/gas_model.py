@@ -0,0 +1,132 @@
+"""
+Learned gas-usage model for agent transactions.
+
+Records gasUsed from every confirmed receipt, keyed by action type and asset
+(e.g. "depositERC20" / "USDT", "lifi_swap" / "USDC->USDT"), and keeps running
+percentiles so a planned action's gas can be estimated with one dict lookup
+instead of a fixed constant.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class GasUsageModel:
+    """
+    Rolling window of gasUsed samples per (action, asset) with cached percentiles.
+
+    Each key also feeds an "any asset" aggregate for the action, used when a
+    specific asset has no samples yet.
+    """
+
+    ANY_ASSET = "*"
+    PERCENTILES = (50, 75, 90)
+
+    def __init__(self, storage_file: str = "gas_usage_history.json", max_samples: int = 200):
+        """
+        Args:
+            storage_file: JSON file persisting samples across restarts
+            max_samples: Samples kept per key (oldest are evicted)
+        """
+        self.storage_file = storage_file
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        # key -> samples in arrival order (for eviction) and sorted (for percentiles)
+        self._samples: Dict[str, Deque[int]] = {}
+        self._sorted: Dict[str, List[int]] = {}
+        # key -> {"p50": ..., "p75": ..., "p90": ..., "count": ...}; what estimate() reads
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._load()
+
+    @staticmethod
+    def _key(action: str, asset: Optional[str]) -> str:
+        return f"{action}:{asset or GasUsageModel.ANY_ASSET}"
+
+    def _load(self):
+        """Load persisted samples from disk."""
+        try:
+            if os.path.exists(self.storage_file):
+                with open(self.storage_file, "r") as f:
+                    data = json.load(f)
+                for key, samples in data.items():
+                    for gas_used in samples[-self.max_samples:]:
+                        self._add_sample(key, int(gas_used))
+        except Exception as e:
+            logger.warning("Could not load gas usage history: %s", e)
+
+    def _save(self):
+        """Persist samples (caller must hold the lock)."""
+        try:
+            with open(self.storage_file, "w") as f:
+                json.dump({k: list(v) for k, v in self._samples.items()}, f)
+        except Exception as e:
+            logger.error("Could not save gas usage history: %s", e)
+
+    def _add_sample(self, key: str, gas_used: int):
+        """Insert a sample and refresh the key's cached percentiles (caller must hold the lock)."""
+        samples = self._samples.setdefault(key, deque())
+        ordered = self._sorted.setdefault(key, [])
+        samples.append(gas_used)
+        bisect.insort(ordered, gas_used)
+        if len(samples) > self.max_samples:
+            evicted = samples.popleft()
+            del ordered[bisect.bisect_left(ordered, evicted)]
+
+        stats = {"count": len(ordered)}
+        for pct in self.PERCENTILES:
+            idx = min(len(ordered) - 1, (len(ordered) * pct) // 100)
+            stats[f"p{pct}"] = ordered[idx]
+        self._stats[key] = stats
+
+    def record(self, action: str, asset: Optional[str], gas_used: int):
+        """
+        Record gasUsed from a receipt.
+
+        Args:
+            action: Action type (contract function name or "lifi_swap")
+            asset: Asset symbol, or "FROM->TO" for swaps
+            gas_used: gasUsed from the receipt
+        """
+        with self._lock:
+            if asset:
+                self._add_sample(self._key(action, asset), gas_used)
+            self._add_sample(self._key(action, None), gas_used)
+            self._save()
+        logger.debug("Recorded gasUsed %s for %s (%s)", gas_used, action, asset)
+
+    def estimate(self, action: str, asset: Optional[str] = None, percentile: int = 75) -> Optional[int]:
+        """
+        Estimated gas units for an action.
+
+        Args:
+            action: Action type
+            asset: Asset symbol (falls back to the action's all-asset aggregate)
+            percentile: One of PERCENTILES
+
+        Returns:
+            Gas units, or None if the action has never been observed
+        """
+        stats = self._stats.get(self._key(action, asset)) or self._stats.get(self._key(action, None))
+        return stats.get(f"p{percentile}") if stats else None
+
+    def on_transaction_finalized(self, entry: Dict[str, Any]):
+        """PendingTransactionTracker listener: learn from confirmed receipts."""
+        if entry.get("status") != "confirmed" or not entry.get("gas_used"):
+            return
+        metadata = entry.get("metadata") or {}
+        asset = metadata.get("asset")
+        if not asset and metadata.get("from") and metadata.get("to"):
+            asset = f"{metadata['from']}->{metadata['to']}"
+        self.record(entry["action"], asset, entry["gas_used"])
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """Cached percentile stats for every key."""
+        with self._lock:
+            return {k: dict(v) for k, v in self._stats.items()}
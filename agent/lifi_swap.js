@@ -2,17 +2,21 @@
  * LI.FI Token Swap Helper Script
  * Called by Python agent to execute token swaps on Base Mainnet
  * 
- * Usage: node lifi_swap.js <fromToken> <toToken> <amount> <privateKey> <recipient>
+ * Usage: node lifi_swap.js <fromToken> <toToken> <amount> <privateKey> <recipient> [quoteFile]
  * 
  * Example: node lifi_swap.js USDC USDT 1000000 0x... 0x...
  * 
+ * quoteFile: optional path to a LI.FI /v1/quote response (pre-fetched by the agent's
+ * quote service); when given, that quote is executed instead of requesting new routes.
+ * 
  * Note: Run from project root: node agent/lifi_swap.js ...
  */
 
 const path = require('path');
+const fs = require('fs');
 
 // Try to load from lifi-sdk workspace
-let findDefaultToken, ChainId, CoinKey, createConfig, EVM, executeRoute, getRoutes;
+let findDefaultToken, ChainId, CoinKey, createConfig, EVM, executeRoute, getRoutes, convertQuoteToRoute;
 let createWalletClient, http, privateKeyToAccount, base;
 
 try {
@@ -35,6 +39,7 @@ try {
   EVM = sdk.EVM;
   executeRoute = sdk.executeRoute;
   getRoutes = sdk.getRoutes;
+  convertQuoteToRoute = sdk.convertQuoteToRoute;
   createWalletClient = viem.createWalletClient;
   http = viem.http;
   privateKeyToAccount = viemAccounts.privateKeyToAccount;
@@ -45,7 +50,27 @@ try {
   process.exit(1);
 }
 
-async function swapTokens(fromTokenKey, toTokenKey, amount, privateKey, recipient) {
+/**
+ * Compare a pre-fetched LI.FI quote with the swap being executed.
+ * Returns the first mismatching field, or null if the quote is for exactly this swap.
+ */
+function quoteMismatch(quote, request) {
+  const action = quote.action || {};
+  const sameAddress = (a, b) => typeof a === 'string' && typeof b === 'string' && a.toLowerCase() === b.toLowerCase();
+  const checks = [
+    ['fromAmount', action.fromAmount === request.fromAmount],
+    ['fromAddress', sameAddress(action.fromAddress, request.fromAddress)],
+    ['toAddress', sameAddress(action.toAddress || action.fromAddress, request.toAddress)],
+    ['fromChainId', Number(action.fromChainId) === Number(request.fromChainId)],
+    ['toChainId', Number(action.toChainId) === Number(request.toChainId)],
+    ['fromToken', sameAddress(action.fromToken?.address, request.fromTokenAddress)],
+    ['toToken', sameAddress(action.toToken?.address, request.toTokenAddress)],
+  ];
+  const failed = checks.find(([, ok]) => !ok);
+  return failed ? failed[0] : null;
+}
+
+async function swapTokens(fromTokenKey, toTokenKey, amount, privateKey, recipient, quoteFile) {
   try {
     console.log(`[LI.FI Swap] Starting swap: ${fromTokenKey} -> ${toTokenKey}, Amount: ${amount}`);
     
@@ -107,14 +132,29 @@ async function swapTokens(fromTokenKey, toTokenKey, amount, privateKey, recipien
       },
     };
     
-    console.log(`[LI.FI Swap] Requesting route...`);
-    const routeResponse = await getRoutes(routeRequest);
-    
-    if (!routeResponse.routes || routeResponse.routes.length === 0) {
-      throw new Error('No route found');
+    let route;
+    if (quoteFile) {
+      // Execute the agent's pre-fetched quote; fall back to route discovery if it doesn't match
+      const quote = JSON.parse(fs.readFileSync(quoteFile, 'utf8'));
+      const mismatch = quoteMismatch(quote, routeRequest);
+      if (!mismatch) {
+        route = convertQuoteToRoute(quote);
+        console.log(`[LI.FI Swap] Using pre-fetched quote (${quote.tool || 'unknown tool'})`);
+      } else {
+        console.log(`[LI.FI Swap] Pre-fetched quote does not match request (${mismatch}), requesting routes`);
+      }
     }
     
-    const route = routeResponse.routes[0];
+    if (!route) {
+      console.log(`[LI.FI Swap] Requesting route...`);
+      const routeResponse = await getRoutes(routeRequest);
+      
+      if (!routeResponse.routes || routeResponse.routes.length === 0) {
+        throw new Error('No route found');
+      }
+      
+      route = routeResponse.routes[0];
+    }
     console.log(`[LI.FI Swap] Route found: ${route.steps.length} step(s)`);
     
     // Execute swap
@@ -176,14 +216,14 @@ async function swapTokens(fromTokenKey, toTokenKey, amount, privateKey, recipien
 
 // Parse command line arguments
 const args = process.argv.slice(2);
-if (args.length !== 5) {
-  console.error('Usage: node lifi_swap.js <fromToken> <toToken> <amount> <privateKey> <recipient>');
+if (args.length !== 5 && args.length !== 6) {
+  console.error('Usage: node lifi_swap.js <fromToken> <toToken> <amount> <privateKey> <recipient> [quoteFile]');
   process.exit(1);
 }
 
-const [fromToken, toToken, amount, privateKey, recipient] = args;
+const [fromToken, toToken, amount, privateKey, recipient, quoteFile] = args;
 
-swapTokens(fromToken, toToken, BigInt(amount), privateKey, recipient)
+swapTokens(fromToken, toToken, BigInt(amount), privateKey, recipient, quoteFile)
   .then(() => process.exit(0))
   .catch((error) => {
     console.error('Swap failed:', error);
@@ -0,0 +1,264 @@
+"""
+HTTP load test for the FastAPI service.
+
+Drives the API with a weighted mix of endpoints (default: mostly /health
+with some /analyze, like the frontend's API routes) from a pool of
+closed-loop workers for a fixed duration, and reports per endpoint:
+throughput, error rate and p50/p95/p99/max latency.
+
+A separate probe thread hits /health at a fixed interval, first on an idle
+server and then under load. /analyze runs blocking agent code inside an
+async endpoint, so a probe p99 far above its idle value means the event loop
+is being blocked; that ratio is reported as the event-loop blocking factor.
+
+By default the app is served in-process by uvicorn against the local
+stand-ins (see benchmark.py), so no network or keys are needed. In-process,
+the load generator shares the interpreter with the server; to size workers,
+start the API separately (e.g. `uvicorn api:app --workers 4` with the
+stand-in environment) and pass --url.
+
+Usage:
+    python loadtest.py -c 16 -d 30
+    python loadtest.py --mix "GET /health=9,POST /analyze=1" --llm-latency-ms 800
+    python loadtest.py --url http://127.0.0.1:8000 -c 64 -d 60
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from benchmark import _percentile, load_results, save_results, serve_app, stand_in_agent
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIX = {"GET /health": 9, "POST /analyze": 1}
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse "GET /health=9,POST /analyze=1" into endpoint -> weight."""
+    mix = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        endpoint, _, weight = part.rpartition("=")
+        method, _, path = endpoint.strip().partition(" ")
+        if not path.startswith("/"):
+            raise ValueError(f"Bad endpoint '{endpoint}' (expected e.g. 'GET /health')")
+        mix[f"{method.upper()} {path}"] = float(weight)
+    return mix
+
+
+def summarize_samples(samples: List[Tuple[float, bool, Any]], elapsed_s: float) -> Dict[str, Any]:
+    """
+    Stats for one endpoint's (latency_ms, ok, status) samples.
+
+    Returns:
+        Dict with requests, throughput (req/s), error rate, status counts and latency percentiles
+    """
+    latencies = [s[0] for s in samples]
+    errors = sum(1 for s in samples if not s[1])
+    return {
+        "requests": len(samples),
+        "throughput_rps": len(samples) / elapsed_s if elapsed_s else 0.0,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "status": dict(Counter(str(s[2]) for s in samples)),
+        "latency_ms": {
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "p99": _percentile(latencies, 99),
+            "max": max(latencies) if latencies else 0.0,
+        },
+    }
+
+
+class LoadTest:
+    """
+    Closed-loop HTTP load generator with an event-loop probe.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        mix: Optional[Dict[str, float]] = None,
+        concurrency: int = 8,
+        duration: float = 30.0,
+        timeout: float = 120.0,
+        probe_interval: float = 0.1,
+        seed: int = 1,
+    ):
+        """
+        Args:
+            url: API base URL
+            mix: "METHOD /path" -> relative weight
+            concurrency: Concurrent workers (each sends its next request when the last completes)
+            duration: Seconds of load
+            timeout: Per-request timeout in seconds
+            probe_interval: Seconds between /health probes (0 = no probe)
+            seed: RNG seed for endpoint selection
+        """
+        self.url = url.rstrip("/")
+        self.mix = mix or dict(DEFAULT_MIX)
+        self.concurrency = concurrency
+        self.duration = duration
+        self.timeout = timeout
+        self.probe_interval = probe_interval
+        self.seed = seed
+
+    def _request(self, session: requests.Session, endpoint: str) -> Tuple[float, bool, Any]:
+        method, path = endpoint.split(" ", 1)
+        started = time.perf_counter()
+        try:
+            response = session.request(method, f"{self.url}{path}", timeout=self.timeout)
+            ok, status = response.status_code < 400, response.status_code
+        except requests.RequestException as e:
+            ok, status = False, type(e).__name__
+        return (time.perf_counter() - started) * 1000, ok, status
+
+    def _worker(self, index: int, stop: threading.Event, results: Dict[str, List], lock: threading.Lock):
+        rng = random.Random(self.seed + index)
+        endpoints, weights = list(self.mix), list(self.mix.values())
+        local = defaultdict(list)
+        with requests.Session() as session:
+            while not stop.is_set():
+                endpoint = rng.choices(endpoints, weights)[0]
+                local[endpoint].append(self._request(session, endpoint))
+        with lock:
+            for endpoint, samples in local.items():
+                results[endpoint].extend(samples)
+
+    def _probe(self, stop: threading.Event, samples: List):
+        with requests.Session() as session:
+            while not stop.is_set():
+                samples.append(self._request(session, "GET /health"))
+                stop.wait(self.probe_interval)
+
+    def probe_idle(self, seconds: float = 3.0) -> Optional[Dict[str, Any]]:
+        """/health probe latency with no other load."""
+        if not self.probe_interval:
+            return None
+        stop, samples = threading.Event(), []
+        thread = threading.Thread(target=self._probe, args=(stop, samples), daemon=True)
+        thread.start()
+        time.sleep(seconds)
+        stop.set()
+        thread.join()
+        return summarize_samples(samples, seconds)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Measure the idle probe, then run the load.
+
+        Returns:
+            Dict with per-endpoint stats, totals, probe stats (idle and under
+            load) and the event-loop blocking factor (probe p99 under load / idle)
+        """
+        idle = self.probe_idle()
+        stop, lock = threading.Event(), threading.Lock()
+        results: Dict[str, List] = defaultdict(list)
+        probe_samples: List = []
+        threads = [threading.Thread(target=self._worker, args=(i, stop, results, lock), daemon=True)
+                   for i in range(self.concurrency)]
+        if self.probe_interval:
+            threads.append(threading.Thread(target=self._probe, args=(stop, probe_samples), daemon=True))
+        logger.info("Load test: %s workers for %gs against %s (%s)",
+                    self.concurrency, self.duration, self.url, self.mix)
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(self.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        # In-flight requests finish after stop; count the whole window
+        elapsed = time.perf_counter() - started
+
+        all_samples = [s for samples in results.values() for s in samples]
+        report: Dict[str, Any] = {
+            "endpoints": {endpoint: summarize_samples(samples, elapsed) for endpoint, samples in sorted(results.items())},
+            "total": summarize_samples(all_samples, elapsed),
+            "elapsed_s": elapsed,
+        }
+        if self.probe_interval:
+            loaded = summarize_samples(probe_samples, elapsed)
+            report["probe"] = {"idle": idle, "under_load": loaded}
+            idle_p99 = idle["latency_ms"]["p99"] if idle else 0.0
+            report["event_loop_blocking_factor"] = loaded["latency_ms"]["p99"] / idle_p99 if idle_p99 else None
+        return report
+
+
+def print_report(run: Dict[str, Any]):
+    print(f"\n{'endpoint':<22}{'reqs':>7}{'req/s':>9}{'err %':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    rows = list(run["endpoints"].items()) + [("TOTAL", run["total"])]
+    probe = run.get("probe") or {}
+    rows += [(f"probe ({phase})", stats) for phase, stats in probe.items() if stats]
+    for name, s in rows:
+        lat = s["latency_ms"]
+        print(f"{name:<22}{s['requests']:>7}{s['throughput_rps']:>9.1f}{s['error_rate'] * 100:>8.1f}"
+              f"{lat['p50']:>9.1f}{lat['p95']:>9.1f}{lat['p99']:>9.1f}{lat['max']:>9.1f}")
+    factor = run.get("event_loop_blocking_factor")
+    if factor is not None:
+        print(f"\nEvent-loop blocking factor (probe p99 under load / idle): {factor:.1f}x")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the agent API")
+    parser.add_argument("--url", default=None, help="API base URL (default: serve in-process against stand-ins)")
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("-d", "--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument("--mix", default=",".join(f"{k}={v:g}" for k, v in DEFAULT_MIX.items()),
+                        help='Weighted endpoints, e.g. "GET /health=9,POST /analyze=1"')
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--probe-interval", type=float, default=0.1, help="Seconds between /health probes (0 = off)")
+    parser.add_argument("--llm-latency-ms", type=float, default=float(os.getenv("BENCHMARK_LLM_LATENCY_MS", "0")))
+    parser.add_argument("--rpc-latency-ms", type=float, default=float(os.getenv("BENCHMARK_RPC_LATENCY_MS", "0")))
+    parser.add_argument("--http-latency-ms", type=float, default=float(os.getenv("BENCHMARK_HTTP_LATENCY_MS", "0")))
+    parser.add_argument("--output", default=os.getenv("LOADTEST_RESULTS_FILE", "loadtest_results.json"),
+                        help="JSON file runs are appended to")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    config = {
+        "url": args.url or "in-process",
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "mix": parse_mix(args.mix),
+    }
+
+    def load(url: str) -> Dict[str, Any]:
+        return LoadTest(url, config["mix"], args.concurrency, args.duration, args.timeout, args.probe_interval).run()
+
+    if args.url:
+        report = load(args.url)
+    else:
+        latency_ms = {"openai": args.llm_latency_ms, "rpc": args.rpc_latency_ms, "defillama": args.http_latency_ms,
+                      "coingecko": args.http_latency_ms, "lifi": args.http_latency_ms}
+        config["latency_ms"] = latency_ms
+        with stand_in_agent(latency_ms) as (api, _, _):
+            uvicorn_server, url = serve_app(api.app, thread_name="loadtest-api")
+            try:
+                report = load(url)
+            finally:
+                uvicorn_server.should_exit = True
+
+    run = {"timestamp": datetime.now().isoformat(), "config": config, **report}
+    print_report(run)
+    if not args.no_save:
+        runs = load_results(output)
+        runs.append(run)
+        save_results(output, runs)
+        print(f"\nSaved run #{len(runs) - 1} to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Logging setup for the agent processes (API and main.py).
+
+Records are put on an in-memory queue by a QueueHandler and written by a
+QueueListener thread. The message (msg % args) and any traceback are rendered
+in the calling thread, as the stock QueueHandler does, so a record shows the
+values at the time of the call; formatting, JSON encoding and the write to
+stderr happen on the listener thread. Log with %-style arguments
+(logger.info("APY: %.4f", apy)) so the message is only rendered if the record
+passes the level check.
+
+Configuration:
+- LOG_FORMAT: text (default) or json (one object per line). Text is the
+  default on purpose: it is the exact line format api.py and main.py printed
+  before this module existed, so a terminal session or anything already
+  reading those lines sees no change. Set json where a log shipper (Loki,
+  Datadog, CloudWatch) parses the output.
+- LOG_LEVEL: root level (default INFO)
+- LOG_LEVELS: per-logger levels, e.g. "web3=WARNING,urllib3=WARNING,api=DEBUG"
+
+JSON records carry ts, level, logger, message, thread, the active trace_id /
+span_id (see tracing.py), anything passed via extra={...}, and exc for
+exceptions.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from tracing import current_span, current_trace_id
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else on a record came from extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "trace_id", "span_id"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_TRACEBACKS = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            entry["trace_id"] = trace_id
+            entry["span_id"] = record.span_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting and output to the listener.
+
+    Like the stock prepare(), the message and traceback are rendered here so
+    arguments mutated after the call can't change the record. Unlike it, the
+    record is not run through a formatter: the listener's handler formats it
+    (text or JSON) with the span context - which lives in a contextvar of the
+    calling thread - captured here.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _TRACEBACKS.formatException(record.exc_info)
+            record.exc_info = None
+        record.trace_id = current_trace_id()
+        record.span_id = current_span().span_id if record.trace_id else None
+        return record
+
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """Parse "web3=WARNING,api=DEBUG" into logger name -> level."""
+    levels = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, level = part.partition("=")
+        value = logging.getLevelName(level.strip().upper())
+        if not isinstance(value, int):
+            raise ValueError(f"Unknown log level '{level}' for logger '{name.strip()}'")
+        levels[name.strip()] = value
+    return levels
+
+
+def configure_logging(fmt: Optional[str] = None, level: Optional[str] = None, levels: Optional[str] = None):
+    """
+    Route all logging through a queue to a background writer thread.
+
+    Arguments override LOG_FORMAT / LOG_LEVEL / LOG_LEVELS. Safe to call more
+    than once (later calls reconfigure).
+    """
+    global _listener
+    fmt = (fmt or os.getenv("LOG_FORMAT", "text")).strip().lower()
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).strip().upper()
+    levels = levels if levels is not None else os.getenv("LOG_LEVELS", "")
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    if _listener is not None:
+        _listener.stop()
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, stream)
+    _listener.start()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    root.setLevel(level)
+    for name, value in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(value)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
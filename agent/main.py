@@ -6,25 +6,27 @@ Aave yield strategies based on real-time blockchain data and market conditions.
 """
 
 import os
+import signal
 import time
 import logging
 from datetime import datetime
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Tuple
 from web3 import Web3
 import requests
 import json
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from log_config import configure_logging
+from profiler import MEMORY_PROFILER, PROFILER
+from scheduler import MISFIRE_SKIP, Scheduler
+from supply_scheduler import SupplyScheduler
+
 # Load environment variables from .env file
 load_dotenv()
 
-# Configure logging (no .log file; only console and JSON output)
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler()]
-)
+# Configure logging (no .log file; console via a background writer, see log_config.py)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -146,14 +148,37 @@ class LLMAaveYieldAgent:
         self.conversation_history = []
         self.apy_history_file = "apy_history.json"
         self.apy_history = self._load_apy_history()
+        self.decision_history_limit = int(os.getenv("DECISION_HISTORY_LIMIT", "500"))
+        self.apy_history_days = int(os.getenv("APY_HISTORY_DAYS", "30"))
+        # The APY job samples every minute; the file is rewritten at most this often (and on compaction/exit)
+        self.apy_history_save_interval = float(os.getenv("APY_HISTORY_SAVE_INTERVAL", "600"))
+        self._apy_history_saved_at = 0.0
+
+        # Market inputs refreshed by scheduler jobs at their own cadence (see run());
+        # name -> {"value", "updated_at"}
+        self.inputs: Dict[str, Dict[str, Any]] = {}
+        self.refresh_intervals = {
+            "apy_vault": float(os.getenv("APY_REFRESH_INTERVAL", "60")),
+            "gas": float(os.getenv("GAS_REFRESH_INTERVAL", "30")),
+            "eth_price": float(os.getenv("ETH_PRICE_REFRESH_INTERVAL", "120")),
+            "alternative_yields": float(os.getenv("ALT_YIELDS_REFRESH_INTERVAL", "1800")),
+            "history_compaction": float(os.getenv("HISTORY_COMPACTION_INTERVAL", "3600")),
+        }
+
+        # Defers supplyToAave until the supplied amount's yield repays its gas
+        self.supply_scheduler = SupplyScheduler(
+            os.getenv("SUPPLY_SCHEDULER_FILE", "supply_scheduler_state.json"),
+            max_breakeven_days=float(os.getenv("SUPPLY_MAX_BREAKEVEN_DAYS", "3")),
+            min_supply_usd=float(os.getenv("SUPPLY_MIN_USD", "1.0")),
+        )
         
-        logger.info(f"LLM-Powered Aave Yield Agent initialized")
-        logger.info(f"Model: {self.model}")
-        logger.info(f"Treasury: {self.treasury_address}")
-        logger.info(f"Risk Tolerance: {self.risk_tolerance}")
-        logger.info(f"Supply to Aave percent (on DEPOSIT): {self.supply_to_aave_percent}%")
+        logger.info("LLM-Powered Aave Yield Agent initialized")
+        logger.info("Model: %s", self.model)
+        logger.info("Treasury: %s", self.treasury_address)
+        logger.info("Risk Tolerance: %s", self.risk_tolerance)
+        logger.info("Supply to Aave percent (on DEPOSIT): %s%%", self.supply_to_aave_percent)
         if self.vault_address:
-            logger.info(f"Vault (for balance): {self.vault_address}")
+            logger.info("Vault (for balance): %s", self.vault_address)
         if self.operator_private_key:
             logger.info("Operator key set: will execute supplyToAave on DEPOSIT")
     
@@ -164,16 +189,17 @@ class LLMAaveYieldAgent:
                 with open(self.apy_history_file, 'r') as f:
                     return json.load(f)
         except Exception as e:
-            logger.warning(f"Could not load APY history: {e}")
+            logger.warning("Could not load APY history: %s", e)
         return []
 
     def _save_apy_history(self):
         """Save APY history to JSON file."""
         try:
             with open(self.apy_history_file, 'w') as f:
-                json.dump(self.apy_history, f, indent=2)
+                json.dump(self.apy_history, f, separators=(',', ':'))
+            self._apy_history_saved_at = time.time()
         except Exception as e:
-            logger.error(f"Could not save APY history: {e}")
+            logger.error("Could not save APY history: %s", e)
 
     def _record_apy(self, apy: float):
         """Record current APY with timestamp."""
@@ -183,32 +209,72 @@ class LLMAaveYieldAgent:
             "unix_timestamp": int(time.time())
         }
         self.apy_history.append(entry)
-        # Keep only last 1000 entries to prevent file from growing too large
-        if len(self.apy_history) > 1000:
-            self.apy_history = self.apy_history[-1000:]
-        self._save_apy_history()
+        # Hard cap between compactions (compact_history downsamples older entries)
+        if len(self.apy_history) > 5000:
+            self.apy_history = self.apy_history[-5000:]
+        if time.time() - self._apy_history_saved_at >= self.apy_history_save_interval:
+            self._save_apy_history()
+
+    def _set_input(self, name: str, value: Any):
+        self.inputs[name] = {"value": value, "updated_at": time.time()}
+
+    def _input(self, name: str, job: str, fetch):
+        """
+        Latest value of a market input refreshed by a scheduler job.
+
+        Falls back to fetching inline when the job has not produced a value
+        within two of its intervals (not started yet, or failing).
+        """
+        entry = self.inputs.get(name)
+        if entry is not None and time.time() - entry["updated_at"] <= 2 * self.refresh_intervals[job]:
+            return entry["value"]
+        value = fetch()
+        self._set_input(name, value)
+        return value
+
+    def _read_apy(self) -> float:
+        """Current USDC supply APY from Aave (raises on RPC errors)."""
+        usdc_checksum = Web3.to_checksum_address(self.USDC_ADDRESS)
+        reserve_data = self.pool_contract.functions.getReserveData(
+            usdc_checksum
+        ).call()
+
+        liquidity_rate = reserve_data[2]
+        RAY = 10 ** 27
+        rate_per_second = liquidity_rate / RAY
+        return (rate_per_second * 365 * 24 * 60 * 60) * 100
 
     def get_current_apy(self) -> float:
         """Get current USDC supply APY from Aave."""
         try:
-            usdc_checksum = Web3.to_checksum_address(self.USDC_ADDRESS)
-            reserve_data = self.pool_contract.functions.getReserveData(
-                usdc_checksum
-            ).call()
-            
-            liquidity_rate = reserve_data[2]
-            RAY = 10 ** 27
-            rate_per_second = liquidity_rate / RAY
-            apy = (rate_per_second * 365 * 24 * 60 * 60) * 100
-            
-            logger.info(f"Current Aave USDC APY: {apy:.4f}%")
+            apy = self._read_apy()
+            logger.info("Current Aave USDC APY: %.4f%%", apy)
             # Record APY for historical tracking
             self._record_apy(apy)
             return apy
         except Exception as e:
-            logger.error(f"Error fetching Aave APY: {e}")
+            logger.error("Error fetching Aave APY: %s", e)
             return 0.0
 
+    def _time_weighted_stats(self, since: int, now: int) -> Tuple[float, float]:
+        """
+        Time-weighted mean and standard deviation of the APY samples taken since `since`.
+
+        Each sample stands for the time until the next one (the last until `now`),
+        capped at an hour - the spacing compact_history keeps - so an outage
+        doesn't stretch a single reading over days.
+        """
+        window = [e for e in self.apy_history if e["unix_timestamp"] >= since]
+        ends = [e["unix_timestamp"] for e in window[1:]] + [now]
+        weights = [min(max(end - e["unix_timestamp"], 0), 3600) for e, end in zip(window, ends)]
+        total = sum(weights)
+        if total <= 0:
+            # All samples at the same instant: fall back to equal weights
+            weights, total = [1] * len(window), len(window)
+        mean = sum(w * e["apy"] for w, e in zip(weights, window)) / total
+        variance = sum(w * (e["apy"] - mean) ** 2 for w, e in zip(weights, window)) / total
+        return mean, variance ** 0.5
+
     def get_historical_yield_metrics(self) -> Dict:
         """
         Calculate historical yield metrics from tracked APY data and external APIs.
@@ -251,21 +317,15 @@ class LLMAaveYieldAgent:
             metrics["apy_change_24h"] = current_apy - apy_24h[0]
             metrics["apy_change_24h_pct"] = ((current_apy - apy_24h[0]) / apy_24h[0] * 100) if apy_24h[0] > 0 else 0
 
+        # Averages and volatility are time-weighted: history is per-minute for the last day and
+        # hourly before that (compact_history), so plain means would be dominated by the last day
         if len(apy_7d) >= 2:
             metrics["apy_change_7d"] = current_apy - apy_7d[0]
             metrics["apy_change_7d_pct"] = ((current_apy - apy_7d[0]) / apy_7d[0] * 100) if apy_7d[0] > 0 else 0
-            metrics["apy_avg_7d"] = sum(apy_7d) / len(apy_7d)
-            if len(apy_7d) >= 2:
-                mean_7d = metrics["apy_avg_7d"]
-                variance_7d = sum((x - mean_7d) ** 2 for x in apy_7d) / len(apy_7d)
-                metrics["apy_volatility_7d"] = variance_7d ** 0.5  # Standard deviation
+            metrics["apy_avg_7d"], metrics["apy_volatility_7d"] = self._time_weighted_stats(now_7d_ago, current_time)
 
         if len(apy_30d) >= 2:
-            metrics["apy_avg_30d"] = sum(apy_30d) / len(apy_30d)
-            if len(apy_30d) >= 2:
-                mean_30d = metrics["apy_avg_30d"]
-                variance_30d = sum((x - mean_30d) ** 2 for x in apy_30d) / len(apy_30d)
-                metrics["apy_volatility_30d"] = variance_30d ** 0.5
+            metrics["apy_avg_30d"], metrics["apy_volatility_30d"] = self._time_weighted_stats(now_30d_ago, current_time)
 
         # Overall stats
         if apy_values:
@@ -282,13 +342,13 @@ class LLMAaveYieldAgent:
             else:
                 metrics["apy_trend"] = "stable"
 
-        # Fetch historical data from DefiLlama API if available
+        # Fetch historical data from DefiLlama API if available (refreshed with the pools list)
         try:
-            defillama_data = self._fetch_defillama_historical()
+            defillama_data = self._input("defillama_historical", "alternative_yields", self._fetch_defillama_historical)
             if defillama_data:
                 metrics["defillama_historical"] = defillama_data
         except Exception as e:
-            logger.debug(f"Could not fetch DefiLlama historical data: {e}")
+            logger.debug("Could not fetch DefiLlama historical data: %s", e)
 
         return metrics
 
@@ -329,46 +389,53 @@ class LLMAaveYieldAgent:
                         "latest_apy": hist_data.get("data", [{}])[-1].get("apy") if hist_data.get("data") else None,
                     }
         except Exception as e:
-            logger.debug(f"DefiLlama historical fetch error: {e}")
+            logger.debug("DefiLlama historical fetch error: %s", e)
         return None
     
+    def _read_treasury_balance(self) -> float:
+        balance_wei = self.usdc_contract.functions.balanceOf(
+            self.treasury_address
+        ).call()
+        return balance_wei / 10 ** 6
+
     def get_treasury_balance(self) -> float:
         """Get treasury wallet USDC balance (ERC20 balanceOf)."""
         try:
-            balance_wei = self.usdc_contract.functions.balanceOf(
-                self.treasury_address
-            ).call()
-            balance_usdc = balance_wei / 10 ** 6
-            logger.info(f"Treasury USDC Balance: {balance_usdc:,.2f} USDC")
+            balance_usdc = self._read_treasury_balance()
+            logger.info("Treasury USDC Balance: %.2f USDC", balance_usdc)
             return balance_usdc
         except Exception as e:
-            logger.error(f"Error fetching treasury balance: {e}")
+            logger.error("Error fetching treasury balance: %s", e)
             return 0.0
 
+    def _read_vault_balances(self) -> Optional[Dict[str, float]]:
+        """Vault balances, or None without a vault (raises on RPC errors)."""
+        if not self.vault_address:
+            return None
+        code = self.w3.eth.get_code(self.vault_address)
+        if not code or code == b"":
+            logger.warning("No contract at YIELD_VAULT_ADDRESS %s", self.vault_address)
+            return None
+        vault = self.w3.eth.contract(address=self.vault_address, abi=self.VAULT_ABI)
+        idle = vault.functions.idleUnderlying().call()
+        a_token = vault.functions.aTokenBalance().call()
+        total = vault.functions.totalAssets().call()
+        decimals = 6
+        return {
+            "outside_aave_usdc": idle / (10**decimals),
+            "inside_aave_usdc": a_token / (10**decimals),
+            "total_usdc": total / (10**decimals),
+        }
+
     def get_vault_balances(self) -> Optional[Dict[str, float]]:
         """
         Get YieldVault balances: outside Aave (idle) and inside Aave (supplied).
         Same logic as read_vault_balance.py. Returns None if no vault address or contract missing.
         """
-        if not self.vault_address:
-            return None
         try:
-            code = self.w3.eth.get_code(self.vault_address)
-            if not code or code == b"":
-                logger.warning(f"No contract at YIELD_VAULT_ADDRESS {self.vault_address}")
-                return None
-            vault = self.w3.eth.contract(address=self.vault_address, abi=self.VAULT_ABI)
-            idle = vault.functions.idleUnderlying().call()
-            a_token = vault.functions.aTokenBalance().call()
-            total = vault.functions.totalAssets().call()
-            decimals = 6
-            return {
-                "outside_aave_usdc": idle / (10**decimals),
-                "inside_aave_usdc": a_token / (10**decimals),
-                "total_usdc": total / (10**decimals),
-            }
+            return self._read_vault_balances()
         except Exception as e:
-            logger.error(f"Error fetching vault balances: {e}")
+            logger.error("Error fetching vault balances: %s", e)
             return None
 
     def execute_supply_to_aave(self, market_data: Dict) -> bool:
@@ -393,6 +460,12 @@ class LLMAaveYieldAgent:
             if amount_raw == 0:
                 logger.info("Supply amount would be 0 (idle too small); skipping")
                 return True
+            evaluation = self.supply_scheduler.evaluate(
+                amount_raw / 1e6, market_data.get("aave_apy", 0), market_data.get("gas_cost_usd", 0)
+            )
+            if not evaluation["should_supply"]:
+                logger.info("Deferring supplyToAave: %s", evaluation['reason'])
+                return True
             account = Account.from_key(self.operator_private_key)
             account_address = account.address
             chain_id = self.w3.eth.chain_id
@@ -407,10 +480,11 @@ class LLMAaveYieldAgent:
             signed = account.sign_transaction(tx)
             tx_hash = self.w3.eth.send_raw_transaction(signed.raw_transaction)
             tx_hash_hex = tx_hash.hex()
-            logger.info(f"supplyToAave tx sent: {tx_hash_hex} (amount={amount_raw} raw, {amount_raw/1e6:.6f} USDC)")
+            logger.info("supplyToAave tx sent: %s (amount=%s raw, %.6f USDC)", tx_hash_hex, amount_raw, amount_raw/1e6)
             receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
             if receipt.get("status") == 1:
                 logger.info("supplyToAave succeeded")
+                self.supply_scheduler.record_supply(amount_raw / 1e6, tx_hash_hex)
                 return True
             logger.error("supplyToAave tx reverted")
             return False
@@ -419,67 +493,85 @@ class LLMAaveYieldAgent:
             logger.error("This could be due to: missing OPERATOR_ROLE, insufficient gas, wrong vault address, or network issues")
             return False
 
+    def _fetch_alternative_yields(self) -> Dict[str, float]:
+        """Best Base USDC APY per protocol from DefiLlama (raises on HTTP errors)."""
+        alternatives = {}
+        response = requests.get("https://yields.llama.fi/pools", timeout=10)
+        response.raise_for_status()
+        data = response.json()
+        for pool in data.get('data', []):
+            if (pool.get('chain') == 'Base' and 
+                'USDC' in pool.get('symbol', '') and
+                pool.get('apy', 0) > 0):
+                protocol = pool.get('project', 'Unknown')
+                apy = pool.get('apy', 0)
+                if protocol not in alternatives or alternatives[protocol] < apy:
+                    alternatives[protocol] = apy
+        logger.info("Alternative yields found: %s", alternatives)
+        return alternatives
+
     def get_alternative_yields(self) -> Dict[str, float]:
         """Get yields from alternative DeFi protocols."""
         alternatives = {}
         try:
-            response = requests.get("https://yields.llama.fi/pools", timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                for pool in data.get('data', []):
-                    if (pool.get('chain') == 'Base' and 
-                        'USDC' in pool.get('symbol', '') and
-                        pool.get('apy', 0) > 0):
-                        protocol = pool.get('project', 'Unknown')
-                        apy = pool.get('apy', 0)
-                        if protocol not in alternatives or alternatives[protocol] < apy:
-                            alternatives[protocol] = apy
-                logger.info(f"Alternative yields found: {alternatives}")
+            alternatives = self._fetch_alternative_yields()
         except Exception as e:
-            logger.warning(f"Could not fetch alternative yields: {e}")
+            logger.warning("Could not fetch alternative yields: %s", e)
         
         if not alternatives:
             alternatives['Conservative Benchmark'] = 1.0
         return alternatives
+
+    def _read_eth_price(self) -> float:
+        """ETH/USD from CoinGecko (raises on HTTP errors or a missing price)."""
+        price_response = requests.get(
+            "https://api.coingecko.com/api/v3/simple/price",
+            params={"ids": "ethereum", "vs_currencies": "usd"},
+            timeout=5
+        )
+        price_response.raise_for_status()
+        return float(price_response.json()['ethereum']['usd'])
+
+    def get_eth_price(self) -> float:
+        try:
+            return self._read_eth_price()
+        except Exception:
+            return 3000.0
     
     def estimate_gas_cost(self) -> float:
         """Estimate gas cost for Aave deposit transaction."""
         try:
-            gas_price = self.w3.eth.gas_price
+            gas_price = self._input("gas_price", "gas", lambda: self.w3.eth.gas_price)
             estimated_gas_units = 250000
             cost_wei = gas_price * estimated_gas_units
             cost_eth = cost_wei / 10 ** 18
             
-            try:
-                price_response = requests.get(
-                    "https://api.coingecko.com/api/v3/simple/price",
-                    params={"ids": "ethereum", "vs_currencies": "usd"},
-                    timeout=5
-                )
-                eth_price = price_response.json().get('ethereum', {}).get('usd', 3000)
-            except:
-                eth_price = 3000
+            eth_price = self._input("eth_price", "eth_price", self.get_eth_price)
             
             cost_usd = cost_eth * eth_price
-            logger.info(f"Estimated gas cost: ${cost_usd:.4f}")
+            logger.info("Estimated gas cost: $%.4f", cost_usd)
             return cost_usd
         except Exception as e:
-            logger.error(f"Error estimating gas cost: {e}")
+            logger.error("Error estimating gas cost: %s", e)
             return 100.0
     
     def get_market_context(self) -> Dict:
         """Gather all market data for LLM analysis."""
+        # Inputs come from the scheduler jobs' latest refresh (fetched inline if stale)
         ctx = {
             'timestamp': datetime.now().isoformat(),
-            'aave_apy': self.get_current_apy(),
-            'treasury_balance': self.get_treasury_balance(),
-            'alternative_yields': self.get_alternative_yields(),
+            'aave_apy': self._input('aave_apy', 'apy_vault', self.get_current_apy),
+            'treasury_balance': self._input('treasury_balance', 'apy_vault', self.get_treasury_balance),
+            'alternative_yields': self._input('alternative_yields', 'alternative_yields', self.get_alternative_yields),
             'gas_cost_usd': self.estimate_gas_cost(),
             'network': 'Base Sepolia',
             'asset': 'USDC',
         }
-        vault_balances = self.get_vault_balances()
+        vault_balances = self._input('vault_balances', 'apy_vault', self.get_vault_balances)
         ctx['vault_balances'] = vault_balances  # None or {outside_aave_usdc, inside_aave_usdc, total_usdc}
+        if vault_balances:
+            # Every check feeds the idle-inflow estimate, not just DEPOSIT decisions
+            self.supply_scheduler.observe(vault_balances['outside_aave_usdc'])
         
         # Add historical yield metrics
         ctx['historical_yield_metrics'] = self.get_historical_yield_metrics()
@@ -613,14 +705,13 @@ Analyze thoroughly and provide your recommendation in the required JSON format.
             decision_data = json.loads(llm_response)
             
             # Log token usage
-            logger.info(f"Tokens used - Prompt: {response.usage.prompt_tokens}, "
-                       f"Completion: {response.usage.completion_tokens}, "
-                       f"Total: {response.usage.total_tokens}")
+            logger.info("Tokens used - Prompt: %s, Completion: %s, Total: %s",
+                        response.usage.prompt_tokens, response.usage.completion_tokens, response.usage.total_tokens)
             
             return decision_data
             
         except Exception as e:
-            logger.error(f"Error getting LLM decision: {e}")
+            logger.error("Error getting LLM decision: %s", e)
             # Fallback to conservative decision
             return {
                 "decision": "HOLD",
@@ -660,7 +751,8 @@ Analyze thoroughly and provide your recommendation in the required JSON format.
 
         # When decision is DEPOSIT, supply (supply_to_aave_percent)% of vault idle to Aave
         if llm_decision.get("decision") == "DEPOSIT" and self.supply_to_aave_percent > 0:
-            logger.info(f"Decision is DEPOSIT. Attempting to supply {self.supply_to_aave_percent}% of vault idle to Aave...")
+            logger.info("Decision is DEPOSIT. Considering supply of %s%% of vault idle to Aave...",
+                        self.supply_to_aave_percent)
             result = self.execute_supply_to_aave(market_data)
             if result:
                 logger.info("Successfully executed supplyToAave transaction")
@@ -669,9 +761,9 @@ Analyze thoroughly and provide your recommendation in the required JSON format.
 
         # Log the decision
         logger.info("=" * 80)
-        logger.info(f"LLM DECISION: {llm_decision['decision']}")
-        logger.info(f"CONFIDENCE: {llm_decision['confidence']}%")
-        logger.info(f"REASONING: {llm_decision['reasoning']}")
+        logger.info("LLM DECISION: %s", llm_decision['decision'])
+        logger.info("CONFIDENCE: %s%%", llm_decision['confidence'])
+        logger.info("REASONING: %s", llm_decision['reasoning'])
         logger.info("=" * 80)
         
         return full_decision
@@ -801,40 +893,173 @@ RISK TOLERANCE: {latest['risk_tolerance'].upper()}
         
         return report
     
+    def refresh_apy_and_balances(self):
+        """Scheduler job: Aave APY (recorded to history), treasury and vault balances."""
+        apy = self._read_apy()
+        logger.info("Current Aave USDC APY: %.4f%%", apy)
+        self._record_apy(apy)
+        self._set_input('aave_apy', apy)
+        self._set_input('treasury_balance', self._read_treasury_balance())
+        self._set_input('vault_balances', self._read_vault_balances())
+
+    def refresh_gas_price(self):
+        """Scheduler job: current gas price."""
+        self._set_input('gas_price', self.w3.eth.gas_price)
+
+    def refresh_eth_price(self):
+        """Scheduler job: ETH/USD for gas cost estimates."""
+        self._set_input('eth_price', self._read_eth_price())
+
+    def refresh_alternative_yields(self):
+        """Scheduler job: DefiLlama pools list (alternative yields) and the Aave pool's chart."""
+        self._set_input('alternative_yields', self._fetch_alternative_yields() or {'Conservative Benchmark': 1.0})
+        self._set_input('defillama_historical', self._fetch_defillama_historical())
+
+    def compact_history(self):
+        """
+        Scheduler job: bound the histories that grow for the life of the process.
+
+        APY samples are kept at full resolution for 24h, then one per hour up to
+        APY_HISTORY_DAYS; decision_history keeps the last DECISION_HISTORY_LIMIT entries.
+        """
+        now = int(time.time())
+        cutoff_raw = now - 24 * 60 * 60
+        cutoff_all = now - self.apy_history_days * 24 * 60 * 60
+        compacted, seen_hours = [], set()
+        for entry in self.apy_history:
+            ts = entry.get("unix_timestamp", 0)
+            if ts < cutoff_all:
+                continue
+            if ts < cutoff_raw:
+                if ts // 3600 in seen_hours:
+                    continue
+                seen_hours.add(ts // 3600)
+            compacted.append(entry)
+        removed = len(self.apy_history) - len(compacted)
+        self.apy_history = compacted
+        self._save_apy_history()
+
+        trimmed = max(0, len(self.decision_history) - self.decision_history_limit)
+        if trimmed:
+            self.decision_history = self.decision_history[-self.decision_history_limit:]
+        logger.info("History compacted: %d APY samples (-%d), %d decisions (-%d)",
+                    len(self.apy_history), removed, len(self.decision_history), trimmed)
+
+    def run_decision(self):
+        """Scheduler job: LLM decision, report and decision history file."""
+        # Make LLM-powered decision (profiled when armed via SIGUSR1)
+        with PROFILER.profile_analysis():
+            self.make_decision()
+
+        # Generate and display report
+        report = self.generate_report()
+        print(report)
+
+        # Save decision history as JSON only (no .log or .txt files)
+        with open('llm_decision_history.json', 'w') as f:
+            json.dump(self.decision_history, f, indent=2)
+
+    def build_scheduler(self, iterations: Optional[int] = None) -> Scheduler:
+        """
+        Scheduler with one job per input cadence plus the decision itself.
+
+        Args:
+            iterations: Stop the scheduler after this many decisions (None = run indefinitely)
+        """
+        scheduler = Scheduler()
+        intervals = self.refresh_intervals
+        # Inputs first, so the first decision sees fresh data
+        scheduler.add_job("apy_vault", self.refresh_apy_and_balances, intervals["apy_vault"])
+        scheduler.add_job("gas", self.refresh_gas_price, intervals["gas"])
+        scheduler.add_job("eth_price", self.refresh_eth_price, intervals["eth_price"])
+        scheduler.add_job("alternative_yields", self.refresh_alternative_yields, intervals["alternative_yields"])
+
+        decisions = {"count": 0}
+
+        def decide():
+            self.run_decision()
+            decisions["count"] += 1
+            if iterations is not None and decisions["count"] >= iterations:
+                scheduler.stop()
+
+        # A failed decision is retried after a minute (as the old loop did), backing off to the check interval
+        scheduler.add_job("decision", decide, self.check_interval, backoff_max=self.check_interval)
+        scheduler.add_job("history_compaction", self.compact_history, intervals["history_compaction"],
+                          misfire=MISFIRE_SKIP, start_delay=intervals["history_compaction"])
+        # Cheap flag check; a signal is acted on within a second unless a decision is running
+        scheduler.add_job("profiling_requests", handle_profiling_requests, 1.0, jitter=0, misfire=MISFIRE_SKIP)
+        return scheduler
+
     def run(self, iterations: Optional[int] = None):
         """Run the LLM agent continuously or for specified iterations."""
         logger.info("Starting LLM-Powered Aave Yield Agent...")
-        logger.info(f"Model: {self.model}")
-        logger.info(f"Risk Tolerance: {self.risk_tolerance}")
-        logger.info(f"Check interval: {self.check_interval} seconds")
-        
-        iteration = 0
-        while iterations is None or iteration < iterations:
-            try:
-                # Make LLM-powered decision
-                decision = self.make_decision()
-                
-                # Generate and display report
-                report = self.generate_report()
-                print(report)
-
-                # Save decision history as JSON only (no .log or .txt files)
-                with open('llm_decision_history.json', 'w') as f:
-                    json.dump(self.decision_history, f, indent=2)
-                
-                iteration += 1
-                
-                # Wait before next check
-                if iterations is None or iteration < iterations:
-                    logger.info(f"Waiting {self.check_interval} seconds until next check...")
-                    time.sleep(self.check_interval)
-                    
-            except KeyboardInterrupt:
-                logger.info("Agent stopped by user")
-                break
-            except Exception as e:
-                logger.error("Error in agent loop: %s", e, exc_info=True)
-                time.sleep(60)
+        logger.info("Model: %s", self.model)
+        logger.info("Risk Tolerance: %s", self.risk_tolerance)
+        logger.info("Check interval: %s seconds", self.check_interval)
+
+        self.scheduler = self.build_scheduler(iterations)
+        try:
+            self.scheduler.run_forever()
+        except KeyboardInterrupt:
+            logger.info("Agent stopped by user")
+            self.scheduler.stop()
+        finally:
+            # Samples since the last periodic save
+            self._save_apy_history()
+
+
+# Set by the signal handlers, acted on by the "profiling_requests" job: a handler runs on
+# the main thread between any two bytecodes, possibly while that thread holds the
+# profiler's lock inside an analysis, so it must not take locks or do I/O itself
+_profiling_requests = {"profile": False, "memory": False, "output_dir": "profiles"}
+
+
+def install_profiling_signals(output_dir: str):
+    """
+    Diagnose a long-running agent without restarting it:
+    - SIGUSR1: profile the next PROFILE_ANALYSES analyses (PROFILE_MODE: sampling or
+      deterministic); the report is written to output_dir when they finish
+    - SIGUSR2: first signal starts tracemalloc; each later one writes a snapshot of the
+      top allocations and their growth since the first to output_dir
+
+    The handlers only record the request; handle_profiling_requests() carries it out
+    on the scheduler thread.
+    """
+    PROFILER.output_dir = output_dir
+    _profiling_requests["output_dir"] = output_dir
+
+    def on_profile(signum, frame):
+        _profiling_requests["profile"] = True
+
+    def on_memory(signum, frame):
+        _profiling_requests["memory"] = True
+
+    signal.signal(signal.SIGUSR1, on_profile)
+    signal.signal(signal.SIGUSR2, on_memory)
+    logger.info("Profiling signals installed (pid %s): SIGUSR1 = profile, SIGUSR2 = memory; output in %s",
+                os.getpid(), output_dir)
+
+
+def handle_profiling_requests():
+    """Act on profiling signals received since the last call (scheduler job)."""
+    if _profiling_requests["profile"]:
+        _profiling_requests["profile"] = False
+        try:
+            PROFILER.arm(int(os.getenv('PROFILE_ANALYSES', '1')), os.getenv('PROFILE_MODE', 'sampling'))
+        except ValueError as e:
+            logger.error("Cannot arm profiler: %s", e)
+
+    if _profiling_requests["memory"]:
+        _profiling_requests["memory"] = False
+        if not MEMORY_PROFILER.tracing:
+            MEMORY_PROFILER.start()
+            return
+        output_dir = _profiling_requests["output_dir"]
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"memory-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+        with open(path, 'w') as f:
+            json.dump(MEMORY_PROFILER.snapshot(), f, indent=2)
+        logger.info("Memory snapshot written to %s", path)
 
 
 if __name__ == "__main__":
@@ -867,17 +1092,17 @@ if __name__ == "__main__":
     
     # Log configuration status
     logger.info("Configuration loaded from .env:")
-    logger.info(f"  RPC_URL: {RPC_URL}")
-    logger.info(f"  TREASURY_ADDRESS: {TREASURY_ADDRESS}")
-    logger.info(f"  YIELD_VAULT_ADDRESS: {YIELD_VAULT_ADDRESS if YIELD_VAULT_ADDRESS else '(not set)'}")
-    logger.info(f"  OPERATOR_PRIVATE_KEY: {'(set)' if OPERATOR_PRIVATE_KEY else '(not set - transactions disabled)'}")
-    logger.info(f"  SUPPLY_TO_AAVE_PERCENT: {SUPPLY_TO_AAVE_PERCENT}%")
-    logger.info(f"  MODEL: {MODEL}")
-    logger.info(f"  RISK_TOLERANCE: {RISK_TOLERANCE}")
-    logger.info(f"  DEFILLAMA_POOL_ID: {DEFILLAMA_POOL_ID if DEFILLAMA_POOL_ID else '(not set - will auto-detect)'}")
+    logger.info("  RPC_URL: %s", RPC_URL)
+    logger.info("  TREASURY_ADDRESS: %s", TREASURY_ADDRESS)
+    logger.info("  YIELD_VAULT_ADDRESS: %s", YIELD_VAULT_ADDRESS if YIELD_VAULT_ADDRESS else '(not set)')
+    logger.info("  OPERATOR_PRIVATE_KEY: %s", '(set)' if OPERATOR_PRIVATE_KEY else '(not set - transactions disabled)')
+    logger.info("  SUPPLY_TO_AAVE_PERCENT: %s%%", SUPPLY_TO_AAVE_PERCENT)
+    logger.info("  MODEL: %s", MODEL)
+    logger.info("  RISK_TOLERANCE: %s", RISK_TOLERANCE)
+    logger.info("  DEFILLAMA_POOL_ID: %s", DEFILLAMA_POOL_ID if DEFILLAMA_POOL_ID else '(not set - will auto-detect)')
 
     if RISK_TOLERANCE not in ['conservative', 'moderate', 'aggressive']:
-        logger.warning(f"Invalid risk tolerance '{RISK_TOLERANCE}', defaulting to 'moderate'")
+        logger.warning("Invalid risk tolerance '%s', defaulting to 'moderate'", RISK_TOLERANCE)
         RISK_TOLERANCE = 'moderate'
 
     # Pass YIELD_VAULT_ADDRESS to agent (it will also read from env in __init__, but we pass it here for consistency)
@@ -895,10 +1120,12 @@ if __name__ == "__main__":
     
     # Verify vault address was loaded correctly
     if YIELD_VAULT_ADDRESS and not agent.vault_address:
-        logger.warning(f"WARNING: YIELD_VAULT_ADDRESS '{YIELD_VAULT_ADDRESS}' may be invalid (not checksummed)")
+        logger.warning("WARNING: YIELD_VAULT_ADDRESS '%s' may be invalid (not checksummed)", YIELD_VAULT_ADDRESS)
     elif not YIELD_VAULT_ADDRESS:
         logger.warning("WARNING: YIELD_VAULT_ADDRESS not set in .env - vault balance monitoring disabled")
     
+    install_profiling_signals(os.getenv('PROFILE_OUTPUT_DIR', 'profiles'))
+
     logger.info("=" * 80)
     logger.info("LLM AGENT READY")
     logger.info("=" * 80)
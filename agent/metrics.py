@@ -0,0 +1,257 @@
+"""
+Prometheus metrics for the agent (text exposition format, no client library).
+
+- agent_stage_duration_seconds: per pipeline stage (market snapshot steps,
+  the decision, swaps, deposits, receipt waits, ...)
+- agent_dependency_request_duration_seconds: per external dependency (RPC,
+  DefiLlama, CoinGecko, LI.FI, OpenAI)
+- agent_rpc_calls_total / agent_rpc_requests_total: JSON-RPC calls per method
+  and HTTP round trips (a batch is one round trip with many calls)
+- agent_llm_tokens_total: prompt and completion tokens from response.usage
+- agent_transactions_total: submitted transactions and their final outcomes
+- agent_decisions_total: decisions by outcome
+- agent_reanalysis_triggers_total: analyses triggered by reserve_watcher, by reason
+
+Stages are timed with the `timed` decorator or `stage_timer` context
+manager, each of which also opens a tracing span (tracing.py); HTTP
+dependencies are timed by a response hook on the agent's shared requests
+session (install_session_hooks), which also counts the JSON-RPC methods in
+each request body.
+"""
+
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import requests
+
+from tracing import start_span
+
+logger = logging.getLogger(__name__)
+
+# Prometheus client defaults, extended for multi-second LLM calls and receipt waits
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_format(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> [per-bucket counts, sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, [list(v[0]), v[1], v[2]]) for k, v in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, ('le', _format(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_format(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    """Set of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "agent_stage_duration_seconds", "Duration of agent pipeline stages.", ["stage"]))
+DEPENDENCY_SECONDS = REGISTRY.register(Histogram(
+    "agent_dependency_request_duration_seconds", "Duration of requests to external dependencies.",
+    ["dependency"]))
+DEPENDENCY_ERRORS = REGISTRY.register(Counter(
+    "agent_dependency_errors_total", "Failed requests to external dependencies (HTTP status >= 400).",
+    ["dependency"]))
+RPC_REQUESTS = REGISTRY.register(Counter(
+    "agent_rpc_requests_total", "JSON-RPC HTTP round trips.", ["batch"]))
+RPC_CALLS = REGISTRY.register(Counter(
+    "agent_rpc_calls_total", "JSON-RPC calls by method (each call of a batch counts).", ["method"]))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "agent_llm_tokens_total", "LLM tokens used.", ["model", "type"]))
+TRANSACTIONS = REGISTRY.register(Counter(
+    "agent_transactions_total", "Transactions submitted and finalized, by action and status.",
+    ["action", "status"]))
+DECISIONS = REGISTRY.register(Counter(
+    "agent_decisions_total", "Decisions made, by outcome and backend.", ["decision", "backend"]))
+REANALYSIS_TRIGGERS = REGISTRY.register(Counter(
+    "agent_reanalysis_triggers_total", "Event-driven re-analyses, by reason (rate_move, deposit).", ["reason"]))
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Time a block as a pipeline stage (and trace it as a span)."""
+    with STAGE_SECONDS.time(stage=stage), start_span(stage):
+        yield
+
+
+def timed(stage: str):
+    """Decorator timing a function as a pipeline stage (and tracing it as a span)."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with STAGE_SECONDS.time(stage=stage), start_span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_llm_usage(model: str, usage) -> None:
+    """Count tokens from an OpenAI response.usage object (ignored if missing)."""
+    if usage is None:
+        return
+    LLM_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, model=model, type="prompt")
+    LLM_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, model=model, type="completion")
+
+
+def on_transaction_submitted(action: str) -> None:
+    TRANSACTIONS.inc(action=action, status="submitted")
+
+
+def on_transaction_finalized(entry: Dict) -> None:
+    """PendingTransactionTracker listener: count final outcomes."""
+    TRANSACTIONS.inc(action=entry.get("action", ""), status=entry.get("status", ""))
+
+
+def _rpc_methods(body) -> List[str]:
+    if not body:
+        return []
+    try:
+        payload = json.loads(body)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        return []
+    items = payload if isinstance(payload, list) else [payload]
+    return [i.get("method", "") for i in items if isinstance(i, dict) and "jsonrpc" in i]
+
+
+def install_session_hooks(session: requests.Session, dependencies: Dict[str, str]) -> None:
+    """
+    Time every response of a requests session per dependency and count JSON-RPC calls.
+
+    Args:
+        session: Shared session (web3 provider, batch RPC client, HTTP APIs)
+        dependencies: URL prefix -> dependency label; longest matching prefix wins,
+            unmatched URLs are labelled by host
+    """
+    prefixes = sorted(((p.rstrip("/"), name) for p, name in dependencies.items() if p), key=lambda x: -len(x[0]))
+
+    def hook(response: requests.Response, *args, **kwargs):
+        try:
+            url = response.url or (response.request.url if response.request is not None else "")
+            dependency = next((name for prefix, name in prefixes if url.startswith(prefix)), None)
+            if dependency is None:
+                dependency = requests.utils.urlparse(url).hostname or "unknown"
+            elapsed = getattr(response, "elapsed", None)
+            DEPENDENCY_SECONDS.observe(elapsed.total_seconds() if elapsed is not None else 0.0, dependency=dependency)
+            if response.status_code >= 400:
+                DEPENDENCY_ERRORS.inc(dependency=dependency)
+            methods = _rpc_methods(response.request.body if response.request is not None else None)
+            if methods:
+                RPC_REQUESTS.inc(batch="true" if len(methods) > 1 else "false")
+                for method in methods:
+                    RPC_CALLS.inc(method=method)
+        except Exception as e:
+            logger.debug("Metrics hook failed: %s", e)
+        return response
+
+    session.hooks["response"].append(hook)
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format."""
+    return REGISTRY.render()
@@ -0,0 +1,158 @@
+"""
+Monte Carlo projection of allocation returns.
+
+Replaces the single-point "balance * APY * days / 365" projection with a
+distribution. Each asset's supply APY follows a mean-reverting random walk
+(daily Ornstein-Uhlenbeck steps, floored at zero) whose volatility is
+estimated from the recorded APY history; assets share a common factor since
+stablecoin rates on the same market tend to move together. The OU recursion
+is linear, so every day's rate is computed in closed form: the decaying
+start-to-target drift plus the shocks convolved with the reversion weights
+(one days x days matrix product), with no Python loop over days. A 30/90-day
+projection of three assets over the default 2,000 paths takes about 25-30 ms
+(about 15 ms for one asset); the result reports its own elapsed_ms.
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def daily_apy_volatility(history: List[Dict[str, Any]], min_samples: int = 3) -> Optional[float]:
+    """
+    Standard deviation of APY changes per day (percentage points) from history entries.
+
+    Changes between samples are normalized by sqrt(elapsed days), so irregularly
+    spaced samples (the agent runs on a timer, with gaps) are comparable.
+
+    Args:
+        history: Entries with "apy" (percent) and "unix_timestamp"
+        min_samples: Fewer samples than this returns None
+
+    Returns:
+        Daily volatility, or None without enough usable samples
+    """
+    if len(history) < min_samples:
+        return None
+    apy = np.array([float(h["apy"]) for h in history])
+    ts = np.array([float(h["unix_timestamp"]) for h in history])
+    dt_days = np.diff(ts) / 86400
+    usable = dt_days > 0
+    if usable.sum() < min_samples - 1:
+        return None
+    changes = np.diff(apy)[usable] / np.sqrt(dt_days[usable])
+    return float(np.std(changes))
+
+
+class ReturnSimulator:
+    """
+    Vectorized APY-path simulator producing percentile bands for an allocation.
+    """
+
+    def __init__(
+        self,
+        n_paths: int = 2_000,
+        mean_reversion: float = 0.05,
+        correlation: float = 0.6,
+        percentiles: Sequence[float] = (5, 25, 50, 75, 95),
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            n_paths: Simulated paths per projection
+            mean_reversion: Fraction of the gap to the long-run APY closed per day (0-1)
+            correlation: Share of APY variance driven by a factor common to all assets
+            percentiles: Percentiles reported for each horizon
+            seed: RNG seed (None = non-deterministic)
+        """
+        self.n_paths = n_paths
+        self.mean_reversion = min(max(mean_reversion, 0.0), 1.0)
+        self.correlation = min(max(correlation, 0.0), 1.0)
+        self.percentiles = list(percentiles)
+        self._rng = np.random.default_rng(seed)
+
+    def simulate(
+        self,
+        amounts: Dict[str, float],
+        apys: Dict[str, float],
+        daily_volatility: Dict[str, float],
+        long_run_apys: Optional[Dict[str, float]] = None,
+        one_time_cost_usd: float = 0.0,
+        horizons_days: Sequence[int] = (30, 90),
+    ) -> Dict[str, Any]:
+        """
+        Simulate returns of holding `amounts` in Aave at stochastic APYs.
+
+        Args:
+            amounts: Asset -> USD amount supplied
+            apys: Asset -> starting supply APY (%), e.g. the post-deposit APY
+            daily_volatility: Asset -> daily APY std-dev (percentage points)
+            long_run_apys: Asset -> APY paths revert to (defaults to the start)
+            one_time_cost_usd: Gas and swap costs subtracted from every path
+            horizons_days: Horizons to report
+
+        Returns:
+            Dict keyed by "<n>d" with mean, std, percentile bands ("p5", ...)
+            and probability of a net loss, plus paths and elapsed ms
+        """
+        started = time.perf_counter()
+        assets = [a for a, amount in amounts.items() if amount > 0 and a in apys]
+        days = int(max(horizons_days))
+        if not assets or days <= 0:
+            bands = {f"p{p:g}": -one_time_cost_usd for p in self.percentiles}
+            result = {
+                f"{h}d": dict(bands, mean=-one_time_cost_usd, std=0.0, prob_loss=1.0 if one_time_cost_usd > 0 else 0.0)
+                for h in horizons_days
+            }
+            return dict(result, paths=0, elapsed_ms=(time.perf_counter() - started) * 1000)
+
+        long_run_apys = long_run_apys or {}
+        start = np.array([apys[a] for a in assets], dtype=float)
+        target = np.array([long_run_apys.get(a, apys[a]) for a in assets], dtype=float)
+        sigma = np.array([daily_volatility.get(a, 0.0) for a in assets], dtype=float)
+        weights = np.array([amounts[a] for a in assets], dtype=float)
+
+        # Correlated daily shocks: common factor + asset-specific noise (float32 halves RNG time).
+        # Laid out (days, assets, paths) so elementwise work runs over contiguous paths.
+        common = self._rng.standard_normal((days, self.n_paths), dtype=np.float32)
+        idio = self._rng.standard_normal((days, len(assets) * self.n_paths), dtype=np.float32)
+
+        # Rate in force at the start of day d (x_0 = start):
+        #   x_d = target + a^d (start - target) + sum_{s<d} a^(d-1-s) shock_s,  a = 1 - mean_reversion
+        # The shock sum is linear, so both shock sources are filtered with one lower-triangular
+        # kernel and scaled afterwards. Rates are floored at zero when they accrue (the
+        # unfloored path keeps reverting).
+        decay = 1.0 - self.mean_reversion
+        day = np.arange(days)
+        lag = day[:, None] - 1 - day[None, :]
+        kernel = np.where(lag >= 0, decay ** np.maximum(lag, 0), 0.0).astype(np.float32)
+        rates = (kernel @ idio).reshape(days, len(assets), self.n_paths)
+        rates *= (np.sqrt(1 - self.correlation) * sigma).astype(np.float32)[:, None]
+        common = kernel @ common
+        drift = target + (decay ** day)[:, None] * (start - target)
+        for i, scale in enumerate(np.sqrt(self.correlation) * sigma):
+            rates[:, i, :] += np.float32(scale) * common
+            rates[:, i, :] += drift[:, i, None].astype(np.float32)
+        np.maximum(rates, 0.0, out=rates)
+
+        # Cumulative USD earnings per day and path
+        cumulative = np.cumsum(weights.astype(np.float32) @ rates, axis=0, dtype=np.float64) / 100 / 365
+        cumulative -= one_time_cost_usd
+
+        result: Dict[str, Any] = {}
+        for horizon in horizons_days:
+            returns = cumulative[int(horizon) - 1]
+            bands = np.percentile(returns, self.percentiles)
+            result[f"{horizon}d"] = {
+                **{f"p{p:g}": float(v) for p, v in zip(self.percentiles, bands)},
+                "mean": float(returns.mean()),
+                "std": float(returns.std()),
+                "prob_loss": float((returns < 0).mean()),
+            }
+        result["paths"] = self.n_paths
+        result["elapsed_ms"] = (time.perf_counter() - started) * 1000
+        return result
@@ -0,0 +1,176 @@
+"""
+Cached ETH/USD price feed for gas-cost estimates.
+
+Reads the Chainlink ETH/USD aggregator on Base through the batched RPC client
+(latestRoundData + decimals in one request), with CoinGecko as a secondary
+source. The price is refreshed in a background thread, so estimate_gas_cost
+never pays for a blocking HTTP call, and every reading carries its source and
+age so a stale price is visible instead of silently replaced by a constant.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from rpc_batch import BatchRpcClient, RpcBatchError
+
+logger = logging.getLogger(__name__)
+
+
+class EthPriceFeed:
+    """
+    ETH/USD price with TTL caching, background refresh and source fallback.
+    """
+
+    # Chainlink ETH/USD aggregator proxy on Base Mainnet
+    CHAINLINK_ETH_USD_BASE = "0x71041dddad3595F9CEd3DcCFBe3D1F4b0a16Bb70"
+    LATEST_ROUND_DATA_SELECTOR = "0xfeaf968c"  # latestRoundData()
+    DECIMALS_SELECTOR = "0x313ce567"  # decimals()
+
+    COINGECKO_URL = "https://api.coingecko.com/api/v3/simple/price"
+
+    SOURCES = ("chainlink", "coingecko")
+
+    def __init__(
+        self,
+        rpc: BatchRpcClient,
+        session: Optional[requests.Session] = None,
+        sources: Optional[List[str]] = None,
+        chainlink_feed: Optional[str] = None,
+        coingecko_url: Optional[str] = None,
+        ttl: float = 1800.0,
+        refresh_interval: float = 60.0,
+    ):
+        """
+        Args:
+            rpc: Batched JSON-RPC client (Base Mainnet)
+            session: Optional shared requests session for CoinGecko
+            sources: Sources in priority order ("chainlink", "coingecko")
+            chainlink_feed: Aggregator address (defaults to ETH/USD on Base)
+            coingecko_url: CoinGecko simple/price endpoint
+            ttl: Seconds after which a price is reported as stale (above the
+                aggregator's 20 min heartbeat so quiet markets aren't flagged)
+            refresh_interval: Seconds between background refreshes
+
+        Raises:
+            ValueError: If a source is not one of SOURCES
+        """
+        self.rpc = rpc
+        self.session = session or requests.Session()
+        self.sources = sources or list(self.SOURCES)
+        unknown = [s for s in self.sources if s not in self.SOURCES]
+        if unknown:
+            raise ValueError(f"Unknown ETH price source(s) {unknown} (supported: {', '.join(self.SOURCES)})")
+        self.chainlink_feed = chainlink_feed or self.CHAINLINK_ETH_USD_BASE
+        self.coingecko_url = coingecko_url or self.COINGECKO_URL
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.Lock()
+        self._price: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _fetch_chainlink(self) -> Optional[Dict[str, Any]]:
+        """Read latestRoundData() and decimals() from the aggregator in one batch."""
+        replies = self.rpc.batch([
+            ("eth_call", [{"to": self.chainlink_feed, "data": selector}, "latest"])
+            for selector in (self.LATEST_ROUND_DATA_SELECTOR, self.DECIMALS_SELECTOR)
+        ])
+        if any("error" in r for r in replies):
+            raise RpcBatchError(f"Chainlink read failed: {[r.get('error') for r in replies]}")
+
+        round_data = bytes.fromhex(replies[0]["result"][2:])
+        if len(round_data) < 160:
+            raise RpcBatchError("Chainlink latestRoundData returned short data")
+        answer = int.from_bytes(round_data[32:64], "big", signed=True)
+        updated_at = int.from_bytes(round_data[96:128], "big")
+        decimals = int(replies[1]["result"], 16)
+        if answer <= 0:
+            raise RpcBatchError(f"Chainlink returned non-positive answer {answer}")
+        return {"price": answer / 10 ** decimals, "source": "chainlink", "updated_at": float(updated_at)}
+
+    def _fetch_coingecko(self) -> Optional[Dict[str, Any]]:
+        """Fetch ETH/USD from CoinGecko's simple price API."""
+        response = self.session.get(
+            self.coingecko_url,
+            params={"ids": "ethereum", "vs_currencies": "usd", "include_last_updated_at": "true"},
+            timeout=5,
+        )
+        response.raise_for_status()
+        data = response.json().get("ethereum", {})
+        if not data.get("usd"):
+            raise ValueError(f"CoinGecko response missing price: {data}")
+        return {
+            "price": float(data["usd"]),
+            "source": "coingecko",
+            "updated_at": float(data.get("last_updated_at") or time.time()),
+        }
+
+    def refresh(self) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a fresh price from the first source that answers.
+
+        Returns:
+            The new reading, or None if every source failed (the old reading is kept)
+        """
+        fetchers = {"chainlink": self._fetch_chainlink, "coingecko": self._fetch_coingecko}
+        for source in self.sources:
+            try:
+                reading = fetchers[source]()
+            except Exception as e:
+                logger.warning("ETH price source %s failed: %s", source, e)
+                continue
+            reading["fetched_at"] = time.time()
+            with self._lock:
+                self._price = reading
+            logger.debug("ETH/USD %.2f from %s", reading['price'], source)
+            return reading
+        logger.error("All ETH price sources failed; keeping previous reading")
+        return None
+
+    def get_price(self) -> Optional[Dict[str, Any]]:
+        """
+        Current cached price (non-blocking once the first reading exists).
+
+        Returns:
+            Dict with price, source, updated_at, age_seconds and stale, or None if
+            no source has ever answered
+        """
+        with self._lock:
+            reading = dict(self._price) if self._price else None
+        if reading is None:
+            # First call before the background thread has produced a value
+            reading = self.refresh()
+            if reading is None:
+                return None
+            reading = dict(reading)
+        reading["age_seconds"] = max(0.0, time.time() - reading["updated_at"])
+        reading["stale"] = reading["age_seconds"] > self.ttl
+        return reading
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error("ETH price refresh error: %s", e, exc_info=True)
+            self._stop.wait(self.refresh_interval)
+
+    def start(self):
+        """Start background refreshing (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="eth-price-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop background refreshing."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -0,0 +1,328 @@
+"""
+On-demand profiling for a running agent process.
+
+- AnalysisProfiler: arm it to run the next N analyses under either a
+  deterministic profiler (cProfile) or a sampling profiler (a background
+  thread reading the analysis thread's stack from sys._current_frames at a
+  fixed interval, so overhead is independent of call count). The result is a
+  pstats-style text report, and for sampling also folded stacks that
+  flamegraph.pl / speedscope read directly.
+- MemoryProfiler: tracemalloc snapshots of the top allocation sites,
+  compared against a baseline taken when tracing started, to find what grows
+  over days (e.g. decision_history).
+
+Both are driven by the API's /admin endpoints and by signals in main.py, so
+the process does not have to be restarted to investigate it.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MODE_DETERMINISTIC = "deterministic"
+MODE_SAMPLING = "sampling"
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class _StackSampler:
+    """Samples one thread's call stack on a background thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+
+def _sampling_report(stacks: Counter, samples: int, interval: float, limit: int) -> str:
+    """Top functions by self and cumulative samples (like pstats tottime/cumtime)."""
+    own: Counter = Counter()
+    cumulative: Counter = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        own[frames[-1]] += count
+        for label in set(frames):
+            cumulative[label] += count
+    lines = [f"{samples} samples at {interval * 1000:g} ms (~{samples * interval:.2f} s sampled)", ""]
+    for title, counts in (("self", own), ("cumulative", cumulative)):
+        lines.append(f"{'samples':>8} {'%':>6}  {title}")
+        for label, count in counts.most_common(limit):
+            lines.append(f"{count:>8} {100.0 * count / samples if samples else 0:>6.1f}  {label}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+class AnalysisProfiler:
+    """
+    Profiles the next N analyses when armed.
+
+    Only one analysis is profiled at a time; analyses running concurrently
+    with a profiled one (e.g. parallel /analyze requests) run unprofiled.
+    """
+
+    def __init__(self, output_dir: Optional[str] = None):
+        """
+        Args:
+            output_dir: If set, each finished profile is also written there
+                (.prof for deterministic, .folded for sampling, plus a .txt report)
+        """
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()
+        self._armed: Optional[Dict[str, Any]] = None
+        self._profile: Optional[cProfile.Profile] = None
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._done = 0
+        self._started_at: Optional[str] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    def arm(self, analyses: int = 1, mode: str = MODE_SAMPLING, interval_ms: float = 5.0,
+            sort: str = "cumulative", limit: int = 40) -> Dict[str, Any]:
+        """
+        Profile the next `analyses` analyses; the result replaces last_result when they finish.
+
+        Args:
+            analyses: Number of analyses to aggregate into one profile
+            mode: "sampling" (low overhead) or "deterministic" (cProfile, exact call counts)
+            interval_ms: Sampling interval
+            sort: pstats sort key for the deterministic report
+            limit: Rows in the text report
+        """
+        if mode not in (MODE_SAMPLING, MODE_DETERMINISTIC):
+            raise ValueError(f"Unknown profiling mode '{mode}' (use {MODE_SAMPLING} or {MODE_DETERMINISTIC})")
+        if analyses < 1:
+            raise ValueError("analyses must be >= 1")
+        with self._lock:
+            self._armed = {"analyses": analyses, "mode": mode, "interval_ms": interval_ms, "sort": sort, "limit": limit}
+            self._profile = cProfile.Profile() if mode == MODE_DETERMINISTIC else None
+            self._stacks = Counter()
+            self._samples = 0
+            self._done = 0
+            self._started_at = None
+        logger.info("Profiler armed: next %s analyses (%s)", analyses, mode)
+        return self.status()
+
+    def cancel(self):
+        with self._lock:
+            self._armed = None
+            self._profile = None
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            armed = dict(self._armed) if self._armed else None
+            done = self._done
+        return {
+            "armed": armed,
+            "analyses_profiled": done if armed else None,
+            "last_result": {k: v for k, v in self.last_result.items() if k not in ("report", "folded")}
+            if self.last_result else None,
+        }
+
+    @contextmanager
+    def profile_analysis(self) -> Iterator[None]:
+        """Wrap one analysis; profiles it if armed, otherwise does nothing."""
+        if self._armed is None or not self._busy.acquire(blocking=False):
+            yield
+            return
+        sampler = None
+        try:
+            with self._lock:
+                config, profile = self._armed, self._profile
+                if config is not None and self._started_at is None:
+                    self._started_at = datetime.now().isoformat()
+            if config is None:
+                yield
+                return
+            started = time.perf_counter()
+            if config["mode"] == MODE_DETERMINISTIC:
+                profile.enable()
+            else:
+                sampler = _StackSampler(threading.get_ident(), config["interval_ms"] / 1000.0)
+                sampler.start()
+            try:
+                yield
+            finally:
+                if sampler is not None:
+                    sampler.stop()
+                else:
+                    profile.disable()
+                self._collect(config, sampler, time.perf_counter() - started)
+        finally:
+            self._busy.release()
+
+    def _collect(self, config: Dict[str, Any], sampler: Optional[_StackSampler], elapsed: float):
+        with self._lock:
+            if self._armed is not config:
+                return  # re-armed or cancelled meanwhile
+            if sampler is not None:
+                self._stacks.update(sampler.stacks)
+                self._samples += sampler.samples
+            self._done += 1
+            self._armed.setdefault("elapsed_s", 0.0)
+            self._armed["elapsed_s"] += elapsed
+            if self._done < config["analyses"]:
+                return
+            self._armed = None
+            profile, stacks, samples, started_at = self._profile, self._stacks, self._samples, self._started_at
+        self.last_result = self._build_result(config, profile, stacks, samples, started_at)
+        logger.info("Profile finished: %s analyses in %.2fs (%s)",
+                    config['analyses'], config['elapsed_s'], config['mode'])
+
+    def _build_result(self, config: Dict[str, Any], profile: Optional[cProfile.Profile], stacks: Counter,
+                      samples: int, started_at: Optional[str]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "mode": config["mode"],
+            "analyses": config["analyses"],
+            "started_at": started_at,
+            "finished_at": datetime.now().isoformat(),
+            "elapsed_s": config["elapsed_s"],
+        }
+        if profile is not None:
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).strip_dirs().sort_stats(config["sort"]).print_stats(config["limit"])
+            result["report"] = out.getvalue()
+        else:
+            interval = config["interval_ms"] / 1000.0
+            result["samples"] = samples
+            result["report"] = _sampling_report(stacks, samples, interval, config["limit"])
+            result["folded"] = "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+        if self.output_dir:
+            result["files"] = self._write(result, profile)
+        return result
+
+    def _write(self, result: Dict[str, Any], profile: Optional[cProfile.Profile]) -> List[str]:
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        files = [f"{base}.txt"]
+        with open(files[0], "w") as f:
+            f.write(result["report"])
+        if profile is not None:
+            profile.dump_stats(f"{base}.prof")
+            files.append(f"{base}.prof")
+        else:
+            with open(f"{base}.folded", "w") as f:
+                f.write(result["folded"] + "\n")
+            files.append(f"{base}.folded")
+        return files
+
+
+class MemoryProfiler:
+    """tracemalloc snapshots compared against a baseline."""
+
+    def __init__(self):
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._started_at: Optional[str] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    @staticmethod
+    def _take() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def start(self, frames: int = 10) -> Dict[str, Any]:
+        """Start tracing allocations (and take the baseline snapshot)."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._baseline = self._take()
+        self._started_at = datetime.now().isoformat()
+        logger.info("tracemalloc started (%s frames)", frames)
+        return self.status()
+
+    def stop(self) -> Dict[str, Any]:
+        tracemalloc.stop()
+        self._baseline = None
+        self._started_at = None
+        logger.info("tracemalloc stopped")
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "started_at": self._started_at,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+        }
+
+    def snapshot(self, limit: int = 25, key_type: str = "lineno") -> Dict[str, Any]:
+        """
+        Top allocation sites now and their growth since the baseline.
+
+        Args:
+            limit: Entries per list
+            key_type: Grouping ("lineno", "filename" or "traceback")
+
+        Returns:
+            Dict with status, top allocations by size and top growth since start()
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not running; start it first")
+        snapshot = self._take()
+
+        def site(stat) -> str:
+            frame = stat.traceback[0]
+            if key_type == "traceback":
+                return " <- ".join(f"{f.filename}:{f.lineno}" for f in stat.traceback)
+            return f"{frame.filename}:{frame.lineno}" if key_type == "lineno" else frame.filename
+
+        result = self.status()
+        result["top"] = [
+            {"site": site(stat), "size_bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics(key_type)[:limit]
+        ]
+        if self._baseline is not None:
+            result["growth"] = [
+                {"site": site(stat), "size_bytes": stat.size, "size_diff_bytes": stat.size_diff,
+                 "count": stat.count, "count_diff": stat.count_diff}
+                for stat in snapshot.compare_to(self._baseline, key_type)[:limit]
+            ]
+        return result
+
+
+PROFILER = AnalysisProfiler(os.getenv("PROFILE_OUTPUT_DIR") or None)
+MEMORY_PROFILER = MemoryProfiler()
@@ -0,0 +1,286 @@
+"""
+LI.FI quote cache with parallel pre-fetching.
+
+Keeps fresh quotes for every ordered pair of supported assets at a few
+standard notional sizes, so the market snapshot carries real swap costs
+(fees, gas, price impact) instead of a guess. Quotes for the swap legs of an
+actual rebalance are pre-fetched in parallel and handed to lifi_swap.js, which
+executes the cached quote instead of requesting a new route.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import permutations
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class LifiQuoteService:
+    """
+    TTL cache of LI.FI /v1/quote responses for same-chain stablecoin swaps.
+    """
+
+    BASE_URL = "https://li.quest/v1"
+    BASE_CHAIN_ID = 8453
+
+    def __init__(
+        self,
+        assets: Dict[str, Dict[str, Any]],
+        from_address: str,
+        to_address: str,
+        session: Optional[requests.Session] = None,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        notional_sizes_usd: Sequence[float] = (100, 1_000, 10_000),
+        slippage: float = 0.03,
+        ttl: float = 120.0,
+        refresh_interval: float = 300.0,
+        max_workers: int = 8,
+    ):
+        """
+        Args:
+            assets: SUPPORTED_ASSETS-style mapping (symbol -> address, decimals)
+            from_address: Address that will send the swaps (the operator)
+            to_address: Address receiving swap output (the treasury)
+            session: Optional shared requests session
+            base_url: LI.FI API base URL
+            api_key: Optional LI.FI API key (higher rate limits)
+            notional_sizes_usd: Standard sizes quoted for every pair
+            slippage: Max slippage passed to LI.FI (0.03 = 3%, same as lifi_swap.js)
+            ttl: Seconds a quote is considered fresh
+            refresh_interval: Seconds between background refreshes of the grid
+            max_workers: Parallel quote requests
+        """
+        self.assets = assets
+        self.from_address = from_address
+        self.to_address = to_address
+        self.session = session or requests.Session()
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
+        self.api_key = api_key
+        self.notional_sizes_usd = sorted(notional_sizes_usd)
+        self.slippage = slippage
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.max_workers = max_workers
+
+        self._lock = threading.Lock()
+        # (from, to, notional_usd) -> normalized quote; the snapshot grid
+        self._grid: Dict[Tuple[str, str, float], Dict[str, Any]] = {}
+        # (from, to, amount_raw, to_address) -> normalized quote; execution quotes
+        self._exact: Dict[Tuple[str, str, int, str], Dict[str, Any]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lifi-quote")
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _fetch(self, from_token: str, to_token: str, amount_raw: int, to_address: Optional[str] = None) -> Dict[str, Any]:
+        """Request one quote from LI.FI and normalize the cost fields."""
+        params = {
+            "fromChain": self.BASE_CHAIN_ID,
+            "toChain": self.BASE_CHAIN_ID,
+            "fromToken": self.assets[from_token]["address"],
+            "toToken": self.assets[to_token]["address"],
+            "fromAmount": str(amount_raw),
+            "fromAddress": self.from_address,
+            "toAddress": to_address or self.to_address,
+            "slippage": self.slippage,
+            "integrator": "onlyyield-agent",
+        }
+        headers = {"x-lifi-api-key": self.api_key} if self.api_key else {}
+        response = self.session.get(f"{self.base_url}/quote", params=params, headers=headers, timeout=15)
+        response.raise_for_status()
+        quote = response.json()
+
+        estimate = quote.get("estimate") or {}
+        from_usd = float(estimate.get("fromAmountUSD") or 0)
+        to_usd = float(estimate.get("toAmountUSD") or 0)
+        fee_usd = sum(float(c.get("amountUSD") or 0) for c in estimate.get("feeCosts") or [])
+        gas_usd = sum(float(c.get("amountUSD") or 0) for c in estimate.get("gasCosts") or [])
+        from_units = amount_raw / 10 ** self.assets[from_token]["decimals"]
+        to_units = int(estimate.get("toAmount") or 0) / 10 ** self.assets[to_token]["decimals"]
+        return {
+            "from": from_token,
+            "to": to_token,
+            "from_amount": amount_raw,
+            "to_amount": int(estimate.get("toAmount") or 0),
+            "to_amount_min": int(estimate.get("toAmountMin") or 0),
+            # Output shortfall vs. input at 1:1 (stablecoins), fees included
+            "cost_bps": (from_units - to_units) / from_units * 10_000 if from_units else None,
+            "price_impact_bps": (from_usd - to_usd) / from_usd * 10_000 if from_usd else None,
+            "fee_usd": fee_usd,
+            "gas_usd": gas_usd,
+            "tool": quote.get("tool"),
+            "execution_duration_s": estimate.get("executionDuration"),
+            "fetched_at": time.time(),
+            "quote": quote,
+        }
+
+    def _fetch_safe(self, *args) -> Optional[Dict[str, Any]]:
+        try:
+            return self._fetch(*args)
+        except Exception as e:
+            logger.warning("LI.FI quote %s->%s (%s) failed: %s", args[0], args[1], args[2], e)
+            return None
+
+    def refresh(self) -> int:
+        """
+        Re-quote every pair at every notional size, in parallel.
+
+        Returns:
+            Number of quotes refreshed
+        """
+        jobs = [
+            (from_token, to_token, size)
+            for from_token, to_token in permutations(self.assets, 2)
+            for size in self.notional_sizes_usd
+        ]
+        results = self._executor.map(
+            lambda job: self._fetch_safe(job[0], job[1], int(job[2] * 10 ** self.assets[job[0]]["decimals"])),
+            jobs,
+        )
+        refreshed = 0
+        with self._lock:
+            for job, quote in zip(jobs, results):
+                if quote is not None:
+                    self._grid[job] = quote
+                    refreshed += 1
+        logger.info("Refreshed %s/%s LI.FI quotes", refreshed, len(jobs))
+        return refreshed
+
+    def _fresh(self, quote: Optional[Dict[str, Any]]) -> bool:
+        return quote is not None and time.time() - quote["fetched_at"] < self.ttl
+
+    def estimate_cost(self, from_token: str, to_token: str, amount_usd: float) -> Optional[Dict[str, Any]]:
+        """
+        Swap cost for an amount, interpolated between the cached notional sizes around it.
+
+        cost_bps and gas_usd are interpolated linearly in the amount between the two
+        quoted sizes that bracket it; outside the quoted range the nearest size is used.
+
+        Returns:
+            Dict with cost_bps, cost_usd (bps scaled to amount, plus gas), the quoted
+            sizes used and the age of the older quote, or None if no quote exists for the pair
+        """
+        with self._lock:
+            candidates = [
+                q for (f, t, _), q in self._grid.items()
+                if f == from_token and t == to_token and q.get("cost_bps") is not None
+            ]
+        if not candidates:
+            return None
+        from_decimals = self.assets[from_token]["decimals"]
+        sized = sorted(((q["from_amount"] / 10 ** from_decimals, q) for q in candidates), key=lambda item: item[0])
+        below = [item for item in sized if item[0] <= amount_usd]
+        above = [item for item in sized if item[0] >= amount_usd]
+        if not below:
+            (low_size, low) = (high_size, high) = above[0]
+        elif not above:
+            (low_size, low) = (high_size, high) = below[-1]
+        else:
+            (low_size, low), (high_size, high) = below[-1], above[0]
+        weight = (amount_usd - low_size) / (high_size - low_size) if high_size > low_size else 0.0
+        cost_bps = low["cost_bps"] + weight * (high["cost_bps"] - low["cost_bps"])
+        gas_usd = low["gas_usd"] + weight * (high["gas_usd"] - low["gas_usd"])
+        return {
+            "cost_bps": cost_bps,
+            "cost_usd": amount_usd * cost_bps / 10_000 + gas_usd,
+            "gas_usd": gas_usd,
+            "quoted_size_usd": low_size if weight < 0.5 else high_size,
+            "quoted_sizes_usd": sorted({low_size, high_size}),
+            "age_seconds": time.time() - min(low["fetched_at"], high["fetched_at"]),
+        }
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Snapshot-friendly view of the grid: "FROM->TO" -> size -> cost fields (no raw quotes).
+        """
+        now = time.time()
+        out: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        with self._lock:
+            items = list(self._grid.items())
+        for (from_token, to_token, size), q in items:
+            out.setdefault(f"{from_token}->{to_token}", {})[f"{size:g}"] = {
+                "cost_bps": q["cost_bps"],
+                "price_impact_bps": q["price_impact_bps"],
+                "fee_usd": q["fee_usd"],
+                "gas_usd": q["gas_usd"],
+                "tool": q["tool"],
+                "age_seconds": now - q["fetched_at"],
+                "stale": now - q["fetched_at"] >= self.ttl,
+            }
+        return out
+
+    def prefetch(self, legs: List[Tuple[str, str, int]], to_address: Optional[str] = None) -> int:
+        """
+        Fetch execution quotes for the swap legs of a plan, in parallel.
+
+        Args:
+            legs: (from, to, amount_raw) tuples
+            to_address: Swap recipient (defaults to the service's to_address)
+
+        Returns:
+            Number of legs with a fresh quote afterwards
+        """
+        to_address = to_address or self.to_address
+        with self._lock:
+            missing = [leg for leg in legs if not self._fresh(self._exact.get((*leg, to_address)))]
+        results = self._executor.map(lambda leg: self._fetch_safe(*leg, to_address), missing)
+        with self._lock:
+            for leg, quote in zip(missing, results):
+                if quote is not None:
+                    self._exact[(*leg, to_address)] = quote
+            # Drop expired execution quotes
+            self._exact = {k: q for k, q in self._exact.items() if self._fresh(q)}
+            return sum(1 for leg in legs if self._fresh(self._exact.get((*leg, to_address))))
+
+    def quote_for_execution(
+        self, from_token: str, to_token: str, amount_raw: int, to_address: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Fresh quote for an exact swap: reuses a pre-fetched one, else fetches now.
+
+        Returns:
+            Normalized quote (raw LI.FI response under "quote"), or None on failure
+        """
+        key = (from_token, to_token, amount_raw, to_address or self.to_address)
+        with self._lock:
+            quote = self._exact.get(key)
+        if self._fresh(quote):
+            return quote
+        quote = self._fetch_safe(*key)
+        if quote is not None:
+            with self._lock:
+                self._exact[key] = quote
+        return quote
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error("LI.FI quote refresh error: %s", e, exc_info=True)
+            self._stop.wait(self.refresh_interval)
+
+    def start(self):
+        """Start background refreshing of the quote grid (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="lifi-quotes", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop background refreshing.
+
+        The worker pool is kept, so refresh()/prefetch() and a later start() keep
+        working; its idle threads exit with the interpreter.
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -0,0 +1,119 @@
+"""
+Netting rebalance planner.
+
+Turns current treasury balances and a target allocation into the smallest
+ordered set of swaps and deposits. Flows are netted per asset first, so swaps
+that cancel out (USDC->USDT and USDT->USDC) never reach the chain, surpluses
+are matched greedily to deficits (at most n-1 swap legs for n assets), and
+legs too small to pay for their own gas are dropped.
+
+Stablecoins are valued 1:1 in USD, as elsewhere in the agent.
+"""
+
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# (action, asset) -> USD gas cost; asset is "FROM->TO" for swaps
+GasCostFn = Callable[[str, Optional[str]], float]
+
+
+class RebalancePlanner:
+    """
+    Plans the minimal swap + deposit transaction set for a target allocation.
+    """
+
+    def __init__(
+        self,
+        min_leg_usd: float = 1.0,
+        min_leg_gas_multiple: float = 20.0,
+        gas_cost_usd: Optional[GasCostFn] = None,
+    ):
+        """
+        Args:
+            min_leg_usd: Absolute floor for any swap or deposit leg
+            min_leg_gas_multiple: A leg must be worth at least this many times its
+                own gas cost (20 = gas is at most 5% of the leg)
+            gas_cost_usd: Gas cost lookup for an action; no gas floor if None
+        """
+        self.min_leg_usd = min_leg_usd
+        self.min_leg_gas_multiple = min_leg_gas_multiple
+        self.gas_cost_usd = gas_cost_usd
+
+    def _min_leg(self, action: str, asset: Optional[str]) -> float:
+        """Smallest USD amount worth sending for an action."""
+        gas_floor = self.gas_cost_usd(action, asset) * self.min_leg_gas_multiple if self.gas_cost_usd else 0.0
+        return max(self.min_leg_usd, gas_floor)
+
+    def plan(self, balances: Dict[str, float], allocation: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Plan swaps and deposits for a target allocation.
+
+        Args:
+            balances: Asset -> current treasury balance (USD, 1:1 for stablecoins)
+            allocation: Asset -> target percentage of total treasury value
+
+        Returns:
+            Dict with ordered swaps [{from, to, amount_usd}], deposits
+            [{asset, amount_usd, allocation_pct}], dropped legs with a reason,
+            and tx_count
+        """
+        total_value = sum(v for v in balances.values() if v > 0)
+        targets = {
+            asset: total_value * pct / 100
+            for asset, pct in allocation.items()
+            if isinstance(pct, (int, float)) and pct > 0
+        }
+
+        # Net position per asset: positive = surplus to swap out, negative = deficit
+        net = {asset: balances.get(asset, 0.0) - targets.get(asset, 0.0) for asset in set(balances) | set(targets)}
+        surpluses = sorted(((a, v) for a, v in net.items() if v > 0), key=lambda x: x[1], reverse=True)
+        deficits = sorted(((a, -v) for a, v in net.items() if v < 0), key=lambda x: x[1], reverse=True)
+
+        swaps: List[Dict[str, Any]] = []
+        dropped: List[Dict[str, Any]] = []
+        i = j = 0
+        surplus_left = [v for _, v in surpluses]
+        deficit_left = [v for _, v in deficits]
+        while i < len(surpluses) and j < len(deficits):
+            amount = min(surplus_left[i], deficit_left[j])
+            leg = {"from": surpluses[i][0], "to": deficits[j][0], "amount_usd": amount}
+            min_leg = self._min_leg("lifi_swap", f"{leg['from']}->{leg['to']}")
+            if amount >= min_leg:
+                swaps.append(leg)
+            else:
+                dropped.append(dict(leg, type="swap", reason=f"below minimum leg ${min_leg:.2f}"))
+            surplus_left[i] -= amount
+            deficit_left[j] -= amount
+            if surplus_left[i] <= 1e-9:
+                i += 1
+            if deficit_left[j] <= 1e-9:
+                j += 1
+
+        # Deposit what each target asset will actually hold after the kept swaps
+        post_swap = dict(balances)
+        for leg in swaps:
+            post_swap[leg["from"]] = post_swap.get(leg["from"], 0.0) - leg["amount_usd"]
+            post_swap[leg["to"]] = post_swap.get(leg["to"], 0.0) + leg["amount_usd"]
+
+        deposits: List[Dict[str, Any]] = []
+        for asset, target in sorted(targets.items(), key=lambda x: x[1], reverse=True):
+            amount = min(target, max(post_swap.get(asset, 0.0), 0.0))
+            min_leg = self._min_leg("depositERC20", asset)
+            if amount >= min_leg:
+                deposits.append({"asset": asset, "amount_usd": amount, "allocation_pct": allocation[asset]})
+            else:
+                dropped.append({"type": "deposit", "asset": asset, "amount_usd": amount,
+                                "reason": f"below minimum leg ${min_leg:.2f}"})
+
+        # Largest swaps first so the biggest deposits are unblocked earliest
+        swaps.sort(key=lambda leg: leg["amount_usd"], reverse=True)
+        plan = {
+            "swaps": swaps,
+            "deposits": deposits,
+            "dropped": dropped,
+            "tx_count": len(swaps) + len(deposits),
+        }
+        logger.info("Rebalance plan: %s swaps, %s deposits, %s legs dropped", len(swaps), len(deposits), len(dropped))
+        return plan
@@ -0,0 +1,82 @@
+"""
+Balance reconciliation from ERC20 Transfer logs.
+
+Swap receipts already carry every token movement the swap caused, so the
+post-swap balance of a holder can be derived from the pre-swap balance plus
+the decoded Transfer logs, without another balanceOf round-trip per token.
+"""
+
+import logging
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+
+def _topic_address(topic: str) -> str:
+    """Lowercase 0x address from a 32-byte indexed topic."""
+    return "0x" + topic[-40:].lower()
+
+
+def decode_transfer_logs(receipt: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Decode ERC20 Transfer events from a raw JSON-RPC receipt.
+
+    ERC721 transfers (tokenId indexed, empty data) are skipped.
+
+    Returns:
+        List of {token, from, to, value} with lowercase addresses and int values
+    """
+    transfers = []
+    for log in receipt.get("logs") or []:
+        topics = log.get("topics") or []
+        if len(topics) != 3 or topics[0].lower() != TRANSFER_TOPIC:
+            continue
+        data = log.get("data") or "0x"
+        if len(data) < 66:
+            continue
+        transfers.append({
+            "token": log["address"].lower(),
+            "from": _topic_address(topics[1]),
+            "to": _topic_address(topics[2]),
+            "value": int(data[2:66], 16),
+        })
+    return transfers
+
+
+def apply_transfers(
+    balances_raw: Dict[str, int],
+    receipt: Dict[str, Any],
+    holder: str,
+    token_symbols: Dict[str, str],
+) -> Dict[str, int]:
+    """
+    Apply a receipt's Transfer logs to a holder's raw balances.
+
+    Args:
+        balances_raw: Symbol -> balance in base units before the transaction
+        receipt: Raw JSON-RPC receipt (hex fields, as returned by BatchRpcClient)
+        holder: Address whose balances are tracked
+        token_symbols: Lowercase token address -> symbol for the tracked tokens
+
+    Returns:
+        New symbol -> raw balance dict (input is not modified)
+    """
+    holder = holder.lower()
+    updated = dict(balances_raw)
+    for transfer in decode_transfer_logs(receipt):
+        symbol = token_symbols.get(transfer["token"])
+        if symbol is None:
+            continue
+        if transfer["to"] == holder:
+            updated[symbol] = updated.get(symbol, 0) + transfer["value"]
+        if transfer["from"] == holder:
+            updated[symbol] = updated.get(symbol, 0) - transfer["value"]
+    for symbol, value in updated.items():
+        if value < 0:
+            # Pre-swap balance was read at an older block than the receipt
+            logger.warning("Derived negative %s balance %s; clamping to 0", symbol, value)
+            updated[symbol] = 0
+    return updated
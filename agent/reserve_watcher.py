@@ -0,0 +1,249 @@
+"""
+Event-driven re-analysis trigger.
+
+Instead of re-running the analysis on a fixed timer, a background thread
+follows new blocks and reads, in one batched request per poll:
+- Aave Pool ReserveDataUpdated logs for the supported reserves (emitted on
+  every supply/borrow/repay/withdraw that touches the reserve, carrying the
+  new liquidity rate)
+- YieldVault ERC-4626 Deposit logs (new idle funds)
+
+An analysis is triggered only when a reserve's supply APY has moved at least
+`rate_threshold` percentage points from the rate the last analysis saw, or
+when deposits totalling at least `min_deposit` have arrived since then.
+Within `cooldown` seconds of the previous trigger, conditions are held back
+and re-checked once the cooldown has passed.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from web3 import Web3
+
+from metrics import REANALYSIS_TRIGGERS
+from rpc_batch import BatchRpcClient, RpcBatchError
+
+logger = logging.getLogger(__name__)
+
+RAY = 10 ** 27
+
+# ReserveDataUpdated(address indexed reserve, uint256 liquidityRate, uint256 stableBorrowRate,
+#                    uint256 variableBorrowRate, uint256 liquidityIndex, uint256 variableBorrowIndex)
+RESERVE_DATA_UPDATED_TOPIC = Web3.to_hex(
+    Web3.keccak(text="ReserveDataUpdated(address,uint256,uint256,uint256,uint256,uint256)"))
+# ERC-4626 Deposit(address indexed sender, address indexed owner, uint256 assets, uint256 shares)
+DEPOSIT_TOPIC = Web3.to_hex(Web3.keccak(text="Deposit(address,address,uint256,uint256)"))
+
+
+def _topic_address(address: str) -> str:
+    return "0x" + "0" * 24 + address.lower()[2:]
+
+
+def _word(data: str, index: int) -> int:
+    data = data[2:] if data.startswith("0x") else data
+    return int(data[index * 64:(index + 1) * 64], 16)
+
+
+class ReserveWatcher:
+    """
+    Follows new blocks and calls on_trigger when the market moved enough to re-analyze.
+    """
+
+    def __init__(
+        self,
+        rpc: BatchRpcClient,
+        pool_address: str,
+        reserves: Dict[str, str],
+        on_trigger: Callable[[Dict[str, Any]], Any],
+        current_rates: Optional[Callable[[], Dict[str, float]]] = None,
+        vault_address: Optional[str] = None,
+        vault_decimals: int = 6,
+        rate_threshold: float = 0.25,
+        min_deposit: float = 100.0,
+        cooldown: float = 60.0,
+        poll_interval: float = 2.0,
+        confirmations: int = 1,
+        max_block_range: int = 500,
+    ):
+        """
+        Args:
+            rpc: Batched JSON-RPC client
+            pool_address: Aave V3 Pool
+            reserves: Asset symbol -> reserve (underlying token) address
+            on_trigger: Called on the watcher thread with {"block", "reasons"} when an analysis is due
+            current_rates: Returns the current supply APY (%) per symbol; seeds the baseline on start
+            vault_address: YieldVault whose Deposit events count as arriving idle funds (optional)
+            vault_decimals: Decimals of the vault's underlying asset
+            rate_threshold: Supply APY move (percentage points) that triggers an analysis
+            min_deposit: Deposited amount (underlying units) that triggers an analysis
+            cooldown: Minimum seconds between triggers
+            poll_interval: Seconds between polls (Base produces a block every 2s)
+            confirmations: Blocks behind head to read, so shallow reorgs are not acted on
+            max_block_range: Max blocks per eth_getLogs (providers cap the range)
+        """
+        self.rpc = rpc
+        self.pool_address = Web3.to_checksum_address(pool_address)
+        self.reserves = {address.lower(): symbol for symbol, address in reserves.items()}
+        self.on_trigger = on_trigger
+        self.current_rates = current_rates
+        self.vault_address = Web3.to_checksum_address(vault_address) if vault_address else None
+        self.vault_decimals = vault_decimals
+        self.rate_threshold = rate_threshold
+        self.min_deposit = min_deposit
+        self.cooldown = cooldown
+        self.poll_interval = poll_interval
+        self.confirmations = confirmations
+        self.max_block_range = max(1, max_block_range)
+
+        # Supply APY per symbol as of the last analysis, and the latest seen on chain
+        self.baseline: Dict[str, float] = {}
+        self.latest: Dict[str, float] = {}
+        self.last_block: Optional[int] = None
+        self._pending_deposits = 0.0
+        self._last_trigger = 0.0
+        self.stats = {"blocks": 0, "reserve_updates": 0, "deposits": 0, "triggers": 0, "held_back": 0}
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def mark_analyzed(self, rates: Optional[Dict[str, float]] = None):
+        """
+        Reset the baseline after an analysis, whatever started it (a trigger, /analyze, ...).
+
+        Deposits seen so far are cleared too: the analysis read the vault's idle balance.
+
+        Args:
+            rates: Supply APY (%) per symbol the analysis saw (defaults to the latest on-chain
+                rates); zeros are failed reads and leave that reserve's baseline as is
+        """
+        rates = self.latest if rates is None else rates
+        self.baseline.update({symbol: apy for symbol, apy in rates.items() if apy})
+        self._pending_deposits = 0.0
+
+    def seed_baseline(self):
+        """Take the current rates as the baseline (what the next analysis is compared against)."""
+        if self.current_rates is None:
+            return
+        try:
+            # Zero means the read failed; leave that reserve unseeded until its first event
+            self.baseline.update({symbol: apy for symbol, apy in self.current_rates().items() if apy})
+        except Exception as e:
+            logger.warning("Could not seed reserve rate baseline: %s", e)
+
+    def _log_filters(self, from_block: int, to_block: int) -> List[Dict[str, Any]]:
+        block_range = {"fromBlock": hex(from_block), "toBlock": hex(to_block)}
+        filters = [{
+            **block_range,
+            "address": self.pool_address,
+            "topics": [RESERVE_DATA_UPDATED_TOPIC, [_topic_address(a) for a in self.reserves]],
+        }]
+        if self.vault_address:
+            filters.append({**block_range, "address": self.vault_address, "topics": [DEPOSIT_TOPIC]})
+        return filters
+
+    def _evaluate(self, block: int) -> List[Dict[str, Any]]:
+        """Reasons to re-analyze: rates moved from the baseline, or enough deposits since the last trigger."""
+        reasons = []
+        for symbol, apy in self.latest.items():
+            baseline = self.baseline.get(symbol)
+            if baseline is None:
+                self.baseline[symbol] = apy
+            elif abs(apy - baseline) >= self.rate_threshold:
+                reasons.append({"type": "rate_move", "asset": symbol, "from_apy": baseline, "to_apy": apy,
+                                "block": block})
+        if self.vault_address and self._pending_deposits >= self.min_deposit:
+            reasons.append({"type": "deposit", "amount": self._pending_deposits, "block": block})
+        return reasons
+
+    def poll_once(self) -> Optional[Dict[str, Any]]:
+        """
+        Scan new blocks once; fires on_trigger if due.
+
+        Returns:
+            The trigger passed to on_trigger, or None
+        """
+        head = int(self.rpc.call("eth_blockNumber", []), 16) - self.confirmations
+        if self.last_block is None:
+            # Start at the head; older events are already reflected in the seeded baseline
+            self.last_block = head
+            return None
+        if head > self.last_block:
+            from_block = self.last_block + 1
+            to_block = min(head, from_block + self.max_block_range - 1)
+            replies = self.rpc.batch([("eth_getLogs", [f]) for f in self._log_filters(from_block, to_block)])
+            for reply in replies:
+                if "error" in reply:
+                    # Do not advance past blocks we could not read
+                    raise RpcBatchError(f"eth_getLogs failed: {reply['error']}")
+
+            for log in replies[0].get("result") or []:
+                symbol = self.reserves.get("0x" + log["topics"][1][-40:].lower())
+                if symbol is None:
+                    continue
+                self.latest[symbol] = _word(log["data"], 0) * 100 / RAY
+                self.stats["reserve_updates"] += 1
+            if self.vault_address:
+                for log in replies[1].get("result") or []:
+                    self._pending_deposits += _word(log["data"], 0) / 10 ** self.vault_decimals
+                    self.stats["deposits"] += 1
+            self.stats["blocks"] += to_block - from_block + 1
+            self.last_block = to_block
+
+        reasons = self._evaluate(self.last_block)
+        if not reasons:
+            return None
+        if time.time() - self._last_trigger < self.cooldown:
+            self.stats["held_back"] += 1
+            return None
+        return self._fire(reasons)
+
+    def _fire(self, reasons: List[Dict[str, Any]]) -> Dict[str, Any]:
+        trigger = {"block": self.last_block, "reasons": reasons}
+        self._last_trigger = time.time()
+        self.stats["triggers"] += 1
+        for reason in trigger["reasons"]:
+            REANALYSIS_TRIGGERS.inc(reason=reason["type"])
+        logger.info("Re-analysis triggered at block %s: %s", trigger["block"], trigger["reasons"])
+        try:
+            self.on_trigger(trigger)
+        finally:
+            # The analysis just ran against these rates (on_trigger may already have reset it)
+            self.mark_analyzed()
+        return trigger
+
+    def _run(self):
+        self.seed_baseline()
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error("Reserve watcher poll error: %s", e, exc_info=True)
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Start the background watcher thread (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="reserve-watcher", daemon=True)
+        self._thread.start()
+        logger.info("Reserve watcher started (%d reserves, vault %s, threshold %spp, min deposit %s)",
+                    len(self.reserves), self.vault_address or "-", self.rate_threshold, self.min_deposit)
+
+    def stop(self):
+        """Stop the background watcher thread."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval + 1)
+            self._thread = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "last_block": self.last_block,
+            "baseline_apy": dict(self.baseline),
+            "latest_apy": dict(self.latest),
+            "pending_deposits": self._pending_deposits,
+            **self.stats,
+        }
@@ -0,0 +1,123 @@
+"""
+Batched JSON-RPC client for Base Mainnet reads.
+
+web3.py issues one HTTP round-trip per call. Pollers and snapshot readers that
+need many independent reads (receipts, eth_call, block data) use this client to
+pack them into a single JSON-RPC batch request instead.
+"""
+
+import itertools
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class RpcBatchError(Exception):
+    """Raised when a whole batch request fails (transport error or malformed reply)."""
+
+
+class BatchRpcClient:
+    """
+    Minimal JSON-RPC client that sends calls in batches.
+
+    Each entry of a batch reply is returned as the raw JSON-RPC response dict
+    ({"result": ...} or {"error": {...}}) in the order the calls were given, so
+    callers can inspect per-call errors such as revert data from eth_call.
+    """
+
+    def __init__(
+        self,
+        rpc_url: str,
+        session: Optional[requests.Session] = None,
+        timeout: float = 10.0,
+        max_batch_size: int = 100,
+    ):
+        """
+        Args:
+            rpc_url: JSON-RPC endpoint
+            session: Optional shared requests session (connection pooling)
+            timeout: HTTP timeout per batch in seconds
+            max_batch_size: Max calls per HTTP request; larger batches are chunked
+        """
+        self.rpc_url = rpc_url
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.max_batch_size = max(1, max_batch_size)
+        self._ids = itertools.count(1)
+        self._id_lock = threading.Lock()
+
+    def _next_id(self) -> int:
+        with self._id_lock:
+            return next(self._ids)
+
+    def batch(self, calls: Sequence[Tuple[str, List[Any]]]) -> List[Dict[str, Any]]:
+        """
+        Send calls as JSON-RPC batches.
+
+        Args:
+            calls: Sequence of (method, params) tuples
+
+        Returns:
+            List of raw JSON-RPC response dicts, in the same order as calls
+        """
+        responses: List[Dict[str, Any]] = []
+        for start in range(0, len(calls), self.max_batch_size):
+            chunk = calls[start:start + self.max_batch_size]
+            payload = []
+            for method, params in chunk:
+                payload.append({
+                    "jsonrpc": "2.0",
+                    "id": self._next_id(),
+                    "method": method,
+                    "params": list(params),
+                })
+            try:
+                response = self.session.post(self.rpc_url, json=payload, timeout=self.timeout)
+                response.raise_for_status()
+                body = response.json()
+            except Exception as e:
+                raise RpcBatchError(f"Batch RPC request failed: {e}") from e
+
+            # Some providers answer a single-element batch with a bare object
+            if isinstance(body, dict):
+                body = [body]
+            if not isinstance(body, list):
+                raise RpcBatchError(f"Unexpected batch RPC reply: {body!r}")
+
+            # Batch replies may come back in any order; match them up by id
+            by_id = {item.get("id"): item for item in body if isinstance(item, dict)}
+            for request in payload:
+                responses.append(
+                    by_id.get(request["id"], {"error": {"code": -32603, "message": "missing response"}})
+                )
+        return responses
+
+    def call(self, method: str, params: List[Any]) -> Any:
+        """Send a single call and return its result (raises RpcBatchError on error)."""
+        reply = self.batch([(method, params)])[0]
+        if "error" in reply:
+            raise RpcBatchError(f"{method} failed: {reply['error']}")
+        return reply.get("result")
+
+    def get_receipts(self, tx_hashes: Sequence[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetch receipts for many transactions in one batch.
+
+        Returns:
+            Dict of tx hash -> receipt dict (None if not yet mined or on per-call error)
+        """
+        if not tx_hashes:
+            return {}
+        replies = self.batch([("eth_getTransactionReceipt", [h]) for h in tx_hashes])
+        receipts = {}
+        for tx_hash, reply in zip(tx_hashes, replies):
+            if "error" in reply:
+                logger.debug("eth_getTransactionReceipt(%s) error: %s", tx_hash, reply['error'])
+                receipts[tx_hash] = None
+            else:
+                receipts[tx_hash] = reply.get("result")
+        return receipts
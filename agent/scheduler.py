@@ -0,0 +1,237 @@
+"""
+Multi-cadence job scheduler for the long-running agent.
+
+Each job has its own interval, so inputs are refreshed at the rate they
+actually change (APY and vault reads every minute, the DefiLlama pools list
+every half hour, ...) instead of everything once per check interval.
+
+Per job:
+- jitter: each delay is randomized by +/- a fraction so jobs that share an
+  interval (and other agents hitting the same RPC) do not fire in lockstep
+- backoff: after consecutive failures the delay grows exponentially (capped)
+  instead of the old fixed 60s sleep for every error
+- missed runs: jobs run on a fixed-rate grid; when the scheduler falls behind
+  (a slow job, a suspended process), the missed slots are counted and either
+  coalesced into one immediate run ("coalesce") or dropped until the next
+  slot ("skip")
+
+Jobs run one at a time on the scheduler thread, so they never race each
+other on the agent's web3 client or caches.
+"""
+
+import heapq
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MISFIRE_COALESCE = "coalesce"
+MISFIRE_SKIP = "skip"
+
+
+class Job:
+    """A callable run every `interval` seconds."""
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[], Any],
+        interval: float,
+        jitter: float = 0.1,
+        retry_delay: Optional[float] = None,
+        backoff_max: Optional[float] = None,
+        misfire: str = MISFIRE_COALESCE,
+        misfire_grace: Optional[float] = None,
+        start_delay: float = 0.0,
+    ):
+        """
+        Args:
+            name: Job name (logs, status)
+            fn: Called with no arguments; raising counts as a failure
+            interval: Seconds between runs
+            jitter: Fraction of each delay randomized (0.1 = +/-10%)
+            retry_delay: Delay after the first failure, doubled per further failure
+                (default: the interval, at most 60s)
+            backoff_max: Cap on the delay after failures (default 8x interval)
+            misfire: "coalesce" (run missed slots once, now) or "skip" (wait for the next slot)
+            misfire_grace: Lateness in seconds after which a run counts as missed (default: half the interval)
+            start_delay: Seconds before the first run
+        """
+        if misfire not in (MISFIRE_COALESCE, MISFIRE_SKIP):
+            raise ValueError(f"Unknown misfire policy '{misfire}'")
+        self.name = name
+        self.fn = fn
+        self.interval = float(interval)
+        self.jitter = jitter
+        self.retry_delay = retry_delay if retry_delay is not None else min(self.interval, 60.0)
+        self.backoff_max = backoff_max if backoff_max is not None else 8 * self.interval
+        self.misfire = misfire
+        self.misfire_grace = misfire_grace if misfire_grace is not None else self.interval / 2
+        self.start_delay = start_delay
+
+        self.next_run = 0.0
+        self.runs = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.missed = 0
+        self.last_run: Optional[float] = None
+        self.last_success: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def status(self) -> Dict[str, Any]:
+        iso = lambda ts: datetime.fromtimestamp(ts).isoformat() if ts else None
+        return {
+            "interval": self.interval,
+            "next_run": iso(self.next_run),
+            "last_run": iso(self.last_run),
+            "last_success": iso(self.last_success),
+            "last_duration_s": self.last_duration,
+            "last_error": self.last_error,
+            "runs": self.runs,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "missed": self.missed,
+        }
+
+
+class Scheduler:
+    """
+    Runs jobs at independent cadences on one thread.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time, seed: Optional[int] = None):
+        """
+        Args:
+            clock: Time source (seconds)
+            seed: RNG seed for jitter
+        """
+        self.clock = clock
+        self.jobs: Dict[str, Job] = {}
+        self._heap: List = []
+        self._seq = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_job(self, name: str, fn: Callable[[], Any], interval: float, **kwargs) -> Job:
+        """Register a job (see Job for options); it first runs after its start_delay."""
+        job = Job(name, fn, interval, **kwargs)
+        with self._lock:
+            if name in self.jobs:
+                raise ValueError(f"Job '{name}' already exists")
+            self.jobs[name] = job
+            self._schedule(job, self.clock() + job.start_delay)
+        self._wake.set()
+        return job
+
+    def _schedule(self, job: Job, when: float):
+        job.next_run = when
+        self._seq += 1  # ties run in registration order
+        heapq.heappush(self._heap, (when, self._seq, job.name))
+
+    def _jittered(self, delay: float, jitter: float) -> float:
+        return max(0.0, delay * (1 + self._rng.uniform(-jitter, jitter))) if jitter else delay
+
+    def _run_job(self, job: Job, scheduled: float):
+        now = self.clock()
+        late = now - scheduled
+        if late > job.misfire_grace and job.consecutive_failures == 0:
+            missed = int(late // job.interval) + 1
+            job.missed += missed
+            if job.misfire == MISFIRE_SKIP:
+                logger.warning("Job %s missed %d run(s) (%.1fs late); skipping to the next slot",
+                               job.name, missed, late)
+                self._schedule(job, scheduled + missed * job.interval)
+                return
+            logger.warning("Job %s missed %d run(s) (%.1fs late); running once now", job.name, missed, late)
+
+        job.last_run = now
+        started = time.perf_counter()
+        try:
+            job.fn()
+        except Exception as e:
+            job.last_duration = time.perf_counter() - started
+            job.runs += 1
+            job.failures += 1
+            job.consecutive_failures += 1
+            job.last_error = f"{type(e).__name__}: {e}"
+            delay = min(job.backoff_max, job.retry_delay * 2 ** (job.consecutive_failures - 1))
+            delay = self._jittered(delay, job.jitter)
+            # Traceback on the first failure only; a job failing for hours would flood the log
+            logger.error("Job %s failed (%d in a row), retrying in %.0fs: %s",
+                         job.name, job.consecutive_failures, delay, e, exc_info=job.consecutive_failures == 1)
+            self._schedule(job, self.clock() + delay)
+            return
+        job.last_duration = time.perf_counter() - started
+        job.runs += 1
+        job.consecutive_failures = 0
+        job.last_error = None
+        job.last_success = self.clock()
+
+        # Fixed-rate grid from the slot this run was scheduled for (no drift from run time);
+        # coalesced runs restart the grid from now
+        base = now if late > job.misfire_grace else scheduled
+        next_run = base + self._jittered(job.interval, job.jitter)
+        self._schedule(job, max(next_run, self.clock()))
+
+    def run_pending(self) -> float:
+        """
+        Run every job that is due.
+
+        Returns:
+            Seconds until the next job is due
+        """
+        while not self._stop.is_set():
+            with self._lock:
+                if not self._heap:
+                    return 60.0
+                when, _, name = self._heap[0]
+                job = self.jobs.get(name)
+                if job is None or when != job.next_run:
+                    heapq.heappop(self._heap)  # removed or rescheduled
+                    continue
+                if when > self.clock():
+                    return when - self.clock()
+                heapq.heappop(self._heap)
+            self._run_job(job, when)
+        return 0.0
+
+    def run_forever(self):
+        """Run jobs in the calling thread until stop()."""
+        self._stop.clear()
+        logger.info("Scheduler running %d jobs: %s", len(self.jobs),
+                    ", ".join(f"{j.name} every {j.interval:g}s" for j in self.jobs.values()))
+        while not self._stop.is_set():
+            self._wake.clear()
+            self._wake.wait(self.run_pending())
+
+    def start(self):
+        """Run jobs on a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop after the running job (if any) finishes."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def run_now(self, name: str):
+        """Make a job due immediately (e.g. on an external event)."""
+        with self._lock:
+            self._schedule(self.jobs[name], self.clock())
+        self._wake.set()
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {name: job.status() for name, job in self.jobs.items()}
@@ -0,0 +1,484 @@
+"""
+Local stand-ins for every external dependency of the agent.
+
+Used by the benchmark harness (and handy for offline development):
+- JSON-RPC stub answering the Aave pool, ERC20, rate-strategy, Chainlink and
+  YieldVault calls the agent makes, plus fee/gas/block methods
+- fake DefiLlama (/pools with a realistically sized payload, /chart/{pool})
+- fake CoinGecko (/api/v3/simple/price)
+- fake LI.FI (/v1/quote)
+- fake OpenAI chat completions endpoint (/v1/chat/completions)
+
+All stand-ins are served by one threaded HTTP server with configurable
+per-service latency and count every request (JSON-RPC per method, with
+batches counted both as calls and as round trips).
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from eth_abi import decode, encode
+from web3 import Web3
+
+logger = logging.getLogger(__name__)
+
+RAY = 10 ** 27
+BASE_CHAIN_ID = 8453
+
+
+def _selector(signature: str) -> str:
+    return Web3.keccak(text=signature)[:4].hex().removeprefix("0x")
+
+
+def _address(label: str) -> str:
+    """Deterministic fake contract address for a label."""
+    return Web3.to_checksum_address(Web3.keccak(text=label)[:20])
+
+
+class StandInState:
+    """
+    Chain and market state served by the stand-ins.
+    """
+
+    def __init__(
+        self,
+        assets: Dict[str, Dict[str, Any]],
+        treasury: str,
+        vault: Optional[str] = None,
+        apys: Optional[Dict[str, float]] = None,
+        treasury_balances: Optional[Dict[str, float]] = None,
+        vault_idle: float = 2_500.0,
+        vault_in_aave: float = 40_000.0,
+        eth_price: float = 3_000.0,
+        llm_decision: str = "HOLD",
+    ):
+        """
+        Args:
+            assets: SUPPORTED_ASSETS-style mapping (symbol -> address, decimals)
+            treasury: Treasury address (balances are served for it)
+            vault: YieldVault address
+            apys: Supply APY (%) per asset
+            treasury_balances: Token units per asset held by the treasury
+            vault_idle: Vault idle underlying (USDC units)
+            vault_in_aave: Vault aToken balance (USDC units)
+            eth_price: ETH/USD for Chainlink and CoinGecko
+            llm_decision: "HOLD" or "DEPOSIT" for the fake LLM's answer
+        """
+        self.assets = assets
+        self.treasury = treasury.lower()
+        self.vault = vault.lower() if vault else None
+        self.apys = apys or {"USDC": 4.8, "USDT": 5.6, "DAI": 4.1, "USDC.e": 3.2}
+        self.treasury_balances = treasury_balances or {"USDC": 25_000.0, "USDT": 5_000.0, "DAI": 1_200.0, "USDC.e": 0.0}
+        self.vault_idle = vault_idle
+        self.vault_in_aave = vault_in_aave
+        self.eth_price = eth_price
+        self.llm_decision = llm_decision
+        self.started_at = time.time()
+        self.block_number = 20_000_000
+
+        self.by_token = {a["address"].lower(): symbol for symbol, a in assets.items()}
+        self.a_tokens = {_address(f"a{symbol}").lower(): symbol for symbol in assets}
+        self.debt_tokens = {_address(f"variableDebt{symbol}").lower(): symbol for symbol in assets}
+        self.strategy = _address("interestRateStrategy")
+        # Reserve sizes (token units): supply and borrows chosen so the strategy reproduces ~apys
+        self.reserve_supply = {symbol: 50_000_000.0 for symbol in assets}
+        self.reserve_debt = {symbol: 38_000_000.0 for symbol in assets}
+
+    def decimals(self, symbol: str) -> int:
+        return self.assets[symbol]["decimals"]
+
+    def liquidity_index(self, symbol: str) -> int:
+        """Index growing at the asset's APY since the stand-in started."""
+        years = (time.time() - self.started_at) / (365 * 24 * 3600)
+        return int(RAY * 1.05 * (1 + self.apys.get(symbol, 0.0) / 100 * years))
+
+
+class StandInServer:
+    """
+    One local HTTP server hosting all stand-ins, routed by path prefix:
+    /rpc, /defillama, /coingecko, /lifi, /openai.
+    """
+
+    def __init__(
+        self,
+        state: StandInState,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: Optional[Dict[str, float]] = None,
+        defillama_pools: int = 18_000,
+        seed: int = 7,
+    ):
+        """
+        Args:
+            state: Served chain/market state
+            host: Bind address
+            port: Bind port (0 = any free port)
+            latency_ms: Extra latency per service ("rpc", "defillama", "coingecko", "lifi", "openai")
+            defillama_pools: Number of pools in the fake /pools payload (the live one has ~18k)
+            seed: RNG seed for generated payloads
+        """
+        self.state = state
+        self.latency_ms = latency_ms or {}
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._pools_payload = self._build_pools(defillama_pools)
+        self._eth_call_handlers = self._build_eth_call_handlers()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, payload: Any):
+                body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _handle(self, method: str):
+                parsed = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                service, _, rest = parsed.path.lstrip("/").partition("/")
+                server._count(f"http.{service}")
+                delay = server.latency_ms.get(service, 0)
+                if delay:
+                    time.sleep(delay / 1000)
+                try:
+                    status, payload = server.route(service, method, "/" + rest, parse_qs(parsed.query), body)
+                except Exception as e:
+                    logger.exception("Stand-in error for %s %s", method, self.path)
+                    status, payload = 500, {"error": str(e)}
+                self._reply(status, payload)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="stand-ins", daemon=True)
+        self._thread.start()
+        logger.info("Stand-ins listening on %s", self.url)
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.counts[key] += n
+
+    def reset_counts(self) -> Dict[str, int]:
+        """Return and clear the request counters."""
+        with self._lock:
+            counts = dict(self.counts)
+            self.counts.clear()
+        return counts
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+
+    def route(self, service: str, method: str, path: str, query: Dict[str, List[str]], body: bytes) -> Tuple[int, Any]:
+        if service == "rpc" and method == "POST":
+            return 200, self._rpc(json.loads(body))
+        if service == "defillama":
+            if path == "/pools":
+                return 200, self._pools_payload
+            if path.startswith("/chart/"):
+                return 200, self._chart(path[len("/chart/"):])
+        if service == "coingecko" and path == "/simple/price":
+            return 200, {"ethereum": {"usd": self.state.eth_price, "last_updated_at": int(time.time())}}
+        if service == "lifi" and path == "/quote":
+            return 200, self._lifi_quote({k: v[0] for k, v in query.items()})
+        if service == "openai" and path.endswith("/chat/completions") and method == "POST":
+            return 200, self._chat_completion(json.loads(body))
+        return 404, {"error": f"no stand-in for {method} /{service}{path}"}
+
+    # ------------------------------------------------------------------
+    # JSON-RPC
+    # ------------------------------------------------------------------
+
+    def _rpc(self, payload: Any) -> Any:
+        self._count("rpc.round_trips")
+        items = payload if isinstance(payload, list) else [payload]
+        replies = []
+        for item in items:
+            self._count("rpc.calls")
+            self._count(f"rpc.{item.get('method')}")
+            try:
+                result = self._rpc_method(item.get("method"), item.get("params") or [])
+                replies.append({"jsonrpc": "2.0", "id": item.get("id"), "result": result})
+            except Exception as e:
+                replies.append({"jsonrpc": "2.0", "id": item.get("id"), "error": {"code": -32000, "message": str(e)}})
+        return replies if isinstance(payload, list) else replies[0]
+
+    def _rpc_method(self, method: str, params: List[Any]) -> Any:
+        state = self.state
+        if method == "eth_chainId":
+            return hex(BASE_CHAIN_ID)
+        if method == "net_version":
+            return str(BASE_CHAIN_ID)
+        if method == "eth_blockNumber":
+            return hex(state.block_number)
+        if method == "eth_gasPrice":
+            return hex(6_000_000)
+        if method == "eth_maxPriorityFeePerGas":
+            return hex(1_000_000)
+        if method == "eth_feeHistory":
+            count = int(params[0], 16) if isinstance(params[0], str) else int(params[0])
+            percentiles = params[2] if len(params) > 2 else []
+            return {
+                "oldestBlock": hex(state.block_number - count + 1),
+                "baseFeePerGas": [hex(5_000_000 + 10_000 * i) for i in range(count + 1)],
+                "gasUsedRatio": [0.45] * count,
+                "reward": [[hex(1_000_000 * (j + 1)) for j in range(len(percentiles))] for _ in range(count)],
+            }
+        if method == "eth_estimateGas":
+            return hex(180_000)
+        if method == "eth_getCode":
+            return "0x6080604052" if params[0].lower() == state.vault else "0x"
+        if method == "eth_getBalance":
+            return hex(10 ** 17)
+        if method == "eth_getTransactionCount":
+            return hex(1)
+        if method == "eth_getBlockByNumber":
+            return {
+                "number": hex(state.block_number), "hash": "0x" + "11" * 32, "parentHash": "0x" + "22" * 32,
+                "timestamp": hex(int(time.time())), "baseFeePerGas": hex(5_000_000),
+                "gasLimit": hex(150_000_000), "gasUsed": hex(60_000_000), "transactions": [],
+            }
+        if method == "eth_getTransactionReceipt":
+            return None
+        if method == "eth_getLogs":
+            return []
+        if method == "eth_call":
+            return self._eth_call(params[0])
+        raise ValueError(f"method {method} not supported by stand-in")
+
+    def _build_eth_call_handlers(self) -> Dict[str, Callable[[str, bytes], str]]:
+        state = self.state
+        reserve_type = "(uint256,uint128,uint128,uint128,uint128,uint128,uint40,uint16,address,address,address,address,uint128,uint128,uint128)"
+
+        def reserve_data(to: str, args: bytes) -> bytes:
+            (asset,) = decode(["address"], args)
+            symbol = state.by_token[asset.lower()]
+            rate = int(state.apys.get(symbol, 0.0) / 100 * RAY)
+            reserve = (
+                1000 << 64,                                   # configuration: 10% reserve factor
+                state.liquidity_index(symbol), rate,
+                int(RAY * 1.08), int(rate * 1.4), 0,
+                int(time.time()), list(state.assets).index(symbol),
+                _address(f"a{symbol}"), _address(f"stableDebt{symbol}"), _address(f"variableDebt{symbol}"),
+                state.strategy, 0, 0, 0,
+            )
+            return encode([reserve_type], [reserve])
+
+        def balance_of(to: str, args: bytes) -> bytes:
+            (holder,) = decode(["address"], args)
+            holder, to = holder.lower(), to.lower()
+            if to in state.by_token and holder == state.treasury:
+                symbol = state.by_token[to]
+                return encode(["uint256"], [int(state.treasury_balances.get(symbol, 0) * 10 ** state.decimals(symbol))])
+            if to in state.by_token and holder == state.vault:
+                return encode(["uint256"], [int(state.vault_idle * 10 ** 6)])
+            return encode(["uint256"], [0])
+
+        def decimals(to: str, args: bytes) -> bytes:
+            to = to.lower()
+            for tokens in (state.by_token, state.a_tokens, state.debt_tokens):
+                if to in tokens:
+                    return encode(["uint8"], [state.decimals(tokens[to])])
+            return encode(["uint8"], [8])  # Chainlink aggregator
+
+        def total_supply(to: str, args: bytes) -> bytes:
+            to = to.lower()
+            if to in state.a_tokens:
+                symbol = state.a_tokens[to]
+                return encode(["uint256"], [int(state.reserve_supply[symbol] * 10 ** state.decimals(symbol))])
+            if to in state.debt_tokens:
+                symbol = state.debt_tokens[to]
+                return encode(["uint256"], [int(state.reserve_debt[symbol] * 10 ** state.decimals(symbol))])
+            return encode(["uint256"], [0])
+
+        def interest_rate_data(to: str, args: bytes) -> bytes:
+            # optimalUsageRatio, baseVariableBorrowRate, variableRateSlope1, variableRateSlope2 (RAY)
+            return encode(["uint256"] * 4, [int(0.9 * RAY), 0, int(0.07 * RAY), int(0.6 * RAY)])
+
+        def latest_round_data(to: str, args: bytes) -> bytes:
+            now = int(time.time())
+            return encode(["uint80", "int256", "uint256", "uint256", "uint80"],
+                          [1, int(state.eth_price * 10 ** 8), now - 60, now - 60, 1])
+
+        def vault_uint(value: Callable[[], float]) -> Callable[[str, bytes], bytes]:
+            return lambda to, args: encode(["uint256"], [int(value() * 10 ** 6)])
+
+        handlers = {
+            "getReserveData(address)": reserve_data,
+            "balanceOf(address)": balance_of,
+            "decimals()": decimals,
+            "totalSupply()": total_supply,
+            "getInterestRateData(address)": interest_rate_data,
+            "latestRoundData()": latest_round_data,
+            "idleUnderlying()": vault_uint(lambda: state.vault_idle),
+            "aTokenBalance()": vault_uint(lambda: state.vault_in_aave),
+            "totalAssets()": vault_uint(lambda: state.vault_idle + state.vault_in_aave),
+        }
+        return {_selector(signature): handler for signature, handler in handlers.items()}
+
+    def _eth_call(self, call: Dict[str, Any]) -> str:
+        data = (call.get("data") or call.get("input") or "0x").removeprefix("0x")
+        selector, args = data[:8], bytes.fromhex(data[8:])
+        self._count(f"rpc.eth_call.{selector}")
+        handler = self._eth_call_handlers.get(selector)
+        if handler is None:
+            # Unknown view: behave like a contract returning zero
+            return "0x" + "00" * 32
+        return "0x" + handler(call.get("to") or "", args).hex()
+
+    # ------------------------------------------------------------------
+    # HTTP APIs
+    # ------------------------------------------------------------------
+
+    def _build_pools(self, count: int) -> bytes:
+        """A /pools payload shaped and sized like DefiLlama's (serialized once)."""
+        rng = self._rng
+        chains = ["Ethereum", "Arbitrum", "Base", "Optimism", "Polygon", "BSC", "Avalanche", "Solana"]
+        projects = ["aave-v3", "compound-v3", "morpho-blue", "moonwell-lending", "uniswap-v3", "curve-dex", "fluid-lending"]
+        symbols = ["USDC", "USDT", "DAI", "WETH", "WBTC", "USDC-USDT", "WETH-USDC", "USDBC", "EURC"]
+        data = []
+        for symbol in self.state.assets:
+            # The pools the agent looks for on Base
+            apy = self.state.apys.get(symbol, 0.0)
+            data.append(self._pool_entry("Base", "aave-v3", symbol.upper(), apy, f"aave-v3-base-{symbol.lower()}"))
+        for _ in range(max(count - len(data), 0)):
+            data.append(self._pool_entry(
+                rng.choice(chains), rng.choice(projects), rng.choice(symbols),
+                round(rng.lognormvariate(1.3, 0.8), 4), str(uuid.UUID(int=rng.getrandbits(128))),
+            ))
+        return json.dumps({"status": "success", "data": data}).encode()
+
+    def _pool_entry(self, chain: str, project: str, symbol: str, apy: float, pool_id: str) -> Dict[str, Any]:
+        rng = self._rng
+        return {
+            "chain": chain, "project": project, "symbol": symbol,
+            "tvlUsd": round(rng.uniform(1e4, 5e8), 2),
+            "apyBase": apy, "apyReward": None, "apy": apy,
+            "rewardTokens": None, "pool": pool_id,
+            "apyPct1D": round(rng.gauss(0, 0.2), 4), "apyPct7D": round(rng.gauss(0, 0.5), 4),
+            "apyPct30D": round(rng.gauss(0, 1.0), 4),
+            "stablecoin": "USD" in symbol or symbol == "DAI", "ilRisk": "no", "exposure": "single",
+            "predictions": {"predictedClass": "Stable/Up", "predictedProbability": 70, "binnedConfidence": 2},
+            "poolMeta": None, "mu": apy, "sigma": round(rng.uniform(0.01, 0.5), 4),
+            "count": rng.randint(10, 1200), "outlier": False,
+            "underlyingTokens": ["0x" + "%040x" % rng.getrandbits(160)],
+            "il7d": None, "apyBase7d": None, "apyMean30d": apy, "volumeUsd1d": None, "volumeUsd7d": None,
+            "apyBaseInception": None,
+        }
+
+    def _chart(self, pool_id: str) -> Dict[str, Any]:
+        """365 daily points around the pool's APY."""
+        rng = random.Random(pool_id)
+        base = next((v for s, v in self.state.apys.items() if pool_id.endswith(s.lower())), 4.0)
+        start = datetime.now(timezone.utc) - timedelta(days=365)
+        apy, points = base, []
+        for day in range(365):
+            apy = max(0.0, apy + 0.05 * (base - apy) + rng.gauss(0, 0.15))
+            points.append({
+                "timestamp": (start + timedelta(days=day)).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                "tvlUsd": 1e8, "apy": round(apy, 4), "apyBase": round(apy, 4), "apyReward": None,
+                "il7d": None, "apyBase7d": None,
+            })
+        return {"status": "success", "data": points}
+
+    def _lifi_quote(self, params: Dict[str, str]) -> Dict[str, Any]:
+        state = self.state
+        from_symbol = state.by_token[params["fromToken"].lower()]
+        to_symbol = state.by_token[params["toToken"].lower()]
+        from_amount = int(params["fromAmount"])
+        units = from_amount / 10 ** state.decimals(from_symbol)
+        to_units = units * 0.9995  # 5 bps all-in
+        to_amount = int(to_units * 10 ** state.decimals(to_symbol))
+        return {
+            "type": "lifi", "id": str(uuid.uuid4()), "tool": "stand-in-dex",
+            "action": {
+                "fromChainId": BASE_CHAIN_ID, "toChainId": BASE_CHAIN_ID,
+                "fromToken": {"address": params["fromToken"], "symbol": from_symbol},
+                "toToken": {"address": params["toToken"], "symbol": to_symbol},
+                "fromAmount": params["fromAmount"], "fromAddress": params.get("fromAddress"),
+                "toAddress": params.get("toAddress"), "slippage": float(params.get("slippage", 0.03)),
+            },
+            "estimate": {
+                "fromAmount": params["fromAmount"], "toAmount": str(to_amount),
+                "toAmountMin": str(int(to_amount * 0.997)),
+                "fromAmountUSD": f"{units:.6f}", "toAmountUSD": f"{to_units:.6f}",
+                "feeCosts": [{"amountUSD": f"{units * 0.00025:.6f}"}], "gasCosts": [{"amountUSD": "0.004"}],
+                "executionDuration": 30,
+            },
+            "transactionRequest": {"to": _address("lifiDiamond"), "data": "0x", "value": "0x0"},
+        }
+
+    def _chat_completion(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        prompt_chars = sum(len(m.get("content") or "") for m in request.get("messages", []))
+        deposit = self.state.llm_decision.upper() == "DEPOSIT"
+        decision = {
+            "decision": "DEPOSIT" if deposit else "HOLD",
+            "confidence": 72,
+            "reasoning": "Stand-in LLM response for benchmarking.",
+            "allocation": {"USDC": 60, "USDT": 40, "DAI": 0, "USDC.e": 0} if deposit else {},
+            "swaps_needed": [],
+            "key_factors": ["stand-in"],
+            "projected_30day_return": 0,
+            "projected_90day_return": 0,
+            "risks": [],
+            "opportunities": [],
+            "alternative_recommendation": "",
+        }
+        content = json.dumps(decision)
+        prompt_tokens, completion_tokens = prompt_chars // 4, len(content) // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}", "object": "chat.completion", "created": int(time.time()),
+            "model": request.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    def env(self) -> Dict[str, str]:
+        """Environment variables pointing the agent at these stand-ins."""
+        return {
+            "BASE_SEPOLIA_RPC_URL": f"{self.url}/rpc",
+            "DEFILLAMA_API_URL": f"{self.url}/defillama",
+            "COINGECKO_API_URL": f"{self.url}/coingecko",
+            "LIFI_API_URL": f"{self.url}/lifi",
+            "OPENAI_BASE_URL": f"{self.url}/openai/v1",
+            "CHAINLINK_ETH_USD_FEED": _address("chainlinkEthUsd"),
+        }
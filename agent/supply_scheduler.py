@@ -0,0 +1,158 @@
+"""
+Gas-aware accumulation scheduler for YieldVault.supplyToAave.
+
+Instead of pushing a slice of vault idle to Aave on every DEPOSIT decision,
+the scheduler tracks how idle grows between checks and only lets a supply
+through when the yield on the amount pays back the transaction's gas within
+a configured horizon. Small inflows accumulate in the vault until one larger
+supply is worth it.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SupplyScheduler:
+    """
+    Decides when idle vault funds are worth supplying to Aave.
+    """
+
+    # Idle samples kept for inflow-rate estimation
+    MAX_SAMPLES = 500
+
+    def __init__(
+        self,
+        storage_file: str = "supply_scheduler_state.json",
+        max_breakeven_days: float = 3.0,
+        min_supply_usd: float = 1.0,
+        inflow_window_hours: float = 72.0,
+    ):
+        """
+        Args:
+            storage_file: JSON file persisting idle samples and the last supply
+            max_breakeven_days: Supply only when gas is repaid by yield within this many days
+            min_supply_usd: Never supply less than this, whatever the gas cost
+            inflow_window_hours: Lookback used to estimate the idle inflow rate
+        """
+        self.storage_file = storage_file
+        self.max_breakeven_days = max_breakeven_days
+        self.min_supply_usd = min_supply_usd
+        self.inflow_window_hours = inflow_window_hours
+
+        self._lock = threading.Lock()
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=self.MAX_SAMPLES)
+        self._last_supply: Optional[Dict[str, Any]] = None
+        self._load()
+
+    def _load(self):
+        """Load persisted state from disk."""
+        try:
+            if os.path.exists(self.storage_file):
+                with open(self.storage_file, "r") as f:
+                    data = json.load(f)
+                self._samples.extend((float(t), float(v)) for t, v in data.get("samples", []))
+                self._last_supply = data.get("last_supply")
+        except Exception as e:
+            logger.warning("Could not load supply scheduler state: %s", e)
+
+    def _save(self):
+        """Persist state (caller must hold the lock)."""
+        try:
+            with open(self.storage_file, "w") as f:
+                json.dump({"samples": list(self._samples), "last_supply": self._last_supply}, f)
+        except Exception as e:
+            logger.error("Could not save supply scheduler state: %s", e)
+
+    def observe(self, idle_usd: float):
+        """Record the vault's current idle balance."""
+        with self._lock:
+            self._samples.append((time.time(), idle_usd))
+            self._save()
+
+    def inflow_rate_per_day(self) -> float:
+        """
+        Idle inflow in USD/day over the lookback window.
+
+        Only increases between consecutive samples count, so supplies (which
+        drop idle) don't look like outflows.
+        """
+        cutoff = time.time() - self.inflow_window_hours * 3600
+        with self._lock:
+            samples = [s for s in self._samples if s[0] >= cutoff]
+        if len(samples) < 2:
+            return 0.0
+        inflow = sum(max(0.0, b[1] - a[1]) for a, b in zip(samples, samples[1:]))
+        elapsed_days = (samples[-1][0] - samples[0][0]) / 86400
+        return inflow / elapsed_days if elapsed_days > 0 else 0.0
+
+    def evaluate(self, amount_usd: float, apy_pct: float, gas_cost_usd: float) -> Dict[str, Any]:
+        """
+        Decide whether supplying amount_usd now is worth its gas.
+
+        Args:
+            amount_usd: Amount that would be supplied
+            apy_pct: Current Aave supply APY (percent)
+            gas_cost_usd: Current USD cost of the supplyToAave transaction
+
+        Returns:
+            Dict with should_supply, breakeven_days, daily_yield_usd, the amount
+            needed to meet the threshold, an ETA for reaching it at the current
+            inflow rate, and a human-readable reason
+        """
+        daily_yield = amount_usd * apy_pct / 100 / 365
+        if apy_pct <= 0:
+            evaluation = {
+                "should_supply": False,
+                "amount_usd": amount_usd,
+                "apy_pct": apy_pct,
+                "gas_cost_usd": gas_cost_usd,
+                "reason": "APY unavailable; never breaks even",
+            }
+            logger.info("Supply scheduler: WAIT (%s)", evaluation['reason'])
+            return evaluation
+        breakeven_days = gas_cost_usd / daily_yield if daily_yield > 0 else None
+        # Smallest amount whose yield repays the gas within max_breakeven_days
+        needed_usd = max(gas_cost_usd * 365 * 100 / (apy_pct * self.max_breakeven_days), self.min_supply_usd)
+        inflow = self.inflow_rate_per_day()
+        eta_days = None
+        if amount_usd < needed_usd and inflow > 0:
+            eta_days = (needed_usd - amount_usd) / inflow
+
+        should_supply = amount_usd >= needed_usd
+        if should_supply:
+            reason = f"break-even {breakeven_days:.2f}d <= {self.max_breakeven_days:.2f}d"
+        elif eta_days is not None:
+            reason = (f"accumulating: ${amount_usd:,.2f} of ${needed_usd:,.2f} needed, "
+                      f"~{eta_days:.1f}d at ${inflow:,.2f}/day inflow")
+        else:
+            reason = f"accumulating: ${amount_usd:,.2f} of ${needed_usd:,.2f} needed, no recent inflow"
+
+        evaluation = {
+            "should_supply": should_supply,
+            "amount_usd": amount_usd,
+            "apy_pct": apy_pct,
+            "gas_cost_usd": gas_cost_usd,
+            "daily_yield_usd": daily_yield,
+            "breakeven_days": breakeven_days,
+            "max_breakeven_days": self.max_breakeven_days,
+            "needed_usd": needed_usd,
+            "inflow_usd_per_day": inflow,
+            "eta_days": eta_days,
+            "last_supply": self._last_supply,
+            "reason": reason,
+        }
+        logger.info("Supply scheduler: %s (%s)", 'SUPPLY' if should_supply else 'WAIT', reason)
+        return evaluation
+
+    def record_supply(self, amount_usd: float, tx_hash: Optional[str] = None):
+        """Record a supply that was sent."""
+        with self._lock:
+            self._last_supply = {"at": time.time(), "amount_usd": amount_usd, "tx_hash": tx_hash}
+            self._save()
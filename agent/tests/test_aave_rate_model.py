@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from aave_rate_model import RAY, AaveRateModel
+
+RESERVE = "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913"
+STRATEGY = "0x5d4a0D1a4C0b5aC8bDf1C0E5F3c1D8b9e6A7F2c1"
+A_TOKEN = "0x4e65fE4DbA92790696d040ac24Aa414708F5c0AB"
+DEBT_TOKEN = "0x59dca05b6c26dbd64b5381374aAaC5CD05644C28"
+
+PARAMS = [int(0.8 * RAY), 0, int(0.04 * RAY), int(0.6 * RAY)]
+
+
+def _word(value: int) -> str:
+    return hex(value)[2:].rjust(64, "0")
+
+
+class FakeRpc:
+    def __init__(self, *batches):
+        self.batches = list(batches)
+        self.calls = []
+
+    def batch(self, calls):
+        self.calls.append(calls)
+        return self.batches.pop(0)
+
+
+def _reserve_data(liquidity_rate: int, reserve_factor_bps: int = 1000):
+    data = [0] * 15
+    data[0] = reserve_factor_bps << 64
+    data[2] = liquidity_rate
+    data[8] = A_TOKEN
+    data[10] = DEBT_TOKEN
+    data[11] = STRATEGY
+    return data
+
+
+def _model(strategy_replies, supply=1000 * 10 ** 6, debt=500 * 10 ** 6):
+    totals = [{"result": hex(supply)}, {"result": hex(debt)}]
+    model = AaveRateModel(FakeRpc(strategy_replies, totals))
+    # Utilization 0.5 -> borrow 0.04 * 0.5 / 0.8 = 0.025, supply 0.025 * 0.5 * 0.9
+    model.update_reserve("USDC", RESERVE, _reserve_data(int(0.01125 * RAY)), 6)
+    model.refresh_totals()
+    return model
+
+
+def test_liquidity_rate_follows_both_slopes():
+    params = dict(zip(["optimal_usage_ratio", "base_variable_borrow_rate", "variable_rate_slope1",
+                       "variable_rate_slope2"], PARAMS))
+    rates = AaveRateModel._liquidity_rate(np.array([0.0, 0.4, 0.8, 0.9]), params, 0.1)
+
+    assert rates == pytest.approx([
+        0.0,
+        0.02 * 0.4 * 0.9,                 # below the kink: slope1 * u / optimal
+        0.04 * 0.8 * 0.9,                 # at the kink
+        (0.04 + 0.6 * 0.5) * 0.9 * 0.9,   # above: slope2 over the remaining 20%
+    ])
+
+
+def test_v2_strategy_post_deposit_apy():
+    v2 = [{"result": "0x" + "".join(_word(w) for w in PARAMS)}] + [{"error": {"message": "revert"}}] * 4
+    model = _model(v2)
+
+    apys = model.supply_apy("USDC", [0.0, 1000.0])
+
+    # A zero deposit reproduces the on-chain rate; 1000 more halves utilization to 0.25
+    assert apys == pytest.approx([1.125, 0.0125 * 0.25 * 0.9 * 100])
+
+
+def test_v1_strategy_getters_are_the_fallback():
+    v1 = [{"error": {"message": "execution reverted"}}] + [{"result": "0x" + _word(w)} for w in PARAMS]
+    model = _model(v1)
+
+    assert model.supply_apy("USDC", [1000.0]) == pytest.approx([0.28125])
+    assert model.impact_table("USDC", [1000.0]) == {"1000.00": pytest.approx(0.28125)}
+
+
+def test_calibration_absorbs_model_error():
+    v2 = [{"result": "0x" + "".join(_word(w) for w in PARAMS)}]
+    totals = [{"result": hex(1000 * 10 ** 6)}, {"result": hex(500 * 10 ** 6)}]
+    model = AaveRateModel(FakeRpc(v2, totals))
+    # On-chain rate twice what the simple model predicts
+    model.update_reserve("USDC", RESERVE, _reserve_data(int(0.0225 * RAY)), 6)
+    model.refresh_totals()
+
+    assert model.supply_apy("USDC", [0.0, 1000.0]) == pytest.approx([2.25, 0.5625])
+
+
+def test_unknown_strategy_or_totals_returns_none():
+    unreadable = [{"error": {"message": "revert"}}] * 5
+    model = AaveRateModel(FakeRpc(unreadable))
+    model.update_reserve("USDC", RESERVE, _reserve_data(int(0.01125 * RAY)), 6)
+
+    assert model.supply_apy("USDC", [1000.0]) is None
+    assert model.supply_apy("DAI", [1000.0]) is None
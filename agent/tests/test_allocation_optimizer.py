@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from allocation_optimizer import AllocationOptimizer
+
+
+def test_concentration_cap_spills_into_next_best_asset():
+    result = AllocationOptimizer("moderate").optimize({"A": 1000.0}, {"A": 5.0, "B": 3.0})
+
+    assert result["allocation"] == {"A": 75.0, "B": 25.0}
+    assert result["excluded"] == {}
+
+
+def test_aggressive_profile_takes_the_best_asset_only():
+    result = AllocationOptimizer("aggressive").optimize({"A": 1000.0}, {"A": 5.0, "B": 3.0})
+
+    assert result["allocation"] == {"A": 100.0}
+
+
+def test_volatility_penalty_reorders_assets():
+    # aggressive penalty 0.1: B's 6% - 0.1 * 20 = 4% < A's 5%
+    result = AllocationOptimizer("aggressive").optimize(
+        {"A": 1000.0}, {"A": 5.0, "B": 6.0}, volatility={"A": 0.0, "B": 20.0})
+
+    assert result["allocation"] == {"A": 100.0}
+
+
+def test_water_filling_equalizes_marginal_apy():
+    # A's APY falls as we supply more of it; B is flat at 4%
+    def supply_apy(asset, amounts):
+        amounts = np.asarray(amounts, dtype=float)
+        return 8.0 - amounts / 100 if asset == "A" else None
+
+    optimizer = AllocationOptimizer("aggressive", chunks=100, default_swap_bps=0.0, supply_apy=supply_apy)
+    result = optimizer.optimize({"A": 500.0, "B": 500.0}, {"A": 8.0, "B": 4.0})
+
+    # Marginal value of A's k-th chunk: d/dx x(8 - x/100) = 8 - x/50, which drops below 4% at x = 200
+    assert result["allocation"]["A"] == pytest.approx(20.0, abs=1.0)
+    assert result["allocation"]["B"] == pytest.approx(80.0, abs=1.0)
+
+
+def test_asset_that_does_not_repay_its_fixed_costs_is_excluded():
+    gas = {"depositERC20": 1.0, "lifi_swap": 1.0}
+
+    def gas_cost_usd(action, asset):
+        return 10.0 if asset and "B" in asset else gas[action]
+
+    optimizer = AllocationOptimizer("moderate", horizon_days=30, gas_cost_usd=gas_cost_usd)
+    result = optimizer.optimize({"A": 10_000.0}, {"A": 5.0, "B": 3.0})
+
+    # B's 25% earns ~$6.16 over 30 days, less than its $10 deposit + $10 swap
+    assert result["allocation"] == {"A": 75.0}
+    assert "B" in result["excluded"]
+
+
+def test_evaluate_charges_swaps_and_gas():
+    optimizer = AllocationOptimizer("aggressive", horizon_days=365, default_swap_bps=10.0,
+                                    gas_cost_usd=lambda action, asset: 2.0)
+    expected = optimizer.evaluate({"A": 50, "B": 50}, {"A": 1000.0}, {"A": 5.0, "B": 4.0})
+
+    assert expected["gross_yield_usd"] == pytest.approx(45.0)
+    assert expected["swap_cost_usd"] == pytest.approx(0.5)  # 500 swapped into B at 10 bps
+    assert expected["gas_cost_usd"] == pytest.approx(6.0)  # two deposits + one swap
+    assert expected["net_usd"] == pytest.approx(45.0 - 0.5 - 6.0)
+
+
+def test_clip_caps_drops_and_scales():
+    optimizer = AllocationOptimizer("moderate")
+    clipped = optimizer.clip({"A": 90, "B": 60, "C": 10, "D": "lots"}, {"A": 5.0, "B": 4.0, "D": 3.0})
+
+    assert clipped["allocation"] == pytest.approx({"A": 75 * 100 / 135, "B": 60 * 100 / 135})
+    assert len(clipped["adjustments"]) == 4
@@ -0,0 +1,123 @@
+import pytest
+from eth_account import Account
+
+from api import LLMAaveYieldAgent
+from benchmark import stand_in_agent
+from rpc_batch import BatchRpcClient
+
+OPERATOR_KEY = "0x" + "11" * 32
+
+
+@pytest.fixture
+def agent():
+    # Agent wired to the local stand-ins: vault with 2,500 USDC idle, USDC at 4.8%
+    with stand_in_agent(defillama_pools=10) as (_, agent, _):
+        yield agent
+
+
+def test_supply_plan_counts_deposits_batched_ahead_of_it(agent):
+    agent.operator_private_key = OPERATOR_KEY
+    agent.supply_to_aave_percent = 5
+    market_data = {"asset_apys": {"USDC": 4.8}}
+
+    standalone = agent.plan_supply_to_aave(market_data)
+    batched = agent.plan_supply_to_aave(market_data, incoming_raw=500 * 10 ** 6)
+
+    assert standalone["amount_raw"] == 125 * 10 ** 6
+    # 5% of the idle the supply leg will actually see: 2,500 + the batch's 500
+    assert batched["amount_raw"] == 150 * 10 ** 6
+
+
+def test_supply_plan_is_empty_when_disabled(agent):
+    agent.operator_private_key = OPERATOR_KEY
+    agent.supply_to_aave_percent = 0
+
+    plan = agent.plan_supply_to_aave({"asset_apys": {"USDC": 4.8}}, incoming_raw=500 * 10 ** 6)
+
+    assert plan["success"] and plan["amount_raw"] == 0
+
+
+def _error_string(reason):
+    encoded = reason.encode()
+    padded = encoded + b"\0" * (-len(encoded) % 32)
+    return "0x08c379a0" + (32).to_bytes(32, "big").hex() + len(encoded).to_bytes(32, "big").hex() + padded.hex()
+
+
+@pytest.mark.parametrize("error, reason", [
+    ({"code": 3, "message": "execution reverted", "data": _error_string("ERC20: transfer amount exceeds balance")},
+     "ERC20: transfer amount exceeds balance"),
+    ({"code": 3, "data": {"data": _error_string("paused")}}, "paused"),
+    ({"code": 3, "data": "0x4e487b71" + (0x11).to_bytes(32, "big").hex()}, "Panic(0x11)"),
+    ({"code": 3, "data": "0xe450d38c" + "00" * 96}, "custom error 0xe450d38c"),
+    ({"code": -32000, "message": "out of gas"}, "out of gas"),
+    ({"code": 3, "data": "0x"}, "execution reverted"),
+])
+def test_decode_revert_reason(error, reason):
+    assert LLMAaveYieldAgent._decode_revert_reason(error) == reason
+
+
+class StubContract:
+    def __init__(self, address):
+        self.address = address
+
+    def encode_abi(self, fn_name, args):
+        return "0x" + fn_name.encode().hex() + "".join(f"{a:064x}" for a in args)
+
+
+class EthCallSession:
+    """Reverts eth_calls whose data is in `reverts` (data -> revert data); replies in reverse order."""
+
+    def __init__(self, reverts):
+        self.reverts = reverts
+        self.payloads = []
+
+    def post(self, url, json=None, timeout=None):
+        self.payloads.append(json)
+        replies = []
+        for request in reversed(json):
+            data = request["params"][0]["data"]
+            if data in self.reverts:
+                replies.append({"id": request["id"], "error": {"code": 3, "message": "execution reverted",
+                                                               "data": self.reverts[data]}})
+            else:
+                replies.append({"id": request["id"], "result": "0x"})
+        return _Response(replies)
+
+
+class _Response:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+def test_simulate_calls_maps_batched_results_back_to_calls():
+    vault, orchestrator = StubContract("0x" + "0a" * 20), StubContract("0x" + "0b" * 20)
+    calls = [
+        {"contract": vault, "fn_name": "approve", "args": [1], "metadata": {"asset": "USDC"}},
+        {"contract": orchestrator, "fn_name": "depositERC20", "args": [2], "metadata": {"asset": "USDT"}},
+        {"contract": orchestrator, "fn_name": "supplyVaultToAave", "args": [3], "metadata": {"asset": "USDC"}},
+    ]
+    session = EthCallSession({orchestrator.encode_abi("depositERC20", [2]): _error_string("insufficient allowance")})
+    agent = LLMAaveYieldAgent.__new__(LLMAaveYieldAgent)
+    agent.operator_private_key = OPERATOR_KEY
+    agent.rpc = BatchRpcClient("http://rpc", session=session)
+
+    results = agent.simulate_calls(calls, block_identifier=1234)
+
+    assert results == [
+        {"action": "approve", "metadata": {"asset": "USDC"}, "success": True, "revert_reason": None},
+        {"action": "depositERC20", "metadata": {"asset": "USDT"}, "success": False,
+         "revert_reason": "insufficient allowance"},
+        {"action": "supplyVaultToAave", "metadata": {"asset": "USDC"}, "success": True, "revert_reason": None},
+    ]
+    # One batch, every call from the operator against the same pinned block
+    (payload,) = session.payloads
+    assert [(r["params"][0]["to"], r["params"][1]) for r in payload] == [
+        (vault.address, "0x4d2"), (orchestrator.address, "0x4d2"), (orchestrator.address, "0x4d2")]
+    assert {r["params"][0]["from"] for r in payload} == {Account.from_key(OPERATOR_KEY).address}
+    assert agent.simulate_calls([]) == []
@@ -0,0 +1,85 @@
+import numpy as np
+
+import pytest
+
+from backtest import SECONDS_PER_YEAR, best_apy_policy, hold_policy, simulate
+
+
+def test_switches_once_the_held_asset_is_beaten_by_the_threshold():
+    # B edges past A by less than 50 bps (rejected), then pulls well ahead
+    apys = np.array([[5, 4], [5, 4], [5, 5.1], [5, 5.1], [5, 9], [5, 9], [5, 9]], dtype=float)
+
+    weights = best_apy_policy(apys, {"threshold_bps": 50})
+
+    np.testing.assert_array_equal(weights[:4], [[1, 0]] * 4)
+    np.testing.assert_array_equal(weights[4:], [[0, 1]] * 3)
+
+
+def test_small_edge_never_moves_the_allocation():
+    apys = np.array([[5, 4], [5, 5.2], [5, 5.3], [5, 5.4]], dtype=float)
+
+    weights = best_apy_policy(apys, {"threshold_bps": 50})
+
+    np.testing.assert_array_equal(weights, [[1, 0]] * 4)
+
+
+def test_rebalance_every_defers_the_switch_to_the_next_allowed_step():
+    apys = np.array([[5, 4], [5, 9], [5, 9], [5, 9]], dtype=float)
+
+    weights = best_apy_policy(apys, {"rebalance_every": 2})
+
+    np.testing.assert_array_equal(weights, [[1, 0], [1, 0], [0, 1], [0, 1]])
+
+
+def test_hold_policy_defaults_to_first_asset():
+    weights = hold_policy(np.ones((3, 2)), {})
+
+    np.testing.assert_array_equal(weights, [[1, 0]] * 3)
+
+
+def _two_asset_series():
+    # Two half-year periods: A pays 10%, B pays 20%
+    half = SECONDS_PER_YEAR / 2
+    return {"timestamps": np.array([0.0, half, 2 * half]),
+            "apys": np.array([[10.0, 20.0], [10.0, 20.0], [10.0, 20.0]]), "assets": ["A", "B"]}
+
+
+def test_simulate_charges_swap_cost_and_gas_on_the_switch():
+    switch = [[1, 0], [0, 1], [0, 1]]
+    hold = [[1, 0], [1, 0], [1, 0]]
+
+    result = simulate(_two_asset_series(), np.array([switch, hold], dtype=float),
+                      initial_usd=1_000, swap_cost_bps=100, gas_per_tx_usd=1.0)
+
+    # switch: deposit into A ($1 gas) -> 999; +5% -> 1048.95; swap at 1% -> 1038.4605,
+    # swap leg + deposit into B ($2 gas) -> 1036.4605; +10% -> 1140.10655
+    # hold:   deposit ($1 gas) -> 999; +5%, +5% -> 1101.3975
+    np.testing.assert_allclose(result["final_usd"], [1140.10655, 1101.3975])
+    np.testing.assert_allclose(result["gross_apy"], [15.5, 10.25])
+    np.testing.assert_allclose(result["net_apy"], [14.010655, 10.13975])
+    # 1% of the $1,050 moved
+    np.testing.assert_allclose(result["swap_cost_usd"], [10.5, 0.0])
+    np.testing.assert_array_equal(result["tx_count"], [3, 1])
+    np.testing.assert_array_equal(result["gas_cost_usd"], [3.0, 1.0])
+    np.testing.assert_array_equal(result["turnover"], [1.0, 0.0])
+
+
+def test_simulate_partial_rebalance_moves_only_the_traded_share():
+    weights = np.array([[1, 0], [0.5, 0.5], [0.5, 0.5]], dtype=float)
+
+    result = simulate(_two_asset_series(), weights, initial_usd=1_000, swap_cost_bps=100, gas_per_tx_usd=0.0)
+
+    # 1050 -> half swapped at 1% (1044.75) -> +7.5% on the 50/50 mix
+    assert result["final_usd"][0] == pytest.approx(1044.75 * 1.075)
+    assert result["swap_cost_usd"][0] == pytest.approx(5.25)
+    assert result["turnover"][0] == 0.5
+    assert result["tx_count"][0] == 3  # deposit into A, then one swap leg and one deposit into B
+
+
+def test_simulate_needs_two_rows():
+    series = {"timestamps": np.array([0.0]), "apys": np.array([[5.0, 6.0]]), "assets": ["A", "B"]}
+
+    result = simulate(series, np.array([[1.0, 0.0]]), initial_usd=1_000)
+
+    assert result["final_usd"][0] == 1_000
+    assert result["tx_count"][0] == 0
@@ -0,0 +1,133 @@
+import pytest
+import requests
+from openai import OpenAI
+
+from cassette import Cassette, CassetteMiss
+from rpc_batch import BatchRpcClient
+from stand_ins import StandInServer, StandInState
+
+TREASURY = "0x000000000000000000000000000000000000dEaD"
+ASSETS = {"USDC": {"address": "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913", "decimals": 6}}
+
+
+@pytest.fixture
+def server():
+    server = StandInServer(StandInState(ASSETS, TREASURY, llm_decision="HOLD"), defillama_pools=1).start()
+    yield server
+    server.stop()
+
+
+def _session(cassette):
+    session = requests.Session()
+    cassette.install(session)
+    return session
+
+
+def _replay(path):
+    cassette = Cassette(path, mode="replay")
+    return cassette, _session(cassette)
+
+
+def test_record_then_replay_without_the_server(server, tmp_path):
+    path = str(tmp_path / "cassette.json.gz")
+    recorder = Cassette(path, mode="record")
+    session = _session(recorder)
+    recorded_price = session.get(f"{server.url}/coingecko/simple/price", params={"ids": "ethereum"}).json()
+    recorded_block = BatchRpcClient(f"{server.url}/rpc", session=session).call("eth_blockNumber", [])
+    recorder.save()
+    server.stop()
+
+    _, replay = _replay(path)
+
+    assert replay.get(f"{server.url}/coingecko/simple/price", params={"ids": "ethereum"}).json() == recorded_price
+    assert BatchRpcClient(f"{server.url}/rpc", session=replay).call("eth_blockNumber", []) == recorded_block
+
+
+def test_json_rpc_ids_are_stripped_for_matching_and_rewritten_on_replay(tmp_path):
+    path = str(tmp_path / "cassette.json")
+    recorder = Cassette(path, mode="record")
+    recorder.record("POST", "http://node/rpc",
+                    b'[{"jsonrpc":"2.0","id":7,"method":"eth_chainId"},{"jsonrpc":"2.0","id":8,"method":"eth_blockNumber"}]',
+                    200, {"Content-Type": "application/json"},
+                    b'[{"jsonrpc":"2.0","id":8,"result":"0x64"},{"jsonrpc":"2.0","id":7,"result":"0x2105"}]', 0.01)
+    recorder.save()
+
+    cassette = Cassette(path, mode="replay")
+    status, headers, content = cassette.play(
+        "POST", "http://node/rpc",
+        b'[{"jsonrpc":"2.0","id":41,"method":"eth_chainId"},{"jsonrpc":"2.0","id":42,"method":"eth_blockNumber"}]')
+
+    assert status == 200 and headers == {"Content-Type": "application/json"}
+    # Each reply keeps pointing at the call it answered, under the new ids
+    assert content == b'[{"jsonrpc":"2.0","id":42,"result":"0x64"},{"jsonrpc":"2.0","id":41,"result":"0x2105"}]'
+
+
+def test_repeated_calls_replay_in_recorded_order(server, tmp_path):
+    path = str(tmp_path / "cassette.json")
+    recorder = Cassette(path, mode="record")
+    rpc = BatchRpcClient(f"{server.url}/rpc", session=_session(recorder))
+    for block in (100, 101):
+        server.state.block_number = block
+        rpc.call("eth_blockNumber", [])
+    recorder.save()
+
+    _, replay = _replay(path)
+    rpc = BatchRpcClient(f"{server.url}/rpc", session=replay)
+
+    # Once the recordings are used up, the last one keeps answering
+    assert [rpc.call("eth_blockNumber", []) for _ in range(3)] == ["0x64", "0x65", "0x65"]
+
+
+def test_non_rpc_requests_fall_back_to_the_next_recording_for_the_url(tmp_path):
+    path = str(tmp_path / "cassette.json")
+    recorder = Cassette(path, mode="record")
+    for answer in (b'{"n":1}', b'{"n":2}'):
+        recorder.record("POST", "http://llm/v1/chat", b'{"prompt":"at 10:00"}', 200, {}, answer, 0.0)
+    recorder.save()
+
+    cassette = Cassette(path, mode="replay")
+
+    assert cassette.play("POST", "http://llm/v1/chat", b'{"prompt":"at 10:05"}')[2] == b'{"n":1}'
+    assert cassette.play("POST", "http://llm/v1/chat", b'{"prompt":"at 10:05"}')[2] == b'{"n":2}'
+    with pytest.raises(CassetteMiss):
+        cassette.play("GET", "http://llm/v1/models", None)
+
+
+def test_json_rpc_never_falls_back_to_another_call(tmp_path):
+    path = str(tmp_path / "cassette.json")
+    recorder = Cassette(path, mode="record")
+    recorder.record("POST", "http://node/rpc", b'{"jsonrpc":"2.0","id":1,"method":"eth_chainId"}', 200, {},
+                    b'{"jsonrpc":"2.0","id":1,"result":"0x2105"}', 0.0)
+    recorder.save()
+
+    cassette = Cassette(path, mode="replay")
+
+    with pytest.raises(CassetteMiss):
+        cassette.play("POST", "http://node/rpc", b'{"jsonrpc":"2.0","id":1,"method":"eth_blockNumber"}')
+
+
+def test_openai_client_records_and_replays(server, tmp_path):
+    path = str(tmp_path / "cassette.json.gz")
+
+    def ask(cassette):
+        client = OpenAI(api_key="sk-test", base_url=f"{server.url}/openai/v1", http_client=cassette.httpx_client(),
+                        max_retries=0)
+        return client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "decide"}])
+
+    recorder = Cassette(path, mode="record")
+    recorded = ask(recorder).choices[0].message.content
+    recorder.save()
+    server.stop()
+
+    assert ask(Cassette(path, mode="replay")).choices[0].message.content == recorded
+
+
+def test_off_mode_installs_nothing():
+    cassette = Cassette(mode="off")
+    session = requests.Session()
+    adapter = session.get_adapter("https://example.com")
+
+    cassette.install(session)
+
+    assert session.get_adapter("https://example.com") is adapter
+    assert cassette.httpx_client() is None
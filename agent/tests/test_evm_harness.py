@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+pytest.importorskip("eth_tester")
+
+from evm_harness import EvmHarness, missing_artifacts  # noqa: E402
+from rpc_batch import BatchRpcClient  # noqa: E402
+
+
+@pytest.fixture
+def harness():
+    harness = EvmHarness().start()
+    yield harness
+    harness.stop()
+
+
+def test_rpc_server_answers_like_a_node(harness):
+    rpc = BatchRpcClient(harness.server.url)
+
+    block, balance, fees = [r["result"] for r in rpc.batch([
+        ("eth_blockNumber", []),
+        ("eth_getBalance", [harness.operator, "latest"]),
+        ("eth_feeHistory", [4, "latest", [25, 50]]),
+    ])]
+
+    # Quantities are hex strings, as the agent's parsers expect from a real node
+    assert block.startswith("0x") and int(balance, 16) == 10 ** 20
+    assert all(fee.startswith("0x") for fee in fees["baseFeePerGas"])
+    assert harness.server.reset_counts()["rpc.eth_feeHistory"] == 1
+
+
+def test_reverts_come_back_as_rpc_errors(harness):
+    rpc = BatchRpcClient(harness.server.url)
+    # Creation code whose constructor always reverts
+    reply = rpc.batch([("eth_estimateGas", [{"from": harness.deployer, "data": "0x60006000fd"}])])[0]
+
+    assert "error" in reply and "result" not in reply
+
+
+def test_one_round_of_every_scenario(harness):
+    missing = missing_artifacts()
+    if missing:
+        message = f"needs `forge build` in contracts/ or EVM_HARNESS_ARTIFACTS (missing {', '.join(missing)})"
+        # CI sets this so the contract path cannot silently stop running
+        if os.getenv("EVM_HARNESS_REQUIRE_ARTIFACTS"):
+            pytest.fail(message)
+        pytest.skip(message)
+    run = harness.run(rounds=1)
+
+    scenarios = run["scenarios"]
+    assert all(s["reverted_txs"] == 0 for s in scenarios.values())
+    # One deposit per asset, or a single multicall
+    assert scenarios["make_decision_per_asset"]["txs_per_round"] >= len(harness.treasury_balances)
+    assert scenarios["make_decision_batched"]["txs_per_round"] >= 1
+    assert scenarios["execute_orchestrator_deposit"]["txs_per_round"] == 1
+
+
+def test_missing_artifacts_fail_before_any_deploy(harness, tmp_path):
+    harness.artifacts_dir = str(tmp_path)
+    block = harness.w3.eth.block_number
+
+    with pytest.raises(FileNotFoundError, match="MockAavePool, MockERC20"):
+        harness.deploy_system()
+    assert harness.w3.eth.block_number == block
@@ -0,0 +1,143 @@
+import pytest
+
+import fee_oracle
+from fee_oracle import FeeOracle
+from rpc_batch import RpcBatchError
+
+GWEI = 10**9
+
+
+class StubRpc:
+    """Answers call(method, params) from a method -> result (or exception) dict."""
+
+    def __init__(self, **results):
+        self.results = results
+        self.calls = []
+
+    def call(self, method, params):
+        self.calls.append((method, params))
+        result = self.results[method]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def _fee_history(next_base_fee=GWEI):
+    # Three blocks; rewards at the 10th / 50th / 90th percentile, the middle block empty
+    return {
+        "oldestBlock": hex(100),
+        "baseFeePerGas": [hex(GWEI)] * 3 + [hex(next_base_fee)],
+        "reward": [
+            [hex(1 * GWEI // 100), hex(5 * GWEI // 100), hex(20 * GWEI // 100)],
+            ["0x0", "0x0", "0x0"],
+            [hex(3 * GWEI // 100), hex(7 * GWEI // 100), hex(40 * GWEI // 100)],
+        ],
+    }
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000.0]
+    monkeypatch.setattr(fee_oracle.time, "time", lambda: now[0])
+    return now
+
+
+def test_fee_history_snapshot_skips_empty_blocks():
+    oracle = FeeOracle(StubRpc(eth_feeHistory=_fee_history(next_base_fee=2 * GWEI)), history_blocks=3)
+
+    snapshot = oracle.get_fee_history()
+
+    assert snapshot["newest_block"] == 102
+    assert snapshot["next_base_fee"] == 2 * GWEI
+    # Median of the two non-empty blocks per column (upper median for an even count)
+    assert snapshot["reward_percentiles"] == {10: 3 * GWEI // 100, 50: 7 * GWEI // 100, 90: 40 * GWEI // 100}
+    assert oracle.rpc.calls == [("eth_feeHistory", ["0x3", "latest", [10, 50, 90]])]
+
+
+@pytest.mark.parametrize("urgency, tip, base_multiplier", [
+    ("low", 3 * GWEI // 100, 1.25),
+    ("standard", 7 * GWEI // 100, 2.0),
+    ("high", 40 * GWEI // 100, 3.0),
+    ("unknown", 7 * GWEI // 100, 2.0),
+])
+def test_urgency_tiers(urgency, tip, base_multiplier):
+    oracle = FeeOracle(StubRpc(eth_feeHistory=_fee_history()), min_priority_fee_wei=1)
+
+    fees = oracle.get_fees(urgency)
+
+    assert fees == {
+        "maxFeePerGas": int(GWEI * base_multiplier) + tip,
+        "maxPriorityFeePerGas": tip,
+        "expectedGasPrice": GWEI + tip,
+    }
+
+
+def test_priority_fee_floor():
+    oracle = FeeOracle(StubRpc(eth_feeHistory=_fee_history()), min_priority_fee_wei=GWEI)
+
+    assert oracle.get_fees("low")["maxPriorityFeePerGas"] == GWEI
+
+
+def test_fee_history_is_cached_for_the_ttl(clock):
+    rpc = StubRpc(eth_feeHistory=_fee_history())
+    oracle = FeeOracle(rpc, cache_ttl=2.0)
+
+    oracle.get_fees("low")
+    clock[0] += 1.9
+    oracle.get_fees("high")
+    assert len(rpc.calls) == 1
+
+    clock[0] += 0.2
+    oracle.get_fees("standard")
+    assert len(rpc.calls) == 2
+
+
+def test_failed_refresh_returns_the_last_snapshot(clock):
+    rpc = StubRpc(eth_feeHistory=_fee_history())
+    oracle = FeeOracle(rpc, cache_ttl=2.0)
+    first = oracle.get_fee_history()
+
+    rpc.results["eth_feeHistory"] = RpcBatchError("timeout")
+    clock[0] += 60
+
+    assert oracle.get_fee_history() is first
+    assert FeeOracle(rpc).get_fees() is None
+
+
+def test_gas_limit_is_estimate_times_call_type_margin():
+    rpc = StubRpc(eth_estimateGas=hex(100_000))
+    oracle = FeeOracle(rpc, gas_margins={"supplyToAave": 1.5})
+
+    assert oracle.estimate_gas("supplyToAave", {"from": "0xa", "to": "0xb", "data": "0x", "value": 5, "nonce": 1}) == 150_000
+    assert oracle.estimate_gas("depositERC20", {"to": "0xb"}) == 125_000
+    assert oracle.estimate_gas("somethingElse", {"to": "0xb"}) == 130_000
+    # Only call fields are sent, with an int value hex-encoded
+    assert rpc.calls[0] == ("eth_estimateGas", [{"from": "0xa", "to": "0xb", "data": "0x", "value": "0x5"}])
+    assert oracle.cached_gas_estimate("supplyToAave") == 100_000
+
+
+def test_failed_estimate_uses_cache_then_fallback_limits():
+    rpc = StubRpc(eth_estimateGas=hex(80_000))
+    oracle = FeeOracle(rpc)
+    oracle.estimate_gas("depositERC20", {"to": "0xb"})
+
+    rpc.results["eth_estimateGas"] = RpcBatchError("execution reverted")
+
+    assert oracle.estimate_gas("depositERC20", {"to": "0xb"}) == 100_000
+    assert oracle.estimate_gas("supplyToAave", {"to": "0xb"}) == FeeOracle.FALLBACK_GAS_LIMITS["supplyToAave"]
+    assert oracle.estimate_gas("lifi_swap", {"to": "0xb"}) == FeeOracle.FALLBACK_GAS_LIMITS["default"]
+
+
+def test_transaction_fields():
+    rpc = StubRpc(eth_feeHistory=_fee_history(), eth_estimateGas=hex(100_000))
+    oracle = FeeOracle(rpc, min_priority_fee_wei=1)
+
+    assert oracle.transaction_fields("multicall", {"to": "0xb"}, urgency="high") == {
+        "gas": 125_000,
+        "maxFeePerGas": 3 * GWEI + 40 * GWEI // 100,
+        "maxPriorityFeePerGas": 40 * GWEI // 100,
+        "type": 2,
+    }
+
+    rpc.results["eth_feeHistory"] = RpcBatchError("down")
+    assert FeeOracle(rpc).transaction_fields("multicall", {"to": "0xb"}) == {"gas": 125_000}
@@ -0,0 +1,41 @@
+from gas_model import GasUsageModel
+
+
+def test_percentiles_and_asset_fallback(tmp_path):
+    model = GasUsageModel(str(tmp_path / "gas.json"))
+    for gas_used in range(100_000, 200_000, 10_000):
+        model.record("depositERC20", "USDC", gas_used)
+
+    assert model.estimate("depositERC20", "USDC", 50) == 150_000
+    assert model.estimate("depositERC20", "USDC", 90) == 190_000
+    # Unseen asset falls back to the action's aggregate; unseen action has no estimate
+    assert model.estimate("depositERC20", "DAI", 75) == 170_000
+    assert model.estimate("supplyToAave") is None
+
+
+def test_window_evicts_oldest_samples(tmp_path):
+    model = GasUsageModel(str(tmp_path / "gas.json"), max_samples=3)
+    for gas_used in (900_000, 100_000, 110_000, 120_000):
+        model.record("lifi_swap", "USDC->USDT", gas_used)
+
+    assert model.summary()["lifi_swap:USDC->USDT"] == {"count": 3, "p50": 110_000, "p75": 120_000, "p90": 120_000}
+
+
+def test_samples_survive_restart(tmp_path):
+    path = str(tmp_path / "gas.json")
+    GasUsageModel(path).record("depositERC20", "USDT", 123_456)
+
+    assert GasUsageModel(path).estimate("depositERC20", "USDT") == 123_456
+
+
+def test_learns_only_from_confirmed_receipts(tmp_path):
+    model = GasUsageModel(str(tmp_path / "gas.json"))
+    model.on_transaction_finalized({"status": "failed", "action": "lifi_swap", "gas_used": 1,
+                                    "metadata": {"from": "USDC", "to": "USDT"}})
+    model.on_transaction_finalized({"status": "confirmed", "action": "lifi_swap", "gas_used": 250_000,
+                                    "metadata": {"from": "USDC", "to": "USDT"}})
+
+    assert model.summary() == {
+        "lifi_swap:USDC->USDT": {"count": 1, "p50": 250_000, "p75": 250_000, "p90": 250_000},
+        "lifi_swap:*": {"count": 1, "p50": 250_000, "p75": 250_000, "p90": 250_000},
+    }
@@ -0,0 +1,68 @@
+import json
+import logging
+import queue
+import sys
+
+import pytest
+
+import log_config
+from log_config import TEXT_FORMAT, JsonFormatter, _DeferredQueueHandler, configure_logging, parse_levels
+
+
+def _record(msg, *args, exc_info=None):
+    return logging.LogRecord("api", logging.INFO, __file__, 1, msg, args, exc_info)
+
+
+def test_message_is_rendered_at_the_call():
+    handler = _DeferredQueueHandler(queue.SimpleQueue())
+    balances = {"USDC": 1.0}
+
+    prepared = handler.prepare(_record("balances %s", balances))
+    balances["USDC"] = 2.0
+
+    assert prepared.getMessage() == "balances {'USDC': 1.0}"
+    assert prepared.args is None
+
+
+def test_traceback_is_rendered_and_survives_json_formatting():
+    handler = _DeferredQueueHandler(queue.SimpleQueue())
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        prepared = handler.prepare(_record("failed", exc_info=sys.exc_info()))
+
+    assert prepared.exc_info is None
+    entry = json.loads(JsonFormatter().format(prepared))
+    assert entry["message"] == "failed"
+    assert "RuntimeError: boom" in entry["exc"]
+
+
+def test_parse_levels():
+    assert parse_levels("web3=warning, api=DEBUG,") == {"web3": logging.WARNING, "api": logging.DEBUG}
+    with pytest.raises(ValueError):
+        parse_levels("web3=LOUD")
+
+
+@pytest.fixture
+def restore_root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    log_config.shutdown_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def test_text_is_the_default_format_and_json_is_opt_in(monkeypatch, restore_root_logger):
+    monkeypatch.delenv("LOG_FORMAT", raising=False)
+    configure_logging()
+    (stream,) = log_config._listener.handlers
+    assert stream.formatter._fmt == TEXT_FORMAT
+
+    monkeypatch.setenv("LOG_FORMAT", "JSON")
+    configure_logging()
+    (stream,) = log_config._listener.handlers
+    assert isinstance(stream.formatter, JsonFormatter)
@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+from main import LLMAaveYieldAgent
+
+
+def _agent(history, tmp_path):
+    # Only the history state get_historical_yield_metrics reads; no RPC or OpenAI clients
+    agent = LLMAaveYieldAgent.__new__(LLMAaveYieldAgent)
+    agent.apy_history = history
+    agent.apy_history_file = str(tmp_path / "apy_history.json")
+    agent.apy_history_save_interval = 600.0
+    agent._apy_history_saved_at = 0.0
+    agent.refresh_intervals = {"alternative_yields": 1800.0}
+    agent.inputs = {"defillama_historical": {"value": None, "updated_at": time.time()}}
+    return agent
+
+
+def _entry(ts, apy):
+    return {"timestamp": "", "apy": apy, "unix_timestamp": ts}
+
+
+def test_averages_weight_samples_by_time_not_count(tmp_path):
+    now = int(time.time())
+    # Six days of hourly samples at 3%, then the last day sampled every minute at 5%
+    day = 86400
+    hourly = [_entry(ts, 3.0) for ts in range(now - 7 * day + 60, now - day, 3600)]
+    minutely = [_entry(ts, 5.0) for ts in range(now - day, now, 60)]
+
+    metrics = _agent(hourly + minutely, tmp_path).get_historical_yield_metrics()
+
+    # ~6/7 of the week at 3% and 1/7 at 5%; an unweighted mean would be ~4.8
+    assert metrics["apy_avg_7d"] == pytest.approx(3 + 2 / 7, abs=0.01)
+    assert metrics["apy_volatility_7d"] == pytest.approx(2 * (6 / 49) ** 0.5, abs=0.01)
+
+
+def test_outage_does_not_stretch_one_sample(tmp_path):
+    now = int(time.time())
+    history = [_entry(now - 5 * 86400, 9.0)] + [_entry(ts, 4.0) for ts in range(now - 3600, now, 60)]
+
+    metrics = _agent(history, tmp_path).get_historical_yield_metrics()
+
+    # The 9% reading counts for at most an hour
+    assert metrics["apy_avg_7d"] == pytest.approx(6.5, abs=0.01)
+
+
+def test_apy_samples_are_saved_at_most_once_per_interval(tmp_path):
+    agent = _agent([], tmp_path)
+
+    agent._record_apy(4.0)
+    saved_at = agent._apy_history_saved_at
+    agent._record_apy(4.1)
+
+    assert agent._apy_history_saved_at == saved_at
+    assert (tmp_path / "apy_history.json").read_text().count('"apy"') == 1
@@ -0,0 +1,125 @@
+import json
+
+import requests
+from requests.adapters import BaseAdapter
+
+import metrics
+from metrics import Counter, Histogram, Registry
+
+
+def test_histogram_buckets_are_cumulative_and_end_in_inf():
+    histogram = Histogram("job_seconds", "Job duration.", ["job"], buckets=(0.5, 0.1, 1.0))
+    for value in (0.05, 0.2, 0.2, 0.7, 3.0):
+        histogram.observe(value, job="a")
+
+    assert histogram.render() == [
+        "# HELP job_seconds Job duration.",
+        "# TYPE job_seconds histogram",
+        'job_seconds_bucket{job="a",le="0.1"} 1',
+        'job_seconds_bucket{job="a",le="0.5"} 3',
+        'job_seconds_bucket{job="a",le="1"} 4',
+        'job_seconds_bucket{job="a",le="+Inf"} 5',
+        'job_seconds_sum{job="a"} 4.15',
+        'job_seconds_count{job="a"} 5',
+    ]
+
+
+def test_label_values_are_escaped():
+    counter = Counter("errors_total", "Errors.", ["reason"])
+    counter.inc(reason='bad "quote"\\path\nnext')
+    counter.inc(2)
+
+    assert counter.render()[2:] == [
+        'errors_total{reason=""} 2',
+        'errors_total{reason="bad \\"quote\\"\\\\path\\nnext"} 1',
+    ]
+
+
+def test_unlabelled_metrics_and_registry_exposition():
+    registry = Registry()
+    counter = registry.register(Counter("ticks_total", "Ticks."))
+    histogram = registry.register(Histogram("wait_seconds", "Wait.", buckets=(1.0,)))
+    counter.inc(0.5)
+    histogram.observe(2.0)
+
+    assert registry.render() == "\n".join([
+        "# HELP ticks_total Ticks.",
+        "# TYPE ticks_total counter",
+        "ticks_total 0.5",
+        "# HELP wait_seconds Wait.",
+        "# TYPE wait_seconds histogram",
+        'wait_seconds_bucket{le="1"} 0',
+        'wait_seconds_bucket{le="+Inf"} 1',
+        "wait_seconds_sum 2",
+        "wait_seconds_count 1",
+    ]) + "\n"
+
+
+class StatusAdapter(BaseAdapter):
+    def __init__(self, status_code=200):
+        super().__init__()
+        self.status_code = status_code
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code, response._content = self.status_code, b"{}"
+        response.request, response.url = request, request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def _hooked_session(status_code=200):
+    session = requests.Session()
+    session.mount("https://", StatusAdapter(status_code))
+    metrics.install_session_hooks(session, {
+        "https://rpc.test/": "test-rpc",
+        "https://api.test/": "test-api",
+        "https://api.test/lifi": "test-lifi",
+    })
+    return session
+
+
+def _dependency_count(dependency):
+    return sum(series[2] for key, series in metrics.DEPENDENCY_SECONDS._series.items() if key == (dependency,))
+
+
+def test_session_hooks_count_rpc_methods_and_round_trips():
+    session = _hooked_session()
+    before = {
+        "batched": metrics.RPC_REQUESTS.value(batch="true"),
+        "single": metrics.RPC_REQUESTS.value(batch="false"),
+        "eth_call": metrics.RPC_CALLS.value(method="eth_call"),
+        "receipt": metrics.RPC_CALLS.value(method="eth_getTransactionReceipt"),
+        "rpc": _dependency_count("test-rpc"),
+    }
+
+    session.post("https://rpc.test/", data=json.dumps([
+        {"jsonrpc": "2.0", "id": 1, "method": "eth_call", "params": []},
+        {"jsonrpc": "2.0", "id": 2, "method": "eth_call", "params": []},
+        {"jsonrpc": "2.0", "id": 3, "method": "eth_getTransactionReceipt", "params": []},
+    ]))
+    session.post("https://rpc.test/", json={"jsonrpc": "2.0", "id": 4, "method": "eth_call", "params": []})
+    session.post("https://rpc.test/", data="not json")
+
+    assert metrics.RPC_REQUESTS.value(batch="true") - before["batched"] == 1
+    assert metrics.RPC_REQUESTS.value(batch="false") - before["single"] == 1
+    assert metrics.RPC_CALLS.value(method="eth_call") - before["eth_call"] == 3
+    assert metrics.RPC_CALLS.value(method="eth_getTransactionReceipt") - before["receipt"] == 1
+    assert _dependency_count("test-rpc") - before["rpc"] == 3
+
+
+def test_session_hooks_label_by_longest_prefix_and_count_errors():
+    before = {name: _dependency_count(name) for name in ("test-api", "test-lifi", "other.test")}
+    errors = metrics.DEPENDENCY_ERRORS.value(dependency="test-lifi")
+    rpc_requests = metrics.RPC_REQUESTS.value(batch="false")
+
+    _hooked_session().get("https://api.test/pools")
+    _hooked_session(status_code=429).get("https://api.test/lifi/quote")
+    _hooked_session().get("https://other.test/x")
+
+    assert {name: _dependency_count(name) - n for name, n in before.items()} == {
+        "test-api": 1, "test-lifi": 1, "other.test": 1}
+    assert metrics.DEPENDENCY_ERRORS.value(dependency="test-lifi") - errors == 1
+    assert metrics.RPC_REQUESTS.value(batch="false") == rpc_requests
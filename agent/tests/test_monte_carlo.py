@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from monte_carlo import ReturnSimulator, daily_apy_volatility
+
+
+def _reference(simulator_seed, amounts, apys, sigma, long_run, mean_reversion, correlation, days):
+    """Day-by-day OU recursion (rates floored when they accrue) on the simulator's own draws."""
+    rng = np.random.default_rng(simulator_seed)
+    assets = list(amounts)
+    n_paths = 500
+    common = rng.standard_normal((days, n_paths), dtype=np.float32).astype(float)
+    idio = rng.standard_normal((days, len(assets) * n_paths), dtype=np.float32).astype(float)
+    idio = idio.reshape(days, len(assets), n_paths)
+    x = np.array([[apys[a]] * n_paths for a in assets], dtype=float)
+    target = np.array([long_run[a] for a in assets])[:, None]
+    sig = np.array([sigma[a] for a in assets])[:, None]
+    weights = np.array([amounts[a] for a in assets])
+    total = np.zeros(n_paths)
+    for day in range(days):
+        total += weights @ np.maximum(x, 0.0) / 100 / 365
+        shock = sig * (np.sqrt(correlation) * common[day] + np.sqrt(1 - correlation) * idio[day])
+        x = x + mean_reversion * (target - x) + shock
+    return total
+
+
+def test_closed_form_matches_the_daily_recursion():
+    amounts = {"USDC": 600_000.0, "USDT": 400_000.0}
+    apys = {"USDC": 4.0, "USDT": 0.3}
+    sigma = {"USDC": 0.3, "USDT": 0.3}
+    long_run = {"USDC": 3.5, "USDT": 0.5}
+    simulator = ReturnSimulator(n_paths=500, mean_reversion=0.1, correlation=0.5, percentiles=(50,), seed=7)
+
+    result = simulator.simulate(amounts, apys, sigma, long_run_apys=long_run, horizons_days=(60,))
+    expected = _reference(7, amounts, apys, sigma, long_run, 0.1, 0.5, 60)
+
+    assert result["60d"]["mean"] == pytest.approx(expected.mean(), rel=1e-4)
+    assert result["60d"]["p50"] == pytest.approx(np.percentile(expected, 50), rel=1e-4)
+
+
+def test_zero_volatility_is_deterministic():
+    simulator = ReturnSimulator(n_paths=100, mean_reversion=0.0, seed=1)
+    result = simulator.simulate({"USDC": 36_500.0}, {"USDC": 10.0}, {"USDC": 0.0}, one_time_cost_usd=2.0)
+
+    assert result["30d"]["mean"] == pytest.approx(30 * 10.0 - 2.0)
+    assert result["30d"]["std"] == pytest.approx(0.0, abs=1e-6)
+    assert result["30d"]["prob_loss"] == 0.0
+
+
+def test_no_allocation_only_costs():
+    result = ReturnSimulator().simulate({}, {}, {}, one_time_cost_usd=3.0)
+
+    assert result["paths"] == 0
+    assert result["90d"]["p50"] == -3.0 and result["90d"]["prob_loss"] == 1.0
+
+
+def test_daily_volatility_normalizes_uneven_spacing():
+    history = [{"apy": 4.0 + (i % 2), "unix_timestamp": i * 4 * 86400} for i in range(11)]
+
+    assert daily_apy_volatility(history) == pytest.approx(0.5)
+    assert daily_apy_volatility(history[:2]) is None
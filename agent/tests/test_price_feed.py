@@ -0,0 +1,135 @@
+import pytest
+import requests
+
+import price_feed
+from price_feed import EthPriceFeed
+from rpc_batch import BatchRpcClient
+
+NOW = 1_700_000_000.0
+
+
+def _word(value, signed=False):
+    return value.to_bytes(32, "big", signed=signed).hex()
+
+
+def _round_data(answer, updated_at, round_id=7):
+    # (roundId, answer, startedAt, updatedAt, answeredInRound)
+    return "0x" + _word(round_id) + _word(answer, signed=True) + _word(updated_at) + _word(updated_at) + _word(round_id)
+
+
+class StubSession:
+    """Serves the aggregator's eth_call batch (post) and CoinGecko (get)."""
+
+    def __init__(self, round_data=None, decimals=8, coingecko=None):
+        self.round_data = round_data
+        self.decimals = decimals
+        self.coingecko = coingecko
+        self.posts, self.gets = [], []
+
+    def post(self, url, json=None, timeout=None):
+        self.posts.append(json)
+        if self.round_data is None:
+            raise requests.ConnectionError("rpc down")
+        by_selector = {EthPriceFeed.LATEST_ROUND_DATA_SELECTOR: self.round_data,
+                       EthPriceFeed.DECIMALS_SELECTOR: hex(self.decimals)}
+        return _Response([{"id": r["id"], "result": by_selector[r["params"][0]["data"]]} for r in json])
+
+    def get(self, url, params=None, timeout=None):
+        self.gets.append((url, params))
+        if self.coingecko is None:
+            raise requests.ConnectionError("coingecko down")
+        return _Response(self.coingecko)
+
+
+class _Response:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [NOW]
+    monkeypatch.setattr(price_feed.time, "time", lambda: now[0])
+    return now
+
+
+def _feed(session, **kwargs):
+    return EthPriceFeed(BatchRpcClient("http://rpc", session=session), session=session, **kwargs)
+
+
+def test_chainlink_round_data_is_decoded(clock):
+    session = StubSession(round_data=_round_data(251_234_000_000, int(NOW) - 300))
+
+    reading = _feed(session).get_price()
+
+    assert reading["price"] == pytest.approx(2512.34)
+    assert reading["source"] == "chainlink"
+    assert reading["age_seconds"] == 300
+    assert reading["stale"] is False
+    # latestRoundData and decimals in one batch, no CoinGecko call
+    assert len(session.posts) == 1 and len(session.posts[0]) == 2
+    assert session.gets == []
+
+
+@pytest.mark.parametrize("round_data", [
+    None,  # RPC unreachable
+    _round_data(-1, int(NOW)),  # non-positive answer
+    "0x" + _word(1) * 3,  # short return data
+])
+def test_falls_back_to_coingecko(clock, round_data):
+    session = StubSession(round_data=round_data,
+                          coingecko={"ethereum": {"usd": 2400.5, "last_updated_at": int(NOW) - 60}})
+
+    reading = _feed(session).get_price()
+
+    assert (reading["price"], reading["source"], reading["age_seconds"]) == (2400.5, "coingecko", 60)
+    assert session.gets[0][1]["ids"] == "ethereum"
+
+
+def test_source_order_is_respected(clock):
+    session = StubSession(round_data=_round_data(200_000_000_000, int(NOW)),
+                          coingecko={"ethereum": {"usd": 2100.0}})
+
+    reading = _feed(session, sources=["coingecko", "chainlink"]).get_price()
+
+    assert (reading["price"], reading["source"], reading["updated_at"]) == (2100.0, "coingecko", NOW)
+    assert session.posts == []
+
+
+def test_readings_are_cached_and_flagged_stale_after_ttl(clock):
+    session = StubSession(round_data=_round_data(200_000_000_000, int(NOW)))
+    feed = _feed(session, ttl=1800)
+    feed.get_price()
+
+    clock[0] += 1801
+    reading = feed.get_price()
+
+    assert len(session.posts) == 1  # get_price never refetches once a reading exists
+    assert reading["stale"] is True
+    assert reading["age_seconds"] == 1801
+
+
+def test_failed_refresh_keeps_the_previous_reading(clock):
+    session = StubSession(round_data=_round_data(200_000_000_000, int(NOW)))
+    feed = _feed(session)
+    feed.refresh()
+
+    session.round_data = None
+    assert feed.refresh() is None
+    assert feed.get_price()["price"] == 2000.0
+
+
+def test_no_reading_when_every_source_fails(clock):
+    assert _feed(StubSession()).get_price() is None
+    assert _feed(StubSession(coingecko={"ethereum": {}}), sources=["coingecko"]).get_price() is None
+
+
+def test_unknown_source_is_rejected():
+    with pytest.raises(ValueError, match="pyth"):
+        _feed(StubSession(), sources=["chainlink", "pyth"])
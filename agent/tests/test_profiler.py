@@ -0,0 +1,109 @@
+import json
+import os
+import signal
+import time
+
+import pytest
+
+import main
+from profiler import MODE_DETERMINISTIC, MODE_SAMPLING, AnalysisProfiler, MemoryProfiler
+
+
+def _work(seconds=0.05):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(200))
+    return total
+
+
+def test_deterministic_profile_round_trip(tmp_path):
+    profiler = AnalysisProfiler(output_dir=str(tmp_path))
+    profiler.arm(1, MODE_DETERMINISTIC)
+
+    with profiler.profile_analysis():
+        _work()
+
+    result = profiler.last_result
+    assert result["mode"] == MODE_DETERMINISTIC
+    assert result["analyses"] == 1
+    assert "_work" in result["report"]
+    assert sorted(os.path.splitext(f)[1] for f in result["files"]) == [".prof", ".txt"]
+    assert profiler.status()["armed"] is None
+
+
+def test_sampling_profile_aggregates_armed_analyses():
+    profiler = AnalysisProfiler()
+    profiler.arm(2, MODE_SAMPLING, interval_ms=1.0)
+
+    with profiler.profile_analysis():
+        _work()
+    assert profiler.last_result is None
+    assert profiler.status()["analyses_profiled"] == 1
+
+    with profiler.profile_analysis():
+        _work()
+    result = profiler.last_result
+    assert result["mode"] == MODE_SAMPLING
+    assert result["analyses"] == 2
+    assert result["samples"] > 0
+    assert "_work" in result["folded"]
+
+
+def test_unarmed_and_cancelled_analyses_are_not_profiled():
+    profiler = AnalysisProfiler()
+    with profiler.profile_analysis():
+        _work(0.01)
+    assert profiler.last_result is None
+
+    profiler.arm(1, MODE_DETERMINISTIC)
+    profiler.cancel()
+    with profiler.profile_analysis():
+        _work(0.01)
+    assert profiler.last_result is None
+
+
+def test_arm_rejects_bad_arguments():
+    profiler = AnalysisProfiler()
+    with pytest.raises(ValueError):
+        profiler.arm(1, "wallclock")
+    with pytest.raises(ValueError):
+        profiler.arm(0)
+
+
+@pytest.fixture
+def signal_profilers(tmp_path, monkeypatch):
+    profiler, memory = AnalysisProfiler(), MemoryProfiler()
+    monkeypatch.setattr(main, "PROFILER", profiler)
+    monkeypatch.setattr(main, "MEMORY_PROFILER", memory)
+    monkeypatch.setattr(main, "_profiling_requests", {"profile": False, "memory": False, "output_dir": "profiles"})
+    previous = {sig: signal.getsignal(sig) for sig in (signal.SIGUSR1, signal.SIGUSR2)}
+    main.install_profiling_signals(str(tmp_path))
+    yield profiler, memory
+    for sig, handler in previous.items():
+        signal.signal(sig, handler)
+    memory.stop()
+
+
+def test_signals_only_record_requests_until_the_job_runs(signal_profilers, tmp_path, monkeypatch):
+    profiler, memory = signal_profilers
+    monkeypatch.setenv("PROFILE_MODE", MODE_DETERMINISTIC)
+
+    # Delivered while an analysis holds the profiler's lock: the handler must not block on it
+    with profiler._lock:
+        os.kill(os.getpid(), signal.SIGUSR1)
+        os.kill(os.getpid(), signal.SIGUSR2)
+    assert profiler.status()["armed"] is None
+    assert not memory.tracing
+
+    main.handle_profiling_requests()
+    assert profiler.status()["armed"]["mode"] == MODE_DETERMINISTIC
+    assert memory.tracing
+
+    os.kill(os.getpid(), signal.SIGUSR2)
+    main.handle_profiling_requests()
+    snapshots = list(tmp_path.glob("memory-*.json"))
+    assert len(snapshots) == 1
+    snapshot = json.loads(snapshots[0].read_text())
+    assert snapshot["tracing"] is True
+    assert "growth" in snapshot
@@ -0,0 +1,147 @@
+import pytest
+import requests
+
+import quote_service
+from quote_service import LifiQuoteService
+
+ASSETS = {
+    "USDC": {"address": "0x" + "01" * 20, "decimals": 6},
+    "USDT": {"address": "0x" + "02" * 20, "decimals": 6},
+    "DAI": {"address": "0x" + "03" * 20, "decimals": 18},
+}
+OPERATOR, TREASURY = "0x" + "0a" * 20, "0x" + "0b" * 20
+
+
+class QuoteSession:
+    """Stub LI.FI /quote: cost of cost_bps(notional) plus a fixed gas cost."""
+
+    def __init__(self, cost_bps=lambda usd: 10.0, gas_usd=0.05, failing=()):
+        self.cost_bps = cost_bps
+        self.gas_usd = gas_usd
+        self.failing = set(failing)
+        self.requests = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requests.append(params)
+        by_address = {a["address"]: (symbol, a["decimals"]) for symbol, a in ASSETS.items()}
+        (from_symbol, from_decimals), (to_symbol, to_decimals) = by_address[params["fromToken"]], by_address[params["toToken"]]
+        if (from_symbol, to_symbol) in self.failing:
+            raise requests.HTTPError("429 Too Many Requests")
+        usd = int(params["fromAmount"]) / 10 ** from_decimals
+        out_usd = usd * (1 - self.cost_bps(usd) / 10_000)
+        return _Response({
+            "tool": "stand-in-dex",
+            "estimate": {
+                "fromAmountUSD": str(usd),
+                "toAmountUSD": str(out_usd),
+                "toAmount": str(round(out_usd * 10 ** to_decimals)),
+                "toAmountMin": str(round(out_usd * 0.97 * 10 ** to_decimals)),
+                "feeCosts": [{"amountUSD": "0.01"}],
+                "gasCosts": [{"amountUSD": str(self.gas_usd)}],
+                "executionDuration": 30,
+            },
+        })
+
+
+class _Response:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(quote_service.time, "time", lambda: now[0])
+    return now
+
+
+def _service(session, **kwargs):
+    return LifiQuoteService(ASSETS, OPERATOR, TREASURY, session=session, **kwargs)
+
+
+def test_refresh_quotes_every_ordered_pair_at_every_size(clock):
+    session = QuoteSession(failing={("DAI", "USDT")})
+    service = _service(session, notional_sizes_usd=(1_000, 100))
+
+    assert service.refresh() == 10  # 6 ordered pairs x 2 sizes, minus DAI->USDT's two
+
+    assert len(session.requests) == 12
+    assert {(r["fromAmount"], r["toAddress"]) for r in session.requests if r["fromToken"] == ASSETS["DAI"]["address"]} \
+        == {(str(100 * 10**18), TREASURY), (str(1_000 * 10**18), TREASURY)}
+    summary = service.summary()
+    assert set(summary) == {"USDC->USDT", "USDC->DAI", "USDT->USDC", "USDT->DAI", "DAI->USDC"}
+    assert summary["USDC->DAI"]["1000"]["cost_bps"] == pytest.approx(10.0)
+    assert summary["USDC->DAI"]["1000"]["stale"] is False
+
+
+def test_estimate_cost_interpolates_between_quoted_sizes(clock):
+    # 30 bps at $100, 10 bps at $1,000, 5 bps at $10,000
+    session = QuoteSession(cost_bps=lambda usd: {100: 30.0, 1_000: 10.0, 10_000: 5.0}[round(usd)], gas_usd=0.05)
+    service = _service(session, notional_sizes_usd=(100, 1_000, 10_000))
+    service.refresh()
+
+    estimate = service.estimate_cost("USDC", "USDT", 550)
+
+    assert estimate["cost_bps"] == pytest.approx(20.0, abs=1e-6)
+    assert estimate["cost_usd"] == pytest.approx(550 * 20.0 / 10_000 + 0.05, abs=1e-6)
+    assert estimate["quoted_sizes_usd"] == [100, 1_000]
+    assert service.estimate_cost("USDC", "USDT", 3_250)["cost_bps"] == pytest.approx(8.75, abs=1e-6)
+    assert service.estimate_cost("USDC", "USDT", 1_000)["cost_bps"] == pytest.approx(10.0, abs=1e-6)
+
+
+def test_estimate_cost_clamps_outside_the_quoted_range(clock):
+    session = QuoteSession(cost_bps=lambda usd: {100: 30.0, 1_000: 10.0}[round(usd)])
+    service = _service(session, notional_sizes_usd=(100, 1_000))
+    service.refresh()
+
+    small = service.estimate_cost("USDC", "DAI", 10)
+    large = service.estimate_cost("USDC", "DAI", 50_000)
+
+    assert (small["cost_bps"], small["quoted_sizes_usd"]) == (pytest.approx(30.0, abs=1e-6), [100])
+    assert (large["cost_bps"], large["quoted_sizes_usd"]) == (pytest.approx(10.0, abs=1e-6), [1_000])
+    assert service.estimate_cost("USDT", "USDC", 100) is not None
+    assert _service(QuoteSession()).estimate_cost("USDC", "USDT", 100) is None
+
+
+def test_execution_quote_matches_the_full_swap(clock):
+    session = QuoteSession()
+    service = _service(session, ttl=120)
+    legs = [("USDC", "USDT", 1_234_567), ("DAI", "USDC", 5 * 10**18)]
+
+    assert service.prefetch(legs) == 2
+    fetched = len(session.requests)
+
+    quote = service.quote_for_execution("USDC", "USDT", 1_234_567)
+    assert quote["from_amount"] == 1_234_567
+    assert quote["quote"]["tool"] == "stand-in-dex"
+    assert len(session.requests) == fetched  # pre-fetched quote reused
+
+    # A different amount or recipient is not the same swap: quoted afresh
+    service.quote_for_execution("USDC", "USDT", 1_234_568)
+    service.quote_for_execution("USDC", "USDT", 1_234_567, to_address=OPERATOR)
+    assert [(r["fromAmount"], r["toAddress"]) for r in session.requests[fetched:]] == [
+        ("1234568", TREASURY), ("1234567", OPERATOR)]
+
+
+def test_expired_execution_quotes_are_refetched(clock):
+    session = QuoteSession()
+    service = _service(session, ttl=120)
+    service.prefetch([("USDC", "USDT", 10**6)])
+
+    clock[0] += 121
+    assert service.prefetch([("USDC", "USDT", 10**6)]) == 1
+    service.quote_for_execution("USDC", "USDT", 10**6)
+    assert len(session.requests) == 2
+
+
+def test_failed_execution_quote_returns_none(clock):
+    service = _service(QuoteSession(failing={("USDC", "USDT")}))
+
+    assert service.quote_for_execution("USDC", "USDT", 10**6) is None
+    assert service.prefetch([("USDC", "USDT", 10**6)]) == 0
@@ -0,0 +1,53 @@
+import pytest
+
+from rebalance_planner import RebalancePlanner
+
+
+def test_swaps_only_the_net_difference():
+    plan = RebalancePlanner().plan({"USDC": 1000.0, "USDT": 0.0}, {"USDC": 50, "USDT": 50})
+
+    assert plan["swaps"] == [{"from": "USDC", "to": "USDT", "amount_usd": 500.0}]
+    assert {d["asset"]: d["amount_usd"] for d in plan["deposits"]} == {"USDC": 500.0, "USDT": 500.0}
+    assert plan["tx_count"] == 3
+
+
+def test_balanced_treasury_needs_no_swaps():
+    plan = RebalancePlanner().plan({"USDC": 500.0, "USDT": 500.0}, {"USDC": 50, "USDT": 50})
+
+    assert plan["swaps"] == []
+    assert len(plan["deposits"]) == 2
+
+
+def test_at_most_n_minus_one_swap_legs():
+    balances = {"USDC": 600.0, "USDT": 300.0, "DAI": 100.0, "USDC.e": 0.0}
+    allocation = {"USDC": 25, "USDT": 25, "DAI": 25, "USDC.e": 25}
+    plan = RebalancePlanner().plan(balances, allocation)
+
+    assert len(plan["swaps"]) <= len(balances) - 1
+    post = dict(balances)
+    for leg in plan["swaps"]:
+        post[leg["from"]] -= leg["amount_usd"]
+        post[leg["to"]] += leg["amount_usd"]
+    assert post == pytest.approx({asset: 250.0 for asset in balances})
+    # Largest swap first
+    amounts = [leg["amount_usd"] for leg in plan["swaps"]]
+    assert amounts == sorted(amounts, reverse=True)
+
+
+def test_drops_legs_that_do_not_pay_for_their_gas():
+    # $1 gas x 20 -> legs under $20 are not worth sending
+    planner = RebalancePlanner(min_leg_usd=1.0, min_leg_gas_multiple=20.0, gas_cost_usd=lambda action, asset: 1.0)
+    plan = planner.plan({"USDC": 1000.0, "USDT": 990.0}, {"USDC": 50, "USDT": 50})
+
+    assert plan["swaps"] == []
+    assert plan["dropped"] == [{"from": "USDC", "to": "USDT", "amount_usd": 5.0, "type": "swap",
+                                "reason": "below minimum leg $20.00"}]
+    # Deposits use what each asset holds after the kept swaps
+    assert {d["asset"]: d["amount_usd"] for d in plan["deposits"]} == {"USDC": 995.0, "USDT": 990.0}
+
+
+def test_drops_small_deposits():
+    plan = RebalancePlanner(min_leg_usd=10.0).plan({"USDC": 1000.0, "DAI": 5.0}, {"USDC": 99.5, "DAI": 0.5})
+
+    assert [d["asset"] for d in plan["deposits"]] == ["USDC"]
+    assert [(d["type"], d.get("asset")) for d in plan["dropped"] if d["type"] == "deposit"] == [("deposit", "DAI")]
@@ -0,0 +1,51 @@
+from receipt_balances import TRANSFER_TOPIC, apply_transfers, decode_transfer_logs
+
+HOLDER = "0x1111111111111111111111111111111111111111"
+ROUTER = "0x2222222222222222222222222222222222222222"
+USDC = "0x833589fcd6edb6e08f4c7c32d4f71b54bda02913"
+USDT = "0xfde4c96c8593536e31f229ea8f37b2ada2699bb2"
+SYMBOLS = {USDC: "USDC", USDT: "USDT"}
+
+
+def _topic(address: str) -> str:
+    return "0x" + "0" * 24 + address[2:]
+
+
+def _transfer(token: str, sender: str, receiver: str, value: int) -> dict:
+    return {
+        "address": token.upper().replace("0X", "0x"),
+        "topics": [TRANSFER_TOPIC, _topic(sender), _topic(receiver)],
+        "data": "0x" + hex(value)[2:].rjust(64, "0"),
+    }
+
+
+def test_decode_skips_non_erc20_transfers():
+    nft = _transfer(USDC, HOLDER, ROUTER, 0)
+    nft["topics"].append(_topic(ROUTER))  # tokenId indexed
+    nft["data"] = "0x"
+    other_event = dict(_transfer(USDC, HOLDER, ROUTER, 5), topics=["0x" + "ab" * 32, _topic(HOLDER), _topic(ROUTER)])
+    receipt = {"logs": [_transfer(USDC, HOLDER, ROUTER, 1_000_000), nft, other_event]}
+
+    assert decode_transfer_logs(receipt) == [{"token": USDC, "from": HOLDER, "to": ROUTER, "value": 1_000_000}]
+    assert decode_transfer_logs({"logs": None}) == []
+
+
+def test_apply_transfers_nets_swap_legs():
+    receipt = {"logs": [
+        _transfer(USDC, HOLDER, ROUTER, 500_000_000),
+        _transfer(USDT, ROUTER, HOLDER, 499_100_000),
+        _transfer(USDT, ROUTER, "0x3333333333333333333333333333333333333333", 900_000),  # fee, not ours
+        _transfer("0x4444444444444444444444444444444444444444", ROUTER, HOLDER, 7),  # untracked token
+    ]}
+    before = {"USDC": 1_000_000_000, "USDT": 0}
+
+    after = apply_transfers(before, receipt, HOLDER.upper().replace("0X", "0x"), SYMBOLS)
+
+    assert after == {"USDC": 500_000_000, "USDT": 499_100_000}
+    assert before == {"USDC": 1_000_000_000, "USDT": 0}
+
+
+def test_negative_balances_are_clamped():
+    receipt = {"logs": [_transfer(USDC, HOLDER, ROUTER, 10)]}
+
+    assert apply_transfers({"USDC": 5}, receipt, HOLDER, SYMBOLS) == {"USDC": 0}
@@ -0,0 +1,183 @@
+import pytest
+
+import reserve_watcher
+from reserve_watcher import DEPOSIT_TOPIC, RAY, RESERVE_DATA_UPDATED_TOPIC, ReserveWatcher
+from rpc_batch import RpcBatchError
+
+POOL = "0xA238Dd80C259a72e81d7e4664a9801593F98d1c5"
+USDC = "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913"
+USDT = "0xfde4C96c8593536E31F229EA8f37b2ADa2699bb2"
+VAULT = "0x" + "0a" * 20
+
+
+def _watcher(**kwargs):
+    return ReserveWatcher(None, POOL, {"USDC": USDC}, on_trigger=lambda trigger: None,
+                          vault_address=POOL, rate_threshold=0.25, min_deposit=100, **kwargs)
+
+
+def test_rate_move_is_measured_from_the_last_analysis():
+    watcher = _watcher()
+    watcher.baseline = {"USDC": 4.0}
+    watcher.latest = {"USDC": 4.3}
+    assert [r["type"] for r in watcher._evaluate(1)] == ["rate_move"]
+
+    # An analysis outside the watcher (e.g. POST /analyze) saw 4.3%
+    watcher.mark_analyzed({"USDC": 4.3})
+
+    assert watcher._evaluate(2) == []
+    watcher.latest = {"USDC": 4.6}
+    assert watcher._evaluate(3)[0]["from_apy"] == 4.3
+
+
+def test_failed_reads_keep_the_baseline_and_deposits_are_cleared():
+    watcher = _watcher()
+    watcher.baseline = {"USDC": 4.0}
+    watcher._pending_deposits = 500.0
+
+    watcher.mark_analyzed({"USDC": 0.0})
+
+    assert watcher.baseline == {"USDC": 4.0}
+    assert watcher._evaluate(1) == []
+
+
+class StubRpc:
+    """Chain head plus eth_getLogs results for the pool and vault filters."""
+
+    def __init__(self, head):
+        self.head = head
+        self.pool_logs, self.vault_logs = [], []
+        self.log_error = None
+        self.filters = []
+
+    def call(self, method, params):
+        assert method == "eth_blockNumber"
+        return hex(self.head)
+
+    def batch(self, calls):
+        replies = []
+        for method, (log_filter,) in calls:
+            assert method == "eth_getLogs"
+            self.filters.append(log_filter)
+            if self.log_error:
+                replies.append({"error": self.log_error})
+            else:
+                replies.append({"result": self.pool_logs if log_filter["address"] == POOL else self.vault_logs})
+        return replies
+
+
+def _word(value):
+    return f"{value:064x}"
+
+
+def _reserve_update(reserve, apy_pct):
+    liquidity_rate = int(apy_pct * RAY) // 100
+    return {"topics": [RESERVE_DATA_UPDATED_TOPIC, "0x" + "0" * 24 + reserve.lower()[2:]],
+            "data": "0x" + _word(liquidity_rate) + _word(0) * 4}
+
+
+def _deposit(assets_raw):
+    return {"topics": [DEPOSIT_TOPIC, "0x" + "0" * 64, "0x" + "0" * 64], "data": "0x" + _word(assets_raw) + _word(assets_raw)}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(reserve_watcher.time, "time", lambda: now[0])
+    return now
+
+
+def _polling_watcher(rpc, triggers, **kwargs):
+    watcher = ReserveWatcher(rpc, POOL, {"USDC": USDC, "USDT": USDT}, on_trigger=triggers.append,
+                             vault_address=VAULT, rate_threshold=0.25, min_deposit=100, cooldown=60,
+                             confirmations=2, **kwargs)
+    watcher.baseline = {"USDC": 4.0, "USDT": 5.0}
+    return watcher
+
+
+def test_first_poll_starts_at_the_confirmed_head(clock):
+    rpc = StubRpc(head=1_000)
+    watcher = _polling_watcher(rpc, [])
+
+    assert watcher.poll_once() is None
+    assert watcher.last_block == 998
+    assert rpc.filters == []
+
+
+def test_reserve_updates_and_deposits_are_decoded(clock):
+    rpc, triggers = StubRpc(head=1_000), []
+    watcher = _polling_watcher(rpc, triggers)
+    watcher.poll_once()
+
+    rpc.head = 1_010
+    rpc.pool_logs = [_reserve_update(USDC, 4.1), _reserve_update(USDT, 5.5),
+                     _reserve_update("0x" + "11" * 20, 99.0)]  # reserve we don't follow
+    rpc.vault_logs = [_deposit(60 * 10**6), _deposit(45 * 10**6)]
+    trigger = watcher.poll_once()
+
+    pool_filter, vault_filter = rpc.filters
+    assert (pool_filter["fromBlock"], pool_filter["toBlock"]) == (hex(999), hex(1_008))
+    assert pool_filter["topics"][0] == RESERVE_DATA_UPDATED_TOPIC
+    assert vault_filter["topics"] == [DEPOSIT_TOPIC]
+    assert watcher.latest == {"USDC": pytest.approx(4.1), "USDT": pytest.approx(5.5)}
+    # USDC moved 0.1pp (below threshold); USDT 0.5pp; 105 deposited
+    assert [(r["type"], r.get("asset"), r.get("amount")) for r in trigger["reasons"]] == [
+        ("rate_move", "USDT", None), ("deposit", None, pytest.approx(105.0))]
+    assert triggers == [trigger]
+    assert watcher.baseline["USDT"] == pytest.approx(5.5)
+    assert watcher.status()["pending_deposits"] == 0
+    assert (watcher.stats["blocks"], watcher.stats["reserve_updates"], watcher.stats["deposits"]) == (10, 2, 2)
+
+
+def test_block_range_is_capped_per_poll(clock):
+    rpc = StubRpc(head=1_000)
+    watcher = _polling_watcher(rpc, [], max_block_range=100)
+    watcher.poll_once()
+
+    rpc.head = 1_250
+    watcher.poll_once()
+    watcher.poll_once()
+    watcher.poll_once()
+
+    ranges = [(int(f["fromBlock"], 16), int(f["toBlock"], 16)) for f in rpc.filters[::2]]
+    assert ranges == [(999, 1_098), (1_099, 1_198), (1_199, 1_248)]
+    assert watcher.last_block == 1_248
+
+
+def test_log_errors_do_not_advance_the_cursor(clock):
+    rpc = StubRpc(head=1_000)
+    watcher = _polling_watcher(rpc, [])
+    watcher.poll_once()
+
+    rpc.head = 1_010
+    rpc.log_error = {"code": -32005, "message": "query returned more than 10000 results"}
+    with pytest.raises(RpcBatchError):
+        watcher.poll_once()
+    assert watcher.last_block == 998
+
+    rpc.log_error = None
+    rpc.pool_logs = [_reserve_update(USDC, 4.5)]
+    assert watcher.poll_once() is not None
+    assert int(rpc.filters[-1]["fromBlock"], 16) == 999
+
+
+def test_conditions_within_the_cooldown_are_held_back_then_fired(clock):
+    rpc, triggers = StubRpc(head=1_000), []
+    watcher = _polling_watcher(rpc, triggers)
+    watcher.poll_once()
+    rpc.head, rpc.pool_logs = 1_002, [_reserve_update(USDC, 4.5)]
+    watcher.poll_once()
+    assert len(triggers) == 1
+
+    # Another move 10s later is held back, not dropped
+    clock[0] += 10
+    rpc.head, rpc.pool_logs = 1_004, [_reserve_update(USDC, 5.0)]
+    assert watcher.poll_once() is None
+    assert watcher.stats["held_back"] == 1
+
+    # Re-checked without new logs once the cooldown has passed
+    clock[0] += 51
+    rpc.head, rpc.pool_logs = 1_005, []
+    trigger = watcher.poll_once()
+    assert trigger["reasons"][0]["from_apy"] == pytest.approx(4.5)
+    assert trigger["reasons"][0]["to_apy"] == pytest.approx(5.0)
+    assert len(triggers) == 2
@@ -0,0 +1,122 @@
+import pytest
+import requests
+
+from rpc_batch import BatchRpcClient, RpcBatchError
+
+
+class StubResponse:
+    def __init__(self, body, status_code=200):
+        self.body, self.status_code = body, status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+    def json(self):
+        return self.body
+
+
+class StubSession:
+    """Answers each batch with reply(payload); records every payload posted."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.payloads = []
+
+    def post(self, url, json=None, timeout=None):
+        self.payloads.append(json)
+        return self.reply(json)
+
+
+def _echo(payload):
+    # Replies in reverse order, as some providers do
+    return StubResponse([{"jsonrpc": "2.0", "id": r["id"], "result": r["params"][0]} for r in reversed(payload)])
+
+
+def test_replies_are_matched_to_calls_by_id():
+    client = BatchRpcClient("http://rpc", session=StubSession(_echo))
+
+    replies = client.batch([("eth_call", ["a"]), ("eth_call", ["b"]), ("eth_call", ["c"])])
+
+    assert [r["result"] for r in replies] == ["a", "b", "c"]
+
+
+def test_large_batches_are_chunked_with_unique_ids():
+    session = StubSession(_echo)
+    client = BatchRpcClient("http://rpc", session=session, max_batch_size=2)
+
+    replies = client.batch([("eth_call", [i]) for i in range(5)])
+
+    assert [r["result"] for r in replies] == [0, 1, 2, 3, 4]
+    assert [len(p) for p in session.payloads] == [2, 2, 1]
+    ids = [r["id"] for p in session.payloads for r in p]
+    assert len(set(ids)) == 5
+
+
+def test_per_call_errors_and_missing_replies_stay_in_place():
+    def reply(payload):
+        first, second, _ = payload
+        return StubResponse([
+            {"id": second["id"], "error": {"code": 3, "message": "execution reverted", "data": "0x08c379a0"}},
+            {"id": first["id"], "result": "0x1"},
+        ])
+    client = BatchRpcClient("http://rpc", session=StubSession(reply))
+
+    replies = client.batch([("eth_call", []), ("eth_call", []), ("eth_call", [])])
+
+    assert replies[0] == {"id": replies[0]["id"], "result": "0x1"}
+    assert replies[1]["error"]["data"] == "0x08c379a0"
+    assert replies[2] == {"error": {"code": -32603, "message": "missing response"}}
+
+
+def test_bare_object_reply_to_single_call_batch():
+    client = BatchRpcClient("http://rpc", session=StubSession(
+        lambda payload: StubResponse({"id": payload[0]["id"], "result": "0x2a"})))
+
+    assert client.call("eth_blockNumber", []) == "0x2a"
+
+
+@pytest.mark.parametrize("reply", [
+    lambda payload: StubResponse({"error": "rate limited"}, status_code=429),
+    lambda payload: StubResponse("not json-rpc"),
+])
+def test_whole_batch_failures_raise(reply):
+    client = BatchRpcClient("http://rpc", session=StubSession(reply))
+
+    with pytest.raises(RpcBatchError):
+        client.batch([("eth_blockNumber", [])])
+
+
+def test_transport_errors_raise():
+    def reply(payload):
+        raise requests.ConnectionError("connection refused")
+    client = BatchRpcClient("http://rpc", session=StubSession(reply))
+
+    with pytest.raises(RpcBatchError, match="connection refused"):
+        client.batch([("eth_blockNumber", [])])
+
+
+def test_call_raises_on_per_call_error():
+    client = BatchRpcClient("http://rpc", session=StubSession(
+        lambda payload: StubResponse([{"id": payload[0]["id"], "error": {"code": -32000, "message": "header not found"}}])))
+
+    with pytest.raises(RpcBatchError, match="header not found"):
+        client.call("eth_getBlockByNumber", ["0x1", False])
+
+
+def test_get_receipts_maps_errors_to_none():
+    def reply(payload):
+        return StubResponse([
+            {"id": payload[0]["id"], "result": {"status": "0x1"}},
+            {"id": payload[1]["id"], "result": None},
+            {"id": payload[2]["id"], "error": {"code": -32000, "message": "unknown"}},
+        ])
+    session = StubSession(reply)
+    client = BatchRpcClient("http://rpc", session=session)
+
+    receipts = client.get_receipts(["0xa", "0xb", "0xc"])
+
+    assert receipts == {"0xa": {"status": "0x1"}, "0xb": None, "0xc": None}
+    assert len(session.payloads) == 1
+    assert client.get_receipts([]) == {}
+    assert len(session.payloads) == 1
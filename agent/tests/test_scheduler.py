@@ -0,0 +1,106 @@
+import pytest
+
+from scheduler import MISFIRE_SKIP, Scheduler
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _scheduler():
+    clock = FakeClock()
+    return Scheduler(clock=clock, seed=0), clock
+
+
+def test_runs_on_a_fixed_grid():
+    scheduler, clock = _scheduler()
+    runs = []
+    scheduler.add_job("tick", lambda: runs.append(clock.now), 10, jitter=0)
+
+    assert scheduler.run_pending() == 10
+    clock.now += 12  # a little late, within the grace period
+    assert scheduler.run_pending() == pytest.approx(8)
+    assert runs == [1_000.0, 1_012.0]
+
+
+def test_failures_back_off_exponentially_up_to_the_cap():
+    scheduler, clock = _scheduler()
+
+    def fail():
+        raise RuntimeError("rpc down")
+
+    job = scheduler.add_job("flaky", fail, 10, jitter=0)
+    delays = []
+    for _ in range(5):
+        delays.append(scheduler.run_pending())
+        clock.now = job.next_run
+
+    assert delays == [10, 20, 40, 80, 80]
+    assert job.consecutive_failures == 5 and job.last_error == "RuntimeError: rpc down"
+
+
+def test_success_resets_backoff():
+    scheduler, clock = _scheduler()
+    outcomes = [RuntimeError("boom"), RuntimeError("boom"), None, None]
+
+    def run():
+        outcome = outcomes.pop(0)
+        if outcome:
+            raise outcome
+
+    job = scheduler.add_job("recovering", run, 10, jitter=0)
+    for _ in range(3):
+        scheduler.run_pending()
+        clock.now = job.next_run
+    assert scheduler.run_pending() == 10
+    assert job.consecutive_failures == 0 and job.failures == 2
+
+
+def test_missed_runs_are_coalesced():
+    scheduler, clock = _scheduler()
+    runs = []
+    job = scheduler.add_job("tick", lambda: runs.append(clock.now), 10, jitter=0)
+    scheduler.run_pending()
+
+    clock.now += 55  # slot at +10 is 45s late: it and the next four are missed
+    assert scheduler.run_pending() == 10
+    assert runs == [1_000.0, 1_055.0]
+    assert job.missed == 5
+
+
+def test_missed_runs_are_skipped():
+    scheduler, clock = _scheduler()
+    runs = []
+    job = scheduler.add_job("compact", lambda: runs.append(clock.now), 10, jitter=0, misfire=MISFIRE_SKIP)
+    scheduler.run_pending()
+
+    clock.now += 55
+    assert scheduler.run_pending() == pytest.approx(5)  # next slot on the grid, at +60
+    assert runs == [1_000.0]
+    assert job.missed == 5
+
+
+def test_jitter_stays_within_bounds():
+    scheduler, clock = _scheduler()
+    job = scheduler.add_job("jittered", lambda: None, 100, jitter=0.1)
+    for _ in range(50):
+        scheduler.run_pending()
+        assert 90 <= job.next_run - clock.now <= 110
+        clock.now = job.next_run
+
+
+def test_run_now_and_duplicate_names():
+    scheduler, clock = _scheduler()
+    runs = []
+    scheduler.add_job("decision", lambda: runs.append(clock.now), 300, jitter=0, start_delay=300)
+    assert scheduler.run_pending() == 300
+
+    scheduler.run_now("decision")
+    scheduler.run_pending()
+    assert runs == [1_000.0]
+    with pytest.raises(ValueError):
+        scheduler.add_job("decision", lambda: None, 10)
@@ -0,0 +1,112 @@
+import json
+
+import pytest
+
+import supply_scheduler
+from supply_scheduler import SupplyScheduler
+
+NOW = 1_700_000_000.0
+HOUR = 3600
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [NOW]
+    monkeypatch.setattr(supply_scheduler.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def scheduler(tmp_path, clock):
+    return SupplyScheduler(storage_file=str(tmp_path / "state.json"), max_breakeven_days=3.0, min_supply_usd=1.0)
+
+
+def _observe(scheduler, clock, idle_by_hour):
+    for idle in idle_by_hour:
+        scheduler.observe(idle)
+        clock[0] += HOUR
+    clock[0] -= HOUR
+
+
+def test_breakeven_gate(scheduler):
+    # $0.10 gas at 3.65% APY: yield repays it within 3 days from 0.10 * 365 * 100 / (3.65 * 3) = $333.33
+    below = scheduler.evaluate(amount_usd=300, apy_pct=3.65, gas_cost_usd=0.10)
+    above = scheduler.evaluate(amount_usd=400, apy_pct=3.65, gas_cost_usd=0.10)
+
+    assert below["should_supply"] is False
+    assert below["needed_usd"] == pytest.approx(333.33, abs=0.01)
+    assert below["breakeven_days"] == pytest.approx(0.10 / (300 * 0.0365 / 365))
+    assert above["should_supply"] is True
+    assert above["breakeven_days"] == pytest.approx(2.5)
+    assert above["reason"].startswith("break-even 2.50d")
+
+
+def test_min_supply_floor_applies_when_gas_is_negligible(scheduler):
+    evaluation = scheduler.evaluate(amount_usd=0.5, apy_pct=5.0, gas_cost_usd=0.0001)
+
+    assert evaluation["needed_usd"] == 1.0
+    assert evaluation["should_supply"] is False
+
+
+def test_zero_apy_never_supplies(scheduler):
+    evaluation = scheduler.evaluate(amount_usd=1_000_000, apy_pct=0.0, gas_cost_usd=0.01)
+
+    assert evaluation["should_supply"] is False
+    assert "never breaks even" in evaluation["reason"]
+
+
+def test_inflow_rate_counts_only_increases(scheduler, clock):
+    # +100, +50, then a supply drops idle to 0, then +30 over four 6-hour steps (one day)
+    for idle in (100, 200, 250, 0, 30):
+        scheduler.observe(idle)
+        clock[0] += 6 * HOUR
+
+    assert scheduler.inflow_rate_per_day() == pytest.approx(180.0)
+
+
+def test_inflow_rate_ignores_samples_outside_the_window(tmp_path, clock):
+    scheduler = SupplyScheduler(storage_file=str(tmp_path / "state.json"), inflow_window_hours=24)
+    scheduler.observe(0)
+    clock[0] += 48 * HOUR
+    _observe(scheduler, clock, [1000, 1012, 1024])  # $12/hour over the last two hours
+
+    assert scheduler.inflow_rate_per_day() == pytest.approx(12 * 24)
+
+
+def test_inflow_rate_needs_two_samples(scheduler):
+    assert scheduler.inflow_rate_per_day() == 0.0
+    scheduler.observe(100)
+    assert scheduler.inflow_rate_per_day() == 0.0
+
+
+def test_eta_to_threshold_uses_the_inflow_rate(scheduler, clock):
+    _observe(scheduler, clock, [100, 110, 120])  # $240/day
+
+    evaluation = scheduler.evaluate(amount_usd=120, apy_pct=3.65, gas_cost_usd=0.10)
+
+    assert evaluation["should_supply"] is False
+    assert evaluation["inflow_usd_per_day"] == pytest.approx(240)
+    assert evaluation["eta_days"] == pytest.approx((333.33 - 120) / 240, abs=1e-4)
+
+
+def test_state_persists_across_restarts(scheduler, clock, tmp_path):
+    _observe(scheduler, clock, [100, 150])
+    scheduler.record_supply(150, tx_hash="0xabc")
+
+    stored = json.loads((tmp_path / "state.json").read_text())
+    assert stored["samples"] == [[NOW, 100], [NOW + HOUR, 150]]
+    assert stored["last_supply"] == {"at": NOW + HOUR, "amount_usd": 150, "tx_hash": "0xabc"}
+
+    restarted = SupplyScheduler(storage_file=str(tmp_path / "state.json"))
+    assert restarted.inflow_rate_per_day() == pytest.approx(50 * 24)
+    assert restarted.evaluate(10, 5.0, 1.0)["last_supply"]["tx_hash"] == "0xabc"
+
+
+def test_corrupt_state_file_starts_empty(tmp_path, clock):
+    path = tmp_path / "state.json"
+    path.write_text("{not json")
+
+    scheduler = SupplyScheduler(storage_file=str(path))
+
+    assert scheduler.inflow_rate_per_day() == 0.0
+    assert scheduler.evaluate(10, 5.0, 1.0)["last_supply"] is None
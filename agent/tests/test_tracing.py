@@ -0,0 +1,60 @@
+import requests
+from requests.adapters import BaseAdapter
+
+import tracing
+
+
+class RecordingExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+class OkAdapter(BaseAdapter):
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code, response._content = 200, b"{}"
+        response.request, response.url = request, request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def _traced_session(monkeypatch, dependencies):
+    exporter = RecordingExporter()
+    monkeypatch.setattr(tracing, "TRACER", tracing.Tracer([exporter]))
+    session = requests.Session()
+    session.mount("https://", OkAdapter())
+    tracing.install_session_hooks(session, dependencies)
+    return session, exporter
+
+
+def _http_spans(exporter):
+    tracing.TRACER.flush()
+    return [s for s in exporter.spans if "http.host" in s.attributes]
+
+
+def test_http_spans_never_record_the_endpoint_url(monkeypatch):
+    rpc_url = "https://base-mainnet.example.com/v2/SECRET_KEY"
+    session, exporter = _traced_session(monkeypatch, {rpc_url: "rpc", "https://yields.llama.fi": "defillama"})
+
+    with tracing.start_span("analysis"):
+        session.post(rpc_url, json={"jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber"})
+        session.get("https://yields.llama.fi/chart/pool-id?apiKey=SECRET_KEY")
+        session.get("https://other.example.com/SECRET_KEY/path")
+
+    spans = _http_spans(exporter)
+    assert [s.name for s in spans] == ["rpc POST", "defillama GET", "other.example.com GET"]
+    assert [s.attributes.get("http.route") for s in spans] == ["/", "/chart/pool-id", None]
+    assert spans[0].attributes["rpc.methods"] == ["eth_blockNumber"]
+    assert "SECRET_KEY" not in repr([s.attributes for s in spans])
+
+
+def test_tracing_is_off_without_an_exporter(monkeypatch):
+    monkeypatch.delenv("TRACE_EXPORTERS", raising=False)
+    monkeypatch.delenv("OTEL_EXPORTER_OTLP_ENDPOINT", raising=False)
+
+    assert not tracing.Tracer.from_env().enabled
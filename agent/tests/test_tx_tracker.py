@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+from rpc_batch import BatchRpcClient
+from tx_tracker import PendingTransactionTracker
+
+TX_A = "0x" + "aa" * 32
+TX_B = "0x" + "bb" * 32
+TX_C = "0x" + "cc" * 32
+
+
+class ReceiptSession:
+    """Stub session answering eth_getTransactionReceipt batches from a hash -> receipt dict."""
+
+    def __init__(self):
+        self.receipts = {}
+        self.batches = []
+        self.fail = False
+
+    def post(self, url, json=None, timeout=None):
+        if self.fail:
+            raise requests.ConnectionError("rpc down")
+        self.batches.append([r["params"][0] for r in json])
+        return _Response([{"id": r["id"], "result": self.receipts.get(r["params"][0])} for r in json])
+
+
+class _Response:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+def _receipt(status, block=100, gas_used=21000, gas_price=1_000_000):
+    return {"status": hex(status), "blockNumber": hex(block), "gasUsed": hex(gas_used),
+            "effectiveGasPrice": hex(gas_price)}
+
+
+@pytest.fixture
+def session():
+    return ReceiptSession()
+
+
+@pytest.fixture
+def tracker(session, tmp_path):
+    return PendingTransactionTracker(BatchRpcClient("http://rpc", session=session),
+                                     storage_file=str(tmp_path / "pending.json"), poll_interval=0.01)
+
+
+def test_pending_table_is_persisted_and_reloaded(tracker, tmp_path):
+    tracker.register(TX_A.upper().replace("0X", ""), "supplyToAave", {"asset": "USDC"})
+
+    stored = json.loads((tmp_path / "pending.json").read_text())
+    assert [(e["tx_hash"], e["status"], e["metadata"]) for e in stored] == [(TX_A, "pending", {"asset": "USDC"})]
+
+    reloaded = PendingTransactionTracker(tracker.rpc, storage_file=tracker.storage_file)
+    assert reloaded.get(TX_A)["action"] == "supplyToAave"
+    assert reloaded.counts()["pending"] == 1
+
+
+def test_one_batch_per_poll_finalizes_each_entry(tracker, session):
+    for tx_hash in (TX_A, TX_B, TX_C):
+        tracker.register(tx_hash, "depositERC20")
+    session.receipts = {TX_A: _receipt(1, block=7, gas_used=50_000, gas_price=3), TX_B: _receipt(0)}
+
+    assert tracker.poll_once() == 2
+
+    assert session.batches == [[TX_A, TX_B, TX_C]]
+    a, b, c = tracker.get(TX_A), tracker.get(TX_B), tracker.get(TX_C)
+    assert (a["status"], a["block_number"], a["gas_used"], a["effective_gas_price"]) == ("confirmed", 7, 50_000, 3)
+    assert b["status"] == "reverted"
+    assert c["status"] == "pending"
+
+    # Only the still-pending hash is polled next time
+    tracker.poll_once()
+    assert session.batches[-1] == [TX_C]
+
+
+def test_unmined_tx_is_dropped_after_timeout(tracker):
+    tracker.drop_after = 60
+    tracker.register(TX_A, "lifi_swap")
+    tracker._transactions[TX_A]["submitted_at_unix"] -= 61
+
+    assert tracker.poll_once() == 1
+    assert tracker.get(TX_A)["status"] == "dropped"
+
+
+def test_failed_poll_keeps_entries_pending(tracker, session):
+    tracker.register(TX_A, "supplyToAave")
+    session.fail = True
+
+    assert tracker.poll_once() == 0
+    assert tracker.get(TX_A)["status"] == "pending"
+
+
+def test_listeners_get_finalized_entries_and_failures_are_isolated(tracker, session):
+    seen = []
+
+    def broken(entry):
+        raise RuntimeError("listener bug")
+
+    tracker.add_listener(broken)
+    tracker.add_listener(seen.append)
+    tracker.register(TX_A, "supplyToAave")
+    session.receipts[TX_A] = _receipt(1)
+
+    tracker.poll_once()
+
+    assert [(e["tx_hash"], e["status"]) for e in seen] == [(TX_A, "confirmed")]
+    assert seen[0]["receipt"] == session.receipts[TX_A]
+
+
+def test_wait_for_polls_until_finalized(tracker, session):
+    tracker.register(TX_A, "supplyToAave")
+    threading.Timer(0.05, lambda: session.receipts.update({TX_A: _receipt(1)})).start()
+
+    entry = tracker.wait_for(TX_A, timeout=5)
+
+    assert entry["status"] == "confirmed"
+    assert len(session.batches) > 1
+
+
+def test_wait_for_times_out_and_handles_unknown_hashes(tracker):
+    tracker.register(TX_A, "supplyToAave")
+
+    started = time.time()
+    assert tracker.wait_for(TX_A, timeout=0.05) is None
+    assert time.time() - started < 1
+    assert tracker.wait_for(TX_B, timeout=1) is None
+
+
+def test_background_thread_finalizes_entries(tracker, session):
+    finalized = threading.Event()
+    tracker.add_listener(lambda entry: finalized.set())
+    tracker.register(TX_A, "supplyToAave")
+    session.receipts[TX_A] = _receipt(1)
+
+    tracker.start()
+    try:
+        assert finalized.wait(2)
+    finally:
+        tracker.stop()
+    assert tracker.counts() == {"pending": 0, "confirmed": 1, "reverted": 0, "dropped": 0}
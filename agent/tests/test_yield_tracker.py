@@ -0,0 +1,44 @@
+import pytest
+
+from yield_tracker import YieldTracker
+
+RAY = 10 ** 27
+T0 = 1_700_000_000.0
+
+
+def test_realized_yield_and_earnings(tmp_path):
+    tracker = YieldTracker(str(tmp_path / "samples.jsonl"))
+    tracker.record("USDC", RAY, 1000.0, timestamp=T0)
+    tracker.record("USDC", RAY * 1001 // 1000, 1000.0, timestamp=T0 + 86400)
+    tracker.record("USDC", RAY * 1001 // 1000 - 1, 1000.0, timestamp=T0 + 90000)  # index went down: ignored
+
+    result = tracker.realized("USDC")
+
+    assert result["samples"] == 2
+    assert result["index_growth_pct"] == pytest.approx(0.1)
+    assert result["earnings"] == pytest.approx(1.0)
+
+
+def test_samples_are_appended_and_reloaded(tmp_path):
+    path = tmp_path / "samples.jsonl"
+    tracker = YieldTracker(str(path))
+    for day in range(3):
+        tracker.record("USDC", RAY + day * 10 ** 23, 500.0, timestamp=T0 + day * 86400)
+        tracker.record("DAI", RAY + day * 10 ** 23, None, timestamp=T0 + day * 86400)
+
+    assert len(path.read_text().splitlines()) == 6
+    reloaded = YieldTracker(str(path))
+    assert reloaded.realized("USDC") == tracker.realized("USDC")
+    assert reloaded.realized("DAI")["earnings"] == 0.0
+
+
+def test_file_is_compacted_to_retained_samples(tmp_path):
+    path = tmp_path / "samples.jsonl"
+    tracker = YieldTracker(str(path), max_samples=5)
+    for i in range(23):
+        tracker.record("USDC", RAY + i, 1.0, timestamp=i + 1)
+
+    assert len(path.read_text().splitlines()) <= 10
+    reloaded = YieldTracker(str(path), max_samples=5)
+    assert reloaded.realized("USDC") == tracker.realized("USDC")
+    assert reloaded.realized("USDC")["samples"] == 5
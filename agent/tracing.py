@@ -0,0 +1,345 @@
+"""
+Lightweight tracing for the agent's decision pipeline.
+
+Spans nest through a contextvar, so every timed stage (see metrics.timed)
+and every HTTP request made inside one (RPC, DefiLlama, CoinGecko, LI.FI,
+OpenAI) becomes part of a single trace per analysis. Span attributes carry
+the details of that call (asset, block number, bytes downloaded, token
+counts, tx hash, ...).
+
+Finished traces are handed to a background exporter thread:
+- file: one JSON object per span, appended to TRACE_FILE (JSON lines, not
+  rotated; meant for short local sessions)
+- otlp: OTLP/HTTP JSON to OTEL_EXPORTER_OTLP_ENDPOINT (/v1/traces), which
+  any OpenTelemetry collector, Jaeger or Tempo accepts
+
+Tracing is off unless an exporter is configured. HTTP spans record the host
+and the path below the configured dependency URL only, never the full URL:
+RPC endpoints commonly carry their API key in the path.
+
+Requests made outside any span (background pollers) are not traced.
+"""
+
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Optional[Dict[str, Any]] = None,
+                 start_ns: Optional[int] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_error(self, error: Any):
+        self.error = f"{type(error).__name__}: {error}" if isinstance(error, BaseException) else str(error)
+
+    def to_dict(self) -> Dict[str, Any]:
+        end_ns = self.end_ns or time.time_ns()
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time": datetime.fromtimestamp(self.start_ns / 1e9, timezone.utc).isoformat(),
+            "start_unix_nano": self.start_ns,
+            "duration_ms": (end_ns - self.start_ns) / 1e6,
+            "attributes": self.attributes,
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+        }
+
+
+class _NoopSpan(Span):
+    """Returned by current_span() outside any trace; attributes are dropped."""
+
+    def __init__(self):
+        super().__init__("noop", "0" * 32, None)
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+_NOOP = _NoopSpan()
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class FileExporter:
+    """Appends spans as JSON lines."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Span]):
+        with open(self.path, "a") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+class OtlpHttpExporter:
+    """Sends spans to an OTLP/HTTP collector using the JSON encoding."""
+
+    def __init__(self, endpoint: str, service_name: str, headers: Optional[Dict[str, str]] = None, timeout: float = 5.0):
+        """
+        Args:
+            endpoint: Collector base URL (e.g. http://localhost:4318); /v1/traces is appended
+            service_name: service.name resource attribute
+            headers: Extra request headers (e.g. auth)
+            timeout: HTTP timeout in seconds
+        """
+        endpoint = endpoint.rstrip("/")
+        self.url = endpoint if endpoint.endswith("/v1/traces") else f"{endpoint}/v1/traces"
+        self.service_name = service_name
+        self.timeout = timeout
+        # Own session: the agent's session is instrumented and would trace the export itself
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json", **(headers or {})})
+
+    def export(self, spans: List[Span]):
+        payload = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": "onlyyield.agent"},
+                "spans": [{
+                    "traceId": span.trace_id,
+                    "spanId": span.span_id,
+                    **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                    "name": span.name,
+                    "kind": 1,  # SPAN_KIND_INTERNAL
+                    "startTimeUnixNano": str(span.start_ns),
+                    "endTimeUnixNano": str(span.end_ns or span.start_ns),
+                    "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()],
+                    "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+                } for span in spans],
+            }],
+        }]}
+        response = self.session.post(self.url, data=json.dumps(payload, default=str), timeout=self.timeout)
+        response.raise_for_status()
+
+
+class Tracer:
+    """
+    Creates spans and exports each finished trace in the background.
+    """
+
+    def __init__(self, exporters: Optional[List[Any]] = None, max_queue: int = 1000):
+        """
+        Args:
+            exporters: Objects with export(spans); no exporters disables tracing
+            max_queue: Finished traces buffered for export before new ones are dropped
+        """
+        self.exporters = exporters or []
+        self._queue: "queue.Queue[List[Span]]" = queue.Queue(maxsize=max_queue)
+        self._open: Dict[str, List[Span]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """
+        Tracer configured by TRACE_EXPORTERS (comma-separated: file, otlp; default "otlp"
+        when OTEL_EXPORTER_OTLP_ENDPOINT is set, else "none"), TRACE_FILE,
+        OTEL_EXPORTER_OTLP_ENDPOINT and OTEL_SERVICE_NAME.
+        """
+        otlp_endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "").strip()
+        default = "otlp" if otlp_endpoint else "none"
+        names = [n.strip().lower() for n in os.getenv("TRACE_EXPORTERS", default).split(",") if n.strip()]
+        exporters = []
+        if "file" in names:
+            exporters.append(FileExporter(os.getenv("TRACE_FILE", "traces.jsonl")))
+        if "otlp" in names:
+            if otlp_endpoint:
+                exporters.append(OtlpHttpExporter(otlp_endpoint, os.getenv("OTEL_SERVICE_NAME", "onlyyield-agent")))
+            else:
+                logger.warning("TRACE_EXPORTERS includes otlp but OTEL_EXPORTER_OTLP_ENDPOINT is not set")
+        return cls(exporters)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    @contextmanager
+    def start_span(self, name: str, **attributes) -> Iterator[Span]:
+        """
+        Open a span as a child of the current one (or as the root of a new trace).
+
+        Exceptions are recorded on the span and re-raised.
+        """
+        if not self.enabled:
+            yield _NOOP
+            return
+        parent = _current.get()
+        span = Span(name, parent.trace_id if parent else secrets.token_hex(16), parent.span_id if parent else None,
+                    attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current.reset(token)
+            self._finish(span, root=parent is None)
+
+    def record_span(self, name: str, start_ns: int, end_ns: int, attributes: Optional[Dict[str, Any]] = None,
+                    error: Optional[str] = None) -> Optional[Span]:
+        """Add an already-finished child span (e.g. from an HTTP response hook); ignored outside a trace."""
+        parent = _current.get()
+        if not self.enabled or parent is None:
+            return None
+        span = Span(name, parent.trace_id, parent.span_id, attributes, start_ns=start_ns)
+        if error:
+            span.record_error(error)
+        self._finish(span, root=False, end_ns=end_ns)
+        return span
+
+    def _finish(self, span: Span, root: bool, end_ns: Optional[int] = None):
+        span.end_ns = end_ns or time.time_ns()
+        with self._lock:
+            spans = self._open.setdefault(span.trace_id, [])
+            spans.append(span)
+            if not root:
+                return
+            spans = self._open.pop(span.trace_id)
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            logger.warning("Trace export queue full; dropping trace %s", span.trace_id)
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            spans = self._queue.get()
+            for exporter in self.exporters:
+                try:
+                    exporter.export(spans)
+                except Exception as e:
+                    logger.warning("Trace export via %s failed: %s", type(exporter).__name__, e)
+            self._queue.task_done()
+
+    def flush(self, timeout: float = 5.0):
+        """Wait (up to timeout) for queued traces to be exported."""
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.01)
+
+
+TRACER = Tracer.from_env()
+
+
+def current_span() -> Span:
+    """The active span, or a no-op span outside any trace."""
+    return _current.get() or _NOOP
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current.get()
+    return span.trace_id if span else None
+
+
+def start_span(name: str, **attributes):
+    """Open a span on the default tracer."""
+    return TRACER.start_span(name, **attributes)
+
+
+def install_session_hooks(session: requests.Session, dependencies: Dict[str, str]) -> None:
+    """
+    Record a span for every response of a requests session made inside a trace.
+
+    Args:
+        session: Shared session
+        dependencies: URL prefix -> dependency label (span name is "<label> <METHOD>")
+
+    Only the host and, for known dependencies, the path below the prefix are
+    recorded; the prefix itself (e.g. an RPC URL with a key in it) and query
+    strings never reach the exporters.
+    """
+    prefixes = sorted(((p.rstrip("/"), name) for p, name in dependencies.items() if p), key=lambda x: -len(x[0]))
+
+    def hook(response: requests.Response, *args, **kwargs):
+        if _current.get() is None:
+            return response
+        try:
+            request = response.request
+            url = response.url or (request.url if request is not None else "")
+            host = requests.utils.urlparse(url).hostname
+            match = next(((prefix, name) for prefix, name in prefixes if url.startswith(prefix)), None)
+            dependency = match[1] if match else host or "http"
+            end_ns = time.time_ns()
+            elapsed = getattr(response, "elapsed", None)
+            start_ns = end_ns - int(elapsed.total_seconds() * 1e9) if elapsed is not None else end_ns
+            attributes = {
+                "http.method": request.method if request is not None else None,
+                "http.host": host,
+                "http.route": (url[len(match[0]):].split("?")[0] or "/") if match else None,
+                "http.status_code": response.status_code,
+            }
+            if not kwargs.get("stream"):
+                attributes["http.response_bytes"] = len(response.content or b"")
+            body = request.body if request is not None else None
+            if body:
+                attributes["http.request_bytes"] = len(body)
+                try:
+                    payload = json.loads(body)
+                    items = payload if isinstance(payload, list) else [payload]
+                    methods = [i.get("method") for i in items if isinstance(i, dict) and "jsonrpc" in i]
+                    if methods:
+                        attributes["rpc.methods"] = methods
+                        attributes["rpc.batch_size"] = len(methods)
+                except (ValueError, TypeError, UnicodeDecodeError):
+                    pass
+            TRACER.record_span(
+                f"{dependency} {attributes['http.method']}", start_ns, end_ns,
+                {k: v for k, v in attributes.items() if v is not None},
+                error=f"HTTP {response.status_code}" if response.status_code >= 400 else None,
+            )
+        except Exception as e:
+            logger.debug("Tracing hook failed: %s", e)
+        return response
+
+    session.hooks["response"].append(hook)
@@ -0,0 +1,245 @@
+"""
+Pending transaction tracker for the yield agent.
+
+Submitted transactions are recorded in a pending-tx table instead of blocking
+the analysis on wait_for_transaction_receipt. A background thread polls all
+pending hashes with one batched eth_getTransactionReceipt request per tick and
+moves each entry to confirmed / reverted (or dropped after a timeout).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from metrics import timed
+from rpc_batch import BatchRpcClient, RpcBatchError
+
+logger = logging.getLogger(__name__)
+
+
+class PendingTransactionTracker:
+    """
+    Tracks broadcast transactions until their receipts are available.
+
+    The table is persisted to a JSON file (like apy_history.json) so pending
+    entries survive restarts and can be reconciled afterwards.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_CONFIRMED = "confirmed"
+    STATUS_REVERTED = "reverted"
+    STATUS_DROPPED = "dropped"
+
+    # Finalized entries kept in the table (pending ones are never trimmed)
+    MAX_FINALIZED = 1000
+
+    def __init__(
+        self,
+        rpc: BatchRpcClient,
+        storage_file: str = "pending_transactions.json",
+        poll_interval: float = 2.0,
+        drop_after: float = 900.0,
+    ):
+        """
+        Args:
+            rpc: Batched JSON-RPC client used for receipt polling
+            storage_file: JSON file backing the pending-tx table
+            poll_interval: Seconds between receipt polls (Base produces a block every 2s)
+            drop_after: Seconds without a receipt before a tx is marked dropped
+        """
+        self.rpc = rpc
+        self.storage_file = storage_file
+        self.poll_interval = poll_interval
+        self.drop_after = drop_after
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._transactions: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Load the pending-tx table from disk."""
+        try:
+            if os.path.exists(self.storage_file):
+                with open(self.storage_file, "r") as f:
+                    return {entry["tx_hash"]: entry for entry in json.load(f)}
+        except Exception as e:
+            logger.warning("Could not load pending transactions: %s", e)
+        return {}
+
+    def _save(self):
+        """Persist the table (caller must hold the lock)."""
+        try:
+            with open(self.storage_file, "w") as f:
+                json.dump(list(self._transactions.values()), f, indent=2)
+        except Exception as e:
+            logger.error("Could not save pending transactions: %s", e)
+
+    def _trim(self):
+        """Drop the oldest finalized entries beyond MAX_FINALIZED (caller must hold the lock)."""
+        finalized = [e for e in self._transactions.values() if e["status"] != self.STATUS_PENDING]
+        if len(finalized) <= self.MAX_FINALIZED:
+            return
+        finalized.sort(key=lambda e: e["submitted_at_unix"])
+        for entry in finalized[:len(finalized) - self.MAX_FINALIZED]:
+            del self._transactions[entry["tx_hash"]]
+
+    @staticmethod
+    def _normalize(tx_hash: str) -> str:
+        tx_hash = tx_hash.lower()
+        return tx_hash if tx_hash.startswith("0x") else f"0x{tx_hash}"
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]):
+        """Register a callback invoked with the entry whenever a tx is finalized."""
+        self._listeners.append(callback)
+
+    def register(self, tx_hash: str, action: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Record a broadcast transaction as pending.
+
+        Args:
+            tx_hash: 0x-prefixed transaction hash
+            action: Action type (e.g. "supplyToAave", "depositERC20", "lifi_swap")
+            metadata: Extra context stored with the entry (asset, amount, ...)
+
+        Returns:
+            The new table entry
+        """
+        tx_hash = self._normalize(tx_hash)
+        entry = {
+            "tx_hash": tx_hash,
+            "action": action,
+            "metadata": metadata or {},
+            "status": self.STATUS_PENDING,
+            "submitted_at": datetime.now().isoformat(),
+            "submitted_at_unix": time.time(),
+            "finalized_at": None,
+            "block_number": None,
+            "gas_used": None,
+            "effective_gas_price": None,
+        }
+        with self._lock:
+            self._transactions[tx_hash] = entry
+            self._save()
+        logger.info("Tracking pending tx %s (%s)", tx_hash, action)
+        return dict(entry)
+
+    def get(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        """Get a single entry by hash."""
+        with self._lock:
+            entry = self._transactions.get(self._normalize(tx_hash))
+            return dict(entry) if entry else None
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """List entries, newest first, optionally filtered by status."""
+        with self._lock:
+            entries = [dict(e) for e in self._transactions.values() if status is None or e["status"] == status]
+        entries.sort(key=lambda e: e["submitted_at_unix"], reverse=True)
+        return entries[:limit]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of entries per status."""
+        counts = {s: 0 for s in (self.STATUS_PENDING, self.STATUS_CONFIRMED, self.STATUS_REVERTED, self.STATUS_DROPPED)}
+        with self._lock:
+            for entry in self._transactions.values():
+                counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return counts
+
+    def poll_once(self) -> int:
+        """
+        Fetch receipts for every pending transaction in one batch request.
+
+        Returns:
+            Number of transactions finalized in this poll
+        """
+        with self._lock:
+            pending = [h for h, e in self._transactions.items() if e["status"] == self.STATUS_PENDING]
+        if not pending:
+            return 0
+
+        try:
+            receipts = self.rpc.get_receipts(pending)
+        except RpcBatchError as e:
+            logger.warning("Receipt poll failed: %s", e)
+            return 0
+
+        finalized = []
+        now = time.time()
+        with self._lock:
+            for tx_hash in pending:
+                entry = self._transactions.get(tx_hash)
+                if entry is None or entry["status"] != self.STATUS_PENDING:
+                    continue
+                receipt = receipts.get(tx_hash)
+                if receipt is None:
+                    if now - entry["submitted_at_unix"] > self.drop_after:
+                        entry["status"] = self.STATUS_DROPPED
+                        entry["finalized_at"] = datetime.now().isoformat()
+                        finalized.append(dict(entry))
+                    continue
+                entry["status"] = self.STATUS_CONFIRMED if int(receipt.get("status", "0x0"), 16) == 1 else self.STATUS_REVERTED
+                entry["finalized_at"] = datetime.now().isoformat()
+                entry["block_number"] = int(receipt["blockNumber"], 16) if receipt.get("blockNumber") else None
+                entry["gas_used"] = int(receipt["gasUsed"], 16) if receipt.get("gasUsed") else None
+                if receipt.get("effectiveGasPrice"):
+                    entry["effective_gas_price"] = int(receipt["effectiveGasPrice"], 16)
+                finalized.append(dict(entry, receipt=receipt))
+            if finalized:
+                self._trim()
+                self._save()
+
+        for entry in finalized:
+            logger.info("Tx %s (%s) %s", entry['tx_hash'], entry['action'], entry['status'])
+            for callback in self._listeners:
+                try:
+                    callback(entry)
+                except Exception as e:
+                    logger.error("Tx tracker listener failed: %s", e, exc_info=True)
+        return len(finalized)
+
+    @timed("receipt_wait")
+    def wait_for(self, tx_hash: str, timeout: float = 120.0) -> Optional[Dict[str, Any]]:
+        """
+        Block until a tracked transaction is finalized (for callers that must sequence on it).
+
+        Returns:
+            The finalized entry, or None on timeout
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            entry = self.get(tx_hash)
+            if entry is None or entry["status"] != self.STATUS_PENDING:
+                return entry
+            if self._thread is None or not self._thread.is_alive():
+                self.poll_once()
+            time.sleep(self.poll_interval)
+        return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error("Tx tracker poll error: %s", e, exc_info=True)
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Start the background polling thread (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="tx-tracker", daemon=True)
+        self._thread.start()
+        logger.info("Pending transaction tracker started (poll every %ss)", self.poll_interval)
+
+    def stop(self):
+        """Stop the background polling thread."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval + 1)
+            self._thread = None
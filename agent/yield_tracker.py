@@ -0,0 +1,188 @@
+"""
+Realized-yield tracker from Aave liquidityIndex deltas.
+
+Each market snapshot records the reserve's liquidityIndex (field 1 of
+getReserveData) and, where known, the vault's aToken balance. The index only
+grows with accrued supply interest, so the ratio of two samples is the exact
+realized growth between them, independent of deposits and withdrawals.
+Earnings are accumulated into prefix sums as samples arrive, so any window is
+answered with two bisects instead of a scan over history.
+
+Samples are persisted as an append-only JSON Lines file (one line per sample);
+the file is compacted to the retained samples once it holds twice as many
+lines, so a snapshot costs one short append rather than a full rewrite.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+
+class YieldTracker:
+    """
+    Per-asset liquidityIndex / balance samples with cumulative earnings.
+    """
+
+    DEFAULT_WINDOWS = {"24h": 24 * 3600, "7d": 7 * 24 * 3600, "30d": 30 * 24 * 3600}
+
+    def __init__(self, storage_file: str = "yield_samples.jsonl", max_samples: int = 20_000):
+        """
+        Args:
+            storage_file: JSON Lines file persisting samples across restarts
+            max_samples: Samples kept per asset (oldest are dropped)
+        """
+        self.storage_file = storage_file
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        # asset -> parallel lists: ts, index, balance, cumulative earnings up to each sample
+        self._series: Dict[str, Dict[str, List[Any]]] = {}
+        # Lines in storage_file, including samples since dropped from memory
+        self._lines = 0
+        self._load()
+
+    def _append(self, asset: str, timestamp: float, liquidity_index: int, balance: Optional[float],
+                earnings: float):
+        """Add a sample to the in-memory series (caller must hold the lock)."""
+        series = self._series.setdefault(asset, {"ts": [], "index": [], "balance": [], "earnings": []})
+        series["ts"].append(timestamp)
+        series["index"].append(liquidity_index)
+        series["balance"].append(balance)
+        series["earnings"].append(earnings)
+        if len(series["ts"]) > self.max_samples:
+            for key in series:
+                del series[key][:len(series[key]) - self.max_samples]
+
+    @staticmethod
+    def _line(asset: str, timestamp: float, liquidity_index: int, balance: Optional[float], earnings: float) -> str:
+        # liquidityIndex is a RAY-scaled uint; store as string to keep precision in JSON tools
+        return json.dumps({"asset": asset, "ts": timestamp, "index": str(liquidity_index),
+                           "balance": balance, "earnings": earnings}) + "\n"
+
+    def _load(self):
+        """Load persisted samples from disk."""
+        try:
+            if os.path.exists(self.storage_file):
+                with open(self.storage_file, "r") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue  # torn final line from an interrupted append
+                        self._append(entry["asset"], float(entry["ts"]), int(entry["index"]),
+                                     entry.get("balance"), float(entry["earnings"]))
+                        self._lines += 1
+        except Exception as e:
+            logger.warning("Could not load yield samples: %s", e)
+
+    def _persist(self, line: str):
+        """Append one sample, compacting the file when it holds twice the retained samples (caller must hold the lock)."""
+        try:
+            retained = sum(len(series["ts"]) for series in self._series.values())
+            if self._lines + 1 > 2 * retained:
+                tmp = f"{self.storage_file}.tmp"
+                with open(tmp, "w") as f:
+                    for asset, series in self._series.items():
+                        for row in zip(series["ts"], series["index"], series["balance"], series["earnings"]):
+                            f.write(self._line(asset, *row))
+                os.replace(tmp, self.storage_file)
+                self._lines = retained
+            else:
+                with open(self.storage_file, "a") as f:
+                    f.write(line)
+                self._lines += 1
+        except Exception as e:
+            logger.error("Could not save yield samples: %s", e)
+
+    def record(self, asset: str, liquidity_index: int, balance: Optional[float] = None,
+               timestamp: Optional[float] = None):
+        """
+        Record one snapshot for an asset.
+
+        Args:
+            asset: Asset symbol
+            liquidity_index: Reserve liquidityIndex (RAY)
+            balance: Our aToken balance in token units, if known
+            timestamp: Unix time of the snapshot (defaults to now)
+        """
+        timestamp = timestamp or time.time()
+        with self._lock:
+            series = self._series.get(asset)
+            earned = 0.0
+            if series and series["ts"]:
+                if timestamp <= series["ts"][-1] or liquidity_index < series["index"][-1]:
+                    return  # out of order or reorged snapshot
+                prev_balance = series["balance"][-1]
+                if prev_balance:
+                    # Interest on the balance held through the interval
+                    earned = prev_balance * (liquidity_index / series["index"][-1] - 1)
+            earnings = (series["earnings"][-1] if series else 0.0) + earned
+            self._append(asset, timestamp, int(liquidity_index), balance, earnings)
+            self._persist(self._line(asset, timestamp, int(liquidity_index), balance, earnings))
+
+    def realized(self, asset: str, window_seconds: Optional[float] = None,
+                 start: Optional[float] = None, end: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Realized yield for an asset over a window.
+
+        Args:
+            asset: Asset symbol
+            window_seconds: Window ending at `end` (ignored if start is given)
+            start: Window start (unix time); snaps to the first sample at or after it
+            end: Window end (unix time, defaults to latest sample); snaps to the last sample at or before it
+
+        Returns:
+            Dict with the covered span, index growth, annualized realized APY (%)
+            and earnings in token units, or None with fewer than two samples in range
+        """
+        with self._lock:
+            series = self._series.get(asset)
+            if not series or len(series["ts"]) < 2:
+                return None
+            ts = series["ts"]
+            end = ts[-1] if end is None else end
+            if start is None:
+                start = end - window_seconds if window_seconds is not None else ts[0]
+            i = bisect.bisect_left(ts, start)
+            j = bisect.bisect_right(ts, end) - 1
+            if j <= i:
+                return None
+            growth = series["index"][j] / series["index"][i] - 1
+            span = ts[j] - ts[i]
+            earnings = series["earnings"][j] - series["earnings"][i]
+            return {
+                "asset": asset,
+                "from": ts[i],
+                "to": ts[j],
+                "span_hours": span / 3600,
+                "samples": j - i + 1,
+                "index_growth_pct": growth * 100,
+                "realized_apy": ((1 + growth) ** (SECONDS_PER_YEAR / span) - 1) * 100 if span > 0 else 0.0,
+                "earnings": earnings,
+                "balance": series["balance"][j],
+            }
+
+    def summary(self, windows: Optional[Dict[str, float]] = None) -> Dict[str, Dict[str, Any]]:
+        """Realized yield per asset for each named window (windows with too little data are omitted)."""
+        windows = windows or self.DEFAULT_WINDOWS
+        with self._lock:
+            assets = list(self._series)
+        out: Dict[str, Dict[str, Any]] = {}
+        for asset in assets:
+            per_window = {}
+            for name, seconds in windows.items():
+                result = self.realized(asset, window_seconds=seconds)
+                if result:
+                    per_window[name] = result
+            if per_window:
+                out[asset] = per_window
+        return out
@@ -5,14 +5,17 @@ import {IERC20} from "@openzeppelin/contracts/token/ERC20/IERC20.sol";
 import {SafeERC20} from "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol";
 import {AccessControl} from "@openzeppelin/contracts/access/AccessControl.sol";
 import {ReentrancyGuard} from "@openzeppelin/contracts/utils/ReentrancyGuard.sol";
+import {Multicall} from "@openzeppelin/contracts/utils/Multicall.sol";
+import {YieldVault} from "./YieldVault.sol";
 import {IYieldStrategy} from "../interfaces/IYieldStrategy.sol";
 import {IUniswapV3Router} from "../interfaces/IUniswapV3Router.sol";
 import {IStrategyPermit} from "../interfaces/IStrategyPermit.sol";
 
 /// @title YieldOrchestrator
 /// @notice Orchestrates all operator operations across yield strategies and vaults
-/// @dev Central control point for AI agent to manage allocations and harvesting
-contract YieldOrchestrator is AccessControl, ReentrancyGuard {
+/// @dev Central control point for AI agent to manage allocations and harvesting.
+///      Operator calls can be batched into one transaction with multicall().
+contract YieldOrchestrator is AccessControl, ReentrancyGuard, Multicall {
     using SafeERC20 for IERC20;
 
     bytes32 public constant OPERATOR_ROLE = keccak256("OPERATOR_ROLE");
@@ -57,6 +60,7 @@ contract YieldOrchestrator is AccessControl, ReentrancyGuard {
         uint256 amountSwapped
     );
     event YieldHarvested(address strategy, uint256 profit, uint256 loss);
+    event VaultSuppliedToAave(address indexed vault, uint256 amount);
 
     /// @notice Constructor
     /// @param _admin Admin address
@@ -159,6 +163,20 @@ contract YieldOrchestrator is AccessControl, ReentrancyGuard {
         emit Deposited(from, inputAsset, targetAsset, amountIn, sharesOut, receiver);
     }
 
+    /// @notice Push a vault's idle underlying into Aave
+    /// @dev Lets a multicall batch deposits and the supply in one transaction.
+    ///      Requires this contract to hold OPERATOR_ROLE on the vault.
+    /// @param vault YieldVault address
+    /// @param amount Amount to supply, or type(uint256).max for all idle underlying
+    function supplyVaultToAave(address vault, uint256 amount) external onlyRole(OPERATOR_ROLE) {
+        require(vault != address(0), "vault=0");
+        if (amount == type(uint256).max) {
+            amount = YieldVault(vault).idleUnderlying();
+        }
+        YieldVault(vault).supplyToAave(amount);
+        emit VaultSuppliedToAave(vault, amount);
+    }
+
     /// @notice Withdraw from a strategy on behalf of a user to a desired asset (optional swap), transfer to receiver
     /// @param owner The owner of the strategy shares (must have approved this contract to burn shares)
     /// @param strategyAsset The asset handled by the source strategy
@@ -0,0 +1,139 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.24;
+
+import {Test} from "forge-std/Test.sol";
+import {IERC20} from "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+import {IAccessControl} from "@openzeppelin/contracts/access/IAccessControl.sol";
+import {Pausable} from "@openzeppelin/contracts/utils/Pausable.sol";
+import {YieldOrchestrator} from "../src/core/YieldOrchestrator.sol";
+import {YieldStrategy} from "../src/core/YieldStrategy.sol";
+import {YieldVault} from "../src/core/YieldVault.sol";
+import {IAaveV3Pool} from "../src/interfaces/IAaveV3Pool.sol";
+import {MockAavePool} from "./mocks/MockAavePool.sol";
+import {MockERC20} from "./mocks/MockERC20.sol";
+
+/// @title YieldOrchestratorMulticallTest
+/// @notice depositERC20 + supplyVaultToAave batched in one multicall, as the agent's batch deposit path sends it
+contract YieldOrchestratorMulticallTest is Test {
+    event VaultSuppliedToAave(address indexed vault, uint256 amount);
+
+    address internal operator = makeAddr("operator");
+    address internal treasury = makeAddr("treasury");
+    address internal feeTreasury = makeAddr("feeTreasury");
+
+    MockERC20 internal usdc;
+    MockERC20 internal dai;
+    MockAavePool internal pool;
+    YieldOrchestrator internal orchestrator;
+    YieldVault internal usdcVault;
+    YieldVault internal daiVault;
+
+    function setUp() public {
+        usdc = new MockERC20("USD Coin", "USDC", 6);
+        dai = new MockERC20("Dai Stablecoin", "DAI", 18);
+        pool = new MockAavePool();
+        orchestrator = new YieldOrchestrator(address(this), operator, makeAddr("router"), 3000);
+        usdcVault = _deployAsset(usdc);
+        daiVault = _deployAsset(dai);
+
+        usdc.mint(treasury, 1_000e6);
+        dai.mint(treasury, 1_000e18);
+        vm.startPrank(treasury);
+        usdc.approve(address(orchestrator), type(uint256).max);
+        dai.approve(address(orchestrator), type(uint256).max);
+        vm.stopPrank();
+
+        // 200 USDC already idle in the vault
+        usdc.mint(address(this), 200e6);
+        usdc.approve(address(usdcVault), 200e6);
+        usdcVault.deposit(200e6, address(this));
+    }
+
+    function _deployAsset(MockERC20 token) internal returns (YieldVault vault) {
+        address aToken = pool.initReserve(address(token));
+        vault = new YieldVault(
+            IERC20(address(token)), IERC20(aToken), feeTreasury, 0, IAaveV3Pool(address(pool)), address(this)
+        );
+        YieldStrategy strategy = new YieldStrategy(
+            address(token), string.concat("Strategy ", token.symbol()), string.concat("s", token.symbol()),
+            address(vault), address(this)
+        );
+        orchestrator.setStrategy(address(token), address(strategy));
+        // supplyVaultToAave calls the vault as the orchestrator
+        vault.addOperator(address(orchestrator));
+    }
+
+    function _depositAndSupply(MockERC20 token, uint256 depositAmount, YieldVault vault, uint256 supplyAmount)
+        internal
+        view
+        returns (bytes[] memory calls)
+    {
+        calls = new bytes[](2);
+        calls[0] = abi.encodeCall(
+            YieldOrchestrator.depositERC20,
+            (treasury, address(token), depositAmount, address(token), depositAmount, treasury)
+        );
+        calls[1] = abi.encodeCall(YieldOrchestrator.supplyVaultToAave, (address(vault), supplyAmount));
+    }
+
+    function test_multicallDepositsThenSuppliesPlannedAmount() public {
+        vm.expectEmit(true, false, false, true, address(orchestrator));
+        emit VaultSuppliedToAave(address(usdcVault), 10e6);
+
+        vm.prank(operator);
+        orchestrator.multicall(_depositAndSupply(usdc, 500e6, usdcVault, 10e6));
+
+        assertEq(usdc.balanceOf(treasury), 500e6);
+        assertEq(IERC20(orchestrator.strategyOf(address(usdc))).balanceOf(treasury), 500e6);
+        assertEq(usdcVault.aTokenBalance(), 10e6);
+        assertEq(usdcVault.idleUnderlying(), 200e6 + 500e6 - 10e6);
+    }
+
+    function test_maxSentinelSuppliesAllIdleIncludingBatchDeposits() public {
+        vm.expectEmit(true, false, false, true, address(orchestrator));
+        emit VaultSuppliedToAave(address(usdcVault), 700e6);
+
+        vm.prank(operator);
+        orchestrator.multicall(_depositAndSupply(usdc, 500e6, usdcVault, type(uint256).max));
+
+        assertEq(usdcVault.aTokenBalance(), 700e6);
+        assertEq(usdcVault.idleUnderlying(), 0);
+        assertEq(usdcVault.totalAssets(), 700e6);
+    }
+
+    function test_supplyRequiresOperatorRoleOnVault() public {
+        usdcVault.removeOperator(address(orchestrator));
+        bytes32 role = usdcVault.OPERATOR_ROLE();
+
+        vm.expectRevert(
+            abi.encodeWithSelector(IAccessControl.AccessControlUnauthorizedAccount.selector, address(orchestrator), role)
+        );
+        vm.prank(operator);
+        orchestrator.supplyVaultToAave(address(usdcVault), 10e6);
+    }
+
+    function test_supplyRequiresOperatorRoleOnOrchestrator() public {
+        address stranger = makeAddr("stranger");
+        bytes32 role = orchestrator.OPERATOR_ROLE();
+        bytes[] memory calls = _depositAndSupply(usdc, 500e6, usdcVault, 10e6);
+
+        vm.expectRevert(abi.encodeWithSelector(IAccessControl.AccessControlUnauthorizedAccount.selector, stranger, role));
+        vm.prank(stranger);
+        orchestrator.multicall(calls);
+    }
+
+    function test_pausedVaultRevertsWholeBatch() public {
+        usdcVault.pause();
+        // The deposit leg goes to the (unpaused) DAI vault; only the supply leg hits the paused one
+        bytes[] memory calls = _depositAndSupply(dai, 100e18, usdcVault, 10e6);
+
+        vm.expectRevert(Pausable.EnforcedPause.selector);
+        vm.prank(operator);
+        orchestrator.multicall(calls);
+
+        assertEq(dai.balanceOf(treasury), 1_000e18);
+        assertEq(daiVault.totalAssets(), 0);
+        assertEq(usdcVault.aTokenBalance(), 0);
+        assertEq(usdcVault.idleUnderlying(), 200e6);
+    }
+}
@@ -0,0 +1,51 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.24;
+
+import {IERC20} from "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+import {IERC20Metadata} from "@openzeppelin/contracts/token/ERC20/extensions/IERC20Metadata.sol";
+import {SafeERC20} from "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol";
+import {IAaveV3Pool} from "../../src/interfaces/IAaveV3Pool.sol";
+import {MockERC20} from "./MockERC20.sol";
+
+/// @title MockAavePool
+/// @notice Minimal Aave V3 pool: supply/withdraw 1:1 against a per-asset aToken, no interest
+contract MockAavePool is IAaveV3Pool {
+    using SafeERC20 for IERC20;
+
+    mapping(address => address) public aTokenOf;
+
+    event ReserveInitialized(address indexed asset, address indexed aToken);
+
+    /// @notice Create the aToken for an asset (idempotent)
+    /// @param asset Underlying asset
+    /// @return aToken aToken address
+    function initReserve(address asset) external returns (address aToken) {
+        aToken = aTokenOf[asset];
+        if (aToken == address(0)) {
+            string memory symbol = IERC20Metadata(asset).symbol();
+            aToken = address(
+                new MockERC20(string.concat("Aave ", symbol), string.concat("a", symbol), IERC20Metadata(asset).decimals())
+            );
+            aTokenOf[asset] = aToken;
+            emit ReserveInitialized(asset, aToken);
+        }
+    }
+
+    function supply(address asset, uint256 amount, address onBehalfOf, uint16) external override {
+        address aToken = aTokenOf[asset];
+        require(aToken != address(0), "reserve not initialized");
+        IERC20(asset).safeTransferFrom(msg.sender, address(this), amount);
+        MockERC20(aToken).mint(onBehalfOf, amount);
+    }
+
+    function withdraw(address asset, uint256 amount, address to) external override returns (uint256) {
+        address aToken = aTokenOf[asset];
+        require(aToken != address(0), "reserve not initialized");
+        if (amount == type(uint256).max) {
+            amount = IERC20(aToken).balanceOf(msg.sender);
+        }
+        MockERC20(aToken).burn(msg.sender, amount);
+        IERC20(asset).safeTransfer(to, amount);
+        return amount;
+    }
+}